@@ -1,36 +1,44 @@
 # Helpers/OCRtoElastic.py
 
 import os
-import json
 from typing import Dict, List
-import pdfplumber
 from datetime import datetime
 from Helpers import Funciones
+from Helpers.trazas import tramo
 
 
 class OCRtoElastic:
     """
-    Extrae texto de PDFs (si tienen texto embebido), genera JSON
-    y luego envía esos JSON a ElasticSearch.
+    Extrae texto de PDFs (si tienen texto embebido), genera un corpus
+    JSON Lines y luego envía esos documentos a ElasticSearch.
     """
 
-    def __init__(self, elastic_instance, index_name: str = "index_normatividad"):
+    NOMBRE_CORPUS = "corpus.jsonl"
+
+    def __init__(self, elastic_instance, index_name: str = "index_normatividad",
+                 detector_duplicados=None, colapsar_duplicados: bool = False):
         self.elastic = elastic_instance
         self.index = index_name
 
+        # DetectorDuplicados opcional (MinHash/LSH) aplicado antes de indexar
+        self.detector = detector_duplicados
+        self.colapsar_duplicados = colapsar_duplicados
+
     # ============================================================
     # MÉTODO PÚBLICO: PROCESAR TODOS LOS PDFs Y ENVIAR A ELASTIC
     # ============================================================
     def procesar_y_enviar(self, carpeta_pdfs: str,
-                        carpeta_json: str = "static/uploads/json") -> Dict:
+                        carpeta_json: str = None) -> Dict:
         """
         1. Lee todos los PDFs de `carpeta_pdfs`.
-        2. Genera un JSON por PDF en `carpeta_json`.
-        3. Carga todos los JSON generados.
-        4. Envía los JSON a ElasticSearch con indexar_bulk.
+        2. Guarda los documentos como un corpus JSON Lines (`corpus.jsonl`) en
+           `carpeta_json` (por defecto `carpeta_pdfs`/json), reexportable e importable.
+        3. Envía los documentos a ElasticSearch con indexar_bulk (desde memoria,
+           sin volver a leer lo que se acaba de escribir).
         """
 
-        # Asegurar carpeta para JSON
+        # Asegurar carpeta para JSON (dentro del espacio del trabajo, no compartida)
+        carpeta_json = carpeta_json or os.path.join(carpeta_pdfs, "json")
         Funciones.crear_carpeta(carpeta_json)
         Funciones.borrar_contenido_carpeta(carpeta_json)
 
@@ -40,47 +48,50 @@ class OCRtoElastic:
             if f.lower().endswith(".pdf")
         ]
 
-        json_paths: List[str] = []
+        documentos: List[Dict] = []
         errores_pdf: List[Dict] = []
+        errores_json: List[Dict] = []
 
-        for pdf_file in pdf_files:
-            ruta_pdf = os.path.join(carpeta_pdfs, pdf_file)
-            print(f"Procesando PDF: {pdf_file}")
-
-            data = self._procesar_pdf(ruta_pdf)
-
-            # Guardar JSON local
-            nombre_json = os.path.splitext(pdf_file)[0] + ".json"
-            json_path = os.path.join(carpeta_json, nombre_json)
+        with tramo("extraccion", archivos=len(pdf_files)):
+            for pdf_file in pdf_files:
+                ruta_pdf = os.path.join(carpeta_pdfs, pdf_file)
+                print(f"Procesando PDF: {pdf_file}")
 
-            try:
-                with open(json_path, "w", encoding="utf-8") as f:
-                    json.dump(data, f, indent=4, ensure_ascii=False)
-                json_paths.append(json_path)
-            except Exception as e:
-                errores_pdf.append({
-                    "archivo": pdf_file,
-                    "error": f"Error guardando JSON: {e}"
-                })
+                documentos.append(self._procesar_pdf(ruta_pdf))
 
         # ====================================================
-        #  Cargar SOLO los JSON y enviarlos a ElasticSearch
+        #  Guardar el corpus local (un documento por línea)
         # ====================================================
-        documentos: List[Dict] = []
-        errores_json: List[Dict] = []
+        ruta_corpus = os.path.join(carpeta_json, self.NOMBRE_CORPUS)
+        json_generados = 0
+        try:
+            with tramo("escribir_corpus"):
+                json_generados = Funciones.escribir_jsonl(ruta_corpus, documentos)
+        except Exception as e:
+            ruta_corpus = None
+            errores_json.append({
+                "archivo_json": self.NOMBRE_CORPUS,
+                "error": f"Error guardando corpus JSONL: {e}"
+            })
 
-        for path in json_paths:
-            try:
-                with open(path, "r", encoding="utf-8") as f:
-                    documentos.append(json.load(f))
-            except Exception as e:
-                errores_json.append({
-                    "archivo_json": os.path.basename(path),
-                    "error": f"Error leyendo JSON: {e}"
-                })
+        # ====================================================
+        #  Marcar / colapsar casi duplicados
+        # ====================================================
+        stats_duplicados = None
+        corrida = self.detector.nueva_corrida() if self.detector is not None else None
+        if corrida is not None:
+            with tramo("duplicados", documentos=len(documentos)):
+                documentos = self.detector.filtrar_documentos(
+                    documentos, "archivo", "texto_ocr",
+                    colapsar=self.colapsar_duplicados, corrida=corrida
+                )
+            stats_duplicados = self.detector.estadisticas(corrida)
 
         if documentos:
             resultado_elastic = self.elastic.indexar_bulk(self.index, documentos)
+            # Las firmas solo se registran si el lote llegó a Elastic
+            if corrida is not None and resultado_elastic.get("success"):
+                self.detector.confirmar(corrida, excluir=resultado_elastic.get("ids_fallidos", []))
         else:
             resultado_elastic = {
                 "success": False,
@@ -90,10 +101,12 @@ class OCRtoElastic:
         return {
             "success": True,
             "total_pdfs": len(pdf_files),
-            "json_generados": len(json_paths),
+            "json_generados": json_generados,
+            "corpus": ruta_corpus,
             "documentos_enviados_elastic": len(documentos),
             "errores_pdf": errores_pdf,
             "errores_json": errores_json,
+            "duplicados": stats_duplicados,
             "resultado_elastic": resultado_elastic
         }
 
@@ -110,8 +123,10 @@ class OCRtoElastic:
         num_paginas = 0
 
         try:
-            with pdfplumber.open(ruta_pdf) as pdf:
-                num_paginas = len(pdf.pages)
+            import pdfplumber
+
+            with tramo("pdfplumber", os.path.basename(ruta_pdf)) as t, pdfplumber.open(ruta_pdf) as pdf:
+                num_paginas = t["paginas"] = len(pdf.pages)
 
                 for pagina in pdf.pages:
                     texto = pagina.extract_text() or ""
@@ -1,37 +1,49 @@
-import spacy
-import nltk
-from nltk.corpus import stopwords
+import re
 from collections import Counter
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sentence_transformers import SentenceTransformer
-from transformers import pipeline
-import pandas as pd
-from typing import List, Dict, Tuple
+from typing import TYPE_CHECKING, Iterator, List, Dict, Tuple
 import warnings
 
-warnings.filterwarnings('ignore')
+from Helpers.estadisticasCorpus import EstadisticasCorpus
+
+# spaCy, sentence-transformers, transformers, sklearn, pandas y nltk se importan
+# al cargar los modelos o en el método que los usa: importar este módulo es
+# liviano y no hace llamadas de red (los workers que solo buscan no los cargan)
+if TYPE_CHECKING:
+    import pandas as pd
 
-# Descarga silenciosa de recursos NLTK
-try:
-    nltk.download('stopwords', quiet=True)
-    nltk.download('punkt', quiet=True)
-except Exception:
-    pass
+warnings.filterwarnings('ignore')
 
 
 class PLN:
     """Procesamiento de Lenguaje Natural en español."""
 
+    # Los textos largos se procesan en fragmentos de este tamaño como máximo
+    # (spaCy limita a 1.000.000 caracteres y la memoria crece con el Doc)
+    MAX_CARACTERES_FRAGMENTO = 100000
+
+    # Fronteras naturales de un documento normativo, de mayor a menor
+    SEPARADORES = [
+        re.compile(r'\f'),                                        # página
+        re.compile(r'\n(?=\s*ART[IÍ]CULO\b)', re.IGNORECASE),     # artículo
+        re.compile(r'\n\s*\n'),                                  # párrafo
+        re.compile(r'(?<=[.;:])\s+'),                             # oración
+    ]
+
     def __init__(
         self,
         modelo_spacy: str = 'es_core_news_lg',
         modelo_embeddings: str = 'paraphrase-multilingual-MiniLM-L12-v2',
-        cargar_modelos: bool = True
+        cargar_modelos: bool = True,
+        n_procesos: int = 1,
+        corpus: EstadisticasCorpus = None
     ):
         self.modelo_spacy_nombre = modelo_spacy
         self.modelo_embeddings_nombre = modelo_embeddings
+        self.n_procesos = n_procesos
+
+        # DF del corpus para TF-IDF (vacío = todos los términos pesan igual)
+        self.corpus = corpus or EstadisticasCorpus()
         self.nlp = None
         self.model_embeddings = None
         self.stopwords_es = None
@@ -45,6 +57,9 @@ class PLN:
     def _cargar_modelos(self):
         """Carga spaCy, SentenceTransformer y stopwords."""
 
+        import spacy
+        from sentence_transformers import SentenceTransformer
+
         # spaCy
         try:
             self.nlp = spacy.load(self.modelo_spacy_nombre)
@@ -60,23 +75,80 @@ class PLN:
         except Exception:
             self.model_embeddings = None
 
-        # Stopwords
+        # Stopwords: las de NLTK si están instaladas (python -m nltk.downloader stopwords);
+        # si no, las de spaCy. Nunca se descargan en tiempo de ejecución.
         try:
+            from nltk.corpus import stopwords
             self.stopwords_es = set(stopwords.words('spanish'))
         except Exception:
-            nltk.download('stopwords', quiet=True)
-            self.stopwords_es = set(stopwords.words('spanish'))
+            self.stopwords_es = set(self.nlp.Defaults.stop_words) if self.nlp is not None else set()
 
     # ===============================================================
-    # ENTIDADES
+    # FRAGMENTACIÓN (textos más largos que MAX_CARACTERES_FRAGMENTO)
     # ===============================================================
-    def extraer_entidades(self, texto: str) -> Dict[str, List[str]]:
-        """Extrae entidades nombradas usando spaCy."""
+    def _fragmentar(self, texto: str, max_caracteres: int = None, nivel: int = 0) -> Iterator[str]:
+        """
+        Corta el texto en fragmentos de tamaño acotado sin partir páginas,
+        artículos o párrafos mientras sea posible. Es un generador: los
+        fragmentos se producen a medida que spaCy los consume.
+        """
+        max_caracteres = max_caracteres or self.MAX_CARACTERES_FRAGMENTO
+
+        if len(texto) <= max_caracteres:
+            if texto.strip():
+                yield texto
+            return
+
+        if nivel >= len(self.SEPARADORES):
+            # Sin fronteras útiles: corte duro
+            for i in range(0, len(texto), max_caracteres):
+                yield texto[i:i + max_caracteres]
+            return
+
+        actual = []
+        tamano = 0
+
+        for pedazo in self.SEPARADORES[nivel].split(texto):
+            if len(pedazo) > max_caracteres:
+                if actual:
+                    yield '\n'.join(actual)
+                    actual, tamano = [], 0
+                yield from self._fragmentar(pedazo, max_caracteres, nivel + 1)
+                continue
+
+            if tamano + len(pedazo) + 1 > max_caracteres and actual:
+                yield '\n'.join(actual)
+                actual, tamano = [], 0
 
+            actual.append(pedazo)
+            tamano += len(pedazo) + 1
+
+        if actual:
+            yield '\n'.join(actual)
+
+    def _docs(self, texto: str, desactivar: Tuple[str, ...] = ()) -> Iterator:
+        """
+        Procesa el texto fragmento a fragmento con nlp.pipe.
+        Cada Doc se descarta después de usarlo, así la memoria no depende del
+        tamaño del documento. Con n_procesos > 1 los fragmentos van en paralelo.
+        """
         if not self.nlp:
             raise ValueError("Modelo spaCy no cargado.")
 
-        doc = self.nlp(texto)
+        desactivar = [p for p in desactivar if p in self.nlp.pipe_names]
+
+        yield from self.nlp.pipe(
+            self._fragmentar(texto or ""),
+            batch_size=4,
+            n_process=self.n_procesos,
+            disable=desactivar
+        )
+
+    # ===============================================================
+    # ENTIDADES
+    # ===============================================================
+    def extraer_entidades(self, texto: str) -> Dict[str, List[str]]:
+        """Extrae entidades nombradas usando spaCy."""
 
         entidades = {
             'personas': [],
@@ -87,7 +159,7 @@ class PLN:
             'otros': []
         }
 
-        for ent in doc.ents:
+        for ent in (e for doc in self._docs(texto, desactivar=('parser',)) for e in doc.ents):
             label = ent.label_
             text = ent.text
 
@@ -111,71 +183,89 @@ class PLN:
         return entidades
 
     # ===============================================================
-    # TEMAS
+    # TEMAS Y RESUMEN (TF-IDF contra el corpus, una sola pasada)
     # ===============================================================
-    def extraer_temas(self, texto: str, top_n: int = 10) -> List[Tuple[str, float]]:
-        """Extrae las palabras clave más relevantes."""
-
-        if not self.nlp:
-            raise ValueError("Modelo spaCy no cargado.")
-
-        doc = self.nlp(texto)
-
-        palabras = [
-            token.lemma_.lower()
-            for token in doc
-            if (
-                not token.is_stop
-                and not token.is_punct
-                and len(token.text) > 3
-                and token.pos_ in ['NOUN', 'PROPN', 'ADJ', 'VERB']
-            )
-        ]
-
-        contador = Counter(palabras)
-        temas = contador.most_common(top_n)
-
-        total = len(palabras)
-        if total > 0:
-            temas = [(p, (f / total) * 100) for p, f in temas]
+    def analizar(self, texto: str, top_n: int = 10, num_oraciones: int = 3,
+                 actualizar_corpus: bool = False) -> Dict:
+        """
+        Recorre el texto una vez y calcula temas y resumen con el IDF del corpus.
+        - Cada lema relevante recibe un id local; las oraciones guardan esos ids.
+        - Con NumPy: tf = conteos, peso = tf * idf, puntaje de oración = peso medio.
+        Con `actualizar_corpus=True` el documento se suma a la tabla DF.
+        """
+
+        vocabulario: Dict[str, int] = {}
+        terminos: List[int] = []
+        oracion_de_termino: List[int] = []
+        oraciones: List[str] = []
+
+        for doc in self._docs(texto, desactivar=('ner',)):
+            for sent in doc.sents:
+                oracion = sent.text.strip()
+                if len(oracion) <= 20:
+                    continue
+
+                for token in sent:
+                    if (
+                        not token.is_stop
+                        and not token.is_punct
+                        and len(token.text) > 3
+                        and token.pos_ in ['NOUN', 'PROPN', 'ADJ', 'VERB']
+                    ):
+                        lema = token.lemma_.lower()
+                        terminos.append(vocabulario.setdefault(lema, len(vocabulario)))
+                        oracion_de_termino.append(len(oraciones))
+
+                oraciones.append(oracion)
+
+        if not vocabulario:
+            return {'temas': [], 'resumen': ' '.join(oraciones[:num_oraciones])}
+
+        lemas = list(vocabulario.keys())
+        indices_hash = self.corpus.indices(lemas)
+
+        terminos = np.array(terminos, dtype=np.int64)
+        tf = np.bincount(terminos, minlength=len(lemas)).astype(np.float64)
+        pesos = tf * self.corpus.idf(indices_hash)
+
+        # Temas: mayor TF-IDF, relevancia como % del peso total
+        top = np.argsort(-pesos)[:top_n]
+        total = pesos.sum()
+        temas = [(lemas[i], float(pesos[i] / total * 100)) for i in top]
+
+        # Resumen: oraciones con mayor peso medio de sus términos
+        if len(oraciones) <= num_oraciones:
+            resumen = ' '.join(oraciones)
         else:
-            temas = [(p, 0.0) for p, f in temas]
-
-        return temas
-
-    # ===============================================================
-    # RESUMEN
-    # ===============================================================
-    def generar_resumen(self, texto: str, num_oraciones: int = 3) -> str:
-        """Genera un resumen extractivo con TF-IDF."""
+            oracion_de_termino = np.array(oracion_de_termino, dtype=np.int64)
+            suma = np.bincount(oracion_de_termino, weights=pesos[terminos], minlength=len(oraciones))
+            cantidad = np.bincount(oracion_de_termino, minlength=len(oraciones))
+            puntajes = suma / np.maximum(cantidad, 1)
 
-        if not self.nlp:
-            raise ValueError("Modelo spaCy no cargado.")
+            idx = sorted(np.argsort(-puntajes)[:num_oraciones])
+            resumen = ' '.join(oraciones[i] for i in idx)
 
-        doc = self.nlp(texto)
-        oraciones = [s.text.strip() for s in doc.sents if len(s.text.strip()) > 20]
-
-        if len(oraciones) <= num_oraciones:
-            return ' '.join(oraciones)
-
-        try:
-            vectorizer = TfidfVectorizer(stop_words=list(self.stopwords_es))
-            matriz = vectorizer.fit_transform(oraciones)
+        if actualizar_corpus:
+            self.corpus.agregar_documento(lemas)
 
-            puntajes = np.array(matriz.sum(axis=1)).flatten()
-            idx = puntajes.argsort()[-num_oraciones:][::-1]
-            idx = sorted(idx)
+        return {'temas': temas, 'resumen': resumen}
 
-            return ' '.join(oraciones[i] for i in idx)
+    def extraer_temas(self, texto: str, top_n: int = 10) -> List[Tuple[str, float]]:
+        """Extrae las palabras clave más relevantes (TF-IDF contra el corpus)."""
+        return self.analizar(texto, top_n=top_n)['temas']
 
-        except Exception:
-            return ' '.join(oraciones[:num_oraciones])
+    def generar_resumen(self, texto: str, num_oraciones: int = 3) -> str:
+        """Genera un resumen extractivo con TF-IDF contra el corpus."""
+        return self.analizar(texto, num_oraciones=num_oraciones)['resumen']
 
     # ===============================================================
     # SIMILITUD SEMÁNTICA
     # ===============================================================
-    def calcular_similitud_semantica(self, textos: List[str]) -> pd.DataFrame:
-        """Calcula similitud entre textos."""
+    def calcular_similitud_semantica(self, textos: List[str]) -> "pd.DataFrame":
+        """
+        Calcula la matriz n×n de similitud entre textos.
+        Solo para pocos textos; para el corpus completo usar IndiceANN.
+        """
 
         if not self.model_embeddings:
             raise ValueError("Modelo embeddings no cargado.")
@@ -183,6 +273,9 @@ class PLN:
         if len(textos) < 2:
             raise ValueError("Se requieren al menos 2 textos.")
 
+        import pandas as pd
+        from sklearn.metrics.pairwise import cosine_similarity
+
         emb = self.model_embeddings.encode(textos)
         sim = cosine_similarity(emb)
 
@@ -192,6 +285,29 @@ class PLN:
             index=[f"Texto {i+1}" for i in range(len(textos))]
         )
 
+    # ===============================================================
+    # EMBEDDINGS (para el índice de documentos similares)
+    # ===============================================================
+    def generar_embeddings(self, textos: List[str], lote: int = 32,
+                           max_caracteres: int = 5000) -> np.ndarray:
+        """
+        Codifica textos como vectores normalizados (float32).
+        El modelo solo usa los primeros tokens, así que se recorta el texto
+        para no tokenizar documentos completos.
+        """
+
+        if not self.model_embeddings:
+            raise ValueError("Modelo embeddings no cargado.")
+
+        emb = self.model_embeddings.encode(
+            [(t or "")[:max_caracteres] for t in textos],
+            batch_size=lote,
+            normalize_embeddings=True,
+            show_progress_bar=False
+        )
+
+        return np.asarray(emb, dtype=np.float32)
+
     # ===============================================================
     # PREPROCESAMIENTO
     # ===============================================================
@@ -204,13 +320,9 @@ class PLN:
         min_longitud: int = 3
     ) -> str:
 
-        if not self.nlp:
-            raise ValueError("Modelo spaCy no cargado.")
-
-        doc = self.nlp(texto)
         palabras = []
 
-        for token in doc:
+        for token in (t for doc in self._docs(texto, desactivar=('ner',)) for t in doc):
             if len(token.text) < min_longitud:
                 continue
             if remover_stopwords and token.is_stop:
@@ -232,6 +344,8 @@ class PLN:
                             modelo: str = 'nlptown/bert-base-multilingual-uncased-sentiment') -> Dict:
 
         try:
+            from transformers import pipeline
+
             classifier = pipeline("sentiment-analysis", model=modelo, tokenizer=modelo)
             r = classifier(texto)[0]
             return {'sentimiento': r['label'], 'score': r['score']}
@@ -242,11 +356,12 @@ class PLN:
     # NOMBRES PROPIOS
     # ===============================================================
     def extraer_nombres_propios(self, texto: str) -> List[str]:
-        if not self.nlp:
-            raise ValueError("Modelo spaCy no cargado.")
-
-        doc = self.nlp(texto)
-        nombres = [t.text for t in doc if t.pos_ == 'PROPN' and len(t.text) > 2]
+        nombres = [
+            t.text
+            for doc in self._docs(texto, desactivar=('parser', 'ner'))
+            for t in doc
+            if t.pos_ == 'PROPN' and len(t.text) > 2
+        ]
 
         return list(dict.fromkeys(nombres))
 
@@ -254,17 +369,17 @@ class PLN:
     # CONTAR PALABRAS
     # ===============================================================
     def contar_palabras(self, texto: str, unicas: bool = False) -> int:
-        if not self.nlp:
-            raise ValueError("Modelo spaCy no cargado.")
+        total = 0
+        vistas = set()
 
-        doc = self.nlp(texto)
-
-        palabras = [
-            t.text.lower() for t in doc
-            if not t.is_punct and not t.is_space and not t.is_stop
-        ]
+        for doc in self._docs(texto, desactivar=('parser', 'ner')):
+            for t in doc:
+                if not t.is_punct and not t.is_space and not t.is_stop:
+                    total += 1
+                    if unicas:
+                        vistas.add(t.text.lower())
 
-        return len(set(palabras)) if unicas else len(palabras)
+        return len(vistas) if unicas else total
 
     # ===============================================================
     # CLOSE
@@ -1,9 +1,58 @@
-from .mongoDB import MongoDB
-from .funciones import Funciones
-from .elastic import ElasticSearch
-from .webScraping import WebScraping
-from .OCRtoElastic import OCRtoElastic
-from .PLN import PLN
+import sys
+import types
+import importlib
+
+# Carga perezosa (PEP 562): cada clase se importa al primer acceso, así
+# `from Helpers import ElasticSearch` no arrastra spaCy, pdfplumber, lxml, etc.
+_MODULOS = {
+    'MongoDB': '.mongoDB',
+    'Funciones': '.funciones',
+    'ElasticSearch': '.elastic',
+    'WebScraping': '.webScraping',
+    'OCRtoElastic': '.OCRtoElastic',
+    'PLN': '.PLN',
+    'IndiceANN': '.indiceANN',
+    'DetectorDuplicados': '.deduplicador',
+    'EstadisticasCorpus': '.estadisticasCorpus',
+    'EnriquecedorNLP': '.enriquecedor',
+    'EstadoCrawl': '.estadoCrawl',
+    'PipelineIngesta': '.pipelineIngesta',
+    'GestorTrabajos': '.gestorTrabajos',
+    'EspaciosTrabajo': '.espaciosTrabajo',
+    'CuotaEspacioExcedida': '.espaciosTrabajo',
+    'ConexionPorProceso': '.conexionPorProceso',
+    'Metricas': '.metricas',
+    'Traza': '.trazas',
+    'MonitorSalud': '.salud',
+    'ControlAdmision': '.admision',
+    'AdmisionRechazada': '.admision',
+}
 
 #__all__ = ['MongoDB', 'Funciones', 'ElasticSearch', 'WebScraping']
-__all__ = ['MongoDB', 'Funciones', 'ElasticSearch', 'WebScraping', 'OCRtoElastic','PLN']
\ No newline at end of file
+__all__ = ['MongoDB', 'Funciones', 'ElasticSearch', 'WebScraping', 'OCRtoElastic','PLN', 'IndiceANN', 'DetectorDuplicados', 'EstadisticasCorpus', 'EnriquecedorNLP', 'EstadoCrawl', 'PipelineIngesta', 'GestorTrabajos', 'EspaciosTrabajo', 'CuotaEspacioExcedida', 'ConexionPorProceso', 'Metricas', 'Traza', 'MonitorSalud', 'ControlAdmision', 'AdmisionRechazada']
+
+
+def __getattr__(nombre: str):
+    modulo = _MODULOS.get(nombre)
+    if modulo is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+    valor = getattr(importlib.import_module(modulo, __name__), nombre)
+    globals()[nombre] = valor
+    return valor
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
+
+
+class _Paquete(types.ModuleType):
+    def __setattr__(self, nombre, valor):
+        # `import Helpers.PLN` deja el submódulo como atributo del paquete; como
+        # PLN y OCRtoElastic se llaman igual que su clase, se expone la clase
+        if isinstance(valor, types.ModuleType) and _MODULOS.get(nombre) == '.' + nombre:
+            valor = getattr(valor, nombre)
+        super().__setattr__(nombre, valor)
+
+
+sys.modules[__name__].__class__ = _Paquete
@@ -0,0 +1,192 @@
+# Helpers/admision.py
+
+import math
+import time
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+from Helpers.metricas import METRICAS
+
+ADMISION_EN_CURSO = METRICAS.medidor(
+    "admision_en_curso", "Solicitudes o trabajos admitidos en curso por clase", ("clase",)
+)
+ADMISION_RECHAZOS = METRICAS.contador(
+    "admision_rechazos", "Solicitudes rechazadas (429) por clase y motivo", ("clase", "motivo")
+)
+
+
+class AdmisionRechazada(Exception):
+    """No hay capacidad o el usuario superó su límite; `reintentar` son segundos para Retry-After."""
+
+    def __init__(self, mensaje: str, reintentar: float):
+        super().__init__(mensaje)
+        self.reintentar = reintentar
+
+
+class _Clase:
+    """Límites y contadores de un tipo de operación (una ruta o familia de rutas)."""
+
+    def __init__(self, nombre: str, limite: Optional[int], por_usuario: Optional[int],
+                 tasa_por_minuto: Optional[float], rafaga: float, interactiva: bool, reintentar: float):
+        self.nombre = nombre
+        self.limite = limite
+        self.por_usuario = por_usuario
+        self.tasa = tasa_por_minuto / 60.0 if tasa_por_minuto else None
+        self.rafaga = rafaga
+        self.interactiva = interactiva
+        self.reintentar = reintentar
+
+        self.en_vuelo = 0
+        self.en_vuelo_usuario: Counter = Counter()
+        self.cubetas: Dict[str, list] = {}   # usuario -> [tokens, ultimo]
+        self.ultima_poda = time.monotonic()
+        self.admitidas = 0
+        self.rechazos: Counter = Counter()
+
+
+class Permiso:
+    """Cupo admitido; liberar() es idempotente (una ruta y su trabajo pueden llamarlo)."""
+
+    def __init__(self, control: "ControlAdmision", clase: _Clase, usuario: str):
+        self._control = control
+        self.clase = clase
+        self.usuario = usuario
+        self._liberado = False
+
+    def liberar(self):
+        self._control._liberar(self)
+
+
+PODA_CUBETAS = 60.0  # segundos entre podas de las cubetas llenas
+
+
+class ControlAdmision:
+    """
+    Control de admisión de las rutas costosas (scraping con Chrome, carga con
+    OCR, queries arbitrarias a Elastic) para que no dejen sin capacidad a la búsqueda.
+    - Por clase: a lo sumo `limite` en curso y `por_usuario` por usuario.
+    - Por usuario: token bucket de `tasa_por_minuto` (ráfaga de `rafaga`).
+    - Prioridad: las clases interactivas (búsqueda) nunca se rechazan; las
+      costosas solo entran mientras lo que está en curso (costosas + interactivas)
+      deje libres `reserva_interactiva` de los `capacidad` cupos.
+    - Rechazo inmediato (sin cola) con AdmisionRechazada → 429 + Retry-After.
+    Los contadores son del proceso: con varios workers de gunicorn el límite
+    efectivo es por worker.
+    """
+
+    def __init__(self, capacidad: int = 8, reserva_interactiva: int = 4):
+        self.capacidad = capacidad
+        self.reserva_interactiva = min(reserva_interactiva, capacidad)
+        self.clases: Dict[str, _Clase] = {}
+        self._lock = threading.Lock()
+
+    def configurar(self, clase: str, limite: int = None, por_usuario: int = None,
+                   tasa_por_minuto: float = None, rafaga: float = 1.0,
+                   interactiva: bool = False, reintentar: float = 10.0):
+        self.clases[clase] = _Clase(clase, limite, por_usuario, tasa_por_minuto,
+                                    max(rafaga, 1.0), interactiva, reintentar)
+
+    # ============================================================
+    # ADMITIR / LIBERAR
+    # ============================================================
+    def admitir(self, clase: str, usuario: str = None) -> Permiso:
+        """Reserva un cupo o lanza AdmisionRechazada. Hay que liberar el permiso al terminar."""
+        c = self.clases[clase]
+        usuario = usuario or "anonimo"
+
+        with self._lock:
+            ahora = time.monotonic()
+
+            if c.tasa:
+                if ahora - c.ultima_poda >= PODA_CUBETAS:
+                    self._podar(c, ahora)
+                cubeta = c.cubetas.setdefault(usuario, [c.rafaga, ahora])
+                cubeta[0] = min(c.rafaga, cubeta[0] + (ahora - cubeta[1]) * c.tasa)
+                cubeta[1] = ahora
+                if cubeta[0] < 1.0:
+                    self._rechazar(c, "tasa_usuario", "Demasiadas solicitudes; espere antes de reintentar",
+                                   (1.0 - cubeta[0]) / c.tasa)
+
+            if c.limite is not None and c.en_vuelo >= c.limite:
+                self._rechazar(c, "limite_clase", f"Capacidad de '{clase}' ocupada ({c.limite} en curso)",
+                               c.reintentar)
+
+            if c.por_usuario is not None and c.en_vuelo_usuario[usuario] >= c.por_usuario:
+                self._rechazar(c, "limite_usuario",
+                               f"Ya tiene {c.en_vuelo_usuario[usuario]} operación(es) de '{clase}' en curso",
+                               c.reintentar)
+
+            if not c.interactiva:
+                en_uso = sum(x.en_vuelo for x in self.clases.values())
+                if en_uso >= self.capacidad - self.reserva_interactiva:
+                    self._rechazar(c, "capacidad", "Servidor ocupado; capacidad reservada para búsquedas",
+                                   c.reintentar)
+
+            if c.tasa:
+                c.cubetas[usuario][0] -= 1.0
+            c.en_vuelo += 1
+            c.en_vuelo_usuario[usuario] += 1
+            c.admitidas += 1
+
+        ADMISION_EN_CURSO.sumar(1, clase)
+        return Permiso(self, c, usuario)
+
+    @staticmethod
+    def _podar(c: _Clase, ahora: float):
+        """Una cubeta que ya se rellenó por completo equivale a no tenerla: se borra."""
+        llenas = [u for u, (tokens, ultimo) in c.cubetas.items()
+                  if tokens + (ahora - ultimo) * c.tasa >= c.rafaga]
+        for usuario in llenas:
+            del c.cubetas[usuario]
+        c.ultima_poda = ahora
+
+    def _rechazar(self, c: _Clase, motivo: str, mensaje: str, reintentar: float):
+        c.rechazos[motivo] += 1
+        ADMISION_RECHAZOS.sumar(1, c.nombre, motivo)
+        raise AdmisionRechazada(mensaje, max(1, math.ceil(reintentar)))
+
+    def _liberar(self, permiso: Permiso):
+        c = permiso.clase
+        with self._lock:
+            if permiso._liberado:
+                return
+            permiso._liberado = True
+            c.en_vuelo -= 1
+            c.en_vuelo_usuario[permiso.usuario] -= 1
+            if c.en_vuelo_usuario[permiso.usuario] <= 0:
+                del c.en_vuelo_usuario[permiso.usuario]
+        ADMISION_EN_CURSO.sumar(-1, c.nombre)
+
+    @contextmanager
+    def permiso(self, clase: str, usuario: str = None) -> Iterator[Permiso]:
+        """Cupo mientras dure el bloque (rutas síncronas)."""
+        permiso = self.admitir(clase, usuario)
+        try:
+            yield permiso
+        finally:
+            permiso.liberar()
+
+    # ============================================================
+    # ESTADÍSTICAS
+    # ============================================================
+    def estadisticas(self) -> Dict:
+        with self._lock:
+            return {
+                "capacidad": self.capacidad,
+                "reserva_interactiva": self.reserva_interactiva,
+                "en_uso": sum(c.en_vuelo for c in self.clases.values()),
+                "clases": {
+                    nombre: {
+                        "interactiva": c.interactiva,
+                        "limite": c.limite,
+                        "por_usuario": c.por_usuario,
+                        "tasa_por_minuto": round(c.tasa * 60, 2) if c.tasa else None,
+                        "en_vuelo": c.en_vuelo,
+                        "admitidas": c.admitidas,
+                        "rechazos": dict(c.rechazos)
+                    }
+                    for nombre, c in self.clases.items()
+                }
+            }
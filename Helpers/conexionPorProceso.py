@@ -0,0 +1,47 @@
+# Helpers/conexionPorProceso.py
+
+import os
+import threading
+from typing import Any, Callable
+
+
+class ConexionPorProceso:
+    """
+    Envoltorio de un cliente (MongoDB, ElasticSearch) que lo crea en el primer
+    uso dentro de cada proceso. Con `gunicorn --preload` el master importa la
+    app una vez, pero cada worker abre sus propios sockets después del fork en
+    vez de heredar los del master. Los atributos se delegan al cliente real.
+    """
+
+    def __init__(self, fabrica: Callable[[], Any], nombre: str = "cliente"):
+        self._fabrica = fabrica
+        self._nombre = nombre
+        self._instancia = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    def obtener(self):
+        pid = os.getpid()
+        if self._pid != pid:
+            with self._lock:
+                if self._pid != pid:
+                    self._instancia = self._fabrica()
+                    self._pid = pid
+        return self._instancia
+
+    @property
+    def abierta(self) -> bool:
+        """True si este proceso ya creó su cliente."""
+        return self._pid == os.getpid()
+
+    def reiniciar(self):
+        """Descarta el cliente; el próximo uso crea uno nuevo."""
+        with self._lock:
+            self._instancia = None
+            self._pid = None
+
+    def __getattr__(self, nombre: str):
+        return getattr(self.obtener(), nombre)
+
+    def __repr__(self) -> str:
+        return f"<ConexionPorProceso {self._nombre} {'abierta' if self.abierta else 'sin abrir'}>"
@@ -0,0 +1,341 @@
+# Helpers/deduplicador.py
+
+import os
+import re
+import zlib
+import tempfile
+import threading
+import numpy as np
+from typing import Dict, Iterator, List, Optional
+
+from Helpers import Funciones
+
+
+class DetectorDuplicados:
+    """
+    Detecta documentos casi idénticos con MinHash + LSH.
+    - El texto se parte en shingles de `k` palabras y cada shingle se hashea (crc32).
+    - La firma MinHash se calcula por bloques de shingles (memoria acotada).
+    - LSH por bandas: solo se comparan los documentos que comparten alguna banda,
+      así la búsqueda de candidatos es sub-lineal.
+    - El primer documento visto de cada grupo queda como canónico.
+    - Textos con menos de `min_shingles` shingles (PDF escaneado sin OCR, JSON
+      sin texto) no se comparan: todos tendrían la misma firma vacía.
+    """
+
+    def __init__(self, num_permutaciones: int = 128, bandas: int = 16,
+                 k_shingle: int = 5, umbral: float = 0.85, semilla: int = 1,
+                 min_shingles: int = 3):
+        if num_permutaciones % bandas != 0:
+            raise ValueError("num_permutaciones debe ser múltiplo de bandas.")
+
+        self.num_permutaciones = num_permutaciones
+        self.bandas = bandas
+        self.filas = num_permutaciones // bandas
+        self.k_shingle = k_shingle
+        self.umbral = umbral
+        self.min_shingles = min_shingles
+
+        # Hash universal multiply-shift: ((a*x + b) mod 2^64) >> 32, con a impar
+        rng = np.random.default_rng(semilla)
+        self._a = rng.integers(1, 2**63, size=num_permutaciones, dtype=np.uint64) | np.uint64(1)
+        self._b = rng.integers(0, 2**63, size=num_permutaciones, dtype=np.uint64)
+
+        self.firmas: Dict[str, np.ndarray] = {}
+        self.canonico_de: Dict[str, str] = {}
+        self.grupos: Dict[str, List[str]] = {}
+        self.buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(bandas)]
+
+        self._lock = threading.Lock()
+
+    # ============================================================
+    # FIRMAS
+    # ============================================================
+    def _shingles(self, texto: str) -> Iterator[int]:
+        palabras = re.findall(r"\w+", (texto or "").lower())
+
+        if len(palabras) < self.k_shingle:
+            if palabras:
+                yield zlib.crc32(" ".join(palabras).encode("utf-8"))
+            return
+
+        for i in range(len(palabras) - self.k_shingle + 1):
+            yield zlib.crc32(" ".join(palabras[i:i + self.k_shingle]).encode("utf-8"))
+
+    def firma(self, texto: str, bloque: int = 4096) -> np.ndarray:
+        """Firma MinHash del texto (vector de `num_permutaciones` enteros)."""
+        return self._firma(texto, bloque)[0]
+
+    def _firma(self, texto: str, bloque: int = 4096):
+        """(firma, cantidad de shingles)."""
+        firma = np.full(self.num_permutaciones, np.iinfo(np.uint64).max, dtype=np.uint64)
+        pendientes: List[int] = []
+        n_shingles = 0
+
+        def procesar(hashes: List[int]):
+            x = np.array(hashes, dtype=np.uint64)[:, None]
+            valores = (x * self._a + self._b) >> np.uint64(32)
+            np.minimum(firma, valores.min(axis=0), out=firma)
+
+        with np.errstate(over='ignore'):
+            for h in self._shingles(texto):
+                n_shingles += 1
+                pendientes.append(h)
+                if len(pendientes) >= bloque:
+                    procesar(pendientes)
+                    pendientes = []
+
+            if pendientes:
+                procesar(pendientes)
+
+        return firma, n_shingles
+
+    def _bandas(self, firma: np.ndarray) -> List[bytes]:
+        return [
+            firma[i * self.filas:(i + 1) * self.filas].tobytes()
+            for i in range(self.bandas)
+        ]
+
+    @staticmethod
+    def similitud(firma_a: np.ndarray, firma_b: np.ndarray) -> float:
+        """Estimación de la similitud de Jaccard entre dos firmas."""
+        return float(np.mean(firma_a == firma_b))
+
+    # ============================================================
+    # DETECCIÓN
+    # ============================================================
+    def nueva_corrida(self) -> "CorridaDuplicados":
+        return CorridaDuplicados(self.bandas)
+
+    def agregar(self, doc_id: Optional[str], texto: str,
+                corrida: Optional["CorridaDuplicados"] = None) -> Optional[str]:
+        """
+        Compara un documento con los ya registrados y con los del lote en curso.
+        Retorna el id canónico si es casi duplicado de uno ya visto, o None si es
+        nuevo o no tiene texto suficiente para compararlo. Sin `doc_id` solo se
+        compara: no se registra, porque no se podría reconocer en otra corrida.
+        Con `corrida` el registro queda pendiente hasta confirmar(); sin ella se
+        registra de inmediato.
+        """
+        inmediato = corrida is None
+        corrida = corrida or self.nueva_corrida()
+        firma, n_shingles = self._firma(texto)
+
+        with self._lock:
+            corrida.stats["documentos"] += 1
+
+            if n_shingles < self.min_shingles:
+                corrida.stats["sin_texto"] += 1
+                return None
+
+        claves = self._bandas(firma)
+
+        with self._lock:
+            conocido = self.canonico_de.get(doc_id) or corrida.canonico_de.get(doc_id)
+            if doc_id is not None and conocido is not None:
+                # Ya visto (en una corrida anterior o antes en esta)
+                return conocido if conocido != doc_id else None
+
+            candidatos = set()
+            for buckets in (self.buckets, corrida.buckets):
+                for banda, clave in zip(buckets, claves):
+                    candidatos.update(banda.get(clave, ()))
+
+            corrida.stats["comparaciones"] += len(candidatos)
+
+            mejor, mejor_sim = None, 0.0
+            for candidato in candidatos:
+                sim = self.similitud(firma, self.firmas.get(candidato, corrida.firmas.get(candidato)))
+                if sim > mejor_sim:
+                    mejor, mejor_sim = candidato, sim
+
+            if mejor is not None and mejor_sim >= self.umbral:
+                if doc_id is not None:
+                    corrida.canonico_de[doc_id] = mejor
+                corrida.stats["duplicados"] += 1
+                canonico = mejor
+            else:
+                corrida.stats["canonicos"] += 1
+                canonico = None
+                if doc_id is not None:
+                    # Documento nuevo: queda como canónico y entra a los buckets del lote
+                    corrida.firmas[doc_id] = firma
+                    corrida.canonico_de[doc_id] = doc_id
+                    for banda, clave in zip(corrida.buckets, claves):
+                        banda.setdefault(clave, []).append(doc_id)
+
+        if inmediato:
+            self.confirmar(corrida)
+        return canonico
+
+    def confirmar(self, corrida: "CorridaDuplicados", excluir=()) -> int:
+        """
+        Registra los canónicos y duplicados pendientes de la corrida, una vez
+        indexados. `excluir`: ids que Elastic rechazó (con sus duplicados).
+        Retorna cuántos registró.
+        """
+        excluir = set(excluir)
+        registrados = 0
+
+        with self._lock:
+            for doc_id, canonico in corrida.canonico_de.items():
+                if doc_id in excluir or canonico in excluir or doc_id in self.canonico_de:
+                    continue
+
+                if canonico == doc_id:
+                    firma = corrida.firmas[doc_id]
+                    self.firmas[doc_id] = firma
+                    for banda, clave in zip(self.buckets, self._bandas(firma)):
+                        banda.setdefault(clave, []).append(doc_id)
+                else:
+                    self.grupos.setdefault(canonico, [canonico]).append(doc_id)
+
+                self.canonico_de[doc_id] = canonico
+                registrados += 1
+
+        corrida.descartar()
+        return registrados
+
+    def filtrar_documentos(self, documentos: List[Dict], campo_id: str, campo_texto: str,
+                           colapsar: bool = False,
+                           corrida: Optional["CorridaDuplicados"] = None) -> List[Dict]:
+        """
+        Pasa un lote del ingest por el detector.
+        - El id es el `_id` del documento si lo tiene (estable entre corridas),
+          si no el valor de `campo_id`.
+        - Marca cada documento con `es_duplicado` / `duplicado_de`.
+        - Con `colapsar=True` los duplicados cuyo canónico viene en el mismo lote
+          no se retornan y su nombre queda en `copias` del canónico. Si el
+          canónico es de una corrida anterior (ya está en Elastic) el duplicado
+          se retorna marcado: descartarlo no dejaría rastro de la copia.
+        - Con `corrida` nada queda registrado hasta detector.confirmar(corrida),
+          que se llama después de indexar el lote.
+        """
+        por_id = {}
+        resultado = []
+
+        for doc in documentos:
+            doc_id = doc.get("_id") or doc.get(campo_id)
+            doc_id = str(doc_id) if doc_id else None
+            canonico = self.agregar(doc_id, doc.get(campo_texto) or "", corrida)
+
+            doc["es_duplicado"] = canonico is not None
+            if canonico is None:
+                por_id[doc_id] = doc
+                resultado.append(doc)
+                continue
+
+            doc["duplicado_de"] = canonico
+            if colapsar and canonico in por_id:
+                copias = por_id[canonico].setdefault("copias", [])
+                if doc_id is not None:
+                    copias.append(doc_id)
+            else:
+                resultado.append(doc)
+
+        return resultado
+
+    # ============================================================
+    # ESTADÍSTICAS
+    # ============================================================
+    def estadisticas(self, corrida: Optional["CorridaDuplicados"] = None) -> Dict:
+        """Estadísticas de una corrida (si se da) y de los grupos acumulados."""
+        with self._lock:
+            tamanos = [len(miembros) for miembros in self.grupos.values()]
+            canonicos = len(self.firmas)
+
+        return {
+            **(corrida.stats if corrida is not None else {}),
+            "grupos_con_duplicados": len(tamanos),
+            "mayor_grupo": max(tamanos) if tamanos else 0,
+            "canonicos_totales": canonicos
+        }
+
+    # ============================================================
+    # PERSISTENCIA
+    # ============================================================
+    def guardar(self, ruta: str) -> bool:
+        """
+        Guarda las firmas fusionándolas con las del archivo (otros workers también
+        registran): bajo un bloqueo entre procesos, primero incorpora lo que hay
+        en disco y luego escribe un temporal que reemplaza al archivo (atómico).
+        """
+        temporal = None
+        try:
+            directorio = os.path.dirname(ruta) or "."
+            os.makedirs(directorio, exist_ok=True)
+
+            with Funciones.bloqueo_archivo(ruta):
+                self.cargar(ruta)
+
+                with self._lock:
+                    ids = list(self.firmas.keys())
+                    duplicados = [(d, c) for d, c in self.canonico_de.items() if d != c]
+
+                    descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix=".tmp")
+                    with os.fdopen(descriptor, "wb") as f:
+                        np.savez(
+                            f,
+                            ids=np.array(ids, dtype=str),
+                            firmas=np.array([self.firmas[i] for i in ids], dtype=np.uint64).reshape(len(ids), self.num_permutaciones),
+                            duplicados=np.array(duplicados, dtype=str).reshape(len(duplicados), 2)
+                        )
+                os.replace(temporal, ruta)
+                temporal = None
+            return True
+        except Exception as e:
+            print(f"Error al guardar firmas MinHash: {e}")
+            return False
+        finally:
+            if temporal and os.path.exists(temporal):
+                os.remove(temporal)
+
+    def cargar(self, ruta: str) -> bool:
+        """Incorpora canónicos y duplicados guardados (de corridas anteriores u otros workers)."""
+        if not os.path.exists(ruta):
+            return False
+
+        try:
+            datos = np.load(ruta)
+
+            with self._lock:
+                for doc_id, firma in zip(datos["ids"], datos["firmas"]):
+                    doc_id = str(doc_id)
+                    if doc_id in self.canonico_de:
+                        continue
+                    self.firmas[doc_id] = firma
+                    self.canonico_de[doc_id] = doc_id
+                    for banda, clave in zip(self.buckets, self._bandas(firma)):
+                        banda.setdefault(clave, []).append(doc_id)
+
+                for doc_id, canonico in datos["duplicados"]:
+                    doc_id, canonico = str(doc_id), str(canonico)
+                    if doc_id in self.canonico_de:
+                        continue
+                    self.canonico_de[doc_id] = canonico
+                    self.grupos.setdefault(canonico, [canonico]).append(doc_id)
+
+            return True
+        except Exception as e:
+            print(f"Error al cargar firmas MinHash {ruta}: {e}")
+            return False
+
+
+class CorridaDuplicados:
+    """
+    Una ingesta frente al DetectorDuplicados compartido por los trabajos:
+    - Estadísticas propias (dos trabajos simultáneos no se pisan los contadores).
+    - Canónicos y duplicados del lote en curso, que se comparan entre sí pero
+      solo pasan al detector con confirmar(), después de indexar el lote.
+    """
+
+    def __init__(self, bandas: int):
+        self.bandas = bandas
+        self.stats = {"documentos": 0, "canonicos": 0, "duplicados": 0, "sin_texto": 0, "comparaciones": 0}
+        self.descartar()
+
+    def descartar(self):
+        """Olvida los registros pendientes (lote confirmado o que no llegó a Elastic)."""
+        self.firmas: Dict[str, np.ndarray] = {}
+        self.canonico_de: Dict[str, str] = {}
+        self.buckets: List[Dict[bytes, List[str]]] = [{} for _ in range(self.bandas)]
@@ -1,17 +1,64 @@
 from elasticsearch import Elasticsearch
-from elasticsearch.helpers import bulk
-from typing import Dict, List, Optional
+from elasticsearch.helpers import bulk, scan
+from elasticsearch.serializer import JsonSerializer, NdjsonSerializer
+from typing import Dict, Iterator, List, Optional
 import json
 
+from Helpers.metricas import METRICAS, instrumentar
+from Helpers.trazas import tramo
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class _CodecOrjson:
+    """Reemplaza json estándar por orjson en los serializadores del cliente."""
+
+    def json_dumps(self, data) -> bytes:
+        return orjson.dumps(
+            data, default=self.default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+
+    def json_loads(self, data: bytes):
+        return orjson.loads(data)
+
+
+class _JsonOrjson(_CodecOrjson, JsonSerializer):
+    pass
+
+
+class _NdjsonOrjson(_CodecOrjson, NdjsonSerializer):
+    pass
+
+
+DOCUMENTOS_INDEXADOS = METRICAS.contador(
+    "elastic_documentos_indexados", "Documentos enviados con indexar_bulk", ("index", "resultado")
+)
+
+
+@instrumentar("elastic")
 class ElasticSearch:
     """Clase para gestionar conexión y operaciones con ElasticSearch Cloud."""
 
     def __init__(self, cloud_url: str, api_key: str):
+        # Con orjson instalado, los cuerpos bulk (NDJSON) y las respuestas se
+        # (de)serializan varias veces más rápido; el cliente lo aplica también
+        # a los mimetypes de compatibilidad (vnd.elasticsearch+json / +x-ndjson)
+        serializers = None
+        if orjson is not None:
+            serializers = {
+                _JsonOrjson.mimetype: _JsonOrjson(),
+                _NdjsonOrjson.mimetype: _NdjsonOrjson()
+            }
+
         self.client = Elasticsearch(
             cloud_url,
             api_key=api_key,
-            verify_certs=True
+            verify_certs=True,
+            **({"serializers": serializers} if serializers else {})
         )
 
     # ---------------------------------------------------------
@@ -88,17 +135,54 @@ class ElasticSearch:
             return False
 
     def indexar_bulk(self, index: str, documentos: List[Dict]) -> Dict:
+        """
+        Indexa documentos por lotes. Un documento con `_id` (p. ej. de un corpus
+        exportado) se indexa con ese ID: reimportarlo reemplaza en vez de duplicar.
+        """
+        try:
+            acciones = []
+            for doc in documentos:
+                accion = {"_index": index, "_source": doc}
+                if doc.get("_id"):
+                    accion["_id"] = str(doc["_id"])
+                    accion["_source"] = {k: v for k, v in doc.items() if k != "_id"}
+                acciones.append(accion)
+
+            with tramo("elastic_bulk", index=index, documentos=len(acciones)):
+                success, errors = bulk(self.client, acciones, raise_on_error=False)
+
+            DOCUMENTOS_INDEXADOS.sumar(success, index, "indexado")
+            if errors:
+                DOCUMENTOS_INDEXADOS.sumar(len(errors), index, "fallido")
+
+            return {
+                "success": True,
+                "indexados": success,
+                "fallidos": len(errors) if errors else 0,
+                "errores": errors or [],
+                # Cada error es {"index": {"_id": ..., "error": ...}}
+                "ids_fallidos": [next(iter(e.values()), {}).get("_id") for e in errors or []]
+            }
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+
+    def actualizar_bulk(self, index: str, actualizaciones: List[tuple], refresh: str = None) -> Dict:
+        """
+        Actualización parcial de varios documentos: lista de (doc_id, campos).
+        `refresh="wait_for"` retorna cuando los cambios ya son visibles para búsquedas.
+        """
         try:
             acciones = [
-                {"_index": index, "_source": doc}
-                for doc in documentos
+                {"_op_type": "update", "_index": index, "_id": doc_id, "doc": datos}
+                for doc_id, datos in actualizaciones
             ]
 
-            success, errors = bulk(self.client, acciones, raise_on_error=False)
+            opciones = {"refresh": refresh} if refresh else {}
+            success, errors = bulk(self.client, acciones, raise_on_error=False, **opciones)
 
             return {
                 "success": True,
-                "indexados": success,
+                "actualizados": success,
                 "fallidos": len(errors) if errors else 0,
                 "errores": errors or []
             }
@@ -112,6 +196,22 @@ class ElasticSearch:
         except Exception:
             return None
 
+    def obtener_documentos(self, index: str, ids: List[str], campos: List[str] = None) -> Dict[str, Dict]:
+        """Obtiene varios documentos en una sola llamada (mget)."""
+        try:
+            if not ids:
+                return {}
+
+            response = self.client.mget(index=index, ids=ids, source=campos or True)
+            return {
+                doc["_id"]: doc.get("_source", {})
+                for doc in response["docs"]
+                if doc.get("found")
+            }
+        except Exception as e:
+            print(f"Error al obtener documentos: {e}")
+            return {}
+
     def actualizar_documento(self, index: str, doc_id: str, datos: Dict) -> bool:
         try:
             self.client.update(index=index, id=doc_id, doc=datos)
@@ -149,6 +249,17 @@ class ElasticSearch:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    def contar(self, index: str, query: Dict = None) -> int:
+        try:
+            if query:
+                response = self.client.count(index=index, query=query)
+            else:
+                response = self.client.count(index=index)
+            return response["count"]
+        except Exception as e:
+            print(f"Error al contar documentos: {e}")
+            return -1
+
     def buscar_texto(self, index: str, texto: str, campos: List[str] = None, size: int = 10) -> Dict:
         try:
             if campos:
@@ -173,6 +284,15 @@ class ElasticSearch:
         except Exception as e:
             return {"success": False, "error": str(e)}
 
+    def iterar_documentos(self, index: str, query: Dict = None, campos: List[str] = None,
+                          lote: int = 500) -> Iterator[Dict]:
+        """Recorre todos los documentos de un índice con scroll (sin límite de 10.000)."""
+        body = {"query": query or {"match_all": {}}}
+        if campos:
+            body["_source"] = campos
+
+        yield from scan(self.client, index=index, query=body, size=lote)
+
     # ---------------------------------------------------------
     # EJECUTORES GENERALES (JSON Commands)
     # ---------------------------------------------------------
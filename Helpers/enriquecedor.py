@@ -0,0 +1,311 @@
+# Helpers/enriquecedor.py
+
+import os
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from Helpers.metricas import METRICAS
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+DOCUMENTOS_ENRIQUECIDOS = METRICAS.contador(
+    "enriquecimiento_documentos", "Documentos enriquecidos con PLN", ("index",)
+)
+ENRIQUECIMIENTO_ERRORES = METRICAS.contador(
+    "enriquecimiento_errores", "Errores del enriquecimiento PLN", ("index",)
+)
+
+
+class EnriquecedorNLP:
+    """
+    Enriquecimiento PLN en segundo plano.
+    - Los documentos se indexan sin resumen/entidades/temas y con `enriquecido: false`.
+    - Un hilo coordinador toma lotes de documentos sin enriquecer desde Elastic,
+      los reparte en un pool de workers y actualiza parcialmente cada lote (bulk update).
+    - El bulk update espera el refresh: el siguiente lote ya no ve los documentos
+      recién enriquecidos (no se repite el PLN ni se cuentan dos veces en el corpus).
+    - Un documento cuya actualización falla (p. ej. conflicto de mapping) queda
+      con `enriquecido_error: true` y sale de los pendientes.
+    - `al_enriquecer(ids, textos)` recibe cada lote ya actualizado (p. ej. para
+      sumarlo al índice de similares); con listas vacías avisa que el backlog se
+      vació, buen momento para guardar lo acumulado.
+    - Con `ruta_bloqueo` solo uno de los workers de gunicorn enriquece cada índice
+      (el que tiene el bloqueo del archivo); los demás esperan para tomar el relevo
+      si ese worker termina. Así ningún documento pasa dos veces por el PLN.
+    - `estadisticas()` expone backlog, procesados y docs/s para el panel de admin.
+    """
+
+    # Documentos pendientes: enriquecido != true (incluye los que no tienen el campo)
+    # y sin un fallo permanente de actualización
+    QUERY_PENDIENTES = {"bool": {"must_not": [
+        {"term": {"enriquecido": True}},
+        {"term": {"enriquecido_error": True}}
+    ]}}
+
+    MAX_DESCARTADOS = 10_000  # ids fallidos que se excluyen en memoria si ni la marca se pudo guardar
+
+    def __init__(self, elastic_instance, index_name: str, obtener_pln: Callable,
+                 n_workers: int = 2, tamano_lote: int = 16, espera_inactivo: int = 60,
+                 guardar_corpus: Optional[Callable] = None, ruta_bloqueo: Optional[str] = None,
+                 al_enriquecer: Optional[Callable[[List[str], List[str]], None]] = None):
+        self.elastic = elastic_instance
+        self.index = index_name
+        self.obtener_pln = obtener_pln
+        self.n_workers = n_workers
+        self.tamano_lote = tamano_lote
+        self.espera_inactivo = espera_inactivo
+        self.guardar_corpus = guardar_corpus
+        self.ruta_bloqueo = ruta_bloqueo
+        self.al_enriquecer = al_enriquecer
+        self.lider = False
+        self._archivo_bloqueo = None
+
+        self._despertar = threading.Event()
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+
+        self.procesados = 0
+        self.errores = 0
+        self.ultimo_error = None
+        self.en_proceso = 0
+        # (segundos, documentos) de los últimos lotes para calcular docs/s
+        self._ventana = deque(maxlen=20)
+        # Lote ya analizado cuyo bulk falló entero: se reenvía sin volver a correr el PLN
+        self._reintentar: List[tuple] = []
+        self._textos: Dict[str, str] = {}  # texto de cada documento del lote en curso
+        self._descartados = set()
+
+    # ============================================================
+    # CICLO DE VIDA
+    # ============================================================
+    def iniciar(self):
+        """Arranca el coordinador (idempotente, se llama después del fork)."""
+        with self._lock:
+            if self._hilo and self._hilo.is_alive():
+                return
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._ciclo, name="enriquecedor-nlp", daemon=True)
+            self._hilo.start()
+
+    def despertar(self):
+        """Avisa que hay documentos nuevos sin esperar al siguiente sondeo."""
+        self.iniciar()
+        self._despertar.set()
+
+    def detener(self):
+        self._detener.set()
+        self._despertar.set()
+
+    # ============================================================
+    # COORDINADOR
+    # ============================================================
+    def _tomar_liderazgo(self) -> bool:
+        """Bloqueo no bloqueante del archivo del índice; el sistema lo libera si el proceso muere."""
+        if self.ruta_bloqueo is None or fcntl is None:
+            return True
+
+        if self._archivo_bloqueo is None:
+            directorio = os.path.dirname(self.ruta_bloqueo)
+            if directorio:
+                os.makedirs(directorio, exist_ok=True)
+            self._archivo_bloqueo = open(self.ruta_bloqueo, "a")
+
+        try:
+            fcntl.flock(self._archivo_bloqueo, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            return False
+
+    def _soltar_liderazgo(self):
+        if self._archivo_bloqueo is not None:
+            self._archivo_bloqueo.close()  # cerrar libera el flock
+            self._archivo_bloqueo = None
+        self.lider = False
+
+    def _ciclo(self):
+        try:
+            self._coordinar()
+        finally:
+            self._soltar_liderazgo()
+
+    def _coordinar(self):
+        with ThreadPoolExecutor(max_workers=self.n_workers, thread_name_prefix="enriquecedor") as pool:
+            while not self._detener.is_set():
+                if not self.lider:
+                    self.lider = self._tomar_liderazgo()
+                    if not self.lider:
+                        # Otro worker enriquece este índice: reintentar más tarde
+                        self._detener.wait(self.espera_inactivo)
+                        continue
+
+                inicio = time.perf_counter()
+
+                if self._reintentar:
+                    actualizaciones, self._reintentar = self._reintentar, []
+                else:
+                    try:
+                        hits = self._siguiente_lote()
+                    except Exception as e:
+                        self._registrar_error(f"Error consultando pendientes: {e}")
+                        hits = []
+
+                    if not hits:
+                        self._avisar([], [])
+                        self._despertar.wait(self.espera_inactivo)
+                        self._despertar.clear()
+                        continue
+
+                    self._textos = {h["_id"]: self._texto(h) for h in hits}
+                    self.en_proceso = len(hits)
+                    resultados = list(pool.map(self._enriquecer, hits))
+                    actualizaciones = [r for r in resultados if r is not None]
+
+                actualizados = 0
+
+                if actualizaciones:
+                    resultado = self.elastic.actualizar_bulk(self.index, actualizaciones, refresh="wait_for")
+                    actualizados = resultado.get("actualizados", 0)
+                    if not resultado.get("success"):
+                        self._registrar_error(resultado.get("error"))
+                        self._reintentar = actualizaciones
+                        # Elastic no disponible: esperar antes de reintentar el mismo lote
+                        self._despertar.wait(self.espera_inactivo)
+                        self._despertar.clear()
+                    else:
+                        fallidos = self._ids_con_error(resultado.get("errores", []))
+                        if fallidos:
+                            self._marcar_fallidos(fallidos)
+                        ids = [doc_id for doc_id, _ in actualizaciones
+                               if doc_id not in fallidos and self._textos.get(doc_id, "").strip()]
+                        self._avisar(ids, [self._textos[doc_id] for doc_id in ids])
+
+                if self.guardar_corpus:
+                    self.guardar_corpus()
+
+                DOCUMENTOS_ENRIQUECIDOS.sumar(actualizados, self.index)
+                with self._lock:
+                    self.procesados += actualizados
+                    self.en_proceso = 0
+                    self._ventana.append((time.perf_counter() - inicio, actualizados))
+
+    def _avisar(self, ids: List[str], textos: List[str]):
+        if self.al_enriquecer is None:
+            return
+        try:
+            self.al_enriquecer(ids, textos)
+        except Exception as e:
+            self._registrar_error(f"Error en al_enriquecer: {e}")
+
+    @staticmethod
+    def _ids_con_error(errores: List[Dict]) -> Dict[str, str]:
+        """{_id: motivo} de los errores de un bulk update."""
+        fallidos = {}
+        for error in errores:
+            detalle = error.get("update", error)
+            if detalle.get("_id"):
+                fallidos[detalle["_id"]] = str(detalle.get("error"))[:500]
+        return fallidos
+
+    def _marcar_fallidos(self, fallidos: Dict[str, str]):
+        """Marca con `enriquecido_error` los documentos cuya actualización falló."""
+        self._registrar_error(f"{len(fallidos)} documento(s) sin actualizar: {next(iter(fallidos.values()))}")
+
+        # Solo campos nuevos: no chocan con el mapping que rechazó el enriquecimiento
+        marcas = [(doc_id, {"enriquecido_error": True, "error_enriquecimiento": motivo})
+                  for doc_id, motivo in fallidos.items()]
+        resultado = self.elastic.actualizar_bulk(self.index, marcas, refresh="wait_for")
+
+        no_marcados = set(fallidos) if not resultado.get("success") else {
+            e.get("update", e).get("_id") for e in resultado.get("errores", [])
+        }
+        with self._lock:
+            for doc_id in no_marcados:
+                if doc_id and len(self._descartados) < self.MAX_DESCARTADOS:
+                    self._descartados.add(doc_id)
+
+    def _siguiente_lote(self) -> List[Dict]:
+        query = self.QUERY_PENDIENTES
+        with self._lock:
+            descartados = list(self._descartados)
+        if descartados:
+            query = {"bool": {"must_not": query["bool"]["must_not"] + [{"ids": {"values": descartados}}]}}
+
+        resultado = self.elastic.buscar(
+            self.index,
+            {"query": query, "_source": ["texto_ocr", "texto"]},
+            size=self.tamano_lote
+        )
+        if not resultado.get("success"):
+            raise RuntimeError(resultado.get("error"))
+        return resultado["resultados"]
+
+    @staticmethod
+    def _texto(hit: Dict) -> str:
+        source = hit.get("_source", {})
+        return source.get("texto_ocr") or source.get("texto") or ""
+
+    def _enriquecer(self, hit: Dict) -> Optional[tuple]:
+        """Corre el PLN sobre un documento y retorna (id, campos a actualizar)."""
+        texto = self._texto(hit)
+
+        datos = {
+            "enriquecido": True,
+            "fecha_enriquecido": datetime.now().isoformat()
+        }
+
+        try:
+            if texto.strip():
+                pln = self.obtener_pln()
+                analisis = pln.analizar(texto, top_n=10, num_oraciones=3, actualizar_corpus=True)
+
+                datos["resumen"] = analisis["resumen"]
+                datos["temas"] = [
+                    {"palabra": palabra, "relevancia": relevancia}
+                    for palabra, relevancia in analisis["temas"]
+                ]
+                datos["entidades"] = pln.extraer_entidades(texto)
+
+            return hit["_id"], datos
+
+        except Exception as e:
+            # Se marca igual para que un documento defectuoso no bloquee la cola
+            self._registrar_error(f"{hit.get('_id')}: {e}")
+            datos["error_enriquecimiento"] = str(e)
+            return hit["_id"], datos
+
+    def _registrar_error(self, mensaje: str):
+        print(f"Error en enriquecimiento: {mensaje}")
+        ENRIQUECIMIENTO_ERRORES.sumar(1, self.index)
+        with self._lock:
+            self.errores += 1
+            self.ultimo_error = mensaje
+
+    # ============================================================
+    # ESTADÍSTICAS
+    # ============================================================
+    def estadisticas(self) -> Dict:
+        backlog = self.elastic.contar(self.index, self.QUERY_PENDIENTES)
+
+        with self._lock:
+            segundos = sum(s for s, _ in self._ventana)
+            documentos = sum(n for _, n in self._ventana)
+
+            return {
+                "activo": bool(self._hilo and self._hilo.is_alive()),
+                "lider": self.lider,
+                "backlog": backlog,
+                "en_proceso": self.en_proceso,
+                "procesados": self.procesados,
+                "errores": self.errores,
+                "ultimo_error": self.ultimo_error,
+                "docs_por_segundo": round(documentos / segundos, 2) if segundos else 0.0,
+                "workers": self.n_workers
+            }
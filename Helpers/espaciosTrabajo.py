@@ -0,0 +1,184 @@
+# Helpers/espaciosTrabajo.py
+
+import os
+import json
+import time
+import uuid
+import shutil
+import zipfile
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional
+
+from Helpers import Funciones
+
+
+class CuotaEspacioExcedida(Exception):
+    """No hay espacio: el uso total de los espacios supera la cuota."""
+
+
+class EspaciosTrabajo:
+    """
+    Carpetas de trabajo aisladas: una por subida o trabajo de ingesta, dentro de `raiz`.
+    Reemplaza el borrado de la carpeta compartida static/uploads, así dos admins
+    (o dos workers de gunicorn) pueden ingerir a la vez sin pisarse archivos.
+    - TTL: los espacios sin uso por más de `ttl_horas` se borran en cada limpieza.
+    - Cuota: `cuota_mb` para la suma de todos los espacios (los ZIP cuentan
+      por su tamaño descomprimido antes de extraerlos).
+    - Falla: `espacio()` borra la carpeta si el bloque lanza una excepción.
+    """
+
+    MARCA = ".espacio"
+
+    def __init__(self, raiz: str = "static/uploads", ttl_horas: float = 24, cuota_mb: float = 2048):
+        self.raiz = raiz
+        self.ttl_horas = ttl_horas
+        self.cuota_bytes = int(cuota_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+
+        Funciones.crear_carpeta(raiz)
+        self.limpiar()
+
+    # ============================================================
+    # CREAR / LIBERAR
+    # ============================================================
+    def crear(self, prefijo: str = "espacio", bytes_necesarios: int = 0) -> str:
+        """Crea una carpeta nueva y vacía; retorna su ruta."""
+        self.limpiar()
+        self.verificar_cuota(bytes_necesarios)
+
+        espacio_id = f"{prefijo}_{datetime.now():%Y%m%d_%H%M%S}_{uuid.uuid4().hex[:8]}"
+        ruta = os.path.join(self.raiz, espacio_id)
+        os.makedirs(ruta)
+
+        with open(os.path.join(ruta, self.MARCA), "w", encoding="utf-8") as f:
+            json.dump({"id": espacio_id, "creado": datetime.now().isoformat(), "pid": os.getpid()}, f)
+
+        return ruta
+
+    def liberar(self, ruta: str) -> bool:
+        """Borra un espacio completo (solo si es un espacio de esta raíz)."""
+        if not self._es_espacio(ruta):
+            return False
+        shutil.rmtree(ruta, ignore_errors=True)
+        return not os.path.exists(ruta)
+
+    @contextmanager
+    def espacio(self, prefijo: str = "espacio", conservar: bool = True,
+                bytes_necesarios: int = 0) -> Iterator[str]:
+        """
+        Espacio para un bloque de trabajo. Si el bloque falla se borra siempre;
+        si termina bien se conserva (para pasos posteriores) salvo `conservar=False`.
+        """
+        ruta = self.crear(prefijo, bytes_necesarios)
+        try:
+            yield ruta
+        except BaseException:
+            self.liberar(ruta)
+            raise
+        if not conservar:
+            self.liberar(ruta)
+        else:
+            self.tocar(ruta)
+
+    def tocar(self, ruta: str):
+        """Renueva el TTL del espacio que contiene `ruta`."""
+        espacio = self.espacio_de(ruta)
+        if espacio:
+            os.utime(os.path.join(espacio, self.MARCA))
+
+    # ============================================================
+    # VALIDACIÓN DE RUTAS
+    # ============================================================
+    def contiene(self, ruta: str) -> bool:
+        """True si `ruta` está dentro de algún espacio (evita leer archivos arbitrarios)."""
+        return self.espacio_de(ruta) is not None
+
+    def espacio_de(self, ruta: str) -> Optional[str]:
+        if not ruta:
+            return None
+        raiz = os.path.realpath(self.raiz)
+        real = os.path.realpath(ruta)
+        if os.path.commonpath([raiz, real]) != raiz or real == raiz:
+            return None
+
+        espacio = os.path.join(self.raiz, os.path.relpath(real, raiz).split(os.sep)[0])
+        return espacio if self._es_espacio(espacio) else None
+
+    def _es_espacio(self, ruta: str) -> bool:
+        return os.path.isfile(os.path.join(ruta, self.MARCA)) and \
+            os.path.dirname(os.path.realpath(ruta)) == os.path.realpath(self.raiz)
+
+    # ============================================================
+    # TTL Y CUOTA
+    # ============================================================
+    def listar(self) -> List[Dict]:
+        espacios = []
+        for nombre in os.listdir(self.raiz):
+            ruta = os.path.join(self.raiz, nombre)
+            marca = os.path.join(ruta, self.MARCA)
+            if os.path.isfile(marca):
+                espacios.append({
+                    "id": nombre,
+                    "ruta": ruta,
+                    "ultimo_uso": os.path.getmtime(marca),
+                    "bytes": self._tamano(ruta)
+                })
+        return espacios
+
+    def limpiar(self) -> int:
+        """Borra los espacios vencidos; retorna cuántos se borraron."""
+        limite = time.time() - self.ttl_horas * 3600
+        borrados = 0
+
+        with self._lock:
+            for nombre in os.listdir(self.raiz):
+                ruta = os.path.join(self.raiz, nombre)
+                marca = os.path.join(ruta, self.MARCA)
+                try:
+                    if os.path.isfile(marca) and os.path.getmtime(marca) < limite:
+                        shutil.rmtree(ruta, ignore_errors=True)
+                        borrados += 1
+                except OSError:
+                    continue
+
+        return borrados
+
+    def uso_bytes(self) -> int:
+        return sum(e["bytes"] for e in self.listar())
+
+    def verificar_cuota(self, bytes_necesarios: int = 0):
+        """Lanza CuotaEspacioExcedida si no caben `bytes_necesarios` más."""
+        uso = self.uso_bytes()
+        if uso + bytes_necesarios > self.cuota_bytes:
+            raise CuotaEspacioExcedida(
+                f"Espacio de trabajo insuficiente: se necesitan {bytes_necesarios / 1048576:.0f} MB "
+                f"y hay {uso / 1048576:.0f} MB usados de {self.cuota_bytes / 1048576:.0f} MB"
+            )
+
+    def verificar_cuota_zip(self, zip_path: str):
+        """Antes de descomprimir: lanza CuotaEspacioExcedida si el contenido expandido no cabe."""
+        with zipfile.ZipFile(zip_path) as zip_ref:
+            expandido = sum(i.file_size for i in zip_ref.infolist() if not i.is_dir())
+        self.verificar_cuota(expandido)
+
+    def estadisticas(self) -> Dict:
+        espacios = self.listar()
+        return {
+            "espacios": len(espacios),
+            "bytes": sum(e["bytes"] for e in espacios),
+            "cuota_bytes": self.cuota_bytes,
+            "ttl_horas": self.ttl_horas
+        }
+
+    @staticmethod
+    def _tamano(ruta: str) -> int:
+        total = 0
+        for carpeta, _, archivos in os.walk(ruta):
+            for archivo in archivos:
+                try:
+                    total += os.path.getsize(os.path.join(carpeta, archivo))
+                except OSError:
+                    continue
+        return total
@@ -0,0 +1,131 @@
+# Helpers/estadisticasCorpus.py
+
+import os
+import zlib
+import tempfile
+import threading
+import numpy as np
+from typing import Dict, Iterable
+
+from Helpers import Funciones
+
+
+class EstadisticasCorpus:
+    """
+    Tabla de frecuencia documental (DF) del corpus, actualizable documento a documento.
+    - El vocabulario es un arreglo de `num_buckets` contadores indexado por hash
+      (crc32 del lema), así no hay diccionario que crezca con el corpus.
+    - El IDF se calcula igual que sklearn con suavizado: ln((1 + N) / (1 + df)) + 1
+    - Varios procesos comparten el archivo: guardar() suma al disco solo lo que
+      este proceso agregó desde el último guardado (el delta), no su tabla entera.
+    """
+
+    def __init__(self, num_buckets: int = 2 ** 20):
+        self.num_buckets = num_buckets
+        self.df = np.zeros(num_buckets, dtype=np.uint32)
+        self.num_documentos = 0
+        self._lock = threading.Lock()
+        # Documentos agregados desde el último guardar()
+        self._delta_df = np.zeros(num_buckets, dtype=np.uint32)
+        self._delta_documentos = 0
+
+    # ============================================================
+    # VOCABULARIO HASHEADO
+    # ============================================================
+    def indices(self, terminos: Iterable[str]) -> np.ndarray:
+        return np.fromiter(
+            (zlib.crc32(t.encode("utf-8")) % self.num_buckets for t in terminos),
+            dtype=np.int64
+        )
+
+    # ============================================================
+    # ACTUALIZACIÓN
+    # ============================================================
+    def agregar_documento(self, terminos: Iterable[str]):
+        """Suma 1 al DF de cada término distinto del documento."""
+        idx = np.unique(self.indices(terminos))
+
+        with self._lock:
+            self.df[idx] += 1
+            self.num_documentos += 1
+            self._delta_df[idx] += 1
+            self._delta_documentos += 1
+
+    # ============================================================
+    # CONSULTA
+    # ============================================================
+    def idf(self, indices: np.ndarray) -> np.ndarray:
+        return np.log((1.0 + self.num_documentos) / (1.0 + self.df[indices])) + 1.0
+
+    def estadisticas(self) -> Dict:
+        return {
+            "documentos": self.num_documentos,
+            "buckets": self.num_buckets,
+            "buckets_usados": int(np.count_nonzero(self.df))
+        }
+
+    # ============================================================
+    # PERSISTENCIA
+    # ============================================================
+    def guardar(self, ruta: str) -> bool:
+        """
+        Fusiona el delta de este proceso con la tabla en disco, bajo un bloqueo
+        entre procesos, y la escribe en un temporal que reemplaza al archivo.
+        Después adopta la tabla fusionada (incluye lo que sumaron otros workers).
+        """
+        with self._lock:
+            if not self._delta_documentos:
+                return True
+            delta_df, delta_documentos = self._delta_df, self._delta_documentos
+            self._delta_df = np.zeros(self.num_buckets, dtype=np.uint32)
+            self._delta_documentos = 0
+
+        temporal = None
+        try:
+            directorio = os.path.dirname(ruta) or "."
+            os.makedirs(directorio, exist_ok=True)
+
+            with Funciones.bloqueo_archivo(ruta):
+                disco = EstadisticasCorpus.cargar(ruta)
+                if disco.num_buckets != self.num_buckets:
+                    raise ValueError(f"{ruta} tiene {disco.num_buckets} buckets, se esperaban {self.num_buckets}")
+
+                df = disco.df + delta_df
+                num_documentos = disco.num_documentos + delta_documentos
+
+                descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix=".tmp")
+                with os.fdopen(descriptor, "wb") as f:
+                    np.savez_compressed(f, df=df, num_documentos=num_documentos)
+                os.replace(temporal, ruta)
+                temporal = None
+
+            with self._lock:
+                # Lo agregado mientras se escribía sigue en el delta para el próximo guardado
+                self.df = df + self._delta_df
+                self.num_documentos = num_documentos + self._delta_documentos
+            return True
+        except Exception as e:
+            print(f"Error al guardar estadísticas del corpus: {e}")
+            with self._lock:
+                self._delta_df += delta_df
+                self._delta_documentos += delta_documentos
+            return False
+        finally:
+            if temporal and os.path.exists(temporal):
+                os.remove(temporal)
+
+    @classmethod
+    def cargar(cls, ruta: str) -> "EstadisticasCorpus":
+        """Carga la tabla guardada o retorna una vacía."""
+        if not os.path.exists(ruta):
+            return cls()
+
+        try:
+            datos = np.load(ruta)
+            corpus = cls(num_buckets=len(datos["df"]))
+            corpus.df = datos["df"].astype(np.uint32)
+            corpus.num_documentos = int(datos["num_documentos"])
+            return corpus
+        except Exception as e:
+            print(f"Error al cargar estadísticas del corpus {ruta}: {e}")
+            return cls()
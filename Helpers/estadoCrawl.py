@@ -0,0 +1,161 @@
+# Helpers/estadoCrawl.py
+
+import os
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+
+from Helpers import Funciones
+
+
+class EstadoCrawl:
+    """
+    Estado persistente del scraping entre corridas.
+    Por cada URL de documento guarda: sección, tipo, ETag, Last-Modified,
+    hash del contenido, archivo local y fechas de primera/última vez vista.
+    Permite:
+    - Cortar la paginación al llegar a documentos ya indexados.
+    - Descargar con GET condicional (If-None-Match / If-Modified-Since → 304).
+    - Enviar aguas abajo solo lo nuevo o modificado.
+
+    Una descarga nueva queda `pendiente` hasta que se confirma con confirmar(),
+    después de indexarla: si la indexación falla (o el espacio de trabajo se
+    pierde) la siguiente corrida vuelve a descargar e indexar ese documento.
+    """
+
+    def __init__(self, ruta_json: str):
+        self.ruta = ruta_json
+        self._lock = threading.Lock()
+        datos = Funciones.leer_json(ruta_json) if os.path.exists(ruta_json) else {}
+        self.urls: Dict[str, Dict] = datos.get("urls", {})
+        # Campos modificados por esta instancia desde el último guardar()
+        self._cambios: Dict[str, Dict] = {}
+
+    def _actualizar(self, url: str, **campos) -> Dict:
+        """Modifica una entrada y recuerda el cambio para fusionarlo al guardar (con el lock tomado)."""
+        entrada = self.urls.setdefault(url, {})
+        entrada.update(campos)
+        self._cambios.setdefault(url, {}).update(campos)
+        return entrada
+
+    # ============================================================
+    # LINKS DESCUBIERTOS
+    # ============================================================
+    def conocida(self, url: str) -> bool:
+        """
+        Conocida = ya se indexó (tiene hash confirmado). Un link solo listado,
+        descargado pero sin indexar, o cuya descarga falló, no cuenta: así no
+        corta la paginación y se reintenta.
+        """
+        entrada = self.urls.get(url)
+        return bool(entrada and entrada.get("hash"))
+
+    def registrar_link(self, link: Dict) -> bool:
+        """Registra un link visto en el listado. Retorna True si es nuevo."""
+        ahora = datetime.now().isoformat()
+
+        with self._lock:
+            if link["url"] in self.urls:
+                self._actualizar(link["url"], ultima_vez=ahora)
+                return False
+
+            self._actualizar(
+                link["url"],
+                seccion=link.get("seccion"),
+                type=link.get("type"),
+                etag=None,
+                last_modified=None,
+                hash=None,
+                archivo=None,
+                pendiente=None,
+                primera_vez=ahora,
+                ultima_vez=ahora
+            )
+            return True
+
+    # ============================================================
+    # DESCARGAS
+    # ============================================================
+    def cabeceras_condicionales(self, url: str) -> Dict[str, str]:
+        """Validadores de la última versión indexada (nunca de una pendiente)."""
+        entrada = self.urls.get(url) or {}
+        cabeceras = {}
+
+        if entrada.get("etag"):
+            cabeceras["If-None-Match"] = entrada["etag"]
+        if entrada.get("last_modified"):
+            cabeceras["If-Modified-Since"] = entrada["last_modified"]
+
+        return cabeceras
+
+    def registrar_descarga(self, url: str, etag: Optional[str], last_modified: Optional[str],
+                           hash_contenido: str, archivo: str) -> bool:
+        """
+        Registra una descarga. Retorna True si el contenido cambió respecto de lo
+        indexado; en ese caso los validadores quedan pendientes de confirmar().
+        """
+        ahora = datetime.now().isoformat()
+
+        with self._lock:
+            entrada = self.urls.get(url) or {}
+            if "primera_vez" not in entrada:
+                self._actualizar(url, primera_vez=ahora)
+
+            if entrada.get("hash") == hash_contenido:
+                # Mismo contenido que el indexado: los validadores nuevos son seguros
+                self._actualizar(url, etag=etag, last_modified=last_modified,
+                                 pendiente=None, ultima_vez=ahora)
+                return False
+
+            self._actualizar(url, ultima_vez=ahora, pendiente={
+                "etag": etag,
+                "last_modified": last_modified,
+                "hash": hash_contenido,
+                "archivo": archivo
+            })
+            return True
+
+    def confirmar(self, url: str, hash_contenido: Optional[str] = None) -> bool:
+        """
+        Marca como indexada la descarga pendiente de `url`. Con `hash_contenido`
+        solo confirma si coincide con la pendiente (otra corrida pudo descargar
+        una versión más nueva entretanto). Retorna True si confirmó.
+        """
+        with self._lock:
+            pendiente = (self.urls.get(url) or {}).get("pendiente")
+            if not pendiente or (hash_contenido and pendiente.get("hash") != hash_contenido):
+                return False
+
+            self._actualizar(url, pendiente=None, **pendiente)
+            return True
+
+    def confirmar_varias(self, urls: Iterable[str]) -> int:
+        return sum(1 for url in urls if self.confirmar(url))
+
+    # ============================================================
+    # PERSISTENCIA
+    # ============================================================
+    def guardar(self) -> bool:
+        """
+        Fusiona los cambios de esta instancia con el archivo en disco, bajo un
+        bloqueo entre procesos: trabajos simultáneos (scraping, carga, pipeline)
+        no se pisan las confirmaciones.
+        """
+        with self._lock, Funciones.bloqueo_archivo(self.ruta):
+            urls = Funciones.leer_json(self.ruta).get("urls", {}) if os.path.exists(self.ruta) else {}
+            for url, campos in self._cambios.items():
+                urls.setdefault(url, {}).update(campos)
+
+            if not Funciones.guardar_json(self.ruta, {"urls": urls}):
+                return False
+
+            self.urls = urls
+            self._cambios = {}
+            return True
+
+    def estadisticas(self) -> Dict:
+        return {
+            "urls_conocidas": len(self.urls),
+            "descargadas": sum(1 for e in self.urls.values() if e.get("hash")),
+            "pendientes": sum(1 for e in self.urls.values() if e.get("pendiente"))
+        }
@@ -1,14 +1,50 @@
 import os
+import gzip
+import zlib
+import codecs
 import zipfile
+import tempfile
 import requests
 import json
-import PyPDF2
-from PIL import Image
-import pytesseract
-from typing import Dict, List
+import posixpath
+from contextlib import contextmanager
+from lxml import etree
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from werkzeug.utils import secure_filename
 from datetime import datetime
 
+from Helpers.trazas import tramo
+
+# Codec JSON rápido y compresión zstd: opcionales, con respaldo en la librería estándar
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+
+# Espacios de nombres de Office Open XML (DOCX / XLSX)
+NS_WORD = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+NS_EXCEL = '{http://schemas.openxmlformats.org/spreadsheetml/2006/main}'
+NS_REL = '{http://schemas.openxmlformats.org/officeDocument/2006/relationships}'
+NS_PAQUETE = '{http://schemas.openxmlformats.org/package/2006/relationships}'
+
+# Extensiones de corpus JSON Lines y su compresión
+EXTENSIONES_JSONL = {
+    '.jsonl': None, '.ndjson': None,
+    '.jsonl.gz': 'gzip', '.ndjson.gz': 'gzip',
+    '.jsonl.zst': 'zstd', '.ndjson.zst': 'zstd'
+}
+
 
 class Funciones:
 
@@ -37,7 +73,7 @@ class Funciones:
                     nombre_archivo = os.path.basename(file_info)
                     extension = os.path.splitext(nombre_archivo)[1].lower()
 
-                    if extension in ['.txt', '.pdf', '.json']:
+                    if extension in ['.txt', '.pdf', '.json', '.docx', '.xlsx']:
                         zip_ref.extract(file_info, ruta_descomprimir)
                         archivos.append({
                             'carpeta': carpeta or 'raiz',
@@ -51,6 +87,104 @@ class Funciones:
             print(f"Error al descomprimir ZIP: {e}")
             return []
 
+    @staticmethod
+    def iterar_json(archivo, tamano_bloque: int = 1 << 16) -> Iterator[Dict]:
+        """
+        Lee JSON por bloques desde un archivo binario y entrega cada objeto:
+        - Un arreglo `[{...}, {...}]`: elemento a elemento, sin cargar el arreglo.
+        - JSON Lines / objetos concatenados: uno por uno.
+        - Un objeto único: ese objeto.
+        En memoria solo queda el objeto en curso y el bloque leído.
+        """
+        decodificador = codecs.getincrementaldecoder('utf-8-sig')()
+        parser = json.JSONDecoder()
+        buffer = ''
+        pos = 0
+        fin = False
+
+        def leer(n: int):
+            nonlocal buffer, pos, fin
+            bloque = archivo.read(n)
+            fin = not bloque
+            buffer = buffer[pos:] + decodificador.decode(bloque or b'', final=fin)
+            pos = 0
+
+        def saltar_espacios() -> bool:
+            """Avanza hasta el siguiente carácter útil; False si se acabó el archivo."""
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                    pos += 1
+                if pos < len(buffer):
+                    return True
+                if fin:
+                    return False
+                leer(tamano_bloque)
+
+        if not saltar_espacios():
+            return
+
+        en_arreglo = buffer[pos] == '['
+        if en_arreglo:
+            pos += 1
+
+        while saltar_espacios():
+            caracter = buffer[pos]
+            if en_arreglo and caracter == ']':
+                return
+            if en_arreglo and caracter == ',':
+                pos += 1
+                continue
+
+            # Si el objeto quedó cortado por el bloque, leer más (bloques crecientes
+            # para que un objeto enorme no se re-parsee miles de veces)
+            lectura = tamano_bloque
+            while True:
+                try:
+                    valor, final = parser.raw_decode(buffer, pos)
+                    if final < len(buffer) or fin:
+                        break
+                except json.JSONDecodeError:
+                    if fin:
+                        raise
+                leer(lectura)
+                lectura *= 2
+
+            pos = final
+            if isinstance(valor, dict):
+                yield valor
+
+    @staticmethod
+    def iterar_documentos_zip(ruta_zip: str, errores: List[Dict] = None) -> Iterator[Tuple[str, Dict]]:
+        """
+        Recorre los miembros .json / .jsonl / .ndjson de un ZIP sin extraerlos y
+        entrega (miembro, documento). Un miembro inválido se registra en `errores`
+        y se sigue con el siguiente.
+        """
+        with zipfile.ZipFile(ruta_zip, 'r') as zip_ref:
+            for info in zip_ref.infolist():
+                nombre = info.filename
+                base = os.path.basename(nombre)
+
+                if info.is_dir() or not base or base.startswith('.') or nombre.startswith('__MACOSX/'):
+                    continue
+                if os.path.splitext(base)[1].lower() not in ('.json', '.jsonl', '.ndjson'):
+                    continue
+
+                try:
+                    with zip_ref.open(info) as miembro:
+                        # JSON Lines se parte por líneas (con el codec rápido); el resto, en streaming
+                        if base.lower().endswith(('.jsonl', '.ndjson')):
+                            documentos = Funciones._iterar_documentos_jsonl(miembro)
+                        else:
+                            documentos = Funciones.iterar_json(miembro)
+                        for documento in documentos:
+                            yield nombre, documento
+                except Exception as e:
+                    print(f"Error leyendo {nombre} del ZIP: {e}")
+                    if errores is not None:
+                        errores.append({'miembro': nombre, 'error': str(e)})
+
     @staticmethod
     def descargar_y_descomprimir_zip(url: str, carpeta_destino: str, tipoArchivo: str = '') -> List[Dict]:
         """Descarga un ZIP desde URL y lo descomprime."""
@@ -111,9 +245,12 @@ class Funciones:
     def extraer_texto_pdf(ruta_pdf: str) -> str:
         """Extrae texto de un PDF (no escaneado)."""
         try:
+            import PyPDF2
+
             texto = ""
-            with open(ruta_pdf, 'rb') as file:
+            with tramo('pypdf2', os.path.basename(ruta_pdf)) as t, open(ruta_pdf, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
+                t['paginas'] = len(pdf_reader.pages)
                 for page in pdf_reader.pages:
                     texto += (page.extract_text() or "") + "\n"
             return texto.strip()
@@ -125,13 +262,18 @@ class Funciones:
     def extraer_texto_pdf_ocr(ruta_pdf: str) -> str:
         """Extrae texto de un PDF escaneado mediante OCR."""
         try:
+            import pytesseract
             from pdf2image import convert_from_path
 
-            images = convert_from_path(ruta_pdf)
+            nombre = os.path.basename(ruta_pdf)
+            with tramo('pdf2image', nombre) as t:
+                images = convert_from_path(ruta_pdf)
+                t['paginas'] = len(images)
             texto = ""
 
-            for image in images:
-                texto += pytesseract.image_to_string(image, lang='spa') + "\n"
+            for i, image in enumerate(images, start=1):
+                with tramo('tesseract', f"{nombre} p{i}", paginas=1):
+                    texto += pytesseract.image_to_string(image, lang='spa') + "\n"
 
             return texto.strip()
 
@@ -139,6 +281,158 @@ class Funciones:
             print(f"Error OCR en PDF {ruta_pdf}: {e}")
             return ""
 
+    @staticmethod
+    def _iterparse_liberando(archivo, tag: str):
+        """
+        iterparse que entrega cada elemento `tag` completo y luego lo libera
+        junto con sus hermanos anteriores: la memoria no crece con el archivo.
+        """
+        for _, elem in etree.iterparse(archivo, events=('end',), tag=tag):
+            yield elem
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+    @staticmethod
+    def extraer_texto_docx(ruta_docx: str) -> str:
+        """Extrae texto de un DOCX párrafo a párrafo (word/document.xml en streaming)."""
+        try:
+            parrafos = []
+            with zipfile.ZipFile(ruta_docx) as docx, docx.open('word/document.xml') as xml:
+                for parrafo in Funciones._iterparse_liberando(xml, f'{NS_WORD}p'):
+                    partes = []
+                    for nodo in parrafo.iter(f'{NS_WORD}t', f'{NS_WORD}tab', f'{NS_WORD}br'):
+                        if nodo.tag == f'{NS_WORD}t':
+                            partes.append(nodo.text or '')
+                        else:
+                            partes.append('\t' if nodo.tag == f'{NS_WORD}tab' else '\n')
+
+                    texto = ''.join(partes).strip()
+                    if texto:
+                        parrafos.append(texto)
+
+            return '\n'.join(parrafos)
+        except Exception as e:
+            print(f"Error al extraer texto DOCX {ruta_docx}: {e}")
+            return ""
+
+    @staticmethod
+    def iterar_filas_xlsx(ruta_xlsx: str) -> Iterator[Tuple[str, List[str]]]:
+        """
+        Recorre un XLSX fila a fila (solo lectura, en streaming) y entrega
+        (nombre de hoja, valores no vacíos de la fila).
+        """
+        with zipfile.ZipFile(ruta_xlsx) as xlsx:
+            nombres = set(xlsx.namelist())
+
+            # Textos compartidos: las celdas de texto guardan un índice a esta tabla
+            compartidos = []
+            if 'xl/sharedStrings.xml' in nombres:
+                with xlsx.open('xl/sharedStrings.xml') as xml:
+                    for si in Funciones._iterparse_liberando(xml, f'{NS_EXCEL}si'):
+                        compartidos.append(''.join(t.text or '' for t in si.iter(f'{NS_EXCEL}t')))
+
+            # Hojas en el orden del libro: workbook.xml → rId → archivo de la hoja
+            with xlsx.open('xl/_rels/workbook.xml.rels') as xml:
+                destinos = {
+                    rel.get('Id'): rel.get('Target')
+                    for rel in etree.parse(xml).getroot().iter(f'{NS_PAQUETE}Relationship')
+                }
+            with xlsx.open('xl/workbook.xml') as xml:
+                hojas = [
+                    (hoja.get('name'), destinos.get(hoja.get(f'{NS_REL}id'), ''))
+                    for hoja in etree.parse(xml).getroot().iter(f'{NS_EXCEL}sheet')
+                ]
+
+            for nombre_hoja, destino in hojas:
+                ruta_hoja = destino.lstrip('/') if destino.startswith('/') \
+                    else posixpath.normpath(posixpath.join('xl', destino))
+                if ruta_hoja not in nombres:
+                    continue
+
+                with xlsx.open(ruta_hoja) as xml:
+                    for fila in Funciones._iterparse_liberando(xml, f'{NS_EXCEL}row'):
+                        valores = []
+                        for celda in fila.iter(f'{NS_EXCEL}c'):
+                            tipo = celda.get('t')
+                            if tipo == 'inlineStr':
+                                valor = ''.join(t.text or '' for t in celda.iter(f'{NS_EXCEL}t'))
+                            else:
+                                v = celda.find(f'{NS_EXCEL}v')
+                                valor = v.text if v is not None and v.text else ''
+                                if tipo == 's' and valor:
+                                    indice = int(valor)
+                                    valor = compartidos[indice] if indice < len(compartidos) else ''
+
+                            valor = valor.strip()
+                            if valor:
+                                valores.append(valor)
+
+                        if valores:
+                            yield nombre_hoja, valores
+
+    @staticmethod
+    def extraer_texto_xlsx(ruta_xlsx: str, max_caracteres: int = 5_000_000) -> str:
+        """Extrae texto de un XLSX: una línea por fila, celdas separadas por ' | '."""
+        try:
+            lineas = []
+            hoja_actual = None
+            total = 0
+
+            for hoja, valores in Funciones.iterar_filas_xlsx(ruta_xlsx):
+                if hoja != hoja_actual:
+                    hoja_actual = hoja
+                    lineas.append(f"\n{hoja}")
+
+                linea = ' | '.join(valores)
+                lineas.append(linea)
+                total += len(linea) + 1
+
+                # Hojas enormes: lo que exceda no aporta a la búsqueda y solo pesa
+                if max_caracteres and total >= max_caracteres:
+                    break
+
+            return '\n'.join(lineas).strip()
+        except Exception as e:
+            print(f"Error al extraer texto XLSX {ruta_xlsx}: {e}")
+            return ""
+
+    @staticmethod
+    def extraer_texto_archivo(ruta: str, extension: str) -> str:
+        """Extrae texto según el tipo de archivo (PDF con respaldo OCR, DOCX, XLSX, TXT)."""
+        extension = extension.lower().lstrip('.')
+        with tramo('extraer_' + (extension or 'archivo'), os.path.basename(ruta)):
+            return Funciones._extraer_texto_archivo(ruta, extension)
+
+    @staticmethod
+    def _extraer_texto_archivo(ruta: str, extension: str) -> str:
+        texto = ""
+
+        if extension == 'pdf':
+            # Intentar extracción normal
+            texto = Funciones.extraer_texto_pdf(ruta)
+
+            # Si no se extrajo texto, intentar con OCR
+            if not texto or len(texto.strip()) < 100:
+                texto = Funciones.extraer_texto_pdf_ocr(ruta) or texto
+
+        elif extension == 'docx':
+            texto = Funciones.extraer_texto_docx(ruta)
+
+        elif extension == 'xlsx':
+            texto = Funciones.extraer_texto_xlsx(ruta)
+
+        elif extension == 'txt':
+            for encoding in ('utf-8', 'latin-1'):
+                try:
+                    with open(ruta, 'r', encoding=encoding) as f:
+                        texto = f.read()
+                    break
+                except Exception:
+                    continue
+
+        return texto
+
     @staticmethod
     def listar_archivos_json(ruta_carpeta: str) -> List[Dict]:
         """Lista archivos JSON en un directorio."""
@@ -191,28 +485,213 @@ class Funciones:
             print(f"Error listando archivos: {e}")
             return []
 
+    # ============================================================
+    # CODEC JSON
+    # ============================================================
+    @staticmethod
+    def json_dumps(datos, indentar: bool = False) -> bytes:
+        """
+        Serializa a JSON UTF-8 con orjson si está instalado (varias veces más rápido
+        y acepta arreglos/escalares numpy); si no, con json estándar compacto.
+        """
+        if orjson is not None:
+            opciones = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+            if indentar:
+                opciones |= orjson.OPT_INDENT_2
+            return orjson.dumps(datos, default=str, option=opciones)
+
+        if indentar:
+            return json.dumps(datos, ensure_ascii=False, default=str, indent=2).encode('utf-8')
+        return json.dumps(datos, ensure_ascii=False, default=str, separators=(',', ':')).encode('utf-8')
+
+    @staticmethod
+    def json_loads(datos):
+        """Parsea JSON desde bytes o str con el codec disponible."""
+        if orjson is not None:
+            return orjson.loads(datos)
+        return json.loads(datos)
+
     @staticmethod
     def leer_json(ruta_json: str) -> Dict:
         """Lee un archivo JSON desde disco."""
         try:
-            with open(ruta_json, 'r', encoding='utf-8') as f:
-                return json.load(f)
+            with open(ruta_json, 'rb') as f:
+                return Funciones.json_loads(f.read())
         except Exception as e:
             print(f"Error al leer JSON {ruta_json}: {e}")
             return {}
 
     @staticmethod
-    def guardar_json(ruta_json: str, datos: Dict) -> bool:
-        """Guarda datos en un archivo JSON."""
+    def guardar_json(ruta_json: str, datos: Dict, indentar: bool = False) -> bool:
+        """
+        Guarda datos en un archivo JSON (compacto por defecto; `indentar=True`
+        para archivos que se leen a mano). La escritura es atómica.
+        """
+        temporal = None
         try:
             directorio = os.path.dirname(ruta_json)
             if directorio:
                 Funciones.crear_carpeta(directorio)
 
-            with open(ruta_json, 'w', encoding='utf-8') as f:
-                json.dump(datos, f, indent=4, ensure_ascii=False)
+            # Temporal único en la misma carpeta: hilos del mismo proceso no lo comparten
+            descriptor, temporal = tempfile.mkstemp(dir=directorio or '.', suffix='.tmp')
+            with os.fdopen(descriptor, 'wb') as f:
+                f.write(Funciones.json_dumps(datos, indentar))
+            os.replace(temporal, ruta_json)
             return True
 
         except Exception as e:
             print(f"Error al guardar JSON: {e}")
+            if temporal and os.path.exists(temporal):
+                os.remove(temporal)
             return False
+
+    @staticmethod
+    @contextmanager
+    def bloqueo_archivo(ruta: str) -> Iterator[None]:
+        """
+        Bloqueo exclusivo entre procesos sobre `ruta` (usa `ruta`.lock). Para
+        leer-fusionar-escribir archivos compartidos por los workers de gunicorn.
+        """
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            Funciones.crear_carpeta(directorio)
+
+        with open(f"{ruta}.lock", "w") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    # ============================================================
+    # CORPUS JSON LINES (.jsonl, .jsonl.gz, .jsonl.zst)
+    # ============================================================
+    @staticmethod
+    def es_jsonl(ruta: str) -> bool:
+        return Funciones.compresion_jsonl(ruta) is not False
+
+    @staticmethod
+    def compresion_jsonl(ruta: str):
+        """'gzip', 'zstd' o None según la extensión; False si no es un corpus JSON Lines."""
+        nombre = ruta.lower()
+        for extension, compresion in EXTENSIONES_JSONL.items():
+            if nombre.endswith(extension):
+                return compresion
+        return False
+
+    @staticmethod
+    def verificar_compresion(compresion: Optional[str]):
+        if compresion not in (None, 'gzip', 'zstd'):
+            raise ValueError(f"Compresión no soportada: {compresion}")
+        if compresion == 'zstd' and zstandard is None:
+            raise RuntimeError("La compresión zstd requiere el paquete 'zstandard' (pip install zstandard)")
+
+    @staticmethod
+    def generar_jsonl(documentos: Iterable[Dict], compresion: Optional[str] = None,
+                      tamano_bloque: int = 1 << 16) -> Iterator[bytes]:
+        """
+        Serializa documentos como JSON Lines y entrega bloques de bytes ya
+        comprimidos (gzip / zstd / sin compresión). Sirve igual para escribir a
+        disco que para una respuesta HTTP en streaming: nunca arma el corpus entero.
+        """
+        Funciones.verificar_compresion(compresion)
+        if compresion == 'gzip':
+            compresor = zlib.compressobj(6, zlib.DEFLATED, 31)  # 31: cabecera gzip
+        elif compresion == 'zstd':
+            compresor = zstandard.ZstdCompressor(level=3).compressobj()
+        else:
+            compresor = None
+
+        bloque = bytearray()
+        for documento in documentos:
+            bloque += Funciones.json_dumps(documento)
+            bloque += b'\n'
+            if len(bloque) >= tamano_bloque:
+                salida = compresor.compress(bytes(bloque)) if compresor else bytes(bloque)
+                bloque.clear()
+                if salida:
+                    yield salida
+
+        salida = compresor.compress(bytes(bloque)) if compresor else bytes(bloque)
+        if compresor:
+            salida += compresor.flush()
+        if salida:
+            yield salida
+
+    @staticmethod
+    def escribir_jsonl(ruta: str, documentos: Iterable[Dict]) -> int:
+        """
+        Escribe un corpus JSON Lines (un documento por línea); la compresión sale
+        de la extensión (.jsonl, .jsonl.gz, .jsonl.zst). Retorna cuántos escribió.
+        """
+        compresion = Funciones.compresion_jsonl(ruta)
+        if compresion is False:
+            raise ValueError(f"Extensión de corpus no soportada: {ruta}")
+
+        directorio = os.path.dirname(ruta)
+        if directorio:
+            Funciones.crear_carpeta(directorio)
+
+        total = 0
+
+        def contar():
+            nonlocal total
+            for documento in documentos:
+                total += 1
+                yield documento
+
+        descriptor, temporal = tempfile.mkstemp(dir=directorio or '.', suffix='.tmp')
+        try:
+            with os.fdopen(descriptor, 'wb') as f:
+                for bloque in Funciones.generar_jsonl(contar(), compresion):
+                    f.write(bloque)
+            os.replace(temporal, ruta)
+        finally:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+
+        return total
+
+    @staticmethod
+    def leer_jsonl(ruta: str) -> Iterator[Dict]:
+        """Recorre un corpus JSON Lines (comprimido o no) documento a documento."""
+        compresion = Funciones.compresion_jsonl(ruta)
+        if compresion is False:
+            raise ValueError(f"Extensión de corpus no soportada: {ruta}")
+        Funciones.verificar_compresion(compresion)
+
+        if compresion == 'gzip':
+            archivo = gzip.open(ruta, 'rb')
+        elif compresion == 'zstd':
+            archivo = zstandard.ZstdDecompressor().stream_reader(open(ruta, 'rb'), closefd=True)
+        else:
+            archivo = open(ruta, 'rb')
+
+        with archivo:
+            yield from Funciones._iterar_documentos_jsonl(archivo)
+
+    @staticmethod
+    def _iterar_documentos_jsonl(archivo, tamano_bloque: int = 1 << 20) -> Iterator[Dict]:
+        """Parte un flujo binario en líneas y parsea cada una; ignora líneas vacías."""
+        resto = b''
+        primera = True
+        while True:
+            bloque = archivo.read(tamano_bloque)
+            if not bloque:
+                break
+            lineas = (resto + bloque).split(b'\n')
+            resto = lineas.pop()
+            if primera and lineas:
+                lineas[0] = lineas[0].removeprefix(codecs.BOM_UTF8)
+                primera = False
+            for linea in lineas:
+                if linea.strip():
+                    documento = Funciones.json_loads(linea)
+                    if isinstance(documento, dict):
+                        yield documento
+
+        if primera:
+            resto = resto.removeprefix(codecs.BOM_UTF8)
+        if resto.strip():
+            documento = Funciones.json_loads(resto)
+            if isinstance(documento, dict):
+                yield documento
@@ -0,0 +1,392 @@
+# Helpers/gestorTrabajos.py
+
+import os
+import time
+import uuid
+import socket
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from Helpers import Funciones
+from Helpers.metricas import METRICAS
+from Helpers.trazas import Traza, activar
+
+TRABAJOS_EN_CURSO = METRICAS.medidor(
+    "trabajos_en_curso", "Trabajos en segundo plano ejecutándose en este proceso", ("tipo",)
+)
+TRABAJOS_TERMINADOS = METRICAS.contador(
+    "trabajos_terminados", "Trabajos en segundo plano terminados", ("tipo", "estado")
+)
+TRABAJO_DURACION = METRICAS.histograma(
+    "trabajo_duracion_segundos", "Duración de los trabajos en segundo plano", ("tipo",),
+    cubetas=(1, 5, 15, 30, 60, 300, 900, 1800, 3600, 10800)
+)
+
+
+class TrabajoCancelado(Exception):
+    """La lanza Trabajo.verificar() cuando se pidió cancelar el trabajo."""
+
+
+class Trabajo:
+    """
+    Manejador que recibe la función de un trabajo para informar progreso
+    (etapa, hechos/total) y consultar si se pidió cancelarlo.
+    """
+
+    INTERVALO_GUARDADO = 0.5  # segundos entre escrituras de progreso a disco
+    INTERVALO_LATIDO = 60     # segundos entre llamadas a las funciones de mantener_vivo()
+
+    def __init__(self, gestor: "GestorTrabajos", datos: Dict):
+        self.gestor = gestor
+        self.id = datos["id"]
+        self.datos = datos
+        self._lock = threading.Lock()
+        self._ultimo_guardado = 0.0
+        self._latidos: List[Callable] = []
+        self._ultimo_latido = 0.0
+        self.traza: Optional[Traza] = None
+
+    # ============================================================
+    # PROGRESO
+    # ============================================================
+    def etapa(self, nombre: str, total: int = None, mensaje: str = None):
+        """Inicia una etapa nueva; hechos vuelve a 0 y el ritmo se mide desde aquí."""
+        with self._lock:
+            self.datos["progreso"] = {
+                "etapa": nombre,
+                "hechos": 0,
+                "total": total,
+                "mensaje": mensaje,
+                "inicio_etapa": time.time()
+            }
+        if self.traza is not None:
+            self.traza.etapa("etapa:" + nombre)
+        self._guardar(forzar=True)
+        self._latir()
+
+    def progreso(self, hechos: int = None, total: int = None, sumar: int = 0, mensaje: str = None):
+        with self._lock:
+            p = self.datos["progreso"]
+            if hechos is not None:
+                p["hechos"] = hechos
+            p["hechos"] += sumar
+            if total is not None:
+                p["total"] = total
+            if mensaje is not None:
+                p["mensaje"] = mensaje
+        self._guardar()
+        self._latir()
+
+    def mantener_vivo(self, funcion: Callable):
+        """
+        Registra `funcion()` para llamarla cada INTERVALO_LATIDO segundos mientras
+        el trabajo informe progreso (p. ej. renovar el TTL de su espacio de trabajo).
+        """
+        self._latidos.append(funcion)
+        self._ultimo_latido = 0.0
+        self._latir()
+
+    def _latir(self):
+        ahora = time.monotonic()
+        if not self._latidos or ahora - self._ultimo_latido < self.INTERVALO_LATIDO:
+            return
+        self._ultimo_latido = ahora
+        for funcion in self._latidos:
+            try:
+                funcion()
+            except Exception as e:
+                print(f"Error en latido del trabajo {self.id}: {e}")
+
+    # ============================================================
+    # CANCELACIÓN
+    # ============================================================
+    def cancelado(self) -> bool:
+        return self.gestor.cancelacion_solicitada(self.id)
+
+    def verificar(self):
+        """Punto de cancelación: lanza TrabajoCancelado si se pidió cancelar."""
+        if self.cancelado():
+            raise TrabajoCancelado()
+
+    def _guardar(self, forzar: bool = False):
+        ahora = time.monotonic()
+        if not forzar and ahora - self._ultimo_guardado < self.INTERVALO_GUARDADO:
+            return
+        self._ultimo_guardado = ahora
+        with self._lock:
+            self.gestor._escribir(self.datos)
+
+
+class GestorTrabajos:
+    """
+    Trabajos en segundo plano para las rutas de ingesta largas.
+    - Las rutas encolan y responden de inmediato con el ID del trabajo.
+    - Un pool local de hilos ejecuta los trabajos de este proceso.
+    - Cada trabajo se persiste como JSON en `carpeta` (escritura atómica), así
+      cualquier worker de gunicorn puede consultar progreso y resultado.
+    - La cancelación es un archivo marca `<id>.cancelar` que el dueño revisa.
+    - Cada ejecución se traza (Helpers.trazas): el resumen queda en el trabajo
+      y los tramos completos en `<id>.traza`.
+    - Si el proceso dueño muere (reciclaje o reinicio del worker) el trabajo
+      queda 'interrumpido': al arrancar cada worker y al consultarlo.
+    """
+
+    ESTADOS_FINALES = ("completado", "fallido", "cancelado", "interrumpido")
+
+    def __init__(self, carpeta: str = "trabajos", n_workers: int = 2, ttl_horas: float = 72):
+        self.carpeta = carpeta
+        self.n_workers = n_workers
+        self.ttl_horas = ttl_horas
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pendientes = 0   # encolados o ejecutándose en este proceso
+
+        Funciones.crear_carpeta(carpeta)
+        self.recuperar_huerfanos()
+        self.limpiar()
+
+    def _obtener_pool(self) -> ThreadPoolExecutor:
+        # Se crea al primer uso: después del fork de gunicorn, no antes
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.n_workers, thread_name_prefix="trabajo")
+            return self._pool
+
+    # ============================================================
+    # ENCOLAR / EJECUTAR
+    # ============================================================
+    def encolar(self, tipo: str, funcion: Callable, *args, usuario: str = None,
+                parametros: Dict = None, al_terminar: Callable = None, **kwargs) -> str:
+        """
+        Encola `funcion(trabajo, *args, **kwargs)`; lo que retorne (un dict)
+        queda como resultado del trabajo. Retorna el ID del trabajo.
+        `al_terminar()` se llama siempre al final, aunque el trabajo se cancele
+        antes de empezar (p. ej. para liberar un permiso de admisión).
+        """
+        datos = {
+            "id": uuid.uuid4().hex,
+            "tipo": tipo,
+            "usuario": usuario,
+            "parametros": parametros or {},
+            "estado": "en_cola",
+            "progreso": {"etapa": "en_cola", "hechos": 0, "total": None, "mensaje": None,
+                         "inicio_etapa": time.time()},
+            "creado": datetime.now().isoformat(),
+            "inicio": None,
+            "fin": None,
+            "host": socket.gethostname(),
+            "pid": os.getpid(),
+            "resultado": None,
+            "error": None
+        }
+        self._escribir(datos)
+        with self._lock:
+            self._pendientes += 1
+        self._obtener_pool().submit(self._ejecutar, datos, funcion, args, kwargs, al_terminar)
+        return datos["id"]
+
+    def _ejecutar(self, datos: Dict, funcion: Callable, args, kwargs, al_terminar: Callable = None):
+        try:
+            self._ejecutar_trabajo(datos, funcion, args, kwargs)
+        finally:
+            with self._lock:
+                self._pendientes -= 1
+            if al_terminar is not None:
+                al_terminar()
+
+    def en_curso(self) -> int:
+        """Trabajos encolados o ejecutándose en este proceso (p. ej. para no reciclar el worker)."""
+        return self._pendientes
+
+    def _ejecutar_trabajo(self, datos: Dict, funcion: Callable, args, kwargs):
+        trabajo = Trabajo(self, datos)
+
+        if self.cancelacion_solicitada(trabajo.id):
+            datos.update({"estado": "cancelado", "fin": datetime.now().isoformat()})
+            self._escribir(datos)
+            return
+
+        datos.update({"estado": "ejecutando", "inicio": datetime.now().isoformat()})
+        self._escribir(datos)
+
+        inicio = time.perf_counter()
+        trabajo.traza = Traza(datos["tipo"])
+        TRABAJOS_EN_CURSO.sumar(1, datos["tipo"])
+        try:
+            with activar(trabajo.traza):
+                resultado = funcion(trabajo, *args, **kwargs)
+            datos["resultado"] = resultado
+            datos["estado"] = "cancelado" if trabajo.cancelado() else "completado"
+        except TrabajoCancelado:
+            datos["estado"] = "cancelado"
+        except Exception as e:
+            print(f"Error en trabajo {trabajo.id} ({datos['tipo']}): {e}")
+            traceback.print_exc()
+            datos["estado"] = "fallido"
+            datos["error"] = str(e)
+        finally:
+            TRABAJOS_EN_CURSO.sumar(-1, datos["tipo"])
+
+        TRABAJO_DURACION.observar(time.perf_counter() - inicio, datos["tipo"])
+        TRABAJOS_TERMINADOS.sumar(1, datos["tipo"], datos["estado"])
+
+        trabajo.traza.terminar()
+        datos["traza"] = trabajo.traza.resumen()
+        trabajo.traza.guardar(self._ruta(trabajo.id, ".traza"))
+
+        datos["fin"] = datetime.now().isoformat()
+        with trabajo._lock:
+            self._escribir(datos)
+
+        marca = self._ruta(trabajo.id, ".cancelar")
+        if os.path.exists(marca):
+            os.remove(marca)
+
+    # ============================================================
+    # CONSULTA Y CANCELACIÓN
+    # ============================================================
+    def obtener(self, trabajo_id: str, incluir_resultado: bool = False) -> Optional[Dict]:
+        """Estado del trabajo con ritmo (items/s) y ETA de la etapa actual."""
+        datos = self._leer(trabajo_id)
+        if datos is None:
+            return None
+        self._marcar_si_huerfano(datos)
+
+        p = datos.get("progreso") or {}
+        segundos = max(time.time() - p.get("inicio_etapa", time.time()), 1e-6)
+        ritmo = p.get("hechos", 0) / segundos
+        pendientes = (p["total"] - p["hechos"]) if p.get("total") is not None else None
+
+        datos["progreso"] = {
+            "etapa": p.get("etapa"),
+            "hechos": p.get("hechos", 0),
+            "total": p.get("total"),
+            "mensaje": p.get("mensaje"),
+            "porcentaje": round(100 * p["hechos"] / p["total"], 1) if p.get("total") else None,
+            "ritmo": round(ritmo, 2),
+            "eta_segundos": round(pendientes / ritmo) if pendientes is not None and ritmo > 0 else None
+        }
+        datos["cancelacion_solicitada"] = self.cancelacion_solicitada(trabajo_id)
+        if not incluir_resultado:
+            datos.pop("resultado", None)
+        return datos
+
+    def listar(self, limite: int = 20, usuario: str = None) -> List[Dict]:
+        trabajos = []
+        for nombre in os.listdir(self.carpeta):
+            if nombre.endswith(".json"):
+                datos = self.obtener(nombre[:-5])
+                if datos and (usuario is None or datos.get("usuario") == usuario):
+                    trabajos.append(datos)
+
+        trabajos.sort(key=lambda t: t["creado"], reverse=True)
+        return trabajos[:limite]
+
+    def cancelar(self, trabajo_id: str) -> bool:
+        datos = self._leer(trabajo_id)
+        if datos is None or datos["estado"] in self.ESTADOS_FINALES:
+            return False
+
+        with open(self._ruta(trabajo_id, ".cancelar"), "w") as f:
+            f.write(datetime.now().isoformat())
+        return True
+
+    def cancelacion_solicitada(self, trabajo_id: str) -> bool:
+        return os.path.exists(self._ruta(trabajo_id, ".cancelar"))
+
+    def obtener_traza(self, trabajo_id: str) -> Optional[Traza]:
+        """Tramos de un trabajo terminado (None si no existe o sigue en curso)."""
+        try:
+            ruta = self._ruta(trabajo_id, ".traza")
+        except ValueError:
+            return None
+        return Traza.cargar(ruta) if os.path.exists(ruta) else None
+
+    # ============================================================
+    # MANTENIMIENTO
+    # ============================================================
+    def recuperar_huerfanos(self) -> int:
+        """
+        Trabajos de este host cuyo proceso ya no existe quedan como 'interrumpido'.
+        Llamar al arrancar cada worker: con preload el constructor corre solo en el master.
+        """
+        recuperados = 0
+        for nombre in os.listdir(self.carpeta):
+            if nombre.endswith(".json"):
+                datos = self._leer(nombre[:-5])
+                recuperados += bool(datos and self._marcar_si_huerfano(datos))
+        return recuperados
+
+    def _marcar_si_huerfano(self, datos: Dict) -> bool:
+        if datos["estado"] in self.ESTADOS_FINALES or datos.get("host") != socket.gethostname():
+            return False
+        if self._proceso_vivo(datos.get("pid")):
+            return False
+
+        datos.update({"estado": "interrumpido", "fin": datetime.now().isoformat(),
+                      "error": "El proceso que ejecutaba el trabajo terminó"})
+        self._escribir(datos)
+        return True
+
+    @staticmethod
+    def _proceso_vivo(pid: Optional[int]) -> bool:
+        if not pid:
+            return False
+        try:
+            os.kill(pid, 0)
+            return True
+        except PermissionError:
+            return True
+        except OSError:
+            return False
+
+    def limpiar(self) -> int:
+        """Borra los trabajos terminados hace más de `ttl_horas`."""
+        limite = time.time() - self.ttl_horas * 3600
+        borrados = 0
+        for nombre in os.listdir(self.carpeta):
+            ruta = os.path.join(self.carpeta, nombre)
+            try:
+                if nombre.endswith(".json") and os.path.getmtime(ruta) < limite:
+                    datos = self._leer(nombre[:-5])
+                    if datos and datos["estado"] in self.ESTADOS_FINALES:
+                        os.remove(ruta)
+                        traza = self._ruta(datos["id"], ".traza")
+                        if os.path.exists(traza):
+                            os.remove(traza)
+                        borrados += 1
+            except OSError:
+                continue
+        return borrados
+
+    # ============================================================
+    # PERSISTENCIA
+    # ============================================================
+    def _ruta(self, trabajo_id: str, sufijo: str = ".json") -> str:
+        # El ID viene de la URL: solo hex para no salir de la carpeta
+        if not trabajo_id or not all(c in "0123456789abcdef" for c in trabajo_id):
+            raise ValueError("ID de trabajo no válido")
+        return os.path.join(self.carpeta, trabajo_id + sufijo)
+
+    def _leer(self, trabajo_id: str) -> Optional[Dict]:
+        try:
+            with open(self._ruta(trabajo_id), "rb") as f:
+                return Funciones.json_loads(f.read())
+        except (OSError, ValueError):
+            return None
+
+    def _escribir(self, datos: Dict):
+        """Escritura atómica: otros procesos nunca leen un JSON a medias."""
+        ruta = self._ruta(datos["id"])
+        temporal = f"{ruta}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temporal, "wb") as f:
+                f.write(Funciones.json_dumps(datos))
+            os.replace(temporal, ruta)
+        except Exception as e:
+            print(f"Error al guardar trabajo {datos['id']}: {e}")
+            if os.path.exists(temporal):
+                os.remove(temporal)
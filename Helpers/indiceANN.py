@@ -0,0 +1,300 @@
+# Helpers/indiceANN.py
+
+import os
+import tempfile
+import threading
+import numpy as np
+from typing import Dict, List, Optional, Tuple
+
+
+class IndiceANN:
+    """
+    Índice aproximado de vecinos más cercanos (estilo IVF) en NumPy puro.
+    - Los embeddings se normalizan, así el producto punto es la similitud coseno.
+    - Los vectores se agrupan en `n_listas` celdas con k-means esférico.
+    - Cada consulta solo compara contra las `n_sondeos` celdas más cercanas.
+    - Admite inserción incremental y se guarda/carga como .npz
+    """
+
+    # Por debajo de este tamaño la búsqueda exacta es igual de rápida
+    MINIMO_ENTRENAMIENTO = 2000
+
+    def __init__(self, n_listas: Optional[int] = None, n_sondeos: int = 8):
+        self.n_listas = n_listas
+        self.n_sondeos = n_sondeos
+
+        self.dimension: Optional[int] = None
+        self.vectores = np.zeros((0, 0), dtype=np.float32)
+        self.total = 0
+
+        self.ids: List[str] = []
+        self.posicion_por_id: Dict[str, int] = {}
+
+        self.centroides: Optional[np.ndarray] = None
+        self.asignacion = np.zeros(0, dtype=np.int32)
+        self.listas: List[List[int]] = []
+
+        self._lock = threading.Lock()
+        self.sin_guardar = 0  # inserciones incrementales desde el último guardar()/cargar()
+
+    # ============================================================
+    # CONSTRUCCIÓN E INSERCIÓN
+    # ============================================================
+    def construir(self, ids: List[str], vectores: np.ndarray) -> Dict:
+        """Carga todos los vectores de una vez y entrena las celdas."""
+        with self._lock:
+            self._insertar(ids, vectores)
+            self._entrenar()
+
+        return self.estadisticas()
+
+    def agregar(self, ids: List[str], vectores: np.ndarray) -> int:
+        """
+        Inserta (o reemplaza) vectores sin reconstruir el índice.
+        Si aún no hay celdas y se supera el mínimo, entrena por primera vez.
+        """
+        with self._lock:
+            posiciones = self._insertar(ids, vectores)
+
+            if self.centroides is not None:
+                self._asignar(posiciones)
+            elif self.total >= self.MINIMO_ENTRENAMIENTO:
+                self._entrenar()
+
+            self.sin_guardar += len(posiciones)
+
+        return len(posiciones)
+
+    def _insertar(self, ids: List[str], vectores: np.ndarray) -> List[int]:
+        vectores = self._normalizar(vectores)
+
+        if len(ids) != len(vectores):
+            raise ValueError("La cantidad de ids y de vectores no coincide.")
+
+        if self.dimension is None:
+            self.dimension = vectores.shape[1]
+            self.vectores = np.zeros((0, self.dimension), dtype=np.float32)
+        elif vectores.shape[1] != self.dimension:
+            raise ValueError(f"Dimensión {vectores.shape[1]} distinta a la del índice ({self.dimension}).")
+
+        self._reservar(self.total + len(ids))
+
+        posiciones = []
+        for doc_id, vector in zip(ids, vectores):
+            pos = self.posicion_por_id.get(doc_id)
+
+            if pos is None:
+                pos = self.total
+                self.total += 1
+                self.ids.append(doc_id)
+                self.posicion_por_id[doc_id] = pos
+            elif self.centroides is not None:
+                # Reemplazo: sacarlo de su celda anterior
+                celda = self.listas[self.asignacion[pos]]
+                if pos in celda:
+                    celda.remove(pos)
+
+            self.vectores[pos] = vector
+            posiciones.append(pos)
+
+        return posiciones
+
+    def _reservar(self, capacidad: int):
+        """Crece el arreglo de vectores por duplicación (inserción amortizada O(1))."""
+        if capacidad <= len(self.vectores):
+            return
+
+        nueva = max(capacidad, 2 * len(self.vectores), 64)
+
+        vectores = np.zeros((nueva, self.dimension), dtype=np.float32)
+        vectores[:self.total] = self.vectores[:self.total]
+        self.vectores = vectores
+
+        asignacion = np.full(nueva, -1, dtype=np.int32)
+        asignacion[:len(self.asignacion)] = self.asignacion[:nueva]
+        self.asignacion = asignacion
+
+    # ============================================================
+    # K-MEANS ESFÉRICO
+    # ============================================================
+    def _entrenar(self, iteraciones: int = 10, muestra_max: int = 50000):
+        if self.total < self.MINIMO_ENTRENAMIENTO:
+            self.centroides = None
+            self.listas = []
+            return
+
+        n_listas = self.n_listas or int(np.sqrt(self.total))
+        n_listas = max(1, min(n_listas, self.total))
+
+        datos = self.vectores[:self.total]
+        rng = np.random.default_rng(42)
+
+        if self.total > muestra_max:
+            muestra = datos[rng.choice(self.total, muestra_max, replace=False)]
+        else:
+            muestra = datos
+
+        centroides = muestra[rng.choice(len(muestra), n_listas, replace=False)].copy()
+
+        for _ in range(iteraciones):
+            etiquetas = np.argmax(muestra @ centroides.T, axis=1)
+
+            sumas = np.zeros_like(centroides)
+            np.add.at(sumas, etiquetas, muestra)
+            conteos = np.bincount(etiquetas, minlength=n_listas)
+
+            # Celdas vacías: se re-siembran con un punto al azar
+            vacias = conteos == 0
+            if vacias.any():
+                sumas[vacias] = muestra[rng.choice(len(muestra), int(vacias.sum()))]
+
+            centroides = self._normalizar(sumas)
+
+        self.centroides = centroides
+        self.listas = [[] for _ in range(n_listas)]
+        self._asignar(range(self.total))
+
+    def _asignar(self, posiciones, lote: int = 8192):
+        posiciones = np.fromiter(posiciones, dtype=np.int64)
+
+        for inicio in range(0, len(posiciones), lote):
+            bloque = posiciones[inicio:inicio + lote]
+            celdas = np.argmax(self.vectores[bloque] @ self.centroides.T, axis=1)
+
+            for pos, celda in zip(bloque.tolist(), celdas.tolist()):
+                self.asignacion[pos] = celda
+                self.listas[celda].append(pos)
+
+    # ============================================================
+    # CONSULTAS
+    # ============================================================
+    def buscar(self, vector: np.ndarray, k: int = 10, excluir: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Retorna los `k` ids más similares al vector con su similitud coseno."""
+        if self.total == 0:
+            return []
+
+        consulta = self._normalizar(vector.reshape(1, -1))[0]
+
+        with self._lock:
+            if self.centroides is None:
+                candidatos = np.arange(self.total)
+            else:
+                n_sondeos = min(self.n_sondeos, len(self.centroides))
+                celdas = np.argpartition(-(self.centroides @ consulta), n_sondeos - 1)[:n_sondeos]
+                candidatos = np.fromiter(
+                    (pos for celda in celdas for pos in self.listas[celda]),
+                    dtype=np.int64
+                )
+
+            if excluir is not None and excluir in self.posicion_por_id:
+                candidatos = candidatos[candidatos != self.posicion_por_id[excluir]]
+
+            if len(candidatos) == 0:
+                return []
+
+            puntajes = self.vectores[candidatos] @ consulta
+            k = min(k, len(candidatos))
+            mejores = np.argpartition(-puntajes, k - 1)[:k]
+            mejores = mejores[np.argsort(-puntajes[mejores])]
+
+            return [(self.ids[candidatos[i]], float(puntajes[i])) for i in mejores]
+
+    def similares_a(self, doc_id: str, k: int = 10) -> List[Tuple[str, float]]:
+        """Vecinos de un documento que ya está en el índice."""
+        # Copia bajo el lock: agregar() puede reemplazar self.vectores al crecer
+        with self._lock:
+            pos = self.posicion_por_id.get(doc_id)
+            if pos is None:
+                return []
+            vector = self.vectores[pos].copy()
+
+        return self.buscar(vector, k=k, excluir=doc_id)
+
+    def contiene(self, doc_id: str) -> bool:
+        return doc_id in self.posicion_por_id
+
+    def estadisticas(self) -> Dict:
+        return {
+            "documentos": self.total,
+            "dimension": self.dimension,
+            "listas": 0 if self.centroides is None else len(self.centroides),
+            "sondeos": self.n_sondeos,
+            "exacto": self.centroides is None
+        }
+
+    # ============================================================
+    # PERSISTENCIA
+    # ============================================================
+    def guardar(self, ruta: str) -> bool:
+        temporal = None
+        try:
+            directorio = os.path.dirname(ruta) or "."
+            os.makedirs(directorio, exist_ok=True)
+
+            # Archivo temporal único + os.replace: otro worker nunca carga un .npz a medias
+            descriptor, temporal = tempfile.mkstemp(dir=directorio, suffix=".tmp")
+            with self._lock:
+                with os.fdopen(descriptor, "wb") as f:
+                    np.savez(
+                        f,
+                        vectores=self.vectores[:self.total],
+                        ids=np.array(self.ids, dtype=str),
+                        asignacion=self.asignacion[:self.total],
+                        centroides=self.centroides if self.centroides is not None else np.zeros((0, 0), dtype=np.float32)
+                    )
+                os.replace(temporal, ruta)
+                temporal = None
+                self.sin_guardar = 0
+            return True
+        except Exception as e:
+            print(f"Error al guardar índice ANN: {e}")
+            return False
+        finally:
+            if temporal and os.path.exists(temporal):
+                os.remove(temporal)
+
+    @classmethod
+    def cargar(cls, ruta: str, n_sondeos: int = 8) -> Optional["IndiceANN"]:
+        if not os.path.exists(ruta):
+            return None
+
+        try:
+            datos = np.load(ruta)
+            indice = cls(n_sondeos=n_sondeos)
+
+            vectores = datos["vectores"]
+            ids = [str(i) for i in datos["ids"]]
+            if not ids:
+                return indice
+
+            indice.dimension = vectores.shape[1]
+            indice.vectores = vectores.astype(np.float32)
+            indice.total = len(ids)
+            indice.ids = ids
+            indice.posicion_por_id = {doc_id: i for i, doc_id in enumerate(ids)}
+            indice.asignacion = datos["asignacion"].astype(np.int32)
+
+            centroides = datos["centroides"]
+            if centroides.size:
+                indice.centroides = centroides.astype(np.float32)
+                indice.n_listas = len(centroides)
+                indice.listas = [[] for _ in range(len(centroides))]
+                for pos, celda in enumerate(indice.asignacion.tolist()):
+                    indice.listas[celda].append(pos)
+
+            return indice
+        except Exception as e:
+            print(f"Error al cargar índice ANN {ruta}: {e}")
+            return None
+
+    # ============================================================
+    # UTILIDADES
+    # ============================================================
+    @staticmethod
+    def _normalizar(vectores: np.ndarray) -> np.ndarray:
+        vectores = np.asarray(vectores, dtype=np.float32)
+        if vectores.ndim == 1:
+            vectores = vectores.reshape(1, -1)
+        normas = np.linalg.norm(vectores, axis=1, keepdims=True)
+        normas[normas == 0] = 1.0
+        return vectores / normas
@@ -0,0 +1,169 @@
+# Helpers/limitador.py
+
+import time
+import threading
+from collections import deque
+from contextlib import contextmanager
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+
+class _EstadoHost:
+    """Token bucket + límite de concurrencia de un host."""
+
+    def __init__(self, tasa: float, limite: float):
+        self.tasa = tasa                  # solicitudes por segundo
+        self.tokens = 1.0
+        self.ultimo = time.monotonic()
+        self.limite = limite              # solicitudes simultáneas (AIMD)
+        self.en_vuelo = 0
+        self.pausa_hasta = 0.0            # Retry-After
+        self.ultimo_recorte = 0.0         # instante de la última reducción (AIMD)
+        self.solicitudes = 0
+        self.throttles = 0
+        self.latencias = deque(maxlen=50)
+
+
+class LimitadorHost:
+    """
+    Limitador compartido por host para el scraper.
+    - Token bucket: a lo sumo `tasa` solicitudes por segundo (ráfaga de `rafaga`).
+    - Concurrencia adaptativa AIMD: cada respuesta rápida suma 1/limite
+      (≈ +1 por ventana), un 429/5xx/error o latencia alta la divide a la mitad.
+      La tasa sigue la misma regla. Como en TCP, se reduce una vez por ventana:
+      las respuestas malas de solicitudes enviadas antes del último recorte ya
+      están contempladas en él y no vuelven a dividir.
+    - Respeta Retry-After pausando el host.
+    """
+
+    def __init__(self, tasa_inicial: float = 2.0, tasa_max: float = 20.0, tasa_min: float = 0.2,
+                 concurrencia_inicial: int = 2, concurrencia_max: int = 8,
+                 latencia_objetivo: float = 2.0, rafaga: float = 2.0):
+        self.tasa_inicial = tasa_inicial
+        self.tasa_max = tasa_max
+        self.tasa_min = tasa_min
+        self.concurrencia_inicial = concurrencia_inicial
+        self.concurrencia_max = concurrencia_max
+        self.latencia_objetivo = latencia_objetivo
+        self.rafaga = rafaga
+
+        self.hosts: Dict[str, _EstadoHost] = {}
+        self.eventos = deque(maxlen=50)
+        self._cond = threading.Condition()
+
+    def _host(self, url: str) -> _EstadoHost:
+        host = urlparse(url).netloc
+        if host not in self.hosts:
+            self.hosts[host] = _EstadoHost(self.tasa_inicial, self.concurrencia_inicial)
+        return self.hosts[host]
+
+    # ============================================================
+    # ADQUIRIR / LIBERAR
+    # ============================================================
+    @contextmanager
+    def permiso(self, url: str):
+        """Espera turno para `url`; dentro del bloque hay que llamar a registrar()."""
+        with self._cond:
+            h = self._host(url)
+
+            while True:
+                ahora = time.monotonic()
+                h.tokens = min(self.rafaga, h.tokens + (ahora - h.ultimo) * h.tasa)
+                h.ultimo = ahora
+
+                espera = 0.0
+                if h.pausa_hasta > ahora:
+                    espera = h.pausa_hasta - ahora
+                elif h.en_vuelo >= int(h.limite):
+                    espera = None  # hasta que alguien libere
+                elif h.tokens < 1.0:
+                    espera = (1.0 - h.tokens) / h.tasa
+                else:
+                    h.tokens -= 1.0
+                    h.en_vuelo += 1
+                    h.solicitudes += 1
+                    break
+
+                self._cond.wait(espera)
+
+        try:
+            yield
+        finally:
+            with self._cond:
+                h.en_vuelo -= 1
+                self._cond.notify_all()
+
+    # ============================================================
+    # RETROALIMENTACIÓN (AIMD)
+    # ============================================================
+    def registrar(self, url: str, status: Optional[int], segundos: float,
+                  retry_after: Optional[str] = None):
+        """Ajusta tasa y concurrencia según el resultado. status=None es error de red."""
+        with self._cond:
+            h = self._host(url)
+            h.latencias.append(segundos)
+
+            sobrecarga = status is None or status == 429 or status >= 500
+            lento = segundos > 2 * self.latencia_objetivo
+
+            if sobrecarga or lento:
+                ahora = time.monotonic()
+                # Enviada antes del último recorte: esa sobrecarga ya se descontó
+                recortar = ahora - segundos >= h.ultimo_recorte
+                if recortar:
+                    h.limite = max(1.0, h.limite / 2)
+                    h.tasa = max(self.tasa_min, h.tasa / 2)
+                    h.ultimo_recorte = ahora
+                    h.throttles += 1
+
+                pausa = self._segundos_retry_after(retry_after)
+                if pausa:
+                    h.pausa_hasta = max(h.pausa_hasta, ahora + pausa)
+
+                if recortar or pausa:
+                    self.eventos.append({
+                        "host": urlparse(url).netloc,
+                        "motivo": "error de red" if status is None else (f"HTTP {status}" if sobrecarga else "lento"),
+                        "tasa": round(h.tasa, 2),
+                        "concurrencia": int(h.limite),
+                        "pausa": pausa,
+                        "instante": time.time()
+                    })
+            elif segundos <= self.latencia_objetivo:
+                h.limite = min(float(self.concurrencia_max), h.limite + 1.0 / h.limite)
+                h.tasa = min(self.tasa_max, h.tasa + 0.5 / h.tasa)
+
+            self._cond.notify_all()
+
+    @staticmethod
+    def _segundos_retry_after(valor: Optional[str]) -> float:
+        if not valor:
+            return 0.0
+        try:
+            return max(0.0, float(valor))
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(valor).timestamp() - time.time())
+            except Exception:
+                return 0.0
+
+    # ============================================================
+    # ESTADÍSTICAS
+    # ============================================================
+    def estadisticas(self) -> Dict:
+        with self._cond:
+            return {
+                "hosts": {
+                    host: {
+                        "tasa": round(h.tasa, 2),
+                        "concurrencia": int(h.limite),
+                        "en_vuelo": h.en_vuelo,
+                        "solicitudes": h.solicitudes,
+                        "throttles": h.throttles,
+                        "latencia_media": round(sum(h.latencias) / len(h.latencias), 3) if h.latencias else 0.0
+                    }
+                    for host, h in self.hosts.items()
+                },
+                "eventos": list(self.eventos)[-10:]
+            }
@@ -0,0 +1,365 @@
+# Helpers/metricas.py
+
+import os
+import time
+import atexit
+import bisect
+import inspect
+import functools
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+from Helpers.funciones import Funciones
+
+try:
+    import fcntl
+except ImportError:  # Windows: sin gunicorn no hay volcados que combinar entre procesos
+    fcntl = None
+
+
+# Cubetas en segundos: de 5 ms (búsqueda en caché) a 60 s (bulk grande, OCR)
+CUBETAS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _formatear(numero: float) -> str:
+    if numero == float("inf"):
+        return "+Inf"
+    return repr(float(numero)) if isinstance(numero, float) and not numero.is_integer() else str(int(numero))
+
+
+class _Familia:
+    """Una métrica con etiquetas: cada combinación de valores es una serie."""
+
+    tipo = ""
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str]):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self.series: Dict[Tuple[str, ...], object] = {}
+        self.lock = threading.Lock()
+
+    def _etiquetas(self, valores: Tuple, extra: str = "") -> str:
+        pares = [f'{k}="{_escapar(v)}"' for k, v in zip(self.etiquetas, valores)]
+        if extra:
+            pares.append(extra)
+        return "{" + ",".join(pares) + "}" if pares else ""
+
+    def _cabecera(self, sufijo: str = "") -> List[str]:
+        return [f"# HELP {self.nombre}{sufijo} {self.ayuda}", f"# TYPE {self.nombre}{sufijo} {self.tipo}"]
+
+
+class Contador(_Familia):
+    tipo = "counter"
+
+    def sumar(self, valor: float = 1, *etiquetas):
+        with self.lock:
+            self.series[etiquetas] = self.series.get(etiquetas, 0) + valor
+
+    def exportar(self) -> List[str]:
+        lineas = self._cabecera("_total")
+        for valores, total in sorted(self.series.items()):
+            lineas.append(f"{self.nombre}_total{self._etiquetas(valores)} {_formatear(total)}")
+        return lineas
+
+
+class Medidor(Contador):
+    """Valor que sube y baja (solicitudes en curso, trabajos ejecutando)."""
+
+    tipo = "gauge"
+
+    def fijar(self, valor: float, *etiquetas):
+        with self.lock:
+            self.series[etiquetas] = valor
+
+    @contextmanager
+    def en_curso(self, *etiquetas) -> Iterator[None]:
+        self.sumar(1, *etiquetas)
+        try:
+            yield
+        finally:
+            self.sumar(-1, *etiquetas)
+
+    def exportar(self) -> List[str]:
+        lineas = self._cabecera()
+        for valores, valor in sorted(self.series.items()):
+            lineas.append(f"{self.nombre}{self._etiquetas(valores)} {_formatear(valor)}")
+        return lineas
+
+
+class Histograma(_Familia):
+    """
+    Conteos por cubeta + suma + total. Observar cuesta una búsqueda binaria
+    y tres sumas bajo el lock de la familia.
+    """
+
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str],
+                 cubetas: Sequence[float] = CUBETAS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.cubetas = tuple(sorted(cubetas))
+
+    def observar(self, valor: float, *etiquetas):
+        i = bisect.bisect_left(self.cubetas, valor)
+        with self.lock:
+            serie = self.series.get(etiquetas)
+            if serie is None:
+                # [conteo por cubeta (la última es +Inf), suma]
+                serie = self.series[etiquetas] = [[0] * (len(self.cubetas) + 1), 0.0]
+            serie[0][i] += 1
+            serie[1] += valor
+
+    @contextmanager
+    def medir(self, *etiquetas) -> Iterator[None]:
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observar(time.perf_counter() - inicio, *etiquetas)
+
+    def exportar(self) -> List[str]:
+        lineas = self._cabecera()
+        limites = self.cubetas + (float("inf"),)
+        for valores, (conteos, suma) in sorted(self.series.items()):
+            acumulado = 0
+            for limite, conteo in zip(limites, conteos):
+                acumulado += conteo
+                le = f'le="{_formatear(limite)}"'
+                lineas.append(f"{self.nombre}_bucket{self._etiquetas(valores, le)} {acumulado}")
+            lineas.append(f"{self.nombre}_sum{self._etiquetas(valores)} {_formatear(suma)}")
+            lineas.append(f"{self.nombre}_count{self._etiquetas(valores)} {acumulado}")
+        return lineas
+
+
+class Metricas:
+    """
+    Registro de métricas en memoria con salida en formato de texto de Prometheus.
+    - Un proceso (python app.py): /metrics exporta lo de ese proceso.
+    - Varios workers de gunicorn: con `carpeta`, cada worker vuelca su estado
+      cada `intervalo` segundos y /metrics suma los volcados de los workers vivos
+      y lo acumulado de los que ya terminaron.
+    """
+
+    ACUMULADO = "acumulado.json"
+
+    def __init__(self):
+        self.familias: Dict[str, _Familia] = {}
+        self._lock = threading.Lock()
+        self.carpeta: Optional[str] = None
+        self.intervalo = 5.0
+        self._hilo: Optional[threading.Thread] = None
+        self._pid_hilo: Optional[int] = None
+
+    # ============================================================
+    # REGISTRO
+    # ============================================================
+    def _registrar(self, clase, nombre: str, ayuda: str, etiquetas: Sequence[str], **kwargs):
+        with self._lock:
+            familia = self.familias.get(nombre)
+            if familia is None:
+                familia = self.familias[nombre] = clase(nombre, ayuda, etiquetas, **kwargs)
+            return familia
+
+    def contador(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Contador:
+        return self._registrar(Contador, nombre, ayuda, etiquetas)
+
+    def medidor(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()) -> Medidor:
+        return self._registrar(Medidor, nombre, ayuda, etiquetas)
+
+    def histograma(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (),
+                   cubetas: Sequence[float] = CUBETAS_LATENCIA) -> Histograma:
+        return self._registrar(Histograma, nombre, ayuda, etiquetas, cubetas=cubetas)
+
+    # ============================================================
+    # EXPORTACIÓN
+    # ============================================================
+    def exportar(self) -> str:
+        """Texto para /metrics (Content-Type text/plain; version=0.0.4)."""
+        if self.carpeta:
+            self._volcar()
+            familias = self._combinar_volcados()
+        else:
+            familias = self.familias
+
+        lineas = []
+        for nombre in sorted(familias):
+            familia = familias[nombre]
+            with familia.lock:
+                lineas.extend(familia.exportar())
+        return "\n".join(lineas) + "\n"
+
+    # ============================================================
+    # MULTIPROCESO (workers de gunicorn)
+    # ============================================================
+    def configurar_multiproceso(self, carpeta: str, intervalo: float = 5.0):
+        self.carpeta = carpeta
+        self.intervalo = intervalo
+        Funciones.crear_carpeta(carpeta)
+
+    def iniciar_volcado(self):
+        """Arranca el hilo de volcado de este proceso (llamar después del fork)."""
+        if not self.carpeta or self._pid_hilo == os.getpid():
+            return
+        self._pid_hilo = os.getpid()
+        self._hilo = threading.Thread(target=self._ciclo_volcado, name="metricas-volcado", daemon=True)
+        self._hilo.start()
+        # Último volcado al salir (reciclado del worker): no se pierden los segundos finales
+        atexit.register(self._volcar)
+
+    def _ciclo_volcado(self):
+        while True:
+            time.sleep(self.intervalo)
+            self._volcar()
+
+    def _volcar(self):
+        ruta = os.path.join(self.carpeta, f"{os.getpid()}.json")
+        Funciones.guardar_json(ruta, self._serializar(self.familias))
+
+    @staticmethod
+    def _serializar(familias: Dict[str, _Familia]) -> Dict:
+        datos = {}
+        for nombre, familia in list(familias.items()):
+            with familia.lock:
+                series = [
+                    [list(valores), [list(valor[0]), valor[1]] if isinstance(valor, list) else valor]
+                    for valores, valor in familia.series.items()
+                ]
+            datos[nombre] = {
+                "tipo": familia.tipo, "ayuda": familia.ayuda, "etiquetas": list(familia.etiquetas),
+                "cubetas": list(getattr(familia, "cubetas", ())), "series": series
+            }
+        return datos
+
+    def _combinar_volcados(self) -> Dict[str, _Familia]:
+        """
+        Suma los volcados de los workers vivos más `acumulado.json`, donde quedan
+        los contadores e histogramas de los workers ya terminados: así un total
+        no baja cuando gunicorn recicla un worker. Los medidores de un worker
+        terminado se descartan (ya no hay nada en curso). Todo bajo un lock de
+        archivo para que dos workers no plieguen el mismo volcado dos veces.
+        """
+        familias: Dict[str, _Familia] = {}
+
+        with self._bloqueo_carpeta():
+            self._plegar_terminados()
+
+            for archivo in os.listdir(self.carpeta):
+                if archivo.endswith(".json"):
+                    self._sumar_volcado(familias, Funciones.leer_json(os.path.join(self.carpeta, archivo)))
+
+        return familias
+
+    def _plegar_terminados(self):
+        terminados = [
+            os.path.join(self.carpeta, archivo) for archivo in os.listdir(self.carpeta)
+            if archivo.endswith(".json") and archivo[:-5].isdigit() and not self._proceso_vivo(int(archivo[:-5]))
+        ]
+        if not terminados:
+            return
+
+        ruta_acumulado = os.path.join(self.carpeta, self.ACUMULADO)
+        acumulado: Dict[str, _Familia] = {}
+        if os.path.exists(ruta_acumulado):
+            self._sumar_volcado(acumulado, Funciones.leer_json(ruta_acumulado))
+        for ruta in terminados:
+            self._sumar_volcado(acumulado, Funciones.leer_json(ruta), medidores=False)
+
+        if Funciones.guardar_json(ruta_acumulado, self._serializar(acumulado)):
+            for ruta in terminados:
+                try:
+                    os.remove(ruta)
+                except OSError:
+                    pass
+
+    @staticmethod
+    def _sumar_volcado(familias: Dict[str, _Familia], datos: Dict, medidores: bool = True):
+        clases = {"counter": Contador, "gauge": Medidor, "histogram": Histograma}
+
+        for nombre, d in datos.items():
+            if d["tipo"] == "gauge" and not medidores:
+                continue
+            familia = familias.get(nombre)
+            if familia is None:
+                extra = {"cubetas": d["cubetas"]} if d["tipo"] == "histogram" else {}
+                familia = familias[nombre] = clases[d["tipo"]](nombre, d["ayuda"], d["etiquetas"], **extra)
+
+            for valores, valor in d["series"]:
+                clave = tuple(valores)
+                if d["tipo"] == "histogram":
+                    actual = familia.series.setdefault(clave, [[0] * len(valor[0]), 0.0])
+                    actual[0] = [a + b for a, b in zip(actual[0], valor[0])]
+                    actual[1] += valor[1]
+                else:
+                    familia.series[clave] = familia.series.get(clave, 0) + valor
+
+    @contextmanager
+    def _bloqueo_carpeta(self) -> Iterator[None]:
+        with open(os.path.join(self.carpeta, ".bloqueo"), "w") as f:
+            if fcntl is not None:
+                fcntl.flock(f, fcntl.LOCK_EX)
+            yield
+
+    @staticmethod
+    def _proceso_vivo(pid: int) -> bool:
+        try:
+            os.kill(pid, 0)
+            return True
+        except PermissionError:
+            return True
+        except OSError:
+            return False
+
+
+# Registro único del proceso: los módulos registran sus métricas al importarse
+METRICAS = Metricas()
+
+BACKEND_DURACION = METRICAS.histograma(
+    "backend_duracion_segundos", "Duración de cada método de Elastic/Mongo", ("backend", "metodo")
+)
+BACKEND_ERRORES = METRICAS.contador(
+    "backend_errores", "Llamadas a Elastic/Mongo que fallaron o retornaron error", ("backend", "metodo")
+)
+BACKEND_EN_CURSO = METRICAS.medidor(
+    "backend_en_curso", "Llamadas a Elastic/Mongo en curso", ("backend",)
+)
+
+
+def instrumentar(backend: str):
+    """
+    Decorador de clase: mide cada método público (latencia, errores y en curso)
+    con las métricas backend_*. Un error es una excepción o un retorno False /
+    {"success": False}, que es como los Helpers informan fallas.
+    """
+    def decorar(clase):
+        for nombre, metodo in list(vars(clase).items()):
+            if nombre.startswith("_") or not inspect.isfunction(metodo) or nombre == "close":
+                continue
+            if inspect.isgeneratorfunction(metodo):
+                continue  # el tiempo real está en la iteración, no en la llamada
+            setattr(clase, nombre, _medir_metodo(backend, nombre, metodo))
+        return clase
+    return decorar
+
+
+def _medir_metodo(backend: str, nombre: str, metodo):
+    @functools.wraps(metodo)
+    def envoltura(*args, **kwargs):
+        BACKEND_EN_CURSO.sumar(1, backend)
+        inicio = time.perf_counter()
+        error = True
+        try:
+            resultado = metodo(*args, **kwargs)
+            error = resultado is False or (isinstance(resultado, dict) and resultado.get("success") is False)
+            return resultado
+        finally:
+            BACKEND_DURACION.observar(time.perf_counter() - inicio, backend, nombre)
+            BACKEND_EN_CURSO.sumar(-1, backend)
+            if error:
+                BACKEND_ERRORES.sumar(1, backend, nombre)
+    return envoltura
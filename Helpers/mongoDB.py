@@ -1,15 +1,43 @@
-from pymongo import MongoClient
-from pymongo.errors import ConnectionFailure
+from pymongo import MongoClient, monitoring, ASCENDING
+from pymongo.errors import ConnectionFailure, DuplicateKeyError
 from typing import Dict, List, Optional
 import hashlib
 
+from Helpers.metricas import METRICAS, instrumentar
 
+
+COMANDO_DURACION = METRICAS.histograma(
+    "mongo_comando_duracion_segundos", "Duración de cada comando del driver (find, insert...)", ("comando",)
+)
+COMANDO_ERRORES = METRICAS.contador(
+    "mongo_comando_errores", "Comandos del driver que fallaron", ("comando",)
+)
+
+
+class _MonitorComandos(monitoring.CommandListener):
+    """Latencia por comando del driver: find_one → find, insert_one → insert..."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        COMANDO_DURACION.observar(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event):
+        COMANDO_DURACION.observar(event.duration_micros / 1e6, event.command_name)
+        COMANDO_ERRORES.sumar(1, event.command_name)
+
+
+@instrumentar("mongodb")
 class MongoDB:
     """Manejador de conexión y operaciones con MongoDB."""
 
+    # Lecturas de usuarios sin la contraseña: no viaja desde Atlas si no se usa
+    SIN_PASSWORD = {"password": 0}
+
     def __init__(self, uri: str, db_name: str):
         """Inicializa la conexión con MongoDB."""
-        self.client = MongoClient(uri)
+        self.client = MongoClient(uri, event_listeners=[_MonitorComandos()])
         self.db = self.client[db_name]
 
     # ---------------------------------------------------------
@@ -23,6 +51,22 @@ class MongoDB:
         except ConnectionFailure:
             return False
 
+    def asegurar_indices(self, coleccion: str) -> bool:
+        """Índice único en `usuario` (llamar al arrancar; si ya existe no hace nada).
+
+        Las búsquedas por usuario dejan de recorrer la colección y el índice
+        es el que detecta duplicados en crear/actualizar sin consultar antes.
+        """
+        try:
+            self.db[coleccion].create_index([("usuario", ASCENDING)], unique=True, name="usuario_unico")
+            return True
+        except DuplicateKeyError as e:
+            print(f"No se pudo crear el índice único de usuarios (hay duplicados): {e}")
+            return False
+        except Exception as e:
+            print(f"Error al crear índices de usuarios: {e}")
+            return False
+
     # ---------------------------------------------------------
     # USUARIOS
     # ---------------------------------------------------------
@@ -38,31 +82,49 @@ class MongoDB:
             return self.db[coleccion].find_one({
                 "usuario": usuario,
                 "password": password_validado
-            })
+            }, self.SIN_PASSWORD)
 
         except Exception as e:
             print(f"Error al validar usuario: {e}")
             return None
 
     def obtener_usuario(self, usuario: str, coleccion: str) -> Optional[Dict]:
-        """Obtiene un usuario por su nombre."""
+        """Obtiene un usuario por su nombre (sin la contraseña)."""
         try:
-            return self.db[coleccion].find_one({"usuario": usuario})
+            return self.db[coleccion].find_one({"usuario": usuario}, self.SIN_PASSWORD)
         except Exception as e:
             print(f"Error al obtener usuario: {e}")
             return None
 
-    def listar_usuarios(self, coleccion: str) -> List[Dict]:
-        """Retorna la lista completa de usuarios."""
+    def listar_usuarios(self, coleccion: str, limite: int = 100, despues: str = None) -> Dict:
+        """Página de usuarios ordenados por nombre, sin contraseña.
+
+        Paginación por cursor: `despues` es el último usuario de la página
+        anterior (el valor de "siguiente"); None en la última página.
+        """
         try:
-            return list(self.db[coleccion].find({}))
+            filtro = {"usuario": {"$gt": despues}} if despues else {}
+            cursor = (self.db[coleccion]
+                      .find(filtro, {"password": 0, "_id": 0})
+                      .sort("usuario", ASCENDING)
+                      .limit(limite + 1))
+            usuarios = list(cursor)
+
+            siguiente = None
+            if len(usuarios) > limite:
+                usuarios = usuarios[:limite]
+                siguiente = usuarios[-1]["usuario"]
+
+            return {"success": True, "usuarios": usuarios, "siguiente": siguiente}
+
         except Exception as e:
             print(f"Error al listar usuarios: {e}")
-            return []
+            return {"success": False, "usuarios": [], "siguiente": None, "error": str(e)}
 
-    def crear_usuario(self, usuario: str, password: str, permisos: Dict, coleccion: str) -> bool:
-        """Crea un nuevo usuario.
+    def crear_usuario(self, usuario: str, password: str, permisos: Dict, coleccion: str) -> Dict:
+        """Crea un nuevo usuario en una sola operación.
 
+        Retorna {"success": True} o {"success": False, "motivo": "duplicado" | "error"}.
         **MD5 está deshabilitado** para pruebas.
         """
         try:
@@ -75,35 +137,57 @@ class MongoDB:
                 "permisos": permisos
             }
 
-            self.db[coleccion].insert_one(documento)
-            return True
+            # Solo inserta si no existe; el índice único cubre dos altas simultáneas
+            resultado = self.db[coleccion].update_one(
+                {"usuario": usuario},
+                {"$setOnInsert": documento},
+                upsert=True
+            )
+            if resultado.upserted_id is None:
+                return {"success": False, "motivo": "duplicado", "error": "El usuario ya existe"}
+            return {"success": True}
 
+        except DuplicateKeyError:
+            return {"success": False, "motivo": "duplicado", "error": "El usuario ya existe"}
         except Exception as e:
             print(f"Error al crear usuario: {e}")
-            return False
+            return {"success": False, "motivo": "error", "error": str(e)}
+
+    def actualizar_usuario(self, usuario: str, nuevos_datos: Dict, coleccion: str) -> Dict:
+        """Actualiza un usuario existente en una sola operación.
 
-    def actualizar_usuario(self, usuario: str, nuevos_datos: Dict, coleccion: str) -> bool:
-        """Actualiza un usuario existente."""
+        Retorna {"success": True} o {"success": False, "motivo": "no_encontrado" | "duplicado" | "error"}
+        ("duplicado": el nuevo nombre ya es de otro usuario).
+        """
         try:
-            self.db[coleccion].update_one(
+            resultado = self.db[coleccion].update_one(
                 {"usuario": usuario},
                 {"$set": nuevos_datos}
             )
-            return True
+            if resultado.matched_count == 0:
+                return {"success": False, "motivo": "no_encontrado", "error": "Usuario no encontrado"}
+            return {"success": True}
 
+        except DuplicateKeyError:
+            return {"success": False, "motivo": "duplicado", "error": "Ya existe otro usuario con ese nombre"}
         except Exception as e:
             print(f"Error al actualizar usuario: {e}")
-            return False
+            return {"success": False, "motivo": "error", "error": str(e)}
+
+    def eliminar_usuario(self, usuario: str, coleccion: str) -> Dict:
+        """Elimina un usuario por nombre.
 
-    def eliminar_usuario(self, usuario: str, coleccion: str) -> bool:
-        """Elimina un usuario por nombre."""
+        Retorna {"success": True} o {"success": False, "motivo": "no_encontrado" | "error"}.
+        """
         try:
             resultado = self.db[coleccion].delete_one({"usuario": usuario})
-            return resultado.deleted_count > 0
+            if resultado.deleted_count == 0:
+                return {"success": False, "motivo": "no_encontrado", "error": "Usuario no encontrado"}
+            return {"success": True}
 
         except Exception as e:
             print(f"Error al eliminar usuario: {e}")
-            return False
+            return {"success": False, "motivo": "error", "error": str(e)}
 
     # ---------------------------------------------------------
     # CIERRE
@@ -0,0 +1,426 @@
+# Helpers/pipelineIngesta.py
+
+import os
+import time
+import hashlib
+import threading
+from queue import Queue, Empty
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from Helpers import Funciones
+from Helpers.metricas import METRICAS
+from Helpers.trazas import tramo, propagar
+
+ETAPA_ITEMS = METRICAS.contador(
+    "ingesta_items", "Items procesados por etapa del pipeline de ingesta", ("etapa", "resultado")
+)
+ETAPA_DURACION = METRICAS.histograma(
+    "ingesta_etapa_duracion_segundos", "Tiempo de trabajo por item y etapa del pipeline", ("etapa",)
+)
+ETAPA_EN_CURSO = METRICAS.medidor(
+    "ingesta_pipelines_en_curso", "Pipelines de ingesta ejecutándose"
+)
+
+
+class _Etapa:
+    """Contadores y tiempos de una etapa del pipeline."""
+
+    def __init__(self, nombre: str, workers: int):
+        self.nombre = nombre
+        self.workers = workers
+        self.procesados = 0
+        self.errores = 0
+        self.segundos = 0.0
+        self.inicio: Optional[float] = None
+        self.fin: Optional[float] = None
+        self.vivos = workers
+        self.lock = threading.Lock()
+
+    def sumar(self, segundos: float, error: bool = False):
+        with self.lock:
+            self.procesados += 1
+            self.errores += int(error)
+            self.segundos += segundos
+        ETAPA_ITEMS.sumar(1, self.nombre, "error" if error else "ok")
+        ETAPA_DURACION.observar(segundos, self.nombre)
+
+    def resumen(self, inicio_pipeline: float) -> Dict:
+        return {
+            "workers": self.workers,
+            "procesados": self.procesados,
+            "errores": self.errores,
+            "segundos_trabajo": round(self.segundos, 2),
+            "termino_en": round(self.fin - inicio_pipeline, 2) if self.fin else None
+        }
+
+
+class PipelineIngesta:
+    """
+    Ingesta en un solo trabajo: scraping → descarga → extracción → indexación.
+    Cada etapa es un pool de workers unido a la siguiente por una cola acotada:
+    - Los links se encolan por página apenas se leen del listado.
+    - Cada archivo descargado pasa de inmediato a extracción de texto.
+    - El indexador envía lotes a Elastic por tamaño o por tiempo.
+    Así los primeros documentos quedan buscables en segundos y el tiempo total
+    se acerca al de la etapa más lenta, no a la suma de todas.
+    """
+
+    FIN = object()  # marca de fin de cola
+
+    def __init__(self, scraper, elastic_instance, index_name: str,
+                 carpeta_destino: str = "static/uploads",
+                 workers_descarga: int = 8, workers_extraccion: int = 2,
+                 tamano_lote: int = 50, espera_lote: float = 2.0, tamano_cola: int = 100,
+                 detector_duplicados=None, colapsar_duplicados: bool = False,
+                 al_indexar: Optional[Callable[[int], None]] = None, tipos: List[str] = None):
+        self.scraper = scraper
+        self.elastic = elastic_instance
+        self.index = index_name
+        self.carpeta_destino = carpeta_destino
+        self.workers_descarga = workers_descarga
+        self.workers_extraccion = workers_extraccion
+        self.tamano_lote = tamano_lote
+        self.espera_lote = espera_lote
+        self.tamano_cola = tamano_cola
+        self.detector = detector_duplicados
+        self.colapsar_duplicados = colapsar_duplicados
+        self.al_indexar = al_indexar
+        self.tipos = scraper.normalizar_tipos(tipos)
+
+        self.cancelado = threading.Event()
+        self.errores: List[Dict] = []
+        self._lock_errores = threading.Lock()
+        self.etapas: Dict[str, _Etapa] = {}
+        self.resultado_indexacion = {"indexados": 0, "fallidos": 0}
+        self.corrida = None
+
+    # ============================================================
+    # DOCUMENTO PARA ELASTIC
+    # ============================================================
+    @staticmethod
+    def crear_documento(texto: str, ruta: str, nombre_archivo: str, url: Optional[str] = None) -> Dict:
+        """
+        Documento base; resumen/entidades/temas los completa el EnriquecedorNLP.
+        El `_id` es estable entre corridas (también para el DetectorDuplicados):
+        sale de la `url` (una versión modificada reemplaza a la anterior) o, sin
+        ella, del contenido. Nunca de la ruta local, que es temporal.
+        """
+        documento = {
+            'texto': texto,
+            'fecha': datetime.now().isoformat(),
+            'ruta': ruta,
+            'nombre_archivo': nombre_archivo,
+            'resumen': '',
+            'entidades': {},
+            'temas': [],
+            'enriquecido': False
+        }
+        documento['_id'] = hashlib.sha1((url or texto).encode('utf-8')).hexdigest()
+        if url:
+            documento['url'] = url
+        return documento
+
+    # ============================================================
+    # EJECUCIÓN
+    # ============================================================
+    def ejecutar(self) -> Dict:
+        Funciones.crear_carpeta(self.carpeta_destino)
+
+        cola_links: Queue = Queue(maxsize=self.tamano_cola)
+        cola_archivos: Queue = Queue(maxsize=self.tamano_cola)
+        cola_documentos: Queue = Queue(maxsize=self.tamano_cola)
+
+        self.etapas = {
+            "descubrimiento": _Etapa("descubrimiento", self.scraper.max_secciones),
+            "descarga": _Etapa("descarga", self.workers_descarga),
+            "extraccion": _Etapa("extraccion", self.workers_extraccion),
+            "indexacion": _Etapa("indexacion", 1),
+        }
+        self.inicio = time.perf_counter()
+        self.primer_indexado: Optional[float] = None
+        self.resultado_indexacion = {"indexados": 0, "fallidos": 0}
+        self.corrida = self.detector.nueva_corrida() if self.detector is not None else None
+
+        session = self.scraper._crear_sesion(self.workers_descarga)
+
+        hilos = [
+            threading.Thread(target=propagar(self._descubrir), args=(cola_links,), name="pipeline-descubrir")
+        ]
+        hilos += [
+            threading.Thread(target=propagar(self._descargar), args=(session, cola_links, cola_archivos),
+                             name=f"pipeline-descarga-{i}")
+            for i in range(self.workers_descarga)
+        ]
+        hilos += [
+            threading.Thread(target=propagar(self._extraer), args=(cola_archivos, cola_documentos),
+                             name=f"pipeline-extraccion-{i}")
+            for i in range(self.workers_extraccion)
+        ]
+        hilos.append(
+            threading.Thread(target=propagar(self._indexar), args=(cola_documentos,), name="pipeline-indexar")
+        )
+
+        with ETAPA_EN_CURSO.en_curso():
+            for hilo in hilos:
+                hilo.start()
+            for hilo in hilos:
+                hilo.join()
+
+        session.close()
+        # Solo las URLs de documentos indexados quedan confirmadas (ver _enviar_lote);
+        # lo demás queda pendiente aunque la corrida haya fallado o se haya cancelado
+        if self.scraper.estado is not None:
+            self.scraper.estado.guardar()
+
+        return self.estadisticas()
+
+    def cancelar(self):
+        self.cancelado.set()
+
+    def progreso(self) -> Dict:
+        """Conteo liviano por etapa, para consultar mientras el pipeline corre."""
+        return {
+            "etapas": {nombre: e.procesados for nombre, e in self.etapas.items()},
+            "indexados": self.resultado_indexacion["indexados"]
+        }
+
+    # ============================================================
+    # ETAPAS
+    # ============================================================
+    def _descubrir(self, cola_links: Queue):
+        etapa = self.etapas["descubrimiento"]
+        etapa.inicio = time.perf_counter()
+        vistos = set()
+        lock = threading.Lock()
+
+        def seccion(item):
+            nombre, url_seccion = item
+            try:
+                for links in self.scraper.iterar_paginas_seccion(url_seccion, self.tipos):
+                    inicio = time.perf_counter()
+                    for link in links:
+                        if self.cancelado.is_set():
+                            return
+                        link["seccion"] = nombre
+
+                        with lock:
+                            if link["url"] in vistos:
+                                continue
+                            vistos.add(link["url"])
+
+                        if self.scraper.estado is not None:
+                            self.scraper.estado.registrar_link(link)
+
+                        # PDF, DOCX y XLSX comparten descarga y extracción
+                        if link["type"] in self.tipos:
+                            cola_links.put(link)
+                    etapa.sumar(time.perf_counter() - inicio)
+            except Exception as e:
+                etapa.sumar(0.0, error=True)
+                self._registrar_error("descubrimiento", url_seccion, e)
+
+        try:
+            with ThreadPoolExecutor(max_workers=self.scraper.max_secciones) as pool:
+                list(pool.map(propagar(seccion), self.scraper.SECCIONES.items()))
+        except Exception as e:
+            self._fallar("descubrimiento", e)
+        finally:
+            etapa.fin = time.perf_counter()
+            for _ in range(self.workers_descarga):
+                cola_links.put(self.FIN)
+
+    def _descargar(self, session, cola_links: Queue, cola_archivos: Queue):
+        etapa = self.etapas["descarga"]
+
+        try:
+            while True:
+                link = cola_links.get()
+                if link is self.FIN:
+                    break
+                if self.cancelado.is_set():
+                    continue
+
+                try:
+                    resultado = self.scraper.descargar_link(session, link, self.carpeta_destino)
+                except Exception as e:
+                    etapa.sumar(0.0, error=True)
+                    self._registrar_error("descarga", link["url"], e)
+                    continue
+                etapa.sumar(resultado["segundos"], error=not resultado["ok"])
+
+                if not resultado["ok"]:
+                    self._registrar_error("descarga", link["url"], resultado["error"])
+                elif resultado["cambiado"]:
+                    cola_archivos.put(resultado)
+        except Exception as e:
+            self._fallar("descarga", e, cola_links)
+        finally:
+            self._cerrar_etapa(etapa, cola_archivos, self.workers_extraccion)
+
+    def _extraer(self, cola_archivos: Queue, cola_documentos: Queue):
+        etapa = self.etapas["extraccion"]
+
+        try:
+            while True:
+                descarga = cola_archivos.get()
+                if descarga is self.FIN:
+                    break
+                if self.cancelado.is_set():
+                    continue
+
+                ruta = descarga["ruta"]
+                inicio = time.perf_counter()
+                try:
+                    texto = Funciones.extraer_texto_archivo(ruta, os.path.splitext(ruta)[1])
+                    if texto and len(texto.strip()) >= 50:
+                        cola_documentos.put(
+                            self.crear_documento(texto, ruta, os.path.basename(ruta), url=descarga["url"])
+                        )
+                    else:
+                        # Sin texto útil no hay nada que indexar: ya está procesado
+                        self._confirmar([descarga["url"]])
+                    etapa.sumar(time.perf_counter() - inicio)
+                except Exception as e:
+                    etapa.sumar(time.perf_counter() - inicio, error=True)
+                    self._registrar_error("extraccion", ruta, e)
+        except Exception as e:
+            self._fallar("extraccion", e, cola_archivos)
+        finally:
+            self._cerrar_etapa(etapa, cola_documentos, 1)
+
+    def _indexar(self, cola_documentos: Queue):
+        etapa = self.etapas["indexacion"]
+        lote: List[Dict] = []
+        limite = time.perf_counter() + self.espera_lote
+
+        try:
+            while True:
+                try:
+                    doc = cola_documentos.get(timeout=max(0.05, limite - time.perf_counter()))
+                except Empty:
+                    doc = None
+
+                terminado = doc is self.FIN
+                if doc is not None and not terminado and not self.cancelado.is_set():
+                    lote.append(doc)
+
+                # Enviar por tamaño, por tiempo o al final
+                if lote and (terminado or len(lote) >= self.tamano_lote or time.perf_counter() >= limite):
+                    try:
+                        self._enviar_lote(etapa, lote)
+                    except Exception as e:
+                        # Un lote fallido no detiene la indexación: se registra y se sigue
+                        etapa.sumar(0.0, error=True)
+                        self._registrar_error("indexacion", self.index, e)
+                    lote = []
+
+                if time.perf_counter() >= limite:
+                    limite = time.perf_counter() + self.espera_lote
+
+                if terminado:
+                    break
+        except Exception as e:
+            self._fallar("indexacion", e, cola_documentos)
+        finally:
+            etapa.fin = time.perf_counter()
+
+    def _enviar_lote(self, etapa: _Etapa, lote: List[Dict]):
+        inicio = time.perf_counter()
+        recibidos = lote
+
+        if self.detector is not None:
+            lote = self.detector.filtrar_documentos(
+                lote, "_id", "texto", colapsar=self.colapsar_duplicados, corrida=self.corrida
+            )
+        if not lote:
+            self._confirmar(d.get("url") for d in recibidos)
+            return
+
+        try:
+            with tramo("lote", documentos=len(lote)):
+                resultado = self.elastic.indexar_bulk(self.index, lote)
+        except Exception:
+            self._descartar_duplicados()
+            raise
+        etapa.sumar(time.perf_counter() - inicio, error=not resultado.get("success"))
+
+        if not resultado.get("success"):
+            self._descartar_duplicados()
+            self._registrar_error("indexacion", self.index, resultado.get("error"))
+            return
+
+        self.resultado_indexacion["indexados"] += resultado["indexados"]
+        self.resultado_indexacion["fallidos"] += resultado["fallidos"]
+
+        # Al EstadoCrawl solo pasa lo indexado: lo demás se vuelve a descargar la próxima vez.
+        # Los colapsados en un canónico cuentan si todo el lote entró.
+        fallidos = set(resultado.get("ids_fallidos", []))
+        if self.detector is not None:
+            self.detector.confirmar(self.corrida, excluir=fallidos)
+        self._confirmar(
+            d.get("url") for d in (lote if fallidos else recibidos)
+            if d.get("_id") not in fallidos
+        )
+
+        if self.primer_indexado is None and resultado["indexados"]:
+            self.primer_indexado = time.perf_counter()
+        if self.al_indexar:
+            self.al_indexar(resultado["indexados"])
+
+    # ============================================================
+    # UTILIDADES
+    # ============================================================
+    def _descartar_duplicados(self):
+        """Un lote que no llegó a Elastic no deja firmas en el detector."""
+        if self.corrida is not None:
+            self.corrida.descartar()
+
+    def _confirmar(self, urls):
+        if self.scraper.estado is not None:
+            for url in urls:
+                if url:
+                    self.scraper.estado.confirmar(url)
+
+    def _cerrar_etapa(self, etapa: _Etapa, cola_siguiente: Queue, workers_siguiente: int):
+        """El último worker de una etapa cierra la cola de la siguiente."""
+        with etapa.lock:
+            etapa.vivos -= 1
+            ultimo = etapa.vivos == 0
+        if ultimo:
+            etapa.fin = time.perf_counter()
+            for _ in range(workers_siguiente):
+                cola_siguiente.put(self.FIN)
+
+    def _fallar(self, etapa: str, error, cola_entrada: Queue = None):
+        """
+        Error inesperado en el bucle de una etapa: cancela el pipeline y sigue
+        consumiendo su cola hasta el FIN, para que las etapas anteriores no
+        queden bloqueadas en un put() sobre una cola llena.
+        """
+        self._registrar_error(etapa, "pipeline", error)
+        self.cancelado.set()
+        if cola_entrada is not None:
+            while cola_entrada.get() is not self.FIN:
+                pass
+
+    def _registrar_error(self, etapa: str, item: str, error):
+        print(f"Error en pipeline ({etapa}) {item}: {error}")
+        with self._lock_errores:
+            self.errores.append({"etapa": etapa, "item": item, "error": str(error)})
+
+    def estadisticas(self) -> Dict:
+        total = time.perf_counter() - self.inicio
+        return {
+            "success": not self.cancelado.is_set(),
+            "cancelado": self.cancelado.is_set(),
+            "segundos": round(total, 2),
+            "primer_documento_buscable": round(self.primer_indexado - self.inicio, 2) if self.primer_indexado else None,
+            "indexados": self.resultado_indexacion["indexados"],
+            "fallidos": self.resultado_indexacion["fallidos"],
+            "etapas": {nombre: e.resumen(self.inicio) for nombre, e in self.etapas.items()},
+            "duplicados": self.detector.estadisticas(self.corrida) if self.detector is not None else None,
+            "limitador": self.scraper.limitador.estadisticas(),
+            "errores": self.errores[:50]
+        }
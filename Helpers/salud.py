@@ -0,0 +1,149 @@
+# Helpers/salud.py
+
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import Callable, Dict, Optional
+
+
+class MonitorSalud:
+    """
+    Verificaciones de dependencias (Mongo, Elastic, modelos, disco) para /readyz.
+    Un hilo por proceso las repite cada `intervalo` segundos y guarda el último
+    resultado: la sonda solo lee ese dict, no toca la red.
+    - Cada verificación tiene `timeout`: una que se cuelga (Atlas sin responder)
+      se reporta como fallida y no se relanza hasta que termine la anterior.
+    - Si el hilo deja de refrescar, estado() lo reporta como vencido (no listo).
+    """
+
+    def __init__(self, intervalo: float = 10.0, timeout: float = 3.0):
+        self.intervalo = intervalo
+        self.timeout = timeout
+        self.verificaciones: Dict[str, tuple] = {}
+        self._resultados: Dict[str, Dict] = {}
+        self._ultima: Optional[float] = None
+        self._en_curso: Dict[str, Future] = {}
+        self._pool: Optional[ThreadPoolExecutor] = None
+        self._pid_pool = None
+        self._pid_hilo = None
+        self._lock = threading.Lock()
+        self.inicio = time.time()
+
+    def registrar(self, nombre: str, funcion: Callable, critica: bool = True):
+        """
+        `funcion` retorna True/False o un dict con 'ok' y detalles. Una
+        verificación no crítica se reporta pero no cambia la disponibilidad.
+        """
+        self.verificaciones[nombre] = (funcion, critica)
+
+    # ============================================================
+    # VERIFICACIÓN
+    # ============================================================
+    def verificar(self) -> Dict:
+        """Ejecuta todas las verificaciones ahora (en paralelo) y actualiza el caché."""
+        with self._lock:
+            if self._pid_pool != os.getpid():
+                # Un pool heredado por fork no tiene hilos en el hijo
+                self._pool = ThreadPoolExecutor(max_workers=max(len(self.verificaciones), 1),
+                                                thread_name_prefix="salud")
+                self._en_curso = {}
+                self._pid_pool = os.getpid()
+
+        for nombre, (funcion, _) in self.verificaciones.items():
+            anterior = self._en_curso.get(nombre)
+            if anterior is None or anterior.done():
+                self._en_curso[nombre] = self._pool.submit(self._medir, funcion)
+
+        limite = time.monotonic() + self.timeout
+        resultados = {}
+        for nombre, (_, critica) in self.verificaciones.items():
+            futuro = self._en_curso[nombre]
+            try:
+                resultado = futuro.result(timeout=max(limite - time.monotonic(), 0))
+            except Exception:
+                resultado = {"ok": False, "error": f"sin respuesta en {self.timeout:.0f} s"}
+            resultado["critica"] = critica
+            resultados[nombre] = resultado
+
+        with self._lock:
+            self._resultados = resultados
+            self._ultima = time.time()
+        return resultados
+
+    @staticmethod
+    def _medir(funcion: Callable) -> Dict:
+        inicio = time.perf_counter()
+        try:
+            valor = funcion()
+            resultado = dict(valor) if isinstance(valor, dict) else {"ok": bool(valor)}
+            resultado["ok"] = bool(resultado.get("ok"))
+        except Exception as e:
+            resultado = {"ok": False, "error": str(e)[:200]}
+        resultado["ms"] = round(1000 * (time.perf_counter() - inicio), 1)
+        return resultado
+
+    # ============================================================
+    # HILO DE REFRESCO
+    # ============================================================
+    def iniciar(self, verificar_ahora: bool = True):
+        """
+        Arranca el refresco de este proceso (llamar después del fork). Con
+        `verificar_ahora` la primera verificación corre antes de retornar.
+        """
+        with self._lock:
+            if self._pid_hilo == os.getpid():
+                return
+            self._pid_hilo = os.getpid()
+
+        if verificar_ahora:
+            self._verificar_seguro()
+        threading.Thread(target=self._ciclo, args=(not verificar_ahora,),
+                         name="salud-refresco", daemon=True).start()
+
+    def _ciclo(self, verificar_ya: bool):
+        if verificar_ya:
+            self._verificar_seguro()
+        while True:
+            time.sleep(self.intervalo)
+            self._verificar_seguro()
+
+    def _verificar_seguro(self):
+        try:
+            self.verificar()
+        except Exception as e:
+            print(f"Error al verificar dependencias: {e}")
+
+    # ============================================================
+    # CONSULTA (sondas)
+    # ============================================================
+    def estado(self) -> Dict:
+        """Último resultado en caché; `listo` exige todas las críticas ok y datos frescos."""
+        if self._pid_hilo != os.getpid():
+            # Proceso sin calentar (servidor de desarrollo): la primera sonda arranca el refresco
+            self.iniciar(verificar_ahora=False)
+
+        with self._lock:
+            resultados = self._resultados
+            ultima = self._ultima
+
+        if ultima is None:
+            return {"listo": False, "motivo": "sin verificar", "verificaciones": {}}
+
+        antiguedad = time.time() - ultima
+        vencido = antiguedad > 3 * self.intervalo + self.timeout
+        fallidas = [n for n, r in resultados.items() if r["critica"] and not r["ok"]]
+
+        estado = {
+            "listo": not fallidas and not vencido,
+            "antiguedad_s": round(antiguedad, 1),
+            "verificaciones": resultados
+        }
+        if vencido:
+            estado["motivo"] = "verificaciones vencidas"
+        elif fallidas:
+            estado["motivo"] = "falla: " + ", ".join(fallidas)
+        return estado
+
+    def vivo(self) -> Dict:
+        return {"pid": os.getpid(), "uptime_s": round(time.time() - self.inicio, 1)}
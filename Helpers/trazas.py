@@ -0,0 +1,295 @@
+# Helpers/trazas.py
+
+import time
+import threading
+import contextvars
+from contextlib import contextmanager
+from collections import defaultdict
+from typing import Callable, Dict, Iterator, List, Optional
+
+
+# Traza de la ejecución en curso. La hereda todo lo que corre en el mismo hilo;
+# los pools de hilos la reciben envolviendo la tarea con propagar()
+_TRAZA_ACTUAL: contextvars.ContextVar = contextvars.ContextVar("traza_actual", default=None)
+_TRAMO_ACTUAL: contextvars.ContextVar = contextvars.ContextVar("tramo_actual", default=None)
+
+
+class Traza:
+    """
+    Tramos (spans) de una ejecución de ingesta: nombre de la etapa, item
+    (URL, archivo, página), inicio, duración, tramo padre e hilo.
+    - resumen(): tiempo por etapa, items más lentos y páginas por segundo.
+    - exportar_folded(): pilas plegadas para flamegraph.pl / speedscope.
+    - exportar_chrome(): Trace Event Format (chrome://tracing, Perfetto).
+    """
+
+    MAX_TRAMOS = 200_000  # tope de memoria: los tramos que sobran solo se cuentan
+
+    def __init__(self, nombre: str = "ejecucion"):
+        self.nombre = nombre
+        self.tramos: List[Dict] = []
+        self.descartados = 0
+        self.inicio = time.perf_counter()
+        self.fecha_inicio = time.time()
+        self.fin: Optional[float] = None
+        self._lock = threading.Lock()
+        self._siguiente_id = 0
+        self._etapa: Optional[tuple] = None
+
+    # ============================================================
+    # REGISTRO
+    # ============================================================
+    @contextmanager
+    def tramo(self, nombre: str, item: str = None, **datos) -> Iterator[Dict]:
+        """Mide el bloque; `datos` (el dict que entrega) admite atributos extra, p. ej. paginas."""
+        tramo_id = self._nuevo_id()
+        padre = _TRAMO_ACTUAL.get()
+        token = _TRAMO_ACTUAL.set(tramo_id)
+        inicio = time.perf_counter()
+        error = None
+        try:
+            yield datos
+        except BaseException as e:
+            error = type(e).__name__
+            raise
+        finally:
+            _TRAMO_ACTUAL.reset(token)
+            self._registrar(tramo_id, padre, nombre, item, inicio, datos, error)
+
+    def etapa(self, nombre: str):
+        """
+        Abre un tramo de etapa que dura hasta la próxima etapa o cerrar_etapa();
+        los tramos que se abran en este hilo mientras tanto cuelgan de él.
+        """
+        self.cerrar_etapa()
+        tramo_id = self._nuevo_id()
+        self._etapa = (tramo_id, _TRAMO_ACTUAL.get(), nombre, time.perf_counter())
+        _TRAMO_ACTUAL.set(tramo_id)
+
+    def cerrar_etapa(self):
+        if self._etapa is None:
+            return
+        tramo_id, padre, nombre, inicio = self._etapa
+        self._etapa = None
+        _TRAMO_ACTUAL.set(padre)
+        self._registrar(tramo_id, padre, nombre, None, inicio)
+
+    def terminar(self):
+        self.cerrar_etapa()
+        self.fin = time.perf_counter()
+
+    def _nuevo_id(self) -> int:
+        with self._lock:
+            self._siguiente_id += 1
+            return self._siguiente_id
+
+    def _registrar(self, tramo_id: int, padre: Optional[int], nombre: str, item: Optional[str],
+                   inicio: float, datos: Dict = None, error: str = None):
+        registro = {
+            "id": tramo_id,
+            "padre": padre,
+            "nombre": nombre,
+            "item": item,
+            "inicio": inicio - self.inicio,
+            "duracion": time.perf_counter() - inicio,
+            "hilo": threading.current_thread().name
+        }
+        if datos:
+            registro["datos"] = datos
+        if error:
+            registro["error"] = error
+
+        with self._lock:
+            if len(self.tramos) < self.MAX_TRAMOS:
+                self.tramos.append(registro)
+            else:
+                self.descartados += 1
+
+    @property
+    def duracion(self) -> float:
+        return (self.fin or time.perf_counter()) - self.inicio
+
+    # ============================================================
+    # REPORTES
+    # ============================================================
+    def resumen(self, top: int = 10) -> Dict:
+        """Tiempo por etapa, items más lentos y páginas por segundo."""
+        with self._lock:
+            tramos = list(self.tramos)
+
+        etapas = defaultdict(lambda: {"tramos": 0, "segundos": 0.0, "max": 0.0, "errores": 0, "paginas": 0})
+        for t in tramos:
+            e = etapas[t["nombre"]]
+            e["tramos"] += 1
+            e["segundos"] += t["duracion"]
+            e["max"] = max(e["max"], t["duracion"])
+            e["errores"] += int("error" in t)
+            e["paginas"] += int(t.get("datos", {}).get("paginas") or 0)
+
+        duracion = self.duracion
+        por_etapa = {}
+        for nombre, e in sorted(etapas.items(), key=lambda x: -x[1]["segundos"]):
+            resumen = {
+                "tramos": e["tramos"],
+                "segundos": round(e["segundos"], 3),
+                "media": round(e["segundos"] / e["tramos"], 4),
+                "max": round(e["max"], 3),
+                # Con hilos en paralelo la suma de una etapa puede superar el 100 %
+                "porcentaje": round(100 * e["segundos"] / duracion, 1) if duracion else 0.0,
+                "errores": e["errores"]
+            }
+            if e["paginas"]:
+                resumen["paginas"] = e["paginas"]
+                resumen["paginas_por_segundo"] = round(e["paginas"] / e["segundos"], 2) if e["segundos"] else 0.0
+            por_etapa[nombre] = resumen
+
+        # Los más lentos entre los tramos de un item concreto (archivo, URL)
+        con_item = sorted((t for t in tramos if t["item"]), key=lambda t: -t["duracion"])[:top]
+
+        # Páginas de la extracción (PyPDF2 / pdfplumber) por segundo de reloj
+        paginas = sum(e["paginas"] for n, e in etapas.items() if n in ("pypdf2", "pdfplumber"))
+
+        return {
+            "nombre": self.nombre,
+            "segundos": round(duracion, 3),
+            "tramos": len(tramos),
+            "tramos_descartados": self.descartados,
+            "paginas": paginas,
+            "paginas_por_segundo": round(paginas / duracion, 2) if duracion and paginas else 0.0,
+            "etapas": por_etapa,
+            "mas_lentos": [
+                {"etapa": t["nombre"], "item": t["item"], "segundos": round(t["duracion"], 3),
+                 **({"error": t["error"]} if "error" in t else {})}
+                for t in con_item
+            ]
+        }
+
+    def exportar_folded(self) -> str:
+        """
+        Pilas plegadas (`raiz;etapa;subetapa microsegundos`) con tiempo propio:
+        la duración de cada tramo menos la de sus hijos.
+        """
+        with self._lock:
+            tramos = {t["id"]: t for t in self.tramos}
+
+        hijos = defaultdict(float)
+        for t in tramos.values():
+            if t["padre"] in tramos:
+                hijos[t["padre"]] += t["duracion"]
+
+        pilas = defaultdict(float)
+        for t in tramos.values():
+            pila = []
+            actual = t
+            while actual is not None:
+                pila.append(actual["nombre"].replace(";", ":").replace(" ", "_"))
+                actual = tramos.get(actual["padre"])
+            clave = ";".join([self.nombre] + pila[::-1])
+            # Hijos en paralelo pueden sumar más que el padre
+            pilas[clave] += max(t["duracion"] - hijos[t["id"]], 0.0)
+
+        return "".join(f"{pila} {round(s * 1e6)}\n" for pila, s in sorted(pilas.items()) if s > 0)
+
+    def exportar_chrome(self) -> Dict:
+        """Trace Event Format: un evento completo ("X") por tramo, un carril por hilo."""
+        with self._lock:
+            tramos = list(self.tramos)
+
+        hilos: Dict[str, int] = {}
+        eventos = []
+        for t in tramos:
+            tid = hilos.setdefault(t["hilo"], len(hilos) + 1)
+            args = dict(t.get("datos") or {})
+            if t["item"]:
+                args["item"] = t["item"]
+            if "error" in t:
+                args["error"] = t["error"]
+            eventos.append({
+                "name": t["nombre"], "ph": "X", "pid": 1, "tid": tid,
+                "ts": round(t["inicio"] * 1e6), "dur": round(t["duracion"] * 1e6), "args": args
+            })
+
+        eventos += [
+            {"name": "thread_name", "ph": "M", "pid": 1, "tid": tid, "args": {"name": hilo}}
+            for hilo, tid in hilos.items()
+        ]
+        return {"traceEvents": eventos, "displayTimeUnit": "ms", "otherData": {"nombre": self.nombre}}
+
+    # ============================================================
+    # PERSISTENCIA
+    # ============================================================
+    def guardar(self, ruta: str) -> bool:
+        from Helpers.funciones import Funciones  # funciones importa este módulo
+
+        with self._lock:
+            tramos = list(self.tramos)
+        return Funciones.guardar_json(ruta, {
+            "nombre": self.nombre,
+            "fecha_inicio": self.fecha_inicio,
+            "segundos": self.duracion,
+            "descartados": self.descartados,
+            "tramos": tramos
+        })
+
+    @classmethod
+    def cargar(cls, ruta: str) -> Optional["Traza"]:
+        from Helpers.funciones import Funciones
+
+        datos = Funciones.leer_json(ruta)
+        if not datos:
+            return None
+        traza = cls(datos.get("nombre", "ejecucion"))
+        traza.tramos = datos.get("tramos", [])
+        traza.descartados = datos.get("descartados", 0)
+        traza.fecha_inicio = datos.get("fecha_inicio", traza.fecha_inicio)
+        traza.fin = traza.inicio + datos.get("segundos", 0.0)
+        return traza
+
+
+# ============================================================
+# API PARA LOS HELPERS
+# ============================================================
+@contextmanager
+def activar(traza: Traza) -> Iterator[Traza]:
+    """Hace de `traza` la traza actual mientras dure el bloque."""
+    token = _TRAZA_ACTUAL.set(traza)
+    token_tramo = _TRAMO_ACTUAL.set(None)
+    try:
+        yield traza
+    finally:
+        # Los hilos de un pool se reutilizan: no dejar la etapa abierta en su contexto
+        traza.cerrar_etapa()
+        _TRAMO_ACTUAL.reset(token_tramo)
+        _TRAZA_ACTUAL.reset(token)
+
+
+def traza_actual() -> Optional[Traza]:
+    return _TRAZA_ACTUAL.get()
+
+
+@contextmanager
+def tramo(nombre: str, item: str = None, **datos) -> Iterator[Dict]:
+    """
+    Tramo en la traza actual. Sin traza activa (búsquedas, scripts) solo
+    entrega el dict de datos: el costo es el de un ContextVar.get().
+    """
+    traza = _TRAZA_ACTUAL.get()
+    if traza is None:
+        yield datos
+        return
+    with traza.tramo(nombre, item, **datos) as d:
+        yield d
+
+
+def propagar(funcion: Callable) -> Callable:
+    """
+    Envuelve una tarea para un pool de hilos o un threading.Thread: corre en
+    una copia del contexto actual, así sus tramos cuelgan del tramo que la lanzó.
+    """
+    contexto = contextvars.copy_context()
+
+    def envoltura(*args, **kwargs):
+        # Cada llamada en su propia copia: un Context no se puede usar en dos hilos a la vez
+        return contexto.copy().run(funcion, *args, **kwargs)
+
+    return envoltura
@@ -1,22 +1,33 @@
 import os
-import json
 import time
-from typing import List, Dict
+import hashlib
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
+from urllib.parse import urljoin, urlparse, unquote
 
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
+import requests
+from requests.adapters import HTTPAdapter
+from lxml import html as lxml_html
 
 from Helpers import Funciones
+from Helpers.limitador import LimitadorHost
+from Helpers.trazas import tramo, propagar
 
 
 class WebScraping:
     """
-    WebScraping con Selenium adaptado a tu proyecto Flask:
-    - Usa Selenium (igual que tu .ipynb)
-    - Recorre secciones (Leyes, Decretos, etc.)
+    WebScraping de la normativa de Minvivienda adaptado a tu proyecto Flask:
+    - Modo "http" (por defecto): las páginas de listado (HTML de Drupal generado
+      en el servidor) se piden con HTTP plano y se parsean con lxml.
+      Selenium solo se abre si una página necesita JavaScript.
+    - Modo "selenium": todo con Chrome (igual que tu .ipynb)
+    - Recorre secciones (Leyes, Decretos, etc.), en paralelo en modo http
     - Extrae PDF, DOCX, XLSX
     - Guarda JSON en static/uploads
+    - Con un EstadoCrawl: corta la paginación en lo ya conocido y descarga
+      con GET condicional, así solo lo nuevo o modificado sigue el flujo
     """
 
     # ================================
@@ -33,98 +44,244 @@ class WebScraping:
 
     DOMINIO = "https://minvivienda.gov.co"
 
-    def __init__(self, headless: bool = True):
+    # Selectores del listado de Drupal (equivalentes a div.views-row a / li.pager__item--next a)
+    XPATH_LINKS = "//div[contains(concat(' ', normalize-space(@class), ' '), ' views-row ')]//a/@href"
+    XPATH_SIGUIENTE = "//li[contains(concat(' ', normalize-space(@class), ' '), ' pager__item--next ')]/a/@href"
+
+    EXTENSIONES = (".pdf", ".docx", ".xlsx")
+
+    # Descargas: conexiones simultáneas (total y por host) y reintentos
+    MAX_DESCARGAS = 8
+    MAX_POR_HOST = 4
+    REINTENTOS = 3
+    TAMANO_BLOQUE = 64 * 1024
+
+    # Un limitador por proceso: los scrapers simultáneos (trabajos, pipeline)
+    # comparten la tasa y la concurrencia de cada host en vez de sumarlas
+    LIMITADOR = LimitadorHost(concurrencia_max=MAX_POR_HOST)
+
+    def __init__(self, headless: bool = True, modo: str = "http", max_secciones: int = 5,
+                 estado=None, limitador: LimitadorHost = None, secciones: Dict[str, str] = None):
         """
-        Inicializa Selenium con opciones compatibles en Windows y Render.
+        Prepara la sesión HTTP. Chrome (compatible con Windows y Render) solo se
+        inicia en modo "selenium" o cuando una página lo necesita.
+        `estado` (EstadoCrawl opcional) activa el scraping incremental.
+        `limitador` regula por host tanto los listados como las descargas
+        (por defecto el LIMITADOR compartido del proceso).
+        `secciones` reemplaza SECCIONES (p. ej. para apuntar a un sitio de prueba local).
         """
-        chrome_options = Options()
+        self.headless = headless
+        self.modo = modo
+        self.max_secciones = max_secciones
+        self.estado = estado
+        if secciones:
+            self.SECCIONES = secciones
+        self.limitador = limitador or self.LIMITADOR
+
+        self.session = self._crear_sesion(max_secciones)
+        self.session.headers["User-Agent"] = "Mozilla/5.0 (BigDataApp MinVivienda)"
+
+        self.driver = None
+        self._lock_driver = threading.Lock()
+        self.paginas_selenium = 0
+
+        if modo == "selenium":
+            self._obtener_driver()
+
+    def _obtener_driver(self):
+        """Inicia Chrome la primera vez que se necesita."""
+        if self.driver is None:
+            from selenium import webdriver
+            from selenium.webdriver.chrome.options import Options
+
+            chrome_options = Options()
+
+            if self.headless:
+                chrome_options.add_argument("--headless=new")
+
+            chrome_options.add_argument("--no-sandbox")
+            chrome_options.add_argument("--disable-gpu")
+            chrome_options.add_argument("--disable-dev-shm-usage")
+
+            self.driver = webdriver.Chrome(options=chrome_options)
+
+        return self.driver
+
+    # ===============================================================
+    # OBTENER Y PARSEAR PÁGINAS DE LISTADO
+    # ===============================================================
+    def _obtener_html(self, url: str) -> str:
+        """HTML de una página de listado: HTTP plano y, si no trae el listado, Selenium."""
+        if self.modo == "http":
+            with tramo("pagina_http", url):
+                res = self._get_listado(url)
+            if self._tiene_listado(res.text):
+                return res.text
+
+        # El driver es uno solo: las secciones que caen aquí se serializan
+        with tramo("pagina_selenium", url), self._lock_driver, self.limitador.permiso(url):
+            from selenium.webdriver.common.by import By
+            from selenium.webdriver.support.ui import WebDriverWait
+
+            driver = self._obtener_driver()
+            inicio = time.perf_counter()
+            driver.get(url)
+
+            # Esperar a que el listado esté en el DOM en vez de un sleep fijo
+            try:
+                WebDriverWait(driver, 10).until(
+                    lambda d: d.find_elements(By.CSS_SELECTOR, "div.views-row, li.pager__item, div.view-empty")
+                )
+            except Exception:
+                pass
+
+            self.limitador.registrar(url, 200, time.perf_counter() - inicio)
+            self.paginas_selenium += 1
+            return driver.page_source
+
+    def _get_listado(self, url: str) -> requests.Response:
+        """GET de una página de listado; reintenta con backoff ante errores de red, 429 y 5xx."""
+        for intento in range(1, self.REINTENTOS + 1):
+            with self.limitador.permiso(url):
+                inicio = time.perf_counter()
+                try:
+                    res = self.session.get(url, timeout=30)
+                except requests.RequestException:
+                    self.limitador.registrar(url, None, time.perf_counter() - inicio)
+                    if intento == self.REINTENTOS:
+                        raise
+                    res = None
+                else:
+                    self.limitador.registrar(
+                        url, res.status_code, time.perf_counter() - inicio,
+                        res.headers.get("Retry-After")
+                    )
+
+            if res is not None and res.status_code != 429 and res.status_code < 500:
+                res.raise_for_status()
+                return res
+
+            if intento == self.REINTENTOS:
+                res.raise_for_status()
+            # El limitador ya aplica Retry-After; esto solo espacia los reintentos
+            time.sleep(0.5 * 2 ** (intento - 1))
+
+    @staticmethod
+    def _tiene_listado(html: str) -> bool:
+        return "views-row" in html or "pager__item" in html or "view-empty" in html
 
-        if headless:
-            chrome_options.add_argument("--headless=new")
+    def _parsear_listado(self, html: str, url_actual: str) -> Tuple[List[Dict], Optional[str]]:
+        """Retorna (links de documentos, url de la siguiente página o None)."""
+        arbol = lxml_html.fromstring(html)
+
+        links = []
+        for href in arbol.xpath(self.XPATH_LINKS):
+            # Relativos (/sites/...) o absolutos: urljoin resuelve ambos
+            url_completa = urljoin(url_actual, href.strip())
 
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--disable-dev-shm-usage")
+            # Guardar solo documentos útiles
+            if url_completa.lower().endswith(self.EXTENSIONES):
+                extension = url_completa.split(".")[-1].lower()
+                links.append({
+                    "url": url_completa,
+                    "type": extension
+                })
 
-        self.driver = webdriver.Chrome(options=chrome_options)
+        siguiente = arbol.xpath(self.XPATH_SIGUIENTE)
+        return links, urljoin(url_actual, siguiente[0]) if siguiente else None
 
     # ===============================================================
     # EXTRAER LINKS DE UNA SECCIÓN
     # ===============================================================
-    def extraer_links_seccion(self, url_seccion: str) -> List[Dict]:
-        """Extrae enlaces de la sección con paginación."""
+    def extraer_links_seccion(self, url_seccion: str, tipos: List[str] = None) -> List[Dict]:
+        """Extrae enlaces de la sección con paginación (ver iterar_paginas_seccion)."""
         links = []
 
         try:
-            self.driver.get(url_seccion)
-            time.sleep(2)
-
-            while True:
-                html = self.driver.page_source
-                soup = BeautifulSoup(html, "lxml")
-
-                elementos = soup.select("div.views-row a")
-
-                for tag in elementos:
-                    href = tag.get("href")
-                    if not href:
-                        continue
-
-                    # Si el href YA es una URL completa → NO concatenar dominio
-                    if href.startswith("http"):
-                        url_completa = href
-                    else:
-                        url_completa = f"{self.DOMINIO}{href}"
-
-                    # Guardar solo documentos útiles
-                    if url_completa.lower().endswith((".pdf", ".docx", ".xlsx")):
-                        extension = url_completa.split(".")[-1].lower()
-                        links.append({
-                            "url": url_completa,
-                            "type": extension
-                        })
-
-                # Buscar el botón de siguiente página
-                boton = soup.select_one("li.pager__item--next a")
-                if boton:
-                    next_href = boton.get("href")
-
-                    if next_href.startswith("http"):
-                        siguiente = next_href
-                    else:
-                        siguiente = f"{self.DOMINIO}{next_href}"
-
-                    self.driver.get(siguiente)
-                    time.sleep(2)
-                else:
-                    break
+            for encontrados in self.iterar_paginas_seccion(url_seccion, tipos):
+                links.extend(encontrados)
 
         except Exception as e:
             print(f"Error en la sección {url_seccion}: {e}")
 
         return links
 
+    def iterar_paginas_seccion(self, url_seccion: str, tipos: List[str] = None) -> Iterator[List[Dict]]:
+        """
+        Recorre la paginación y entrega los links de cada página apenas se leen.
+        `tipos`: extensiones que se van a descargar. Solo esos links deciden el
+        corte incremental; los de otros tipos nunca se indexan, así que nunca
+        quedan conocidos y no deben impedirlo.
+        """
+        tipos = self.normalizar_tipos(tipos)
+        url = url_seccion
+        visitadas = set()
+
+        while url and url not in visitadas:
+            visitadas.add(url)
+
+            html = self._obtener_html(url)
+            with tramo("parsear_listado", url):
+                encontrados, url = self._parsear_listado(html, url)
+
+            # Incremental: el listado va de lo más reciente a lo más antiguo,
+            # una página sin nada nuevo significa que el resto ya se indexó.
+            # Se evalúa antes de entregar la página: quien consume puede
+            # registrar o descargar sus links antes de pedir la siguiente.
+            relevantes = [l for l in encontrados if l["type"] in tipos]
+            ya_conocida = bool(self.estado and relevantes and
+                               all(self.estado.conocida(l["url"]) for l in relevantes))
+            yield encontrados
+
+            if ya_conocida:
+                break
+
     # ===============================================================
     # RECORRER TODAS LAS SECCIONES Y GUARDAR JSON
     # ===============================================================
-    def extraer_todos_los_links(self, json_destino: str) -> Dict:
+    def extraer_todos_los_links(self, json_destino: str,
+                                al_progreso: Callable[[int, int], None] = None,
+                                detener: Callable[[], bool] = None,
+                                tipos: List[str] = None) -> Dict:
         """
-        Recorre todas las secciones y guarda los links en un JSON.
+        Recorre todas las secciones (en paralelo) y guarda los links en un JSON.
+        La carpeta del JSON no se vacía: cada trabajo usa su propio espacio.
+        `tipos` (los que se van a descargar) define el corte incremental.
+        `al_progreso(hechas, total)` se llama al terminar cada sección; si
+        `detener()` es verdadero las secciones pendientes no se recorren.
         """
         carpeta = os.path.dirname(json_destino)
         Funciones.crear_carpeta(carpeta)
-        Funciones.borrar_contenido_carpeta(carpeta)
 
-        todos = []
+        inicio = time.perf_counter()
+        hilos = self.max_secciones if self.modo == "http" else 1
 
-        for nombre, url_seccion in self.SECCIONES.items():
-            print(f"\n=== Scraping sección: {nombre} ===")
-            lista = self.extraer_links_seccion(url_seccion)
+        hechas = []
 
+        def tarea(item):
+            nombre, url_seccion = item
+            if detener and detener():
+                return []
+            print(f"\n=== Scraping sección: {nombre} ===")
+            with tramo("seccion", nombre) as t:
+                lista = self.extraer_links_seccion(url_seccion, tipos)
+                t["links"] = len(lista)
             for l in lista:
                 l["seccion"] = nombre
+            if al_progreso:
+                hechas.append(nombre)
+                al_progreso(len(hechas), len(self.SECCIONES))
+            return lista
+
+        with tramo("links"), ThreadPoolExecutor(max_workers=hilos) as pool:
+            resultados = list(pool.map(propagar(tarea), self.SECCIONES.items()))
 
-            todos.extend(lista)
+        todos = [l for lista in resultados for l in lista]
+
+        nuevos = 0
+        if self.estado is not None:
+            nuevos = sum(1 for l in todos if self.estado.registrar_link(l))
+            self.estado.guardar()
 
         # Guardar JSON
         self._guardar_links(json_destino, todos)
@@ -132,46 +289,230 @@ class WebScraping:
         return {
             "success": True,
             "total_links": len(todos),
-            "links": todos
+            "links_nuevos": nuevos,
+            "links": todos,
+            "segundos": round(time.perf_counter() - inicio, 2),
+            "paginas_selenium": self.paginas_selenium,
+            "limitador": self.limitador.estadisticas()
         }
 
     # ===============================================================
-    # DESCARGAR PDFs USANDO REQUESTS
+    # DESCARGAR PDFs (CONCURRENTE, SESIÓN COMPARTIDA, ESCRITURA EN STREAMING)
     # ===============================================================
-    def descargar_pdfs(self, json_path: str, carpeta_destino: str = "static/uploads") -> Dict:
+    def descargar_pdfs(self, json_path: str, carpeta_destino: str = "static/uploads",
+                       max_descargas: int = None, tipos: List[str] = None,
+                       al_progreso: Callable[[int, int], None] = None,
+                       detener: Callable[[], bool] = None) -> Dict:
+        """
+        Descarga los documentos del JSON de links en paralelo.
+        - `carpeta_destino` no se vacía: cada trabajo usa su propio espacio.
+        - `tipos`: extensiones a descargar (por defecto PDF, DOCX y XLSX).
+        - Una sola Session con keep-alive (pool de conexiones reutilizable).
+        - Tasa y descargas simultáneas por host reguladas por el LimitadorHost.
+        - El cuerpo se escribe por bloques a un .part y luego se renombra (atómico).
+        - Reintentos con backoff exponencial ante errores de red, 429 y 5xx.
+        - Con EstadoCrawl: GET condicional (304 = sin cambios) y comparación de hash;
+          `archivos` lista solo los nuevos o modificados, pendientes de confirmar()
+          en el estado una vez indexados.
+        - `al_progreso(hechos, total)` tras cada archivo; `detener()` omite los pendientes.
+        """
 
         links = self._cargar_links(json_path)
-        pdfs = [l for l in links if l["type"] == "pdf"]
+        tipos = self.normalizar_tipos(tipos)
+        # Un mismo documento puede aparecer en varias secciones
+        pdfs = list({l["url"]: l for l in links if l["type"] in tipos}.values())
 
         Funciones.crear_carpeta(carpeta_destino)
-        Funciones.borrar_contenido_carpeta(carpeta_destino)
 
-        import requests
+        max_descargas = max_descargas or self.MAX_DESCARGAS
+        session = self._crear_sesion(max_descargas)
+
+        hechos = []
+
+        def tarea(link: Dict) -> Dict:
+            if detener and detener():
+                return {
+                    "url": link["url"], "ok": False, "no_modificado": False, "cambiado": False,
+                    "bytes": 0, "intentos": 0, "segundos": 0.0, "error": "cancelado"
+                }
+            resultado = self.descargar_link(session, link, carpeta_destino)
+            if al_progreso:
+                hechos.append(1)
+                al_progreso(len(hechos), len(pdfs))
+            return resultado
+
+        inicio = time.perf_counter()
+        with tramo("descargas"), ThreadPoolExecutor(max_workers=max_descargas) as pool:
+            resultados = list(pool.map(propagar(tarea), pdfs))
+        duracion = time.perf_counter() - inicio
+
+        session.close()
+        if self.estado is not None:
+            self.estado.guardar()
+
+        exitosos = [r for r in resultados if r["ok"]]
+        errores = [{"url": r["url"], "error": r["error"]} for r in resultados if not r["ok"]]
+
+        # Lo que sigue al OCR/indexación: solo documentos nuevos o modificados.
+        # url + hash permiten confirmar la descarga en el EstadoCrawl una vez indexada.
+        archivos = [
+            {
+                "nombre": os.path.basename(r["ruta"]),
+                "ruta": r["ruta"],
+                "extension": os.path.splitext(r["ruta"])[1].lstrip(".").lower(),
+                "tamaño": r["bytes"],
+                "url": r["url"],
+                "hash": r["hash"]
+            }
+            for r in resultados if r["cambiado"]
+        ]
+
+        total_bytes = sum(r["bytes"] for r in exitosos)
+        latencias = sorted(r["segundos"] for r in exitosos)
 
-        descargados = 0
-        errores = []
-        for link in pdfs:
-            url = link["url"]
-            nombre = os.path.basename(url)
-            destino = os.path.join(carpeta_destino, nombre)
+        return {
+            "success": True,
+            "total": len(pdfs),
+            "descargados": len(exitosos),
+            "sin_cambios": len(exitosos) - len(archivos),
+            "archivos": archivos,
+            "errores": errores,
+            "stats": {
+                "segundos": round(duracion, 2),
+                "bytes": total_bytes,
+                "mb_por_segundo": round(total_bytes / 1048576 / duracion, 2) if duracion else 0.0,
+                "archivos_por_segundo": round(len(exitosos) / duracion, 2) if duracion else 0.0,
+                "latencia_media": round(sum(latencias) / len(latencias), 3) if latencias else 0.0,
+                "latencia_p95": round(latencias[int(0.95 * (len(latencias) - 1))], 3) if latencias else 0.0,
+                "reintentos": sum(max(0, r["intentos"] - 1) for r in resultados),
+                "limitador": self.limitador.estadisticas()
+            }
+        }
 
+    def descargar_link(self, session: requests.Session, link: Dict, carpeta_destino: str) -> Dict:
+        """
+        Descarga un documento del listado. `cambiado` indica si es nuevo o
+        modificado (y por lo tanto debe seguir a extracción e indexación).
+        """
+        url = link["url"]
+        destino = os.path.join(carpeta_destino, self.nombre_destino(url))
+        cabeceras = self.estado.cabeceras_condicionales(url) if self.estado else {}
+
+        with tramo("descarga", url) as t:
+            resultado = self._descargar_archivo(session, url, destino, cabeceras)
+            t["bytes"] = resultado["bytes"]
+            if resultado["no_modificado"]:
+                t["no_modificado"] = True
+
+        resultado["cambiado"] = resultado["ok"] and not resultado["no_modificado"]
+        if resultado["cambiado"] and self.estado is not None:
+            resultado["cambiado"] = self.estado.registrar_descarga(
+                url, resultado["etag"], resultado["last_modified"], resultado["hash"], destino
+            )
+        resultado["ruta"] = destino
+        return resultado
+
+    @classmethod
+    def normalizar_tipos(cls, tipos: List[str] = None) -> set:
+        """Extensiones sin punto y en minúsculas; por defecto PDF, DOCX y XLSX."""
+        return {t.lower().lstrip(".") for t in (tipos or cls.EXTENSIONES)}
+
+    @staticmethod
+    def nombre_destino(url: str) -> str:
+        """
+        Nombre local estable por URL: el nombre del archivo más un hash corto de
+        la URL, así dos secciones con `anexo.pdf` no se pisan entre sí.
+        """
+        nombre = unquote(os.path.basename(urlparse(url).path)) or "documento"
+        base, extension = os.path.splitext(nombre)
+        base = "".join(c if c.isalnum() or c in "-_." else "_" for c in base)[:80] or "documento"
+        sufijo = hashlib.sha1(url.encode("utf-8")).hexdigest()[:10]
+        return f"{base}_{sufijo}{extension.lower()}"
+
+    def _crear_sesion(self, pool: int) -> requests.Session:
+        """Session con pool de conexiones del tamaño de la concurrencia."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool, max_retries=0)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+    def _descargar_archivo(self, session: requests.Session, url: str, destino: str,
+                           cabeceras: Dict = None) -> Dict:
+        """Descarga un archivo en streaming con reintentos; nunca deja archivos a medias."""
+        temporal = None
+        error = None
+        intento = 0
+        inicio = time.perf_counter()
+
+        for intento in range(1, self.REINTENTOS + 1):
             try:
-                res = requests.get(url, timeout=30)
-                res.raise_for_status()
-
-                with open(destino, "wb") as f:
-                    f.write(res.content)
+                with self.limitador.permiso(url), \
+                        session.get(url, timeout=30, stream=True, headers=cabeceras or {}) as res:
+                    # Latencia hasta las cabeceras: lo que refleja la carga del servidor
+                    self.limitador.registrar(
+                        url, res.status_code, res.elapsed.total_seconds(),
+                        res.headers.get("Retry-After")
+                    )
+
+                    if res.status_code == 304:
+                        return {
+                            "url": url, "ok": True, "no_modificado": True, "bytes": 0,
+                            "intentos": intento, "segundos": time.perf_counter() - inicio,
+                            "error": None
+                        }
+
+                    if res.status_code == 429 or res.status_code >= 500:
+                        raise requests.HTTPError(f"HTTP {res.status_code}", response=res)
+                    res.raise_for_status()
+
+                    tamano = 0
+                    sha = hashlib.sha256()
+                    # Temporal único en la misma carpeta (os.replace atómico, sin choques entre hilos)
+                    descriptor, temporal = tempfile.mkstemp(
+                        dir=os.path.dirname(destino) or ".", suffix=".part"
+                    )
+                    with os.fdopen(descriptor, "wb") as f:
+                        for bloque in res.iter_content(chunk_size=self.TAMANO_BLOQUE):
+                            f.write(bloque)
+                            sha.update(bloque)
+                            tamano += len(bloque)
+
+                    etag = res.headers.get("ETag")
+                    last_modified = res.headers.get("Last-Modified")
+
+                os.replace(temporal, destino)
+                temporal = None
+
+                return {
+                    "url": url, "ok": True, "no_modificado": False, "bytes": tamano,
+                    "intentos": intento, "segundos": time.perf_counter() - inicio,
+                    "error": None, "hash": sha.hexdigest(),
+                    "etag": etag, "last_modified": last_modified
+                }
+
+            except requests.HTTPError as e:
+                error = str(e)
+                status = e.response.status_code if e.response is not None else 0
+                # 4xx distintos de 429 no se arreglan reintentando
+                if status and status < 500 and status != 429:
+                    break
+            except requests.RequestException as e:
+                error = str(e)
+                self.limitador.registrar(url, None, time.perf_counter() - inicio)
+            except Exception as e:
+                error = str(e)
 
-                descargados += 1
+            if temporal and os.path.exists(temporal):
+                os.remove(temporal)
+            temporal = None
 
-            except Exception as e:
-                errores.append({"url": url, "error": str(e)})
+            if intento < self.REINTENTOS:
+                time.sleep(0.5 * 2 ** (intento - 1))
 
         return {
-            "success": True,
-            "total": len(pdfs),
-            "descargados": descargados,
-            "errores": errores
+            "url": url, "ok": False, "no_modificado": False, "bytes": 0,
+            "intentos": intento, "segundos": time.perf_counter() - inicio, "error": error
         }
 
     # ===============================================================
@@ -179,22 +520,21 @@ class WebScraping:
     # ===============================================================
     def _guardar_links(self, path: str, lista_links: List[Dict]):
         """Guardar JSON con formato estándar de tu App."""
-        data = {"links": lista_links}
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=4, ensure_ascii=False)
+        Funciones.guardar_json(path, {"links": lista_links}, indentar=True)
 
     def _cargar_links(self, path: str) -> List[Dict]:
         if not os.path.exists(path):
             return []
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f).get("links", [])
+        return Funciones.leer_json(path).get("links", [])
 
     # ===============================================================
-    # CERRAR SELENIUM
+    # CERRAR SESIÓN Y SELENIUM
     # ===============================================================
     def close(self):
-        """Cerrar Selenium correctamente."""
+        """Cerrar la sesión HTTP y Selenium (si se llegó a abrir)."""
+        self.session.close()
         try:
-            self.driver.quit()
+            if self.driver is not None:
+                self.driver.quit()
         except:
             pass
\ No newline at end of file
@@ -1,9 +1,16 @@
-from flask import Flask, render_template, request, redirect, url_for, jsonify, session, flash
+from flask import Flask, render_template, request, redirect, url_for, jsonify, session, flash, Response, stream_with_context, g
 from dotenv import load_dotenv
 import os
+import time
+import shutil
+import zipfile
+import threading
+import numpy as np
 from datetime import datetime
 from werkzeug.utils import secure_filename
-from Helpers import MongoDB, ElasticSearch, Funciones, WebScraping, OCRtoElastic, PLN
+from Helpers import MongoDB, ElasticSearch, Funciones, WebScraping, OCRtoElastic, PLN, IndiceANN, DetectorDuplicados, EstadisticasCorpus, EnriquecedorNLP, EstadoCrawl, PipelineIngesta, GestorTrabajos, EspaciosTrabajo, CuotaEspacioExcedida, ConexionPorProceso, MonitorSalud, ControlAdmision, AdmisionRechazada
+from Helpers.metricas import METRICAS
+from Helpers.trazas import tramo
 
 # Cargar variables de entorno
 load_dotenv()
@@ -21,13 +28,65 @@ ELASTIC_CLOUD_URL = os.getenv('ELASTIC_CLOUD_URL')
 ELASTIC_API_KEY = os.getenv('ELASTIC_API_KEY')
 ELASTIC_INDEX_DEFAULT = os.getenv('ELASTIC_INDEX_DEFAULT', 'index_normatividad')
 
+# Carpeta donde se guardan los índices de documentos similares
+INDICES_DIR = os.getenv('INDICES_DIR', 'indices')
+RUTA_CORPUS_TFIDF = os.path.join(INDICES_DIR, 'corpus_tfidf.npz')
+RUTA_ESTADO_CRAWL = os.path.join(INDICES_DIR, 'estado_crawl.json')
+
+# Índices con búsqueda de similares (cada uno vive en memoria): lista cerrada, separada por comas
+INDICES_SIMILARES = {ELASTIC_INDEX_DEFAULT} | {i.strip() for i in os.getenv('INDICES_SIMILARES', '').split(',') if i.strip()}
+# Guardar el índice ANN a disco cada tantas inserciones incrementales
+ANN_GUARDAR_CADA = int(os.getenv('ANN_GUARDAR_CADA', '50'))
+
+# Trabajos en segundo plano (scraping, carga a Elastic): estado persistido en JSON
+TRABAJOS_DIR = os.getenv('TRABAJOS_DIR', 'trabajos')
+# Duración máxima de un stream SSE: luego el cliente se reconecta (libera el hilo)
+SSE_DURACION_MAX = int(os.getenv('SSE_DURACION_MAX', '300'))
+
+# Carpetas de trabajo aisladas (una por subida/trabajo) dentro de static/uploads
+ESPACIOS_DIR = os.getenv('ESPACIOS_DIR', os.path.join('static', 'uploads'))
+
+# Métricas: con varios workers cada uno vuelca las suyas aquí y /metrics las suma
+METRICAS_DIR = os.getenv('METRICAS_DIR', 'metricas')
+# Bearer token de /metrics (obligatorio en el perfil produccion salvo METRICAS_PUBLICAS=1)
+METRICAS_TOKEN = os.getenv('METRICAS_TOKEN')
+
+# /readyz: cada cuánto se re-verifican las dependencias y espacio mínimo para subidas
+SALUD_INTERVALO = float(os.getenv('SALUD_INTERVALO', '10'))
+SALUD_TIMEOUT = float(os.getenv('SALUD_TIMEOUT', '3'))
+SALUD_DISCO_MIN_MB = int(os.getenv('SALUD_DISCO_MIN_MB', '500'))
+
+# Control de admisión (por worker): cupos totales y cuántos quedan siempre para /buscar-elastic
+ADMISION_CAPACIDAD = int(os.getenv('ADMISION_CAPACIDAD', os.getenv('GUNICORN_THREADS', '8')))
+ADMISION_RESERVA_BUSQUEDA = int(os.getenv('ADMISION_RESERVA_BUSQUEDA', '4'))
+
 # Versión de la aplicación
 VERSION_APP = "1.2.0"
 CREATOR_APP = "JaderGO"
 
-# Inicializar conexiones
-mongo = MongoDB(MONGO_URI, MONGO_DB)
-elastic = ElasticSearch(ELASTIC_CLOUD_URL, ELASTIC_API_KEY)
+# Perfiles de configuración (APP_PERFIL=desarrollo | produccion)
+PERFILES = {
+    'desarrollo': {
+        'DEBUG': True,
+        'PRECARGAR_MODELOS': False
+    },
+    'produccion': {
+        'DEBUG': False,
+        'SESSION_COOKIE_HTTPONLY': True,
+        'SESSION_COOKIE_SAMESITE': 'Lax',
+        'SESSION_COOKIE_SECURE': os.getenv('SESSION_COOKIE_SECURE', '1') == '1',
+        'SEND_FILE_MAX_AGE_DEFAULT': 3600,
+        # Modelos de solo lectura en el master (antes del fork): los workers los
+        # comparten por copy-on-write en vez de cargarlos cada uno en su primera solicitud
+        'PRECARGAR_MODELOS': os.getenv('PRECARGAR_MODELOS', '0') == '1',
+        # /metrics solo con METRICAS_TOKEN (METRICAS_PUBLICAS=1 lo deja abierto, p. ej. en una red interna)
+        'METRICAS_REQUIERE_TOKEN': os.getenv('METRICAS_PUBLICAS', '0') != '1'
+    }
+}
+
+# Conexiones: cada proceso abre las suyas en el primer uso (después del fork de gunicorn)
+mongo = ConexionPorProceso(lambda: MongoDB(MONGO_URI, MONGO_DB), 'mongodb')
+elastic = ConexionPorProceso(lambda: ElasticSearch(ELASTIC_CLOUD_URL, ELASTIC_API_KEY), 'elastic')
 
 # OCR → ElasticSearch
 ocr = OCRtoElastic(
@@ -35,6 +94,647 @@ ocr = OCRtoElastic(
     index_name=ELASTIC_INDEX_DEFAULT
 )
 
+# PLN e índices ANN se cargan en el primer uso (los modelos pesan cientos de MB)
+pln_compartido = None
+lock_pln = threading.Lock()
+indices_similares = {}
+mtime_similares = {}  # fecha de modificación del .npz que cada índice tiene en memoria
+lock_indices_similares = threading.Lock()
+
+
+def obtener_pln() -> PLN:
+    global pln_compartido
+    with lock_pln:
+        if pln_compartido is None:
+            pln_compartido = PLN(
+                cargar_modelos=True,
+                corpus=EstadisticasCorpus.cargar(RUTA_CORPUS_TFIDF)
+            )
+    return pln_compartido
+
+
+def ruta_indice_similares(index: str) -> str:
+    return os.path.join(INDICES_DIR, f"ann_{index}.npz")
+
+
+def _fecha_modificacion(ruta: str):
+    try:
+        return os.path.getmtime(ruta)
+    except OSError:
+        return None
+
+
+def obtener_indice_similares(index: str) -> IndiceANN:
+    """
+    Índice ANN en memoria. Solo el enriquecedor líder le agrega documentos (ver
+    agregar_similares); los demás workers recargan el .npz cuando cambia en disco.
+    """
+    if index not in INDICES_SIMILARES:
+        raise ValueError(f"El índice '{index}' no tiene búsqueda de similares")
+
+    ruta = ruta_indice_similares(index)
+    with lock_indices_similares:
+        indice = indices_similares.get(index)
+        mtime = _fecha_modificacion(ruta)
+        # Con inserciones propias sin guardar se conserva la copia en memoria
+        if indice is None or (mtime != mtime_similares.get(index) and indice.sin_guardar == 0):
+            indices_similares[index] = IndiceANN.cargar(ruta) or indice or IndiceANN()
+            mtime_similares[index] = mtime
+        return indices_similares[index]
+
+
+def guardar_indice_similares(index: str, indice: IndiceANN) -> bool:
+    """Guarda y deja `indice` como el de este proceso, sin recargar lo que se acaba de escribir."""
+    ruta = ruta_indice_similares(index)
+    if not indice.guardar(ruta):
+        return False
+    with lock_indices_similares:
+        indices_similares[index] = indice
+        mtime_similares[index] = _fecha_modificacion(ruta)
+    return True
+
+
+def agregar_similares(index: str):
+    """
+    Callback del enriquecedor (corre solo en el worker líder del índice): suma al
+    índice ANN los documentos recién enriquecidos y lo guarda cada ANN_GUARDAR_CADA
+    inserciones o cuando se vacía el backlog.
+    """
+    def agregar(ids, textos):
+        indice = obtener_indice_similares(index)
+        if ids:
+            indice.agregar(ids, obtener_pln().generar_embeddings(textos))
+        if indice.sin_guardar and (indice.sin_guardar >= ANN_GUARDAR_CADA or not ids):
+            guardar_indice_similares(index, indice)
+
+    return agregar if index in INDICES_SIMILARES else None
+
+
+def guardar_corpus_tfidf():
+    if pln_compartido is not None:
+        pln_compartido.corpus.guardar(RUTA_CORPUS_TFIDF)
+
+
+# Enriquecimiento PLN en segundo plano (resumen, entidades, temas)
+enriquecedores = {}
+lock_enriquecedores = threading.Lock()
+
+
+def obtener_enriquecedor(index: str) -> EnriquecedorNLP:
+    """
+    Un enriquecedor por índice; el hilo arranca en el primer uso (ya en el worker).
+    Todos los workers lo crean, pero solo el que toma el bloqueo del índice procesa.
+    """
+    with lock_enriquecedores:
+        if index not in enriquecedores:
+            enriquecedores[index] = EnriquecedorNLP(
+                elastic_instance=elastic,
+                index_name=index,
+                obtener_pln=obtener_pln,
+                n_workers=int(os.getenv('ENRIQUECIMIENTO_WORKERS', '2')),
+                tamano_lote=int(os.getenv('ENRIQUECIMIENTO_LOTE', '16')),
+                guardar_corpus=guardar_corpus_tfidf,
+                ruta_bloqueo=os.path.join(INDICES_DIR, f"enriquecedor_{index}.lock"),
+                al_enriquecer=agregar_similares(index)
+            )
+            enriquecedores[index].iniciar()
+        return enriquecedores[index]
+
+
+detectores_duplicados = {}
+lock_detectores = threading.Lock()
+
+
+def obtener_detector_duplicados(index: str) -> DetectorDuplicados:
+    """Detector MinHash por índice, con las firmas de corridas anteriores."""
+    with lock_detectores:
+        if index not in detectores_duplicados:
+            detector = DetectorDuplicados()
+            detector.cargar(os.path.join(INDICES_DIR, f"minhash_{index}.npz"))
+            detectores_duplicados[index] = detector
+        return detectores_duplicados[index]
+
+
+def texto_documento(source: dict) -> str:
+    return source.get('texto_ocr') or source.get('texto') or ''
+
+
+# ==================== TRABAJOS EN SEGUNDO PLANO ====================
+
+trabajos = GestorTrabajos(
+    carpeta=TRABAJOS_DIR,
+    n_workers=int(os.getenv('TRABAJOS_WORKERS', '2')),
+    ttl_horas=float(os.getenv('TRABAJOS_TTL_HORAS', '72'))
+)
+
+espacios = EspaciosTrabajo(
+    raiz=ESPACIOS_DIR,
+    ttl_horas=float(os.getenv('ESPACIOS_TTL_HORAS', '24')),
+    cuota_mb=float(os.getenv('ESPACIOS_CUOTA_MB', '2048'))
+)
+
+# Documentos por llamada a indexar_bulk (también es la granularidad del progreso)
+LOTE_INDEXACION = 500
+
+
+def mantener_espacios(trabajo, *rutas):
+    """Renueva el TTL de los espacios de `rutas` mientras el trabajo informa progreso."""
+    carpetas = {espacios.espacio_de(r) for r in rutas} - {None}
+    trabajo.mantener_vivo(lambda: [espacios.tocar(c) for c in carpetas])
+
+
+def tarea_webscraping(trabajo, tipos):
+    """Scraping incremental + descarga; el resultado lista los documentos nuevos o modificados."""
+    # Espacio propio: se conserva para la carga posterior y se borra si el trabajo falla
+    with espacios.espacio('webscraping') as carpeta_pdfs:
+        mantener_espacios(trabajo, carpeta_pdfs)
+        return _webscraping_en_espacio(trabajo, tipos, carpeta_pdfs)
+
+
+def _webscraping_en_espacio(trabajo, tipos, carpeta_pdfs):
+    json_links_path = os.path.join(carpeta_pdfs, 'links_minvivienda.json')
+
+    # Estado persistente: URLs vistas, ETag/Last-Modified y hash por documento
+    estado = EstadoCrawl(RUTA_ESTADO_CRAWL)
+    scraper = WebScraping(headless=True, estado=estado)
+
+    try:
+        print("\n=== [SCRAPING] Extrayendo enlaces de Minvivienda ===")
+        trabajo.etapa('links', total=len(scraper.SECCIONES), mensaje='Secciones recorridas')
+        resultado_links = scraper.extraer_todos_los_links(
+            json_destino=json_links_path,
+            al_progreso=lambda hechos, total: trabajo.progreso(hechos=hechos, total=total),
+            detener=trabajo.cancelado,
+            tipos=tipos or None
+        )
+        print(f"Links encontrados: {resultado_links.get('total_links',0)}")
+        trabajo.verificar()
+
+        print("\n=== [DESCARGA] Descargando documentos ===")
+        trabajo.etapa('descarga', mensaje='Documentos descargados')
+        resultado_descarga = scraper.descargar_pdfs(
+            json_path=json_links_path,
+            carpeta_destino=carpeta_pdfs,
+            tipos=tipos or None,
+            al_progreso=lambda hechos, total: trabajo.progreso(hechos=hechos, total=total),
+            detener=trabajo.cancelado
+        )
+    finally:
+        scraper.close()
+
+    # Solo los documentos nuevos o modificados siguen el flujo
+    archivos = resultado_descarga.get('archivos', [])
+
+    return {
+        'success': True,
+        'archivos': archivos,
+        'mensaje': f"{len(archivos)} documentos nuevos o modificados.",
+        'stats': {
+            'total_links': resultado_links.get('total_links', 0),
+            'links_nuevos': resultado_links.get('links_nuevos', 0),
+            'descargados': resultado_descarga.get('descargados', 0),
+            'sin_cambios': resultado_descarga.get('sin_cambios', 0),
+            'errores': len(resultado_descarga.get('errores', [])),
+            'descarga': resultado_descarga.get('stats', {})
+        }
+    }
+
+
+def tarea_cargar_documentos(trabajo, archivos, index, metodo, modo_duplicados):
+    """Extrae texto (o lee JSON), filtra casi duplicados e indexa en Elastic por lotes."""
+    # JSON del ZIP (campos archivo/texto_ocr) y documentos extraídos (ruta/texto)
+    documentos_json = []
+    documentos_texto = []
+    # Descargas del webscraping (url, hash, _id): se confirman en el EstadoCrawl ya indexadas
+    descargas = []
+
+    mantener_espacios(trabajo, *(a.get('ruta') for a in archivos))
+    trabajo.etapa('extraccion', total=len(archivos), mensaje='Archivos leídos')
+
+    for archivo in archivos:
+        trabajo.verificar()
+        trabajo.progreso(sumar=1)
+
+        ruta = archivo.get('ruta')
+        # Solo archivos de un espacio de trabajo: la ruta llega desde el navegador
+        if not ruta or not espacios.contiene(ruta) or not os.path.exists(ruta):
+            continue
+
+        extension = (archivo.get('extension') or os.path.splitext(ruta)[1]).lower().lstrip('.')
+
+        # ===========================================================
+        # ZIP — CARGAR JSON DIRECTAMENTE
+        # ===========================================================
+        if metodo == 'zip' and extension == 'json':
+            with tramo('leer_json', os.path.basename(ruta)):
+                doc = Funciones.leer_json(ruta)
+            if doc:
+                documentos_json.append(doc)
+            continue
+
+        # ===========================================================
+        # WEBSCRAPING (o PDF/DOCX/XLSX/TXT dentro del ZIP) — EXTRAER TEXTO
+        # ===========================================================
+        texto = Funciones.extraer_texto_archivo(ruta, extension)
+
+        if not texto or len(texto.strip()) < 50:
+            # Sin texto útil no hay nada que indexar: igual cuenta como procesado
+            if archivo.get('url'):
+                descargas.append((archivo['url'], archivo.get('hash'), None))
+            continue
+
+        # El PLN (resumen, entidades, temas) lo completa el EnriquecedorNLP
+        documento = PipelineIngesta.crear_documento(texto, ruta, archivo.get('nombre', ''),
+                                                    url=archivo.get('url'))
+        documentos_texto.append(documento)
+        if archivo.get('url'):
+            descargas.append((archivo['url'], archivo.get('hash'), documento['_id']))
+
+    if not documentos_json and not documentos_texto:
+        raise ValueError('No se pudieron procesar documentos')
+
+    # Casi duplicados (MinHash/LSH): marcar o colapsar en el canónico
+    trabajo.etapa('duplicados')
+    detector = obtener_detector_duplicados(index)
+    corrida = detector.nueva_corrida()
+
+    documentos = []
+    for grupo, campo_id, campo_texto in ((documentos_json, 'archivo', 'texto_ocr'),
+                                         (documentos_texto, '_id', 'texto')):
+        if grupo:
+            with tramo('duplicados', documentos=len(grupo)):
+                documentos += detector.filtrar_documentos(
+                    grupo, campo_id, campo_texto,
+                    colapsar=(modo_duplicados == 'colapsar'), corrida=corrida
+                )
+
+    # Indexar documentos en Elastic
+    trabajo.etapa('indexacion', total=len(documentos), mensaje='Documentos enviados a Elastic')
+    indexados = 0
+    fallidos = 0
+    ids_fallidos = set()
+
+    for i in range(0, len(documentos), LOTE_INDEXACION):
+        trabajo.verificar()
+        lote = documentos[i:i + LOTE_INDEXACION]
+        resultado = elastic.indexar_bulk(index, lote)
+        if not resultado.get('success'):
+            raise RuntimeError(resultado.get('error'))
+
+        indexados += resultado.get('indexados', 0)
+        fallidos += resultado.get('fallidos', 0)
+        ids_fallidos.update(resultado.get('ids_fallidos', []))
+        trabajo.progreso(sumar=len(lote))
+
+        if resultado.get('indexados'):
+            obtener_enriquecedor(index).despertar()
+
+    # Firmas MinHash: solo de lo que quedó en Elastic
+    detector.confirmar(corrida, excluir=ids_fallidos)
+    detector.guardar(os.path.join(INDICES_DIR, f"minhash_{index}.npz"))
+
+    return {
+        'success': True,
+        'indexados': indexados,
+        'errores': fallidos,
+        'confirmados': confirmar_descargas(descargas, ids_fallidos),
+        'duplicados': detector.estadisticas(corrida)
+    }
+
+
+def confirmar_descargas(descargas, ids_fallidos=()) -> int:
+    """
+    Confirma en el EstadoCrawl las descargas del webscraping (url, hash, _id) ya
+    indexadas. Las no confirmadas (trabajo fallido, espacio vencido o nunca
+    cargado) se vuelven a descargar en el siguiente scraping.
+    """
+    if not descargas:
+        return 0
+
+    estado = EstadoCrawl(RUTA_ESTADO_CRAWL)
+    confirmados = sum(
+        1 for url, hash_contenido, doc_id in descargas
+        if doc_id not in ids_fallidos and estado.confirmar(url, hash_contenido)
+    )
+    estado.guardar()
+    return confirmados
+
+
+def indexar_por_lotes(trabajo, documentos, index, modo_duplicados,
+                      campo_id='archivo', campo_texto='texto_ocr'):
+    """
+    Envía a Elastic un flujo de documentos en lotes de LOTE_INDEXACION, pasando
+    cada lote por el detector de duplicados. Nunca tiene más de un lote en memoria.
+    """
+    detector = obtener_detector_duplicados(index)
+    corrida = detector.nueva_corrida()
+
+    totales = {'documentos': 0, 'indexados': 0, 'fallidos': 0}
+    lote = []
+
+    def enviar(lote):
+        with tramo('duplicados', documentos=len(lote)):
+            lote = detector.filtrar_documentos(
+                lote, campo_id, campo_texto, colapsar=(modo_duplicados == 'colapsar'), corrida=corrida
+            )
+        if not lote:
+            return
+        resultado = elastic.indexar_bulk(index, lote)
+        if not resultado.get('success'):
+            raise RuntimeError(resultado.get('error'))
+        # Las firmas del lote se registran solo una vez indexado
+        detector.confirmar(corrida, excluir=resultado.get('ids_fallidos', []))
+        totales['indexados'] += resultado.get('indexados', 0)
+        totales['fallidos'] += resultado.get('fallidos', 0)
+        if resultado.get('indexados'):
+            obtener_enriquecedor(index).despertar()
+
+    for documento in documentos:
+        lote.append(documento)
+        totales['documentos'] += 1
+
+        if len(lote) >= LOTE_INDEXACION:
+            trabajo.verificar()
+            enviar(lote)
+            lote = []
+
+    if lote:
+        enviar(lote)
+
+    detector.guardar(os.path.join(INDICES_DIR, f"minhash_{index}.npz"))
+
+    return {
+        'success': True,
+        'documentos': totales['documentos'],
+        'indexados': totales['indexados'],
+        'errores': totales['fallidos'],
+        'duplicados': detector.estadisticas(corrida)
+    }
+
+
+def tarea_indexar_zip(trabajo, zip_path, index, modo_duplicados):
+    """
+    Ingesta directa de un ZIP: lee los JSON / JSON Lines del archivo sin extraerlos
+    y los envía a Elastic por lotes en una sola pasada. El espacio se borra al final.
+    """
+    try:
+        mantener_espacios(trabajo, zip_path)
+        with zipfile.ZipFile(zip_path) as zip_ref:
+            miembros = sum(
+                1 for n in zip_ref.namelist()
+                if n.lower().endswith(('.json', '.jsonl', '.ndjson')) and not n.startswith('__MACOSX/')
+            )
+
+        trabajo.etapa('indexacion', total=miembros, mensaje='Archivos JSON leídos del ZIP')
+
+        errores_miembros = []
+
+        def documentos():
+            vistos = set()
+            for miembro, documento in Funciones.iterar_documentos_zip(zip_path, errores=errores_miembros):
+                if miembro not in vistos:
+                    vistos.add(miembro)
+                    trabajo.verificar()
+                    trabajo.progreso(hechos=len(vistos))
+                yield documento
+
+        resultado = indexar_por_lotes(trabajo, documentos(), index, modo_duplicados)
+        trabajo.progreso(hechos=miembros)
+
+        resultado['errores_miembros'] = errores_miembros[:50]
+        return resultado
+    finally:
+        espacios.liberar(os.path.dirname(zip_path))
+
+
+def tarea_importar_corpus(trabajo, ruta_corpus, index, modo_duplicados):
+    """
+    Importa un corpus JSON Lines (.jsonl / .jsonl.gz / .jsonl.zst), por ejemplo uno
+    exportado con /exportar-corpus, leyéndolo en streaming. Las líneas con `_id`
+    reemplazan ese documento si ya existe. El espacio se borra al final.
+    """
+    try:
+        mantener_espacios(trabajo, ruta_corpus)
+        trabajo.etapa('indexacion', mensaje='Documentos leídos del corpus')
+
+        # Corpus de OCRtoElastic (archivo/texto_ocr) o del pipeline (_id/texto);
+        # un `_id` exportado siempre tiene prioridad como id para duplicados
+        primero = next(Funciones.leer_jsonl(ruta_corpus), {})
+        campos = ('archivo', 'texto_ocr') if 'texto_ocr' in primero else ('_id', 'texto')
+
+        def documentos():
+            for n, documento in enumerate(Funciones.leer_jsonl(ruta_corpus), start=1):
+                if n % LOTE_INDEXACION == 0:
+                    trabajo.progreso(hechos=n)
+                yield documento
+
+        resultado = indexar_por_lotes(trabajo, documentos(), index, modo_duplicados, *campos)
+        trabajo.progreso(hechos=resultado['documentos'])
+        return resultado
+    finally:
+        espacios.liberar(os.path.dirname(ruta_corpus))
+
+
+def tarea_pipeline(trabajo, index, modo_duplicados):
+    """Pipeline completo; un hilo vigía publica el progreso y propaga la cancelación."""
+    # Los archivos solo hacen falta hasta indexarlos: el espacio se borra al terminar
+    with espacios.espacio('pipeline', conservar=False) as carpeta:
+        mantener_espacios(trabajo, carpeta)
+        return _pipeline_en_espacio(trabajo, index, modo_duplicados, carpeta)
+
+
+def _pipeline_en_espacio(trabajo, index, modo_duplicados, carpeta):
+    scraper = WebScraping(headless=True, estado=EstadoCrawl(RUTA_ESTADO_CRAWL))
+    detector = obtener_detector_duplicados(index)
+    enriquecedor = obtener_enriquecedor(index)
+
+    pipeline = PipelineIngesta(
+        scraper=scraper,
+        elastic_instance=elastic,
+        index_name=index,
+        carpeta_destino=carpeta,
+        detector_duplicados=detector,
+        colapsar_duplicados=(modo_duplicados == 'colapsar'),
+        al_indexar=lambda n: enriquecedor.despertar()
+    )
+
+    terminado = threading.Event()
+
+    def vigilar():
+        while not terminado.wait(1.0):
+            if trabajo.cancelado():
+                pipeline.cancelar()
+            progreso = pipeline.progreso()
+            trabajo.progreso(
+                hechos=progreso['indexados'],
+                mensaje=', '.join(f"{etapa}: {n}" for etapa, n in progreso['etapas'].items())
+            )
+
+    trabajo.etapa('pipeline', mensaje='Documentos indexados')
+    vigia = threading.Thread(target=vigilar, name=f"vigia-{trabajo.id[:8]}", daemon=True)
+    vigia.start()
+
+    try:
+        return pipeline.ejecutar()
+    finally:
+        terminado.set()
+        scraper.close()
+        detector.guardar(os.path.join(INDICES_DIR, f"minhash_{index}.npz"))
+
+# ==================== MÉTRICAS ====================
+
+HTTP_DURACION = METRICAS.histograma(
+    'http_duracion_segundos', 'Duración de las solicitudes por ruta', ('ruta', 'metodo')
+)
+HTTP_SOLICITUDES = METRICAS.contador(
+    'http_solicitudes', 'Solicitudes atendidas por ruta y código de estado', ('ruta', 'metodo', 'estado')
+)
+HTTP_EN_CURSO = METRICAS.medidor('http_en_curso', 'Solicitudes en curso')
+
+
+@app.before_request
+def iniciar_medicion():
+    g.inicio_solicitud = time.perf_counter()
+    HTTP_EN_CURSO.sumar(1)
+
+
+@app.after_request
+def registrar_estado(respuesta):
+    g.estado_respuesta = respuesta.status_code
+    return respuesta
+
+
+@app.teardown_request
+def terminar_medicion(error=None):
+    # Con respuestas en streaming (SSE, exportar corpus) corre al cerrar el stream
+    inicio = g.pop('inicio_solicitud', None)
+    if inicio is None:
+        return
+    HTTP_EN_CURSO.sumar(-1)
+
+    # La regla (/trabajos/<trabajo_id>) y no la URL, para no crear una serie por ID
+    ruta = request.url_rule.rule if request.url_rule else 'sin_ruta'
+    estado = 500 if error else g.get('estado_respuesta', 500)
+    HTTP_DURACION.observar(time.perf_counter() - inicio, ruta, request.method)
+    HTTP_SOLICITUDES.sumar(1, ruta, request.method, str(estado))
+
+
+@app.route('/metrics')
+def metrics():
+    """Métricas en formato de texto de Prometheus."""
+    if METRICAS_TOKEN:
+        if request.headers.get('Authorization') != f'Bearer {METRICAS_TOKEN}':
+            return Response('No autorizado\n', status=401, mimetype='text/plain')
+    elif app.config.get('METRICAS_REQUIERE_TOKEN'):
+        return Response('Defina METRICAS_TOKEN para habilitar /metrics\n', status=403, mimetype='text/plain')
+
+    return Response(METRICAS.exportar(), mimetype='text/plain; version=0.0.4; charset=utf-8')
+
+# ==================== SALUD ====================
+
+salud = MonitorSalud(intervalo=SALUD_INTERVALO, timeout=SALUD_TIMEOUT)
+
+
+def verificar_mongo() -> bool:
+    mongo.client.admin.command('ping')
+    return True
+
+
+def verificar_elastic() -> bool:
+    # ping() no imprime como test_connection() y respeta el timeout de la sonda
+    return elastic.client.options(request_timeout=SALUD_TIMEOUT).ping()
+
+
+def verificar_modelos() -> dict:
+    """Índices del índice por defecto en memoria; PLN solo si se pidió precargarlo."""
+    detalle = {
+        'pln': pln_compartido is not None,
+        'indice_similares': ELASTIC_INDEX_DEFAULT in indices_similares,
+        'detector_duplicados': ELASTIC_INDEX_DEFAULT in detectores_duplicados
+    }
+    requeridos = ['indice_similares', 'detector_duplicados']
+    if app.config.get('PRECARGAR_MODELOS'):
+        requeridos.append('pln')
+    return {'ok': all(detalle[r] for r in requeridos), **detalle}
+
+
+def verificar_disco() -> dict:
+    ruta = os.path.abspath(ESPACIOS_DIR)
+    while not os.path.exists(ruta):
+        ruta = os.path.dirname(ruta)
+    uso = shutil.disk_usage(ruta)
+    libre_mb = uso.free // (1024 * 1024)
+    return {'ok': libre_mb >= SALUD_DISCO_MIN_MB, 'libre_mb': libre_mb, 'minimo_mb': SALUD_DISCO_MIN_MB}
+
+
+salud.registrar('mongodb', verificar_mongo)
+salud.registrar('elastic', verificar_elastic)
+salud.registrar('modelos', verificar_modelos)
+salud.registrar('disco', verificar_disco)
+
+
+@app.route('/healthz')
+def healthz():
+    """Liveness: el proceso responde. No toca dependencias."""
+    return jsonify({'status': 'ok', **salud.vivo()})
+
+
+@app.route('/readyz')
+def readyz():
+    """Readiness: último resultado en caché de las verificaciones (ver MonitorSalud)."""
+    estado = salud.estado()
+    estado['calentado'] = estado_arranque['calentado']
+    return jsonify(estado), 200 if estado['listo'] else 503
+
+# ==================== CONTROL DE ADMISIÓN ====================
+
+admision = ControlAdmision(capacidad=ADMISION_CAPACIDAD, reserva_interactiva=ADMISION_RESERVA_BUSQUEDA)
+
+# Búsqueda pública: nunca se rechaza, pero su carga descuenta cupos a las costosas
+admision.configurar('busqueda', interactiva=True)
+# Similares: búsqueda en el índice ANN en memoria + lectura de los vecinos en Elastic
+admision.configurar('similares', limite=4, por_usuario=2, tasa_por_minuto=60, rafaga=10, reintentar=5)
+# Queries arbitrarias: síncronas, pueden escanear todo el índice
+admision.configurar('query_elastic', limite=2, por_usuario=1, tasa_por_minuto=30, rafaga=5, reintentar=5)
+# Trabajos en segundo plano: el cupo dura lo que dura el trabajo
+admision.configurar('webscraping', limite=1, por_usuario=1, tasa_por_minuto=2, rafaga=2, reintentar=60)
+admision.configurar('pipeline', limite=1, por_usuario=1, tasa_por_minuto=2, rafaga=2, reintentar=60)
+admision.configurar('carga_ocr', limite=2, por_usuario=1, tasa_por_minuto=6, rafaga=3, reintentar=30)
+# Indexación sin OCR (JSON de un ZIP, ZIP directo, corpus): bulk + duplicados
+admision.configurar('indexacion', limite=2, por_usuario=1, tasa_por_minuto=6, rafaga=3, reintentar=30)
+
+
+def usuario_admision() -> str:
+    return session.get('usuario') or request.remote_addr or 'anonimo'
+
+
+def respuesta_rechazo(e: AdmisionRechazada):
+    """429 con Retry-After para un rechazo del control de admisión."""
+    respuesta = jsonify({'success': False, 'error': str(e), 'reintentar_en': e.reintentar})
+    respuesta.headers['Retry-After'] = str(e.reintentar)
+    return respuesta, 429
+
+
+def encolar_admitido(clase: str, tipo: str, funcion, *args, **kwargs) -> str:
+    """Encola el trabajo con un cupo de `clase` que se libera cuando termina (o lanza AdmisionRechazada)."""
+    permiso = admision.admitir(clase, usuario_admision())
+    try:
+        return trabajos.encolar(tipo, funcion, *args, al_terminar=permiso.liberar, **kwargs)
+    except Exception:
+        permiso.liberar()
+        raise
+
+
+@app.route('/admision')
+def estado_admision():
+    """Cupos en uso y rechazos por clase (este worker)."""
+    error = validar_permiso_trabajos()
+    if error:
+        return error
+
+    return jsonify({'success': True, 'pid': os.getpid(), **admision.estadisticas()})
+
+
 # ==================== RUTAS ====================
 
 @app.route('/')
@@ -77,18 +777,118 @@ def buscar_elastic():
             }
         }
 
-        resultado = elastic.buscar(
-            index=ELASTIC_INDEX_DEFAULT,
-            query=query_base,
-            aggs=aggs,
-            size=100
-        )
+        with admision.permiso('busqueda'):
+            resultado = elastic.buscar(
+                index=ELASTIC_INDEX_DEFAULT,
+                query=query_base,
+                aggs=aggs,
+                size=100
+            )
 
         return jsonify(resultado)
 
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
 
+# ----------- Documentos similares (índice ANN) -----------
+
+@app.route('/documentos-similares', methods=['POST'])
+def documentos_similares():
+    """
+    Vecinos de un documento en el índice ANN. Solo consulta: los documentos
+    entran al índice cuando el enriquecedor los procesa, no aquí.
+    """
+    try:
+        data = request.get_json()
+        doc_id = data.get('id')
+        k = min(int(data.get('k', 10)), 50)
+        index = data.get('index') or ELASTIC_INDEX_DEFAULT
+
+        if not doc_id:
+            return jsonify({'success': False, 'error': 'Id del documento es requerido'}), 400
+
+        if index not in INDICES_SIMILARES:
+            return jsonify({'success': False, 'error': 'Índice no disponible para similares'}), 400
+
+        with admision.permiso('similares', usuario_admision()):
+            indice = obtener_indice_similares(index)
+
+            if not indice.contiene(doc_id):
+                return jsonify({
+                    'success': False,
+                    'error': 'El documento aún no está en el índice de similares (se agrega al enriquecerlo)'
+                }), 404
+
+            vecinos = indice.similares_a(doc_id, k=k)
+
+            fuentes = elastic.obtener_documentos(
+                index,
+                [vecino_id for vecino_id, _ in vecinos],
+                campos=['archivo', 'nombre_archivo', 'texto_ocr', 'texto']
+            )
+
+        similares = []
+        for vecino_id, score in vecinos:
+            s = fuentes.get(vecino_id, {})
+            similares.append({
+                '_id': vecino_id,
+                'score': score,
+                'archivo': s.get('archivo') or s.get('nombre_archivo', ''),
+                'fragmento': texto_documento(s)[:200]
+            })
+
+        return jsonify({'success': True, 'id': doc_id, 'similares': similares})
+
+    except AdmisionRechazada as e:
+        return respuesta_rechazo(e)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+@app.route('/construir-indice-similares', methods=['POST'])
+def construir_indice_similares():
+    """Reconstruye el índice ANN con los embeddings de todo el corpus."""
+    try:
+        if not session.get('logged_in'):
+            return jsonify({'success': False, 'error': 'No autorizado'}), 401
+
+        permisos = session.get('permisos', {})
+        if not permisos.get('admin_elastic'):
+            return jsonify({'success': False, 'error': 'No tiene permisos'}), 403
+
+        data = request.get_json(silent=True) or {}
+        index = data.get('index') or ELASTIC_INDEX_DEFAULT
+
+        if index not in INDICES_SIMILARES:
+            return jsonify({'success': False, 'error': 'Índice no disponible para similares (ver INDICES_SIMILARES)'}), 400
+
+        pln = obtener_pln()
+        ids, vectores, lote_ids, lote_textos = [], [], [], []
+
+        for hit in elastic.iterar_documentos(index, campos=['texto_ocr', 'texto']):
+            lote_ids.append(hit['_id'])
+            lote_textos.append(texto_documento(hit.get('_source', {})))
+
+            if len(lote_ids) >= 256:
+                ids.extend(lote_ids)
+                vectores.append(pln.generar_embeddings(lote_textos))
+                lote_ids, lote_textos = [], []
+
+        if lote_ids:
+            ids.extend(lote_ids)
+            vectores.append(pln.generar_embeddings(lote_textos))
+
+        if not ids:
+            return jsonify({'success': False, 'error': 'El índice no tiene documentos'}), 400
+
+        indice = IndiceANN()
+        stats = indice.construir(ids, np.vstack(vectores))
+        guardar_indice_similares(index, indice)
+
+        return jsonify({'success': True, 'stats': stats})
+
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
 # ----------- Gestión de usuarios (MongoDB) -----------
 
 @app.route('/login', methods=['GET', 'POST'])
@@ -112,13 +912,16 @@ def login():
 
 @app.route('/listar-usuarios')
 def listar_usuarios():
+    """Página de usuarios (sin contraseña): ?limite=100&despues=<siguiente de la página anterior>."""
     try:
-        usuarios = mongo.listar_usuarios(MONGO_COLECCION)
-        for usuario in usuarios:
-            usuario['_id'] = str(usuario['_id'])
-        return jsonify(usuarios)
+        limite = min(max(request.args.get('limite', 100, type=int), 1), 500)
+        pagina = mongo.listar_usuarios(MONGO_COLECCION, limite=limite, despues=request.args.get('despues'))
+
+        if not pagina['success']:
+            return jsonify(pagina), 500
+        return jsonify(pagina)
     except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        return jsonify({'success': False, 'error': str(e)}), 500
 
 @app.route('/gestor_usuarios')
 def gestor_usuarios():
@@ -140,6 +943,16 @@ def gestor_usuarios():
         creador=CREATOR_APP
     )
 
+# Motivo de falla de las operaciones de usuarios → código HTTP
+ESTADO_MOTIVO_USUARIO = {'duplicado': 400, 'no_encontrado': 404}
+
+
+def respuesta_usuario(resultado: dict):
+    if resultado['success']:
+        return jsonify({'success': True}), 200
+    return jsonify(resultado), ESTADO_MOTIVO_USUARIO.get(resultado.get('motivo'), 500)
+
+
 @app.route('/crear-usuario', methods=['POST'])
 def crear_usuario():
     try:
@@ -158,16 +971,8 @@ def crear_usuario():
         if not usuario or not password:
             return jsonify({'success': False, 'error': 'Usuario y contraseña requeridos'}), 400
 
-        usuario_existente = mongo.obtener_usuario(usuario, MONGO_COLECCION)
-        if usuario_existente:
-            return jsonify({'success': False, 'error': 'El usuario ya existe'}), 400
-
-        resultado = mongo.crear_usuario(usuario, password, permisos_usuario, MONGO_COLECCION)
-
-        if resultado:
-            return jsonify({'success': True}), 200
-        else:
-            return jsonify({'success': False, 'error': 'Error al crear usuario'}), 500
+        # Una sola operación: el duplicado lo informa Mongo (índice único)
+        return respuesta_usuario(mongo.crear_usuario(usuario, password, permisos_usuario, MONGO_COLECCION))
 
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -189,21 +994,14 @@ def actualizar_usuario():
         if not usuario_original:
             return jsonify({'success': False, 'error': 'Usuario original requerido'}), 400
 
-        usuario_existente = mongo.obtener_usuario(usuario_original, MONGO_COLECCION)
-        if not usuario_existente:
-            return jsonify({'success': False, 'error': 'Usuario no encontrado'}), 404
-
-        nuevo_usuario = datos_usuario.get('usuario')
-        if nuevo_usuario and nuevo_usuario != usuario_original:
-            if mongo.obtener_usuario(nuevo_usuario, MONGO_COLECCION):
-                return jsonify({'success': False, 'error': 'Ya existe otro usuario con ese nombre'}), 400
+        # Solo los campos editables; contraseña vacía = no cambiarla (el listado ya no la envía)
+        datos_usuario = {k: v for k, v in datos_usuario.items()
+                         if k in ('usuario', 'password', 'permisos') and v not in (None, '')}
+        if not datos_usuario:
+            return jsonify({'success': False, 'error': 'No hay datos para actualizar'}), 400
 
-        resultado = mongo.actualizar_usuario(usuario_original, datos_usuario, MONGO_COLECCION)
-
-        if resultado:
-            return jsonify({'success': True}), 200
-        else:
-            return jsonify({'success': False, 'error': 'Error al actualizar usuario'}), 500
+        # No encontrado y nombre repetido los informa la misma actualización
+        return respuesta_usuario(mongo.actualizar_usuario(usuario_original, datos_usuario, MONGO_COLECCION))
 
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -224,19 +1022,10 @@ def eliminar_usuario():
         if not usuario:
             return jsonify({'success': False, 'error': 'Usuario requerido'}), 400
 
-        usuario_existente = mongo.obtener_usuario(usuario, MONGO_COLECCION)
-        if not usuario_existente:
-            return jsonify({'success': False, 'error': 'Usuario no encontrado'}), 404
-
         if usuario == session.get('usuario'):
             return jsonify({'success': False, 'error': 'No puede eliminarse a sí mismo'}), 400
 
-        resultado = mongo.eliminar_usuario(usuario, MONGO_COLECCION)
-
-        if resultado:
-            return jsonify({'success': True}), 200
-        else:
-            return jsonify({'success': False, 'error': 'Error al eliminar usuario'}), 500
+        return respuesta_usuario(mongo.eliminar_usuario(usuario, MONGO_COLECCION))
 
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -293,7 +1082,11 @@ def ejecutar_query_elastic():
         if not query_json:
             return jsonify({'success': False, 'error': 'Query requerida'}), 400
 
-        return jsonify(elastic.ejecutar_query(query_json))
+        with admision.permiso('query_elastic', usuario_admision()):
+            return jsonify(elastic.ejecutar_query(query_json))
+
+    except AdmisionRechazada as e:
+        return respuesta_rechazo(e)
 
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -322,9 +1115,10 @@ def cargar_doc_elastic():
 @app.route('/procesar-webscraping-elastic', methods=['POST'])
 def procesar_webscraping_elastic():
     """
-    - Extrae únicamente los PDFs.
-    - Descarga los PDFs en static/uploads.
-    - Devuelve la lista de PDFs al frontend.
+    Encola el scraping en segundo plano y responde de inmediato con el ID del trabajo:
+    - Extrae los links de documentos (PDF, DOCX, XLSX).
+    - Descarga los tipos pedidos en un espacio propio (incremental: solo nuevos o modificados).
+    - El resultado del trabajo lista los documentos nuevos/modificados.
     NO hace OCR, NO indexa en Elastic.
     """
     try:
@@ -336,56 +1130,73 @@ def procesar_webscraping_elastic():
         if not permisos.get('admin_data_elastic'):
             return jsonify({'success': False, 'error': 'No tiene permisos'}), 403
 
-        # ---------- 2. Preparar carpetas de trabajo ----------
-        carpeta_pdfs = os.path.join('static', 'uploads')
-        json_links_path = os.path.join(carpeta_pdfs, 'links_minvivienda.json')
+        data = request.get_json(silent=True) or {}
+        tipos = [t.strip() for t in str(data.get('tipos_archivos') or '').split(',') if t.strip()]
 
-        Funciones.crear_carpeta(carpeta_pdfs)
-        Funciones.borrar_contenido_carpeta(carpeta_pdfs)
+        # ---------- 2. Encolar ----------
+        trabajo_id = encolar_admitido(
+            'webscraping', 'webscraping', tarea_webscraping, tipos,
+            usuario=session.get('usuario'),
+            parametros={'tipos': tipos}
+        )
 
-        # ---------- 3. Scrapin ----------
-        print("\n=== [SCRAPING] Extrayendo enlaces de Minvivienda ===")
+        return jsonify({
+            'success': True,
+            'trabajo_id': trabajo_id,
+            'estado_url': url_for('estado_trabajo', trabajo_id=trabajo_id),
+            'traza_url': url_for('traza_trabajo', trabajo_id=trabajo_id)
+        }), 202
 
-        scraper = WebScraping(headless=True)
+    except AdmisionRechazada as e:
+        return respuesta_rechazo(e)
 
-        resultado_links = scraper.extraer_todos_los_links(
-            json_destino=json_links_path
-        )
+    except Exception as e:
+        print("Error en procesar_webscraping_elastic:", e)
+        return jsonify({'success': False, 'error': str(e)}), 500
 
-        print(f"Links encontrados: {resultado_links.get('total_links',0)}")
 
-        # ---------- 4. Descargar SOLO PDFs ----------
-        print("\n=== [DESCARGA] Descargando PDFs ===")
+@app.route('/procesar-pipeline-elastic', methods=['POST'])
+def procesar_pipeline_elastic():
+    """
+    Ingesta completa en segundo plano, por etapas en paralelo:
+    scraping → descarga → extracción de texto → indexación en Elastic.
+    """
+    try:
+        if not session.get('logged_in'):
+            return jsonify({'success': False, 'error': 'No autorizado'}), 401
 
-        resultado_descarga = scraper.descargar_pdfs(
-            json_path=json_links_path,
-            carpeta_destino=carpeta_pdfs
-        )
+        permisos = session.get('permisos', {})
+        if not permisos.get('admin_data_elastic'):
+            return jsonify({'success': False, 'error': 'No tiene permisos'}), 403
 
-        scraper.close()
+        data = request.get_json(silent=True) or {}
+        index = data.get('index') or ELASTIC_INDEX_DEFAULT
+        modo_duplicados = data.get('duplicados', 'marcar')
 
-        # ---------- 5. Listar los PDFs descargados ----------
-        archivos = Funciones.listar_archivos_carpeta(carpeta_pdfs, ['pdf'])
+        trabajo_id = encolar_admitido(
+            'pipeline', 'pipeline', tarea_pipeline, index, modo_duplicados,
+            usuario=session.get('usuario'),
+            parametros={'index': index, 'duplicados': modo_duplicados}
+        )
 
         return jsonify({
             'success': True,
-            'archivos': archivos,
-            'mensaje': f"{len(archivos)} PDFs descargados correctamente.",
-            'stats': {
-                'total_links': resultado_links.get('total_links', 0),
-                'descargados': resultado_descarga.get('descargados', 0),
-                'errores': len(resultado_descarga.get('errores', []))
-            }
-        })
+            'trabajo_id': trabajo_id,
+            'estado_url': url_for('estado_trabajo', trabajo_id=trabajo_id),
+            'traza_url': url_for('traza_trabajo', trabajo_id=trabajo_id)
+        }), 202
+
+    except AdmisionRechazada as e:
+        return respuesta_rechazo(e)
 
     except Exception as e:
-        print("Error en procesar_webscraping_elastic:", e)
+        print("Error en procesar_pipeline_elastic:", e)
         return jsonify({'success': False, 'error': str(e)}), 500
 
 
 @app.route('/cargar-documentos-elastic', methods=['POST'])
 def cargar_documentos_elastic():
-    """API para cargar documentos a ElasticSearch"""
+    """API para cargar documentos a ElasticSearch (encola un trabajo en segundo plano)"""
     try:
         # ---------------- VALIDACIÓN DE SESIÓN ----------------
         if not session.get('logged_in'):
@@ -400,113 +1211,242 @@ def cargar_documentos_elastic():
         archivos = data.get('archivos', [])
         index = data.get('index')
         metodo = data.get('metodo', 'zip')
+        modo_duplicados = data.get('duplicados', 'marcar')  # 'marcar' | 'colapsar'
 
         if not archivos or not index:
             return jsonify({'success': False, 'error': 'Archivos e índice son requeridos'}), 400
 
-        documentos = []
+        parametros = {'index': index, 'metodo': metodo, 'archivos': len(archivos),
+                      'duplicados': modo_duplicados}
 
-        # ===========================================================
-        # MÉTODO 1: ZIP — CARGAR JSON DIRECTAMENTE
-        # ===========================================================
-        if metodo == 'zip':
-            for archivo in archivos:
-                ruta = archivo.get('ruta')
+        # Solo JSON de un ZIP no pasa por extracción/OCR: cupo de indexación, no de OCR
+        solo_json = metodo == 'zip' and all(
+            (a.get('extension') or os.path.splitext(a.get('ruta') or '')[1]).lower().lstrip('.') == 'json'
+            for a in archivos
+        )
+        trabajo_id = encolar_admitido(
+            'indexacion' if solo_json else 'carga_ocr', 'cargar_documentos', tarea_cargar_documentos,
+            archivos, index, metodo, modo_duplicados, usuario=session.get('usuario'), parametros=parametros
+        )
 
-                if ruta and os.path.exists(ruta):
-                    doc = Funciones.leer_json(ruta)
-                    if doc:
-                        documentos.append(doc)
+        return jsonify({
+            'success': True,
+            'trabajo_id': trabajo_id,
+            'estado_url': url_for('estado_trabajo', trabajo_id=trabajo_id),
+            'traza_url': url_for('traza_trabajo', trabajo_id=trabajo_id)
+        }), 202
 
-        # ===========================================================
-        # MÉTODO 2: WEBSCRAPING — PROCESAR ARCHIVOS UNO POR UNO
-        # ===========================================================
-        elif metodo == 'webscraping':
-            # Procesar archivos con PLN
-            pln = PLN(cargar_modelos=True)
-
-            for archivo in archivos:
-                ruta = archivo.get('ruta')
-                if not ruta or not os.path.exists(ruta):
-                    continue
-
-                extension = archivo.get('extension', '').lower()
-
-                # Extraer texto según tipo de archivo
-                texto = ""
-                
-                if extension == 'pdf':
-                    # Intentar extracción normal
-                    texto = Funciones.extraer_texto_pdf(ruta)
-
-                    # Si no se extrajo texto, intentar con OCR
-                    if not texto or len(texto.strip()) < 100:
-                        try:
-                            texto = Funciones.extraer_texto_pdf_ocr(ruta)
-                        except:
-                            pass
-
-                elif extension == 'txt':
-                    try:
-                        with open(ruta, 'r', encoding='utf-8') as f:
-                            texto = f.read()
-                    except:
-                        try:
-                            with open(ruta, 'r', encoding='latin-1') as f:
-                                texto = f.read()
-                        except:
-                            pass
-
-                if not texto or len(texto.strip()) < 50:
-                    continue
-
-                # Procesar con PLN
-                try:
-                    # resumen = pln.generar_resumen(texto, num_oraciones=3)
-                    # entidades = pln.extraer_entidades(texto)
-                    # temas = pln.extraer_temas(texto, top_n=10)
-
-                    resumen = ""      # borrar en producción
-                    entidades = ""    # borrar en producción
-                    temas = ""        # borrar en producción
-
-                    # Crear documento
-                    documento = {
-                        'texto': texto,
-                        'fecha': datetime.now().isoformat(),
-                        'ruta': ruta,
-                        'nombre_archivo': archivo.get('nombre', ''),
-                        'resumen': resumen,
-                        'entidades': entidades,
-                        'temas': [{'palabra': palabra, 'relevancia': relevancia} for palabra, relevancia in temas]
-                    }
-
-                    documentos.append(documento)
-
-                except Exception as e:
-                    print(f"Error al procesar {archivo.get('nombre')}: {e}")
-                    continue
-
-            # pln.close()
-
-        if not documentos:
-            return jsonify({'success': False, 'error': 'No se pudieron procesar documentos'}), 400
-
-        # Indexar documentos en Elastic
-        resultado = elastic.indexar_bulk(index, documentos)
+    except AdmisionRechazada as e:
+        return respuesta_rechazo(e)
 
-        return jsonify({
-            'success': resultado['success'],
-            'indexados': resultado['indexados'],
-            'errores': resultado['fallidos']
-        })
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+# ==================== TRABAJOS ====================
+
+def validar_permiso_trabajos():
+    """Retorna (respuesta, status) si no hay permiso; None si puede continuar."""
+    if not session.get('logged_in'):
+        return jsonify({'success': False, 'error': 'No autorizado'}), 401
+
+    permisos = session.get('permisos', {})
+    if not permisos.get('admin_data_elastic'):
+        return jsonify({'success': False, 'error': 'No tiene permisos'}), 403
+
+    return None
+
+
+def ve_todos_los_trabajos():
+    """Los administradores de usuarios ven y cancelan trabajos de cualquiera."""
+    return bool(session.get('permisos', {}).get('admin_usuarios'))
+
+
+def obtener_trabajo_propio(trabajo_id, incluir_resultado=False):
+    """Datos del trabajo si es de la sesión (o admin_usuarios); None si no existe o es ajeno."""
+    datos = trabajos.obtener(trabajo_id, incluir_resultado=incluir_resultado)
+    if datos is None:
+        return None
+    if not ve_todos_los_trabajos() and datos.get('usuario') != session.get('usuario'):
+        return None
+    return datos
+
+
+@app.route('/trabajos')
+def listar_trabajos():
+    error = validar_permiso_trabajos()
+    if error:
+        return error
+
+    limite = request.args.get('limite', 20, type=int)
+    usuario = None if ve_todos_los_trabajos() else session.get('usuario')
+    return jsonify({'success': True, 'trabajos': trabajos.listar(limite=limite, usuario=usuario)})
+
+
+@app.route('/trabajos/<trabajo_id>')
+def estado_trabajo(trabajo_id):
+    """Estado, etapa, hechos/total, ritmo y ETA de un trabajo."""
+    error = validar_permiso_trabajos()
+    if error:
+        return error
+
+    datos = obtener_trabajo_propio(trabajo_id)
+
+    if datos is None:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+
+    return jsonify({'success': True, 'trabajo': datos})
+
+
+@app.route('/trabajos/<trabajo_id>/resultado')
+def resultado_trabajo(trabajo_id):
+    error = validar_permiso_trabajos()
+    if error:
+        return error
+
+    datos = obtener_trabajo_propio(trabajo_id, incluir_resultado=True)
+
+    if datos is None:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+
+    if datos['estado'] not in GestorTrabajos.ESTADOS_FINALES:
+        return jsonify({'success': False, 'error': 'El trabajo no ha terminado',
+                        'estado': datos['estado']}), 409
+
+    return jsonify({
+        'success': datos['estado'] == 'completado',
+        'estado': datos['estado'],
+        'error': datos.get('error'),
+        'resultado': datos.get('resultado'),
+        'traza': datos.get('traza')
+    })
+
+
+@app.route('/trabajos/<trabajo_id>/traza')
+def traza_trabajo(trabajo_id):
+    """
+    Tramos de un trabajo terminado:
+    - formato=resumen (por defecto): tiempo por etapa, archivos más lentos, páginas/s.
+    - formato=folded: pilas plegadas para flamegraph.pl o speedscope.
+    - formato=chrome: Trace Event Format para chrome://tracing o Perfetto.
+    """
+    error = validar_permiso_trabajos()
+    if error:
+        return error
+
+    traza = trabajos.obtener_traza(trabajo_id) if obtener_trabajo_propio(trabajo_id) else None
+    if traza is None:
+        return jsonify({'success': False, 'error': 'Traza no encontrada (el trabajo no existe o no ha terminado)'}), 404
+
+    formato = request.args.get('formato', 'resumen')
+    if formato == 'folded':
+        return Response(
+            traza.exportar_folded(), mimetype='text/plain',
+            headers={'Content-Disposition': f'attachment; filename=traza_{trabajo_id}.folded'}
+        )
+    if formato == 'chrome':
+        return Response(
+            Funciones.json_dumps(traza.exportar_chrome()), mimetype='application/json',
+            headers={'Content-Disposition': f'attachment; filename=traza_{trabajo_id}.json'}
+        )
+
+    top = request.args.get('top', 10, type=int)
+    return jsonify({'success': True, 'traza': traza.resumen(top=top)})
+
+
+@app.route('/trabajos/<trabajo_id>/cancelar', methods=['POST'])
+def cancelar_trabajo(trabajo_id):
+    error = validar_permiso_trabajos()
+    if error:
+        return error
+
+    if obtener_trabajo_propio(trabajo_id) is None:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+
+    cancelado = trabajos.cancelar(trabajo_id)
+
+    if not cancelado:
+        return jsonify({'success': False, 'error': 'El trabajo no existe o ya terminó'}), 409
+
+    return jsonify({'success': True, 'mensaje': 'Cancelación solicitada'})
+
+
+@app.route('/trabajos/<trabajo_id>/eventos')
+def eventos_trabajo(trabajo_id):
+    """
+    Server-Sent Events: envía el estado del trabajo cada vez que cambia.
+    Cada stream dura a lo sumo SSE_DURACION_MAX segundos y termina con un
+    evento `reconectar`: un trabajo de horas no retiene un hilo todo ese tiempo.
+    """
+    error = validar_permiso_trabajos()
+    if error:
+        return error
+
+    if obtener_trabajo_propio(trabajo_id) is None:
+        return jsonify({'success': False, 'error': 'Trabajo no encontrado'}), 404
+
+    def generar():
+        anterior = None
+        limite = time.monotonic() + SSE_DURACION_MAX
+        while True:
+            datos = trabajos.obtener(trabajo_id)
+            if datos is None:
+                yield "event: error\ndata: {}\n\n"
+                return
+
+            actual = Funciones.json_dumps(datos).decode('utf-8')
+            if actual != anterior:
+                yield f"data: {actual}\n\n"
+                anterior = actual
+            else:
+                yield ": sigue\n\n"  # mantiene viva la conexión a través de proxies
+
+            if datos['estado'] in GestorTrabajos.ESTADOS_FINALES:
+                return
+            if time.monotonic() >= limite:
+                yield "event: reconectar\ndata: {}\n\n"
+                return
+            time.sleep(1)
+
+    return Response(
+        stream_with_context(generar()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+@app.route('/estado-enriquecimiento')
+def estado_enriquecimiento():
+    """Backlog y velocidad del enriquecimiento PLN en segundo plano."""
+    try:
+        if not session.get('logged_in'):
+            return jsonify({'success': False, 'error': 'No autorizado'}), 401
+
+        permisos = session.get('permisos', {})
+        if not permisos.get('admin_data_elastic'):
+            return jsonify({'success': False, 'error': 'No tiene permisos'}), 403
+
+        index = request.args.get('index') or ELASTIC_INDEX_DEFAULT
+
+        # Solo consulta: no arranca un enriquecedor para un índice que llega del cliente
+        enriquecedor = enriquecedores.get(index)
+        if enriquecedor is None:
+            return jsonify({
+                'success': True, 'index': index, 'activo': False,
+                'backlog': elastic.contar(index, EnriquecedorNLP.QUERY_PENDIENTES)
+            })
+
+        return jsonify({'success': True, 'index': index, **enriquecedor.estadisticas()})
 
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
-    
+
 @app.route('/procesar-zip-elastic', methods=['POST'])
 def procesar_zip_elastic():
-    """API para procesar archivo ZIP con archivos JSON"""
+    """
+    API para procesar archivo ZIP con archivos JSON (y PDF, DOCX, XLSX, TXT).
+    Con modo='directo' los JSON / JSON Lines se indexan en segundo plano leyéndolos
+    del ZIP, sin descomprimir ni segundo paso de carga.
+    """
     try:
         if not session.get('logged_in'):
             return jsonify({'success': False, 'error': 'No autorizado'}), 401
@@ -527,29 +1467,169 @@ def procesar_zip_elastic():
         if not index:
             return jsonify({'success': False, 'error': 'Índice no especificado'}), 400
 
-        # Guardar archivo ZIP temporalmente
-        filename = secure_filename(file.filename)
-        carpeta_upload = 'static/uploads'
-        Funciones.crear_carpeta(carpeta_upload)
-        Funciones.borrar_contenido_carpeta(carpeta_upload)
+        # Guardar y descomprimir en un espacio propio (se borra si algo falla)
+        filename = secure_filename(file.filename) or 'carga.zip'
+
+        if request.form.get('modo') == 'directo':
+            with espacios.espacio('zip_directo', bytes_necesarios=request.content_length or 0) as carpeta:
+                zip_path = os.path.join(carpeta, filename)
+                file.save(zip_path)
+
+                if not zipfile.is_zipfile(zip_path):
+                    raise ValueError('El archivo no es un ZIP válido')
+
+                modo_duplicados = request.form.get('duplicados', 'marcar')
+                trabajo_id = encolar_admitido(
+                    'indexacion', 'indexar_zip', tarea_indexar_zip, zip_path, index, modo_duplicados,
+                    usuario=session.get('usuario'),
+                    parametros={'index': index, 'archivo': filename, 'duplicados': modo_duplicados}
+                )
+
+            return jsonify({
+                'success': True,
+                'trabajo_id': trabajo_id,
+                'estado_url': url_for('estado_trabajo', trabajo_id=trabajo_id),
+                'traza_url': url_for('traza_trabajo', trabajo_id=trabajo_id)
+            }), 202
+
+        with espacios.espacio('zip', bytes_necesarios=request.content_length or 0) as carpeta_upload:
+            zip_path = os.path.join(carpeta_upload, filename)
+            file.save(zip_path)
+
+            # La cuota cuenta el contenido expandido, no solo el ZIP subido
+            if zipfile.is_zipfile(zip_path):
+                espacios.verificar_cuota_zip(zip_path)
+
+            # Descomprimir ZIP
+            archivos = Funciones.descomprimir_zip_local(zip_path, carpeta_upload)
+
+            # Eliminar archivo ZIP
+            os.remove(zip_path)
+
+            # Listar archivos JSON
+            archivos_json = Funciones.listar_archivos_json(carpeta_upload)
+
+        # Documentos de los que se extrae texto al cargar (en cualquier carpeta del ZIP)
+        documentos = [
+            {
+                'nombre': a['nombre'],
+                'ruta': a['ruta'],
+                'extension': a['extension'].lstrip('.'),
+                'tamaño': os.path.getsize(a['ruta'])
+            }
+            for a in archivos if a['extension'] != '.json'
+        ]
 
-        zip_path = os.path.join(carpeta_upload, filename)
-        file.save(zip_path)
+        return jsonify({
+            'success': True,
+            'archivos': archivos_json + documentos,
+            'mensaje': f'Se encontraron {len(archivos_json)} archivos JSON y {len(documentos)} documentos'
+        })
 
-        # Descomprimir ZIP
-        archivos = Funciones.descomprimir_zip_local(zip_path, carpeta_upload)
+    except AdmisionRechazada as e:
+        return respuesta_rechazo(e)
 
-        # Eliminar archivo ZIP
-        os.remove(zip_path)
+    except CuotaEspacioExcedida as e:
+        return jsonify({'success': False, 'error': str(e)}), 507
 
-        # Listar archivos JSON
-        archivos_json = Funciones.listar_archivos_json(carpeta_upload)
+    except Exception as e:
+        return jsonify({'success': False, 'error': str(e)}), 500
+
+
+# ==================== CORPUS JSON LINES ====================
+
+FORMATOS_CORPUS = {
+    'jsonl': (None, '.jsonl'),
+    'jsonl.gz': ('gzip', '.jsonl.gz'),
+    'jsonl.zst': ('zstd', '.jsonl.zst')
+}
+
+@app.route('/exportar-corpus')
+def exportar_corpus():
+    """
+    Descarga todos los documentos de un índice como corpus JSON Lines
+    (?formato=jsonl | jsonl.gz | jsonl.zst). Se genera en streaming desde un
+    scroll de Elastic, sin armar el archivo en memoria ni en disco.
+    Cada línea lleva el `_id` del documento: /importar-corpus lo reutiliza.
+    """
+    error = validar_permiso_trabajos()
+    if error:
+        return error
+
+    index = request.args.get('index') or ELASTIC_INDEX_DEFAULT
+    formato = request.args.get('formato', 'jsonl.gz')
+
+    if formato not in FORMATOS_CORPUS:
+        return jsonify({'success': False, 'error': f'Formato no soportado: {formato}'}), 400
+
+    compresion, extension = FORMATOS_CORPUS[formato]
+    try:
+        # Falla aquí (antes de empezar la respuesta) si falta zstandard
+        Funciones.verificar_compresion(compresion)
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+
+    documentos = ({**hit['_source'], '_id': hit['_id']} for hit in elastic.iterar_documentos(index, lote=1000))
+    nombre = f"{secure_filename(index)}_{datetime.now():%Y%m%d_%H%M%S}{extension}"
+
+    return Response(
+        stream_with_context(Funciones.generar_jsonl(documentos, compresion)),
+        mimetype='application/gzip' if compresion == 'gzip' else
+                 'application/zstd' if compresion == 'zstd' else 'application/x-ndjson',
+        headers={'Content-Disposition': f'attachment; filename="{nombre}"'}
+    )
+
+
+@app.route('/importar-corpus', methods=['POST'])
+def importar_corpus():
+    """Indexa en segundo plano un corpus .jsonl / .jsonl.gz / .jsonl.zst subido."""
+    error = validar_permiso_trabajos()
+    if error:
+        return error
+
+    try:
+        file = request.files.get('file')
+        index = request.form.get('index')
+
+        if not file or not file.filename:
+            return jsonify({'success': False, 'error': 'No se envió ningún archivo'}), 400
+
+        if not index:
+            return jsonify({'success': False, 'error': 'Índice no especificado'}), 400
+
+        filename = secure_filename(file.filename)
+        if not Funciones.es_jsonl(filename):
+            return jsonify({'success': False,
+                            'error': 'Formato no soportado: use .jsonl, .jsonl.gz o .jsonl.zst'}), 400
+
+        Funciones.verificar_compresion(Funciones.compresion_jsonl(filename))
+
+        with espacios.espacio('corpus', bytes_necesarios=request.content_length or 0) as carpeta:
+            ruta_corpus = os.path.join(carpeta, filename)
+            file.save(ruta_corpus)
+
+            modo_duplicados = request.form.get('duplicados', 'marcar')
+            trabajo_id = encolar_admitido(
+                'indexacion', 'importar_corpus', tarea_importar_corpus, ruta_corpus, index, modo_duplicados,
+                usuario=session.get('usuario'),
+                parametros={'index': index, 'archivo': filename, 'duplicados': modo_duplicados}
+            )
 
         return jsonify({
             'success': True,
-            'archivos': archivos_json,
-            'mensaje': f'Se encontraron {len(archivos_json)} archivos JSON'
-        })
+            'trabajo_id': trabajo_id,
+            'estado_url': url_for('estado_trabajo', trabajo_id=trabajo_id),
+            'traza_url': url_for('traza_trabajo', trabajo_id=trabajo_id)
+        }), 202
+
+    except AdmisionRechazada as e:
+        return respuesta_rechazo(e)
+
+    except CuotaEspacioExcedida as e:
+        return jsonify({'success': False, 'error': str(e)}), 507
+
+    except RuntimeError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
 
     except Exception as e:
         return jsonify({'success': False, 'error': str(e)}), 500
@@ -570,14 +1650,111 @@ def admin():
         permisos=session.get('permisos')
     )
 
+# ==================== ARRANQUE ====================
+
+# Resultado del último calentamiento de este proceso
+estado_arranque = {'pid': None, 'calentado': False, 'precargado': False, 'huerfanos': 0, 'pasos': {}}
+
+
+def precargar_modelos():
+    """
+    Carga los modelos de solo lectura: PLN (spaCy + embeddings), corpus TF-IDF
+    e índices ANN y MinHash del índice por defecto. Pensado para el master de
+    gunicorn con preload_app, antes del fork.
+    """
+    inicio = time.perf_counter()
+    obtener_pln()
+    obtener_indice_similares(ELASTIC_INDEX_DEFAULT)
+    obtener_detector_duplicados(ELASTIC_INDEX_DEFAULT)
+    estado_arranque['precargado'] = True
+    print(f"Modelos precargados en {time.perf_counter() - inicio:.1f} s (pid {os.getpid()})")
+
+
+def calentar() -> dict:
+    """
+    Calentamiento de un worker antes de recibir tráfico: abre y prueba las
+    conexiones de este proceso y deja en memoria los índices del índice por defecto.
+    Un paso que falla se registra pero no impide arrancar.
+    """
+    pasos = {}
+
+    def paso(nombre, funcion):
+        inicio = time.perf_counter()
+        try:
+            ok = funcion() is not False
+        except Exception as e:
+            print(f"Calentamiento ({nombre}) falló: {e}")
+            ok = False
+        pasos[nombre] = {'ok': ok, 'segundos': round(time.perf_counter() - inicio, 3)}
+
+    METRICAS.iniciar_volcado()
+
+    paso('mongodb', mongo.test_connection)
+    paso('indices_mongo', lambda: mongo.asegurar_indices(MONGO_COLECCION))
+    paso('elastic', elastic.test_connection)
+    paso('indice_similares', lambda: obtener_indice_similares(ELASTIC_INDEX_DEFAULT))
+    paso('detector_duplicados', lambda: obtener_detector_duplicados(ELASTIC_INDEX_DEFAULT))
+    # Sin esperar a la próxima carga: retoma el backlog que quedó del arranque anterior
+    paso('enriquecedor', lambda: obtener_enriquecedor(ELASTIC_INDEX_DEFAULT))
+
+    # Primera verificación de /readyz ya con los índices cargados; luego se refresca sola
+    salud.iniciar()
+
+    estado_arranque.update({
+        'pid': os.getpid(),
+        'calentado': all(p['ok'] for p in pasos.values()),
+        'pasos': pasos,
+        'fecha': datetime.now().isoformat()
+    })
+    return estado_arranque
+
+
+def iniciar_proceso() -> dict:
+    """
+    Arranque de un proceso que atiende solicitudes, sea un worker de gunicorn
+    (post_worker_init en gunicorn.conf.py) o `python app.py`: marca como
+    interrumpidos los trabajos de un proceso anterior que murió y calienta.
+    """
+    estado_arranque['huerfanos'] = trabajos.recuperar_huerfanos()
+    return calentar()
+
+
+def crear_app(perfil: str = None) -> Flask:
+    """
+    Punto de entrada para servidores WSGI: gunicorn "app:crear_app('produccion')".
+    Aplica el perfil y, si corresponde, precarga los modelos. Las conexiones no
+    se abren aquí: las abre cada proceso que atiende (ver iniciar_proceso()).
+    """
+    perfil = perfil or os.getenv('APP_PERFIL', 'desarrollo')
+    if perfil not in PERFILES:
+        raise ValueError(f"Perfil desconocido: {perfil} (use {', '.join(PERFILES)})")
+
+    app.config.update(PERFILES[perfil])
+    app.config['PERFIL'] = perfil
+
+    # En producción hay varios workers: /metrics debe sumar los de todos
+    if perfil == 'produccion':
+        METRICAS.configurar_multiproceso(METRICAS_DIR)
+
+    if app.config['PRECARGAR_MODELOS'] and not estado_arranque['precargado']:
+        precargar_modelos()
+
+    return app
+
+
 # ==================== MAIN ====================
 
 if __name__ == '__main__':
     Funciones.crear_carpeta('static/uploads')
+    crear_app()
+
+    # Con debug, el recargador de Flask atiende desde un proceso hijo: solo ese se calienta
+    if not app.config['DEBUG'] or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        pasos = iniciar_proceso()['pasos']
 
-    print("\n" + "=" * 50)
-    print("VERIFICANDO CONEXIONES")
-    print("MongoDB Atlas:", "Conectado ✅" if mongo.test_connection() else "Error ❌")
-    print("ElasticSearch:", "Conectado ✅" if elastic.test_connection() else "Error ❌")
+        print("\n" + "=" * 50)
+        print("VERIFICANDO CONEXIONES")
+        print("MongoDB Atlas:", "Conectado ✅" if pasos['mongodb']['ok'] else "Error ❌")
+        print("ElasticSearch:", "Conectado ✅" if pasos['elastic']['ok'] else "Error ❌")
 
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    app.run(debug=app.config['DEBUG'], host='0.0.0.0', port=5000)
@@ -0,0 +1,384 @@
+# benchmarks/benchmark_ingesta.py
+"""
+Suite de benchmarks de ingesta sobre un corpus normativo sintético y
+reproducible (misma semilla y escala = mismo corpus):
+- extracción: Funciones.extraer_texto_pdf (PyPDF2), OCRtoElastic._procesar_pdf
+  (pdfplumber), Funciones.extraer_texto_pdf_ocr (Tesseract) y lectura de ZIPs de JSON
+- PLN: PLN.analizar, extraer_entidades, preprocesar_texto, contar_palabras
+  y generar_embeddings (si spaCy / sentence-transformers están instalados)
+- indexación: ElasticSearch.indexar_bulk contra un Elastic local (ElasticFixture)
+
+Cada medición se repite y se reporta la mediana. Con --comparar se contrasta
+contra un resultado anterior y el proceso termina con código 1 si algún
+ritmo (…_por_segundo) cae más que --umbral.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.benchmark_ingesta
+    python -m benchmarks.benchmark_ingesta --escala mediana --repeticiones 5
+    python -m benchmarks.benchmark_ingesta --comparar benchmarks/resultados/ingesta_base.json --umbral 0.15
+    python -m benchmarks.benchmark_ingesta --solo extraccion_pypdf2 bulk
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import platform
+import statistics
+import subprocess
+import tempfile
+from datetime import datetime
+from importlib import metadata
+from typing import Callable, Dict, List
+
+from Helpers.funciones import Funciones
+from Helpers.elastic import ElasticSearch
+from Helpers.OCRtoElastic import OCRtoElastic
+from benchmarks.corpusNormas import ESCALAS, generar_corpus
+from benchmarks.elasticFixture import ElasticFixture
+
+
+# ============================================================
+# MEDICIÓN
+# ============================================================
+def medir(funcion: Callable[[], Dict], repeticiones: int = 3) -> Dict:
+    """
+    Ejecuta `funcion` una vez de calentamiento y luego `repeticiones` veces.
+    `funcion` retorna las unidades procesadas (archivos, paginas, documentos…);
+    el reporte trae la mediana de los tiempos y las unidades por segundo.
+    """
+    unidades = funcion()
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        unidades = funcion()
+        tiempos.append(time.perf_counter() - inicio)
+
+    mediana = statistics.median(tiempos)
+    resultado = {
+        "segundos_mediana": round(mediana, 4),
+        "segundos_min": round(min(tiempos), 4),
+        "segundos_max": round(max(tiempos), 4),
+        "repeticiones": repeticiones,
+        **unidades
+    }
+    for clave, valor in unidades.items():
+        if isinstance(valor, (int, float)) and not isinstance(valor, bool) and mediana > 0:
+            resultado[f"{clave}_por_segundo"] = round(valor / mediana, 2)
+    return resultado
+
+
+def omitido(motivo: str) -> Dict:
+    return {"omitido": True, "motivo": motivo}
+
+
+# ============================================================
+# EXTRACCIÓN
+# ============================================================
+def bench_extraccion_pypdf2(manifiesto: Dict, repeticiones: int) -> Dict:
+    pdfs = manifiesto["texto"]
+
+    def correr():
+        caracteres = sum(len(Funciones.extraer_texto_pdf(p["ruta"])) for p in pdfs)
+        return {"archivos": len(pdfs), "paginas": sum(p["paginas"] for p in pdfs), "caracteres": caracteres}
+
+    return medir(correr, repeticiones)
+
+
+def bench_extraccion_pdfplumber(manifiesto: Dict, repeticiones: int) -> Dict:
+    pdfs = manifiesto["texto"]
+    ocr = OCRtoElastic(elastic_instance=None)
+
+    def correr():
+        docs = [ocr._procesar_pdf(p["ruta"]) for p in pdfs]
+        return {"archivos": len(docs), "paginas": sum(d["num_paginas"] for d in docs),
+                "caracteres": sum(d["caracteres"] for d in docs)}
+
+    return medir(correr, repeticiones)
+
+
+def bench_extraccion_ocr(manifiesto: Dict, repeticiones: int) -> Dict:
+    try:
+        import pytesseract  # noqa: F401
+        import pdf2image  # noqa: F401
+    except ImportError as e:
+        return omitido(f"falta {e.name} (pip install pytesseract pdf2image)")
+    if not shutil.which("tesseract") or not shutil.which("pdftoppm"):
+        return omitido("faltan los binarios tesseract y/o pdftoppm (poppler)")
+
+    pdfs = manifiesto["escaneado"]
+
+    def correr():
+        caracteres = sum(len(Funciones.extraer_texto_pdf_ocr(p["ruta"])) for p in pdfs)
+        return {"archivos": len(pdfs), "paginas": sum(p["paginas"] for p in pdfs), "caracteres": caracteres}
+
+    # OCR es lento: una sola repetición alcanza para ver regresiones grandes
+    return medir(correr, min(repeticiones, 1))
+
+
+def bench_zip_json(manifiesto: Dict, repeticiones: int) -> Dict:
+    zips = manifiesto["zip"]
+
+    def correr():
+        documentos = 0
+        for z in zips:
+            documentos += sum(1 for _ in Funciones.iterar_documentos_zip(z["ruta"]))
+        return {"archivos": len(zips), "documentos": documentos,
+                "mb": round(sum(z["bytes"] for z in zips) / 1048576, 3)}
+
+    return medir(correr, repeticiones)
+
+
+# ============================================================
+# PLN
+# ============================================================
+def bench_pln(textos: List[str], repeticiones: int) -> Dict:
+    try:
+        from Helpers.PLN import PLN
+        pln = PLN()
+    except ImportError as e:
+        return omitido(f"falta {e.name} (pip install spacy sentence-transformers)")
+    if pln.nlp is None:
+        return omitido("no hay modelo de spaCy (python -m spacy download es_core_news_sm)")
+
+    caracteres = sum(len(t) for t in textos)
+    metodos = {
+        "analizar": lambda t: pln.analizar(t),
+        "extraer_entidades": lambda t: pln.extraer_entidades(t),
+        "preprocesar_texto": lambda t: pln.preprocesar_texto(t),
+        "contar_palabras": lambda t: pln.contar_palabras(t),
+    }
+
+    resultado = {"modelo_spacy": pln.nlp.meta.get("name") if hasattr(pln.nlp, "meta") else None}
+    for nombre, metodo in metodos.items():
+        def correr(metodo=metodo):
+            for t in textos:
+                metodo(t)
+            return {"documentos": len(textos), "caracteres": caracteres}
+        resultado[nombre] = medir(correr, repeticiones)
+
+    if pln.model_embeddings is not None:
+        resultado["generar_embeddings"] = medir(
+            lambda: {"documentos": len(pln.generar_embeddings(textos)), "caracteres": caracteres},
+            repeticiones
+        )
+    else:
+        resultado["generar_embeddings"] = omitido("no hay modelo de sentence-transformers")
+
+    return resultado
+
+
+# ============================================================
+# INDEXACIÓN BULK
+# ============================================================
+def bench_bulk(documentos: List[Dict], repeticiones: int, lote: int = 500,
+               latencia: float = 0.0) -> Dict:
+    with ElasticFixture(latencia=latencia, max_guardados=0) as fixture:
+        elastic = ElasticSearch(fixture.url, "benchmarks")
+
+        def correr():
+            fixture.reiniciar_contadores()
+            indexados = 0
+            for i in range(0, len(documentos), lote):
+                indexados += elastic.indexar_bulk("benchmark", documentos[i:i + lote]).get("indexados", 0)
+            return {"documentos": indexados, "lotes": fixture.contadores["bulk"],
+                    "mb": round(fixture.contadores["bytes_recibidos"] / 1048576, 3)}
+
+        resultado = medir(correr, repeticiones)
+        elastic.close()
+
+    resultado.update({"tamano_lote": lote, "latencia_simulada": latencia})
+    return resultado
+
+
+# ============================================================
+# ENTORNO Y COMPARACIÓN
+# ============================================================
+def describir_entorno() -> Dict:
+    versiones = {}
+    for paquete in ("PyPDF2", "pdfplumber", "pytesseract", "elasticsearch", "orjson",
+                    "spacy", "sentence-transformers", "numpy"):
+        try:
+            versiones[paquete] = metadata.version(paquete)
+        except metadata.PackageNotFoundError:
+            versiones[paquete] = None
+
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except Exception:
+        commit = None
+
+    return {
+        "python": sys.version.split()[0],
+        "plataforma": platform.platform(),
+        "procesador": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+        "versiones": versiones
+    }
+
+
+def _ritmos(resultados: Dict, prefijo: str = "") -> Dict[str, float]:
+    """Aplana {seccion: {..._por_segundo}} a {'seccion.clave': valor}."""
+    ritmos = {}
+    for clave, valor in resultados.items():
+        if isinstance(valor, dict):
+            ritmos.update(_ritmos(valor, f"{prefijo}{clave}."))
+        elif clave.endswith("_por_segundo"):
+            ritmos[prefijo + clave] = valor
+    return ritmos
+
+
+def comparar(actual: Dict, base: Dict, umbral: float) -> List[Dict]:
+    """Ritmos que cayeron más de `umbral` (0.15 = 15 %) respecto de `base`."""
+    ritmos_base = _ritmos(base.get("resultados", {}))
+    cambios = []
+    for clave, valor in _ritmos(actual["resultados"]).items():
+        anterior = ritmos_base.get(clave)
+        if not anterior:
+            continue
+        cambio = (valor - anterior) / anterior
+        cambios.append({"metrica": clave, "base": anterior, "actual": valor,
+                        "cambio": round(cambio, 3), "regresion": cambio < -umbral})
+    return cambios
+
+
+# ============================================================
+# REPORTE
+# ============================================================
+def imprimir_resumen(resultado: Dict):
+    print("\n==============================")
+    print("   BENCHMARK DE INGESTA")
+    print("==============================")
+    c = resultado["corpus"]
+    print(f"   corpus: {c['pdfs_texto']} PDFs de texto, {c['pdfs_escaneados']} escaneados,"
+          f" {c['zips']} ZIPs × {c['json_por_zip']} JSON (semilla {c['semilla']})\n")
+
+    def linea(nombre, r):
+        if r.get("omitido"):
+            print(f"   {nombre:<28} omitido: {r['motivo']}")
+            return
+        ritmos = ", ".join(f"{v} {k[:-len('_por_segundo')]}/s" for k, v in r.items()
+                           if k.endswith("_por_segundo") and k != "caracteres_por_segundo")
+        print(f"   {nombre:<28} {r['segundos_mediana']:>8.3f} s  {ritmos}")
+
+    for nombre, r in resultado["resultados"].items():
+        if nombre == "pln" and not r.get("omitido"):
+            for metodo, rm in r.items():
+                if isinstance(rm, dict):
+                    linea(f"pln.{metodo}", rm)
+        else:
+            linea(nombre, r)
+
+    if resultado.get("comparacion"):
+        print("\n   Comparación con la base")
+        for cambio in resultado["comparacion"]:
+            marca = "❌" if cambio["regresion"] else "  "
+            print(f"   {marca} {cambio['metrica']:<48} {cambio['base']:>10} → {cambio['actual']:<10}"
+                  f" ({cambio['cambio']:+.1%})")
+    print()
+
+
+# ============================================================
+# MAIN
+# ============================================================
+PRUEBAS = ("extraccion_pypdf2", "extraccion_pdfplumber", "extraccion_ocr", "zip_json", "pln", "bulk")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks de ingesta con un corpus normativo sintético")
+    parser.add_argument("--escala", choices=sorted(ESCALAS), default="pequena")
+    parser.add_argument("--pdfs-texto", type=int, default=None)
+    parser.add_argument("--pdfs-escaneados", type=int, default=None)
+    parser.add_argument("--zips", type=int, default=None)
+    parser.add_argument("--json-por-zip", type=int, default=None)
+    parser.add_argument("--articulos", type=int, default=None, help="artículos por norma")
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--lote", type=int, default=500, help="documentos por llamada a indexar_bulk")
+    parser.add_argument("--latencia-elastic", type=float, default=0.0, help="segundos por solicitud al Elastic local")
+    parser.add_argument("--solo", nargs="+", choices=PRUEBAS, default=None)
+    parser.add_argument("--corpus", default=None, help="carpeta del corpus (por defecto una temporal que se borra)")
+    parser.add_argument("--comparar", default=None, help="JSON de una corrida anterior")
+    parser.add_argument("--umbral", type=float, default=0.15, help="caída de ritmo tolerada (0.15 = 15 %%)")
+    parser.add_argument("--salida", default=None, help="JSON de resultados (por defecto benchmarks/resultados/)")
+    args = parser.parse_args()
+
+    pdfs_texto, pdfs_escaneados, zips, json_por_zip, articulos = ESCALAS[args.escala]
+    corpus = {
+        "escala": args.escala,
+        "pdfs_texto": args.pdfs_texto if args.pdfs_texto is not None else pdfs_texto,
+        "pdfs_escaneados": args.pdfs_escaneados if args.pdfs_escaneados is not None else pdfs_escaneados,
+        "zips": args.zips if args.zips is not None else zips,
+        "json_por_zip": args.json_por_zip if args.json_por_zip is not None else json_por_zip,
+        "articulos": args.articulos if args.articulos is not None else articulos,
+        "semilla": args.semilla
+    }
+    pruebas = args.solo or PRUEBAS
+
+    carpeta = args.corpus or tempfile.mkdtemp(prefix="bench_ingesta_")
+    try:
+        inicio = time.perf_counter()
+        manifiesto = generar_corpus(
+            carpeta, corpus["pdfs_texto"], corpus["pdfs_escaneados"], corpus["zips"],
+            corpus["json_por_zip"], corpus["articulos"], corpus["semilla"]
+        )
+        corpus["segundos_generacion"] = round(time.perf_counter() - inicio, 2)
+
+        # Documentos del corpus (forma OCRtoElastic) para PLN e indexación
+        documentos = [d for z in manifiesto["zip"] for _, d in Funciones.iterar_documentos_zip(z["ruta"])]
+
+        resultados = {}
+        for prueba in pruebas:
+            print(f"▶ {prueba}...")
+            if prueba == "extraccion_pypdf2":
+                resultados[prueba] = bench_extraccion_pypdf2(manifiesto, args.repeticiones)
+            elif prueba == "extraccion_pdfplumber":
+                resultados[prueba] = bench_extraccion_pdfplumber(manifiesto, args.repeticiones)
+            elif prueba == "extraccion_ocr":
+                resultados[prueba] = bench_extraccion_ocr(manifiesto, args.repeticiones)
+            elif prueba == "zip_json":
+                resultados[prueba] = bench_zip_json(manifiesto, args.repeticiones)
+            elif prueba == "pln":
+                # El PLN es lo más lento: una muestra fija del corpus
+                resultados[prueba] = bench_pln([d["texto_ocr"] for d in documentos[:50]], args.repeticiones)
+            elif prueba == "bulk":
+                resultados[prueba] = bench_bulk(documentos, args.repeticiones, args.lote, args.latencia_elastic)
+    finally:
+        if not args.corpus:
+            shutil.rmtree(carpeta, ignore_errors=True)
+
+    resultado = {
+        "fecha": datetime.now().isoformat(),
+        "corpus": corpus,
+        "entorno": describir_entorno(),
+        "resultados": resultados
+    }
+
+    regresiones = []
+    if args.comparar:
+        base = Funciones.leer_json(args.comparar)
+        if not base:
+            print(f"No se pudo leer la base {args.comparar}")
+        else:
+            resultado["comparacion"] = comparar(resultado, base, args.umbral)
+            resultado["base"] = args.comparar
+            regresiones = [c for c in resultado["comparacion"] if c["regresion"]]
+
+    imprimir_resumen(resultado)
+
+    salida = args.salida or os.path.join(
+        "benchmarks", "resultados", f"ingesta_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    if Funciones.guardar_json(salida, resultado, indentar=True):
+        print(f"Resultados guardados en {salida}")
+
+    if regresiones:
+        print(f"❌ {len(regresiones)} regresiones mayores a {args.umbral:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,239 @@
+# benchmarks/benchmark_json.py
+"""
+Benchmark de formatos para datos intermedios: un JSON por documento con indent=4
+(el formato anterior de OCRtoElastic), un arreglo JSON, y corpus JSON Lines sin
+comprimir, gzip y zstd. Mide tamaño en disco, tiempo de escritura y documentos/s
+al leer con json estándar y con orjson (si está instalado).
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.benchmark_json
+    python -m benchmarks.benchmark_json --documentos 20000 --caracteres 20000 --dim-embedding 384
+"""
+
+import os
+import io
+import gzip
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from Helpers.funciones import Funciones, orjson, zstandard
+from benchmarks.sitioFixture import PALABRAS
+
+
+# ============================================================
+# CORPUS SINTÉTICO
+# ============================================================
+def generar_documentos(n: int, caracteres: int = 8000, dim_embedding: int = 0,
+                       semilla: int = 42) -> List[Dict]:
+    """Documentos con la forma de OCRtoElastic (archivo, texto_ocr, ...)."""
+    rnd = random.Random(semilla)
+    documentos = []
+
+    for i in range(n):
+        palabras = []
+        total = 0
+        while total < caracteres:
+            palabra = rnd.choice(PALABRAS)
+            palabras.append(palabra)
+            total += len(palabra) + 1
+
+        documento = {
+            "archivo": f"norma_{i:06d}.pdf",
+            "texto_ocr": " ".join(palabras),
+            "num_paginas": rnd.randint(1, 40),
+            "caracteres": total,
+            "tiene_texto": True,
+            "motivo_sin_texto": None,
+            "fecha_procesado": "2025-01-01"
+        }
+        if dim_embedding:
+            documento["embedding"] = [round(rnd.uniform(-1, 1), 6) for _ in range(dim_embedding)]
+        documentos.append(documento)
+
+    return documentos
+
+
+# ============================================================
+# LECTORES POR FORMATO (con el `loads` a comparar)
+# ============================================================
+def leer_por_archivo(carpeta: str, loads: Callable) -> int:
+    n = 0
+    for nombre in os.listdir(carpeta):
+        with open(os.path.join(carpeta, nombre), "rb") as f:
+            loads(f.read())
+        n += 1
+    return n
+
+
+def leer_arreglo(ruta: str, loads: Callable) -> int:
+    with open(ruta, "rb") as f:
+        return len(loads(f.read()))
+
+
+def leer_lineas(archivo, loads: Callable) -> int:
+    n = 0
+    for linea in archivo:
+        if linea.strip():
+            loads(linea)
+            n += 1
+    return n
+
+
+def leer_jsonl(ruta: str, loads: Callable) -> int:
+    if ruta.endswith(".gz"):
+        with gzip.open(ruta, "rb") as f:
+            return leer_lineas(f, loads)
+    if ruta.endswith(".zst"):
+        with open(ruta, "rb") as crudo:
+            lector = zstandard.ZstdDecompressor().stream_reader(crudo)
+            return leer_lineas(io.BufferedReader(lector), loads)
+    with open(ruta, "rb") as f:
+        return leer_lineas(f, loads)
+
+
+# ============================================================
+# BENCHMARK
+# ============================================================
+def medir(funcion: Callable, repeticiones: int) -> float:
+    """Mejor tiempo de `repeticiones` corridas (menos ruido del sistema)."""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor
+
+
+def ejecutar_benchmark(documentos: List[Dict], repeticiones: int = 3) -> Dict:
+    carpeta = tempfile.mkdtemp(prefix="bench_json_")
+    n = len(documentos)
+
+    codecs = {"json": json.loads}
+    if orjson is not None:
+        codecs["orjson"] = orjson.loads
+
+    resultados = {}
+
+    try:
+        # ---------------- Un archivo por documento (indent=4) ----------------
+        carpeta_archivos = os.path.join(carpeta, "por_archivo")
+        os.makedirs(carpeta_archivos)
+
+        def escribir_por_archivo():
+            for doc in documentos:
+                with open(os.path.join(carpeta_archivos, os.path.splitext(doc["archivo"])[0] + ".json"),
+                          "w", encoding="utf-8") as f:
+                    json.dump(doc, f, indent=4, ensure_ascii=False)
+
+        segundos = medir(escribir_por_archivo, 1)
+        resultados["por_archivo_indent4"] = {
+            "bytes": sum(os.path.getsize(os.path.join(carpeta_archivos, a)) for a in os.listdir(carpeta_archivos)),
+            "archivos": n,
+            "escritura_segundos": round(segundos, 3),
+            "lectura": {c: medir(lambda: leer_por_archivo(carpeta_archivos, loads), repeticiones)
+                        for c, loads in codecs.items()}
+        }
+
+        # ---------------- Un arreglo JSON compacto ----------------
+        ruta_arreglo = os.path.join(carpeta, "corpus.json")
+        segundos = medir(lambda: Funciones.guardar_json(ruta_arreglo, documentos), 1)
+        resultados["arreglo_json"] = {
+            "bytes": os.path.getsize(ruta_arreglo),
+            "archivos": 1,
+            "escritura_segundos": round(segundos, 3),
+            "lectura": {c: medir(lambda: leer_arreglo(ruta_arreglo, loads), repeticiones)
+                        for c, loads in codecs.items()}
+        }
+
+        # ---------------- JSON Lines: plano, gzip, zstd ----------------
+        extensiones = [".jsonl", ".jsonl.gz"] + ([".jsonl.zst"] if zstandard is not None else [])
+        for extension in extensiones:
+            ruta = os.path.join(carpeta, "corpus" + extension)
+            segundos = medir(lambda: Funciones.escribir_jsonl(ruta, documentos), 1)
+            resultados["jsonl" + extension[len(".jsonl"):]] = {
+                "bytes": os.path.getsize(ruta),
+                "archivos": 1,
+                "escritura_segundos": round(segundos, 3),
+                "lectura": {c: medir(lambda: leer_jsonl(ruta, loads), repeticiones)
+                            for c, loads in codecs.items()}
+            }
+    finally:
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    # Tiempos → documentos/s y MB/s (sobre el tamaño en disco)
+    base = resultados["por_archivo_indent4"]["bytes"]
+    for r in resultados.values():
+        r["mb"] = round(r["bytes"] / 1048576, 2)
+        r["relativo_a_por_archivo"] = round(r["bytes"] / base, 3)
+        r["lectura"] = {
+            codec: {
+                "segundos": round(seg, 3),
+                "documentos_por_segundo": round(n / seg) if seg else None,
+                "mb_por_segundo": round(r["bytes"] / 1048576 / seg, 1) if seg else None
+            }
+            for codec, seg in r["lectura"].items()
+        }
+
+    return {
+        "documentos": n,
+        "codecs": list(codecs),
+        "zstd_disponible": zstandard is not None,
+        "formatos": resultados
+    }
+
+
+def imprimir_resumen(resultado: Dict):
+    print("\n==============================")
+    print("   BENCHMARK FORMATOS JSON")
+    print("==============================\n")
+    print(f"Documentos: {resultado['documentos']}   codecs: {', '.join(resultado['codecs'])}"
+          f"   zstd: {'sí' if resultado['zstd_disponible'] else 'no (pip install zstandard)'}\n")
+
+    encabezado = f"{'formato':<22}{'MB':>9}{'relativo':>10}{'escritura s':>13}"
+    for codec in resultado["codecs"]:
+        encabezado += f"{codec + ' docs/s':>16}"
+    print(encabezado)
+
+    for nombre, r in resultado["formatos"].items():
+        linea = f"{nombre:<22}{r['mb']:>9}{r['relativo_a_por_archivo']:>10}{r['escritura_segundos']:>13}"
+        for codec in resultado["codecs"]:
+            linea += f"{r['lectura'][codec]['documentos_por_segundo']:>16}"
+        print(linea)
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de formatos y codecs JSON")
+    parser.add_argument("--documentos", type=int, default=5000)
+    parser.add_argument("--caracteres", type=int, default=8000, help="caracteres de texto_ocr por documento")
+    parser.add_argument("--dim-embedding", type=int, default=0, help="agrega un vector de esta dimensión")
+    parser.add_argument("--repeticiones", type=int, default=3)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", default=None, help="JSON de resultados (por defecto benchmarks/resultados/)")
+    args = parser.parse_args()
+
+    configuracion = vars(args).copy()
+    configuracion.pop("salida")
+
+    documentos = generar_documentos(args.documentos, args.caracteres, args.dim_embedding, args.semilla)
+    resultado = ejecutar_benchmark(documentos, args.repeticiones)
+
+    resultado["configuracion"] = configuracion
+    resultado["fecha"] = datetime.now().isoformat()
+    imprimir_resumen(resultado)
+
+    salida = args.salida or os.path.join(
+        "benchmarks", "resultados", f"json_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    if Funciones.guardar_json(salida, resultado, indentar=True):
+        print(f"Resultados guardados en {salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+# benchmarks/benchmark_scraping.py
+"""
+Benchmark de WebScraping contra el sitio de prueba local (sin tocar minvivienda.gov.co).
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.benchmark_scraping
+    python -m benchmarks.benchmark_scraping --paginas 20 --latencia 0.05 --tasa-error 0.05 --tasa-throttle 0.02
+"""
+
+import os
+import time
+import shutil
+import argparse
+import tempfile
+from datetime import datetime
+from typing import Dict
+
+from Helpers.webScraping import WebScraping
+from Helpers.limitador import LimitadorHost
+from Helpers.funciones import Funciones
+from benchmarks.sitioFixture import SitioFixture
+
+
+def ejecutar_benchmark(sitio: SitioFixture, limitador: LimitadorHost,
+                       max_secciones: int = 5, max_descargas: int = None) -> Dict:
+    """Extrae links y descarga los PDFs del sitio; retorna métricas de cada fase."""
+    carpeta = tempfile.mkdtemp(prefix="bench_scraping_")
+    json_links = os.path.join(carpeta, "links", "links.json")
+    carpeta_pdfs = os.path.join(carpeta, "pdfs")
+
+    scraper = WebScraping(
+        headless=True, max_secciones=max_secciones,
+        limitador=limitador, secciones=sitio.secciones()
+    )
+
+    try:
+        # ---------------- Links ----------------
+        sitio.reiniciar_contadores()
+        inicio = time.perf_counter()
+        resultado_links = scraper.extraer_todos_los_links(json_destino=json_links)
+        segundos_links = time.perf_counter() - inicio
+        servidor_links = dict(sitio.contadores)
+
+        # ---------------- Descargas ----------------
+        sitio.reiniciar_contadores()
+        resultado_descarga = scraper.descargar_pdfs(
+            json_links, carpeta_destino=carpeta_pdfs, max_descargas=max_descargas
+        )
+        servidor_descargas = dict(sitio.contadores)
+    finally:
+        scraper.close()
+        shutil.rmtree(carpeta, ignore_errors=True)
+
+    paginas_esperadas = len(sitio.nombres_secciones) * sitio.paginas
+    stats = resultado_descarga["stats"]
+
+    return {
+        "links": {
+            "segundos": round(segundos_links, 2),
+            "paginas_esperadas": paginas_esperadas,
+            "paginas_leidas": servidor_links["listados"],
+            "paginas_por_segundo": round(servidor_links["listados"] / segundos_links, 2) if segundos_links else 0.0,
+            "links_esperados": sitio.total_documentos(),
+            "links_encontrados": resultado_links["total_links"],
+            "paginas_selenium": resultado_links["paginas_selenium"],
+            "servidor": servidor_links
+        },
+        "descargas": {
+            "segundos": stats["segundos"],
+            "total": resultado_descarga["total"],
+            "descargados": resultado_descarga["descargados"],
+            "fallidos": len(resultado_descarga["errores"]),
+            "mb": round(stats["bytes"] / 1048576, 2),
+            "mb_por_segundo": stats["mb_por_segundo"],
+            "archivos_por_segundo": stats["archivos_por_segundo"],
+            "latencia_media": stats["latencia_media"],
+            "latencia_p95": stats["latencia_p95"],
+            "reintentos": stats["reintentos"],
+            "errores": resultado_descarga["errores"][:10],
+            "servidor": servidor_descargas
+        },
+        "limitador": limitador.estadisticas()
+    }
+
+
+def imprimir_resumen(resultado: Dict):
+    links = resultado["links"]
+    descargas = resultado["descargas"]
+
+    print("\n==============================")
+    print("   BENCHMARK WEB SCRAPING")
+    print("==============================\n")
+
+    print("🔎 Links")
+    print(f"   páginas leídas:     {links['paginas_leidas']}/{links['paginas_esperadas']}"
+          f"  ({links['paginas_por_segundo']} páginas/s)")
+    print(f"   links encontrados:  {links['links_encontrados']}/{links['links_esperados']}")
+    print(f"   errores servidor:   500={links['servidor']['errores_500']}"
+          f"  429={links['servidor']['throttles_429']}")
+    print(f"   tiempo:             {links['segundos']} s")
+
+    print("\n📥 Descargas")
+    print(f"   descargados:        {descargas['descargados']}/{descargas['total']}"
+          f"  (fallidos: {descargas['fallidos']}, reintentos: {descargas['reintentos']})")
+    print(f"   volumen:            {descargas['mb']} MB  ({descargas['mb_por_segundo']} MB/s,"
+          f" {descargas['archivos_por_segundo']} archivos/s)")
+    print(f"   latencia:           media {descargas['latencia_media']} s, p95 {descargas['latencia_p95']} s")
+    print(f"   errores servidor:   500={descargas['servidor']['errores_500']}"
+          f"  429={descargas['servidor']['throttles_429']}")
+    print(f"   tiempo:             {descargas['segundos']} s")
+
+    for host, h in resultado["limitador"]["hosts"].items():
+        print(f"\n⚙️  Limitador {host}: tasa {h['tasa']}/s, concurrencia {h['concurrencia']},"
+              f" throttles {h['throttles']}")
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de WebScraping contra un sitio local")
+    parser.add_argument("--secciones", type=int, default=3)
+    parser.add_argument("--paginas", type=int, default=5, help="páginas de listado por sección")
+    parser.add_argument("--filas", type=int, default=10, help="documentos por página")
+    parser.add_argument("--tamano-pdf", type=int, default=50_000, help="bytes por PDF")
+    parser.add_argument("--latencia", type=float, default=0.0, help="segundos por respuesta")
+    parser.add_argument("--jitter", type=float, default=0.0, help="latencia extra aleatoria máxima")
+    parser.add_argument("--tasa-error", type=float, default=0.0, help="fracción de respuestas 500")
+    parser.add_argument("--tasa-throttle", type=float, default=0.0, help="fracción de respuestas 429")
+    parser.add_argument("--max-secciones", type=int, default=5)
+    parser.add_argument("--max-descargas", type=int, default=None)
+    parser.add_argument("--tasa-inicial", type=float, default=2.0, help="solicitudes/s iniciales por host")
+    parser.add_argument("--tasa-max", type=float, default=20.0)
+    parser.add_argument("--concurrencia-max", type=int, default=WebScraping.MAX_POR_HOST)
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", default=None, help="JSON de resultados (por defecto benchmarks/resultados/)")
+    args = parser.parse_args()
+
+    configuracion = vars(args).copy()
+    configuracion.pop("salida")
+
+    sitio = SitioFixture(
+        secciones=args.secciones, paginas=args.paginas, filas_por_pagina=args.filas,
+        tamano_pdf=args.tamano_pdf, latencia=args.latencia, jitter=args.jitter,
+        tasa_error=args.tasa_error, tasa_throttle=args.tasa_throttle, semilla=args.semilla
+    )
+    limitador = LimitadorHost(
+        tasa_inicial=args.tasa_inicial, tasa_max=args.tasa_max,
+        concurrencia_max=args.concurrencia_max
+    )
+
+    with sitio:
+        resultado = ejecutar_benchmark(sitio, limitador, args.max_secciones, args.max_descargas)
+
+    resultado["configuracion"] = configuracion
+    resultado["fecha"] = datetime.now().isoformat()
+    imprimir_resumen(resultado)
+
+    salida = args.salida or os.path.join(
+        "benchmarks", "resultados", f"scraping_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    if Funciones.guardar_json(salida, resultado):
+        print(f"Resultados guardados en {salida}")
+
+
+if __name__ == "__main__":
+    main()
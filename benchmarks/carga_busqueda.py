@@ -0,0 +1,372 @@
+# benchmarks/carga_busqueda.py
+"""
+Prueba de carga de /buscar-elastic sin tocar Elastic Cloud.
+
+Levanta tres procesos: un Elastic local (benchmarks.elasticFixture, con normas
+sintéticas o respuestas grabadas y latencia configurable), la app (gunicorn con
+cada configuración de workers × hilos, o el servidor de Flask) y este generador,
+que repite una mezcla realista de consultas en español subiendo la concurrencia
+por escalones. Por escalón reporta throughput, percentiles de latencia y errores.
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.carga_busqueda
+    python -m benchmarks.carga_busqueda --configuraciones 1x8 2x8 4x4 --concurrencias 1 4 16 64 --duracion 15
+    python -m benchmarks.carga_busqueda --latencia-elastic 0.05 --jitter-elastic 0.1 --slo-p95-ms 500
+    python -m benchmarks.carga_busqueda --servidor flask
+
+Respuestas grabadas (una vez, contra el Elastic real de .env):
+    python -m benchmarks.carga_busqueda --grabar benchmarks/resultados/respuestas.jsonl
+    python -m benchmarks.carga_busqueda --respuestas benchmarks/resultados/respuestas.jsonl
+"""
+
+import os
+import sys
+import time
+import random
+import socket
+import argparse
+import threading
+import subprocess
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+import requests
+
+from Helpers.funciones import Funciones
+
+
+# ============================================================
+# MEZCLA DE CONSULTAS
+# ============================================================
+# (texto, peso): pocas consultas muy frecuentes y una cola larga, como en el buscador real
+CONSULTAS: List[Tuple[str, int]] = [
+    ("subsidio familiar de vivienda", 30),
+    ("vivienda de interés social", 25),
+    ("decreto 1077 de 2015", 20),
+    ("licencia de construcción", 15),
+    ("mi casa ya", 12),
+    ("servicios públicos domiciliarios", 10),
+    ("acueducto y alcantarillado", 8),
+    ("vivienda de interés prioritario", 8),
+    ("cobertura a la tasa de interés", 6),
+    ("mejoramiento de vivienda rural", 6),
+    ("plan de ordenamiento territorial", 5),
+    ("curaduría urbana", 4),
+    ("Fondo Nacional de Vivienda", 4),
+    ("cajas de compensación familiar", 3),
+    ("zonas de alto riesgo no mitigable", 3),
+    ("restitución del subsidio", 2),
+    ("resolución 0536 de 2020", 2),
+    ("titulación de predios fiscales", 2),
+    ("arrendamiento social", 1),
+    ("semillero de propietarios", 1),
+    ("agua potable y saneamiento básico", 1),
+    ("concepto jurídico sobre propiedad horizontal", 1),
+]
+
+
+def query_busqueda(texto: str) -> Dict:
+    """La misma consulta que arma /buscar-elastic (para grabar respuestas con la misma clave)."""
+    return {"match": {"texto_ocr": texto}}
+
+
+AGGS_BUSQUEDA = {
+    "cuentos_por_mes": {"date_histogram": {"field": "fecha_creacion", "calendar_interval": "month"}},
+    "cuentos_por_autor": {"terms": {"field": "autor", "size": 10}}
+}
+
+
+# ============================================================
+# PROCESOS
+# ============================================================
+def puerto_libre() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def esperar_listo(url: str, proceso: subprocess.Popen, timeout: float = 90.0) -> bool:
+    limite = time.monotonic() + timeout
+    while time.monotonic() < limite:
+        if proceso.poll() is not None:
+            return False
+        try:
+            if requests.get(url, timeout=2).status_code < 500:
+                return True
+        except requests.RequestException:
+            pass
+        time.sleep(0.3)
+    return False
+
+
+def detener(proceso: Optional[subprocess.Popen]):
+    if proceso is None or proceso.poll() is not None:
+        return
+    proceso.terminate()
+    try:
+        proceso.wait(timeout=20)
+    except subprocess.TimeoutExpired:
+        proceso.kill()
+
+
+def iniciar_elastic(args) -> Tuple[subprocess.Popen, str]:
+    puerto = puerto_libre()
+    comando = [
+        sys.executable, "-m", "benchmarks.elasticFixture", "--puerto", str(puerto),
+        "--latencia", str(args.latencia_elastic), "--jitter", str(args.jitter_elastic),
+        "--tasa-error", str(args.tasa_error_elastic), "--documentos", str(args.documentos),
+        "--index", args.index, "--semilla", str(args.semilla)
+    ]
+    if args.respuestas:
+        comando += ["--respuestas", args.respuestas]
+
+    proceso = subprocess.Popen(comando, stdout=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{puerto}"
+    if not esperar_listo(url, proceso):
+        detener(proceso)
+        raise RuntimeError("El Elastic local no arrancó")
+    return proceso, url
+
+
+def iniciar_app(servidor: str, workers: int, hilos: int, url_elastic: str, args) -> Tuple[subprocess.Popen, str]:
+    puerto = puerto_libre()
+    entorno = dict(os.environ)
+    entorno.update({
+        "ELASTIC_CLOUD_URL": url_elastic,
+        "ELASTIC_API_KEY": "carga",
+        "ELASTIC_INDEX_DEFAULT": args.index,
+        # Mongo no participa en la búsqueda: un URI que falla rápido si no hay uno configurado
+        "MONGO_URI": os.getenv("MONGO_URI") or "mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=200",
+        "MONGO_DB": os.getenv("MONGO_DB") or "carga",
+    })
+
+    if servidor == "gunicorn":
+        comando = [
+            sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py",
+            "--bind", f"127.0.0.1:{puerto}", "--workers", str(workers), "--threads", str(hilos),
+            "--worker-class", args.worker_class, "--access-logfile", "/dev/null" if os.name != "nt" else "nul",
+            "--max-requests", "0"
+        ]
+    else:
+        comando = [
+            sys.executable, "-c",
+            f"import app; app.crear_app('produccion').run(host='127.0.0.1', port={puerto}, threaded=True)"
+        ]
+
+    proceso = subprocess.Popen(comando, env=entorno, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    url = f"http://127.0.0.1:{puerto}"
+    if not esperar_listo(url + "/", proceso):
+        detener(proceso)
+        raise RuntimeError(f"La app no arrancó ({servidor} {workers}x{hilos})")
+    return proceso, url
+
+
+# ============================================================
+# GENERADOR DE CARGA
+# ============================================================
+def percentil(valores: List[float], p: float) -> float:
+    return valores[int(p * (len(valores) - 1))] if valores else 0.0
+
+
+def ejecutar_escalon(url: str, concurrencia: int, duracion: float, semilla: int,
+                     timeout: float = 30.0) -> Dict:
+    """`concurrencia` clientes en lazo cerrado (envían la siguiente al recibir la anterior)."""
+    textos = [t for t, _ in CONSULTAS]
+    pesos = [p for _, p in CONSULTAS]
+    latencias: List[float] = []
+    codigos: Counter = Counter()
+    errores: Counter = Counter()
+    lock = threading.Lock()
+    inicio_comun = threading.Barrier(concurrencia + 1)
+    fin = [0.0]
+
+    def cliente(i: int):
+        rnd = random.Random(semilla * 1000 + i)
+        sesion = requests.Session()
+        propias, codigos_propios, errores_propios = [], Counter(), Counter()
+        inicio_comun.wait()
+
+        while time.perf_counter() < fin[0]:
+            texto = rnd.choices(textos, weights=pesos)[0]
+            t0 = time.perf_counter()
+            try:
+                res = sesion.post(f"{url}/buscar-elastic", json={"texto": texto}, timeout=timeout)
+                latencia = time.perf_counter() - t0
+                codigos_propios[res.status_code] += 1
+                if res.status_code != 200:
+                    errores_propios[f"HTTP {res.status_code}"] += 1
+                elif not res.json().get("success"):
+                    errores_propios["success=false"] += 1
+                propias.append(latencia)
+            except requests.RequestException as e:
+                errores_propios[type(e).__name__] += 1
+
+        sesion.close()
+        with lock:
+            latencias.extend(propias)
+            codigos.update(codigos_propios)
+            errores.update(errores_propios)
+
+    hilos = [threading.Thread(target=cliente, args=(i,), daemon=True) for i in range(concurrencia)]
+    for h in hilos:
+        h.start()
+    fin[0] = time.perf_counter() + duracion
+    inicio = time.perf_counter()
+    inicio_comun.wait()
+    for h in hilos:
+        h.join()
+    segundos = time.perf_counter() - inicio
+
+    latencias.sort()
+    total = sum(codigos.values()) + sum(v for k, v in errores.items() if not k.startswith("HTTP ") and k != "success=false")
+    n_errores = sum(errores.values())
+
+    return {
+        "concurrencia": concurrencia,
+        "segundos": round(segundos, 2),
+        "solicitudes": total,
+        "throughput": round((total - n_errores) / segundos, 2) if segundos else 0.0,
+        "latencia_ms": {
+            "media": round(1000 * sum(latencias) / len(latencias), 1) if latencias else 0.0,
+            "p50": round(1000 * percentil(latencias, 0.50), 1),
+            "p90": round(1000 * percentil(latencias, 0.90), 1),
+            "p95": round(1000 * percentil(latencias, 0.95), 1),
+            "p99": round(1000 * percentil(latencias, 0.99), 1),
+            "max": round(1000 * latencias[-1], 1) if latencias else 0.0
+        },
+        "errores": n_errores,
+        "tasa_error": round(n_errores / total, 4) if total else 0.0,
+        "codigos": {str(k): v for k, v in sorted(codigos.items())},
+        "tipos_error": dict(errores)
+    }
+
+
+def probar_configuracion(nombre: str, url: str, args) -> Dict:
+    print(f"\n=== {nombre} ===")
+    # Calentamiento: conexiones, cachés y primeros imports de cada worker
+    ejecutar_escalon(url, max(args.concurrencias[0], 2), args.calentamiento, args.semilla)
+
+    escalones = []
+    for concurrencia in args.concurrencias:
+        escalon = ejecutar_escalon(url, concurrencia, args.duracion, args.semilla)
+        escalones.append(escalon)
+        lat = escalon["latencia_ms"]
+        print(f"   c={concurrencia:<4} {escalon['throughput']:>8.1f} req/s   p50 {lat['p50']:>7.1f} ms"
+              f"   p95 {lat['p95']:>7.1f} ms   p99 {lat['p99']:>7.1f} ms   errores {escalon['tasa_error']:.1%}")
+
+        # Saturado: subir más la concurrencia solo agrega cola
+        if escalon["tasa_error"] > args.max_tasa_error:
+            print(f"   (se detiene la rampa: errores > {args.max_tasa_error:.0%})")
+            break
+
+    resultado = {"configuracion": nombre, "escalones": escalones}
+    mejor = max(escalones, key=lambda e: e["throughput"])
+    resultado["throughput_max"] = mejor["throughput"]
+    resultado["concurrencia_throughput_max"] = mejor["concurrencia"]
+
+    if args.slo_p95_ms:
+        dentro = [e for e in escalones
+                  if e["latencia_ms"]["p95"] <= args.slo_p95_ms and e["tasa_error"] <= args.max_tasa_error]
+        resultado["slo_p95_ms"] = args.slo_p95_ms
+        resultado["capacidad_slo"] = max((e["throughput"] for e in dentro), default=0.0)
+        resultado["concurrencia_slo"] = max((e["concurrencia"] for e in dentro), default=0)
+
+    return resultado
+
+
+# ============================================================
+# GRABAR RESPUESTAS REALES
+# ============================================================
+def grabar_respuestas(ruta: str, index: str, size: int = 100) -> int:
+    """Ejecuta cada consulta de la mezcla contra el Elastic de .env y guarda las respuestas."""
+    from dotenv import load_dotenv
+    from Helpers.elastic import ElasticSearch
+
+    load_dotenv()
+    elastic = ElasticSearch(os.getenv("ELASTIC_CLOUD_URL"), os.getenv("ELASTIC_API_KEY"))
+
+    registros = []
+    for texto, _ in CONSULTAS:
+        query = query_busqueda(texto)
+        respuesta = elastic.client.search(index=index, query=query, aggs=AGGS_BUSQUEDA, size=size)
+        registros.append({"query": query, "respuesta": dict(respuesta.body)})
+        print(f"   {texto}: {respuesta['hits']['total']['value']} hits")
+
+    elastic.close()
+    return Funciones.escribir_jsonl(ruta, registros)
+
+
+# ============================================================
+# MAIN
+# ============================================================
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de /buscar-elastic con Elastic local")
+    parser.add_argument("--servidor", choices=("gunicorn", "flask"), default="gunicorn")
+    parser.add_argument("--configuraciones", nargs="+", default=["1x8", "2x8", "4x8"],
+                        help="workers x hilos de gunicorn (ignorado con --servidor flask)")
+    parser.add_argument("--worker-class", default="gthread", choices=("gthread", "gevent"))
+    parser.add_argument("--concurrencias", nargs="+", type=int, default=[1, 2, 4, 8, 16, 32])
+    parser.add_argument("--duracion", type=float, default=10.0, help="segundos por escalón")
+    parser.add_argument("--calentamiento", type=float, default=3.0)
+    parser.add_argument("--max-tasa-error", type=float, default=0.05, help="corta la rampa por encima de esto")
+    parser.add_argument("--slo-p95-ms", type=float, default=None, help="reporta la capacidad con p95 bajo este valor")
+    parser.add_argument("--latencia-elastic", type=float, default=0.02)
+    parser.add_argument("--jitter-elastic", type=float, default=0.03)
+    parser.add_argument("--tasa-error-elastic", type=float, default=0.0)
+    parser.add_argument("--documentos", type=int, default=2000, help="normas sintéticas en el Elastic local")
+    parser.add_argument("--respuestas", default=None, help="JSON Lines de respuestas grabadas")
+    parser.add_argument("--grabar", default=None, help="graba respuestas reales en este JSON Lines y termina")
+    parser.add_argument("--index", default=os.getenv("ELASTIC_INDEX_DEFAULT", "index_normatividad"))
+    parser.add_argument("--semilla", type=int, default=42)
+    parser.add_argument("--salida", default=None, help="JSON de resultados (por defecto benchmarks/resultados/)")
+    args = parser.parse_args()
+
+    if args.grabar:
+        print(f"{grabar_respuestas(args.grabar, args.index)} respuestas guardadas en {args.grabar}")
+        return
+
+    configuraciones = ["flask"] if args.servidor == "flask" else args.configuraciones
+
+    proceso_elastic, url_elastic = iniciar_elastic(args)
+    resultados = []
+    try:
+        for configuracion in configuraciones:
+            workers, hilos = (int(x) for x in configuracion.split("x")) if "x" in configuracion else (1, 1)
+            proceso_app, url_app = iniciar_app(args.servidor, workers, hilos, url_elastic, args)
+            try:
+                resultados.append(probar_configuracion(configuracion, url_app, args))
+            finally:
+                detener(proceso_app)
+    finally:
+        detener(proceso_elastic)
+
+    print("\n==============================")
+    print("   RESUMEN POR CONFIGURACIÓN")
+    print("==============================")
+    for r in resultados:
+        linea = f"   {r['configuracion']:<8} máx {r['throughput_max']:>8.1f} req/s (c={r['concurrencia_throughput_max']})"
+        if "capacidad_slo" in r:
+            linea += f"   con p95 ≤ {r['slo_p95_ms']:.0f} ms: {r['capacidad_slo']:.1f} req/s (c={r['concurrencia_slo']})"
+        print(linea)
+    print()
+
+    configuracion_prueba = vars(args).copy()
+    configuracion_prueba.pop("salida")
+    resultado = {
+        "fecha": datetime.now().isoformat(),
+        "cpus": os.cpu_count(),
+        "configuracion": configuracion_prueba,
+        "consultas": [{"texto": t, "peso": p} for t, p in CONSULTAS],
+        "resultados": resultados
+    }
+
+    salida = args.salida or os.path.join(
+        "benchmarks", "resultados", f"carga_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    if Funciones.guardar_json(salida, resultado, indentar=True):
+        print(f"Resultados guardados en {salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+# benchmarks/corpusNormas.py
+
+import os
+import io
+import random
+import zipfile
+from typing import Dict, List
+
+from Helpers.funciones import Funciones
+from benchmarks.sitioFixture import pdf_desde_lineas
+
+
+# ============================================================
+# VOCABULARIO NORMATIVO
+# ============================================================
+TIPOS = ("DECRETO", "RESOLUCIÓN", "LEY", "CIRCULAR", "CONCEPTO JURÍDICO")
+
+MESES = ("enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+         "agosto", "septiembre", "octubre", "noviembre", "diciembre")
+
+ENTIDADES = (
+    "Ministerio de Vivienda, Ciudad y Territorio", "Fondo Nacional de Vivienda",
+    "Departamento Nacional de Planeación", "Superintendencia de Servicios Públicos Domiciliarios",
+    "Comisión de Regulación de Agua Potable y Saneamiento Básico", "Banco Agrario de Colombia",
+    "Caja de Compensación Familiar", "Findeter"
+)
+
+LUGARES = ("Bogotá D.C.", "Medellín", "Cali", "Barranquilla", "Cartagena de Indias",
+           "Bucaramanga", "Pereira", "Cúcuta", "Villavicencio", "Pasto", "Montería")
+
+OBJETOS = (
+    "se reglamenta el subsidio familiar de vivienda de interés social",
+    "se modifica el Decreto 1077 de 2015 en lo relacionado con el programa de vivienda gratuita",
+    "se establecen los requisitos para la asignación de coberturas a la tasa de interés",
+    "se adoptan medidas para la prestación de los servicios públicos de acueducto y alcantarillado",
+    "se reglamentan las licencias urbanísticas de construcción y parcelación",
+    "se fijan los lineamientos del mejoramiento de vivienda rural",
+)
+
+FRASES = (
+    "Los hogares beneficiarios deberán acreditar ingresos totales mensuales no superiores a cuatro salarios mínimos",
+    "La entidad otorgante verificará el cumplimiento de los requisitos dentro de los treinta días hábiles siguientes",
+    "El municipio o distrito garantizará la disponibilidad inmediata de servicios públicos domiciliarios",
+    "Las viviendas de interés prioritario tendrán un valor máximo de noventa salarios mínimos legales mensuales",
+    "El Fondo Nacional de Vivienda podrá celebrar convenios con las cajas de compensación familiar",
+    "Los recursos del subsidio se girarán al oferente una vez se acredite la escrituración del inmueble",
+    "La postulación se realizará mediante el formulario único dispuesto por el Ministerio",
+    "En ningún caso el subsidio podrá aplicarse a viviendas ubicadas en zonas de alto riesgo no mitigable",
+    "Los prestadores de los servicios públicos deberán reportar la información al Sistema Único de Información",
+    "El incumplimiento de las obligaciones aquí previstas dará lugar a la restitución del subsidio",
+    "Para efectos del presente capítulo se entenderá por hogar el conformado por una o más personas",
+    "La curaduría urbana expedirá la licencia previa verificación de las normas urbanísticas del plan de ordenamiento",
+)
+
+
+# ============================================================
+# TEXTO DE UNA NORMA
+# ============================================================
+def generar_norma(numero: int, articulos: int = 20, semilla: int = 0) -> Dict:
+    """Norma sintética (encabezado, considerandos y articulado) determinista por semilla."""
+    rnd = random.Random(semilla)
+    tipo = rnd.choice(TIPOS)
+    anio = rnd.randint(1995, 2024)
+    fecha = f"({rnd.randint(1, 28)} de {rnd.choice(MESES)} de {anio})"
+    objeto = rnd.choice(OBJETOS)
+
+    lineas = [
+        "REPÚBLICA DE COLOMBIA",
+        ENTIDADES[0].upper(),
+        f"{tipo} {numero} DE {anio}",
+        fecha,
+        f"Por el cual {objeto}.",
+        "",
+        "CONSIDERANDO:",
+    ]
+    for _ in range(rnd.randint(2, 4)):
+        lineas.append(
+            f"Que la Ley {rnd.randint(3, 2200)} de {rnd.randint(1990, anio)} dispone que "
+            f"{rnd.choice(FRASES).lower()} en {rnd.choice(LUGARES)}."
+        )
+    lineas += ["", "DECRETA:" if tipo == "DECRETO" else "RESUELVE:", ""]
+
+    for n in range(1, articulos + 1):
+        lineas.append(f"ARTÍCULO {n}. {rnd.choice(FRASES)}.")
+        for _ in range(rnd.randint(1, 4)):
+            lineas.append(
+                f"{rnd.choice(FRASES)}, de acuerdo con lo dispuesto por el {rnd.choice(ENTIDADES)}"
+                f" para {rnd.choice(LUGARES)}."
+            )
+        lineas.append("")
+
+    lineas += ["PUBLÍQUESE Y CÚMPLASE", f"Dado en Bogotá D.C., a los {fecha[1:-1]}"]
+
+    return {"titulo": f"{tipo} {numero} DE {anio}", "tipo": tipo, "anio": anio, "lineas": lineas}
+
+
+def _partir_linea(linea: str, ancho: int = 95) -> List[str]:
+    """Corta una línea larga en renglones de `ancho` caracteres por palabras."""
+    renglones, actual = [], ""
+    for palabra in linea.split(" "):
+        if actual and len(actual) + len(palabra) + 1 > ancho:
+            renglones.append(actual)
+            actual = palabra
+        else:
+            actual = f"{actual} {palabra}" if actual else palabra
+    renglones.append(actual)
+    return renglones
+
+
+def renglones_norma(norma: Dict, ancho: int = 95) -> List[str]:
+    return [r for linea in norma["lineas"] for r in _partir_linea(linea, ancho)]
+
+
+def paginas_norma(norma: Dict, lineas_por_pagina: int = 60, ancho: int = 95) -> int:
+    return -(-len(renglones_norma(norma, ancho)) // lineas_por_pagina)
+
+
+# ============================================================
+# FORMATOS
+# ============================================================
+def pdf_texto(norma: Dict) -> bytes:
+    """PDF con capa de texto (lo que PyPDF2 / pdfplumber extraen directamente)."""
+    return pdf_desde_lineas(renglones_norma(norma), lineas_por_pagina=60)
+
+
+def pdf_escaneado(norma: Dict, dpi: int = 150, lineas_por_pagina: int = 45) -> bytes:
+    """
+    PDF de imágenes sin capa de texto, como un escaneo: cada página es un
+    mapa de bits con el texto dibujado. Solo OCR (Tesseract) lo puede leer.
+    """
+    from PIL import Image, ImageDraw, ImageFont
+
+    ancho, alto = int(8.27 * dpi), int(11.69 * dpi)  # A4
+    tamano_fuente = max(10, dpi // 8)
+    try:
+        fuente = ImageFont.load_default(size=tamano_fuente)
+    except TypeError:
+        fuente = ImageFont.load_default()  # Pillow < 10.1: tamaño fijo
+    interlineado = int(tamano_fuente * 1.5)
+
+    renglones = renglones_norma(norma, ancho=80)
+    paginas = []
+    for i in range(0, len(renglones), lineas_por_pagina):
+        imagen = Image.new("L", (ancho, alto), 255)
+        dibujo = ImageDraw.Draw(imagen)
+        y = dpi // 2
+        for renglon in renglones[i:i + lineas_por_pagina]:
+            dibujo.text((dpi // 2, y), renglon, fill=0, font=fuente)
+            y += interlineado
+        paginas.append(imagen)
+
+    salida = io.BytesIO()
+    paginas[0].save(salida, format="PDF", save_all=True, append_images=paginas[1:], resolution=dpi)
+    return salida.getvalue()
+
+
+def documento_json(norma: Dict, archivo: str) -> Dict:
+    """Documento con la forma de OCRtoElastic (archivo, texto_ocr, ...)."""
+    texto = "\n".join(norma["lineas"])
+    return {
+        "archivo": archivo,
+        "texto_ocr": texto,
+        "num_paginas": paginas_norma(norma),
+        "caracteres": len(texto),
+        "tiene_texto": True,
+        "fecha_procesado": "2025-01-01"
+    }
+
+
+# ============================================================
+# CORPUS COMPLETO
+# ============================================================
+ESCALAS = {
+    # pdfs_texto, pdfs_escaneados, zips, json_por_zip, articulos
+    "pequena": (20, 3, 2, 200, 15),
+    "mediana": (100, 10, 5, 1000, 25),
+    "grande": (500, 30, 10, 5000, 40),
+}
+
+
+def generar_corpus(carpeta: str, pdfs_texto: int = 20, pdfs_escaneados: int = 3,
+                   zips: int = 2, json_por_zip: int = 200, articulos: int = 15,
+                   semilla: int = 42) -> Dict:
+    """
+    Escribe en `carpeta` el corpus sintético:
+    - texto/     PDFs con capa de texto
+    - escaneado/ PDFs solo imagen (para OCR)
+    - zip/       ZIPs de JSON por documento (la carga por ZIP de la app)
+    Con la misma semilla y escala el contenido es el mismo (Pillow solo agrega
+    la fecha de creación a los escaneados).
+    Retorna el manifiesto (rutas, tamaños, páginas) para los benchmarks.
+    """
+    manifiesto = {"carpeta": carpeta, "semilla": semilla, "texto": [], "escaneado": [], "zip": []}
+
+    for subcarpeta in ("texto", "escaneado", "zip"):
+        Funciones.crear_carpeta(os.path.join(carpeta, subcarpeta))
+
+    numero = 1000
+    for i in range(pdfs_texto):
+        numero += 1
+        norma = generar_norma(numero, articulos, semilla=semilla * 100_003 + numero)
+        ruta = os.path.join(carpeta, "texto", f"norma_{numero}.pdf")
+        contenido = pdf_texto(norma)
+        with open(ruta, "wb") as f:
+            f.write(contenido)
+        manifiesto["texto"].append({"ruta": ruta, "bytes": len(contenido), "paginas": paginas_norma(norma)})
+
+    for i in range(pdfs_escaneados):
+        numero += 1
+        # Los escaneos suelen ser normas cortas o anexos: menos artículos
+        norma = generar_norma(numero, max(3, articulos // 3), semilla=semilla * 100_003 + numero)
+        ruta = os.path.join(carpeta, "escaneado", f"escaneo_{numero}.pdf")
+        contenido = pdf_escaneado(norma)
+        with open(ruta, "wb") as f:
+            f.write(contenido)
+        manifiesto["escaneado"].append({"ruta": ruta, "bytes": len(contenido),
+                                        "paginas": paginas_norma(norma, 45, ancho=80)})
+
+    for z in range(zips):
+        ruta = os.path.join(carpeta, "zip", f"lote_{z + 1:03d}.zip")
+        with zipfile.ZipFile(ruta, "w", zipfile.ZIP_DEFLATED) as zf:
+            for i in range(json_por_zip):
+                numero += 1
+                norma = generar_norma(numero, articulos, semilla=semilla * 100_003 + numero)
+                archivo = f"norma_{numero}.pdf"
+                # Fecha fija en el miembro: el ZIP no cambia entre corridas
+                info = zipfile.ZipInfo(f"json/norma_{numero}.json", date_time=(2025, 1, 1, 0, 0, 0))
+                info.compress_type = zipfile.ZIP_DEFLATED
+                zf.writestr(info, Funciones.json_dumps(documento_json(norma, archivo)))
+        manifiesto["zip"].append({"ruta": ruta, "bytes": os.path.getsize(ruta), "documentos": json_por_zip})
+
+    return manifiesto
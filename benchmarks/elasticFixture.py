@@ -0,0 +1,323 @@
+# benchmarks/elasticFixture.py
+
+import json
+import time
+import zlib
+import random
+import argparse
+import threading
+from collections import defaultdict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from Helpers.funciones import Funciones
+
+
+class ElasticFixture:
+    """
+    Servidor HTTP local que responde lo mínimo de la API de Elasticsearch 8
+    para los Helpers (sin tocar Elastic Cloud):
+    - GET /                        info del clúster (con X-Elastic-Product)
+    - POST /_bulk, /<index>/_bulk  indexa y responde por item (201 / 429)
+    - POST /<index>/_search        hits de los documentos guardados, aggs vacías
+    - GET /<index>/_count, GET /_cat/indices, PUT / DELETE /<index>
+    Latencia, jitter y tasa de errores configurables, con semilla fija.
+    Solo guarda hasta `max_guardados` documentos por índice (el resto se cuenta).
+    Con respuestas grabadas (cargar_respuestas) las búsquedas conocidas
+    devuelven la respuesta real de Elastic Cloud.
+
+    También corre como proceso aparte (para pruebas de carga):
+        python -m benchmarks.elasticFixture --puerto 9201 --latencia 0.02 --documentos 2000
+    """
+
+    VERSION = "8.11.0"
+
+    def __init__(self, latencia: float = 0.0, jitter: float = 0.0, tasa_error: float = 0.0,
+                 tasa_rechazo_bulk: float = 0.0, max_guardados: int = 2000,
+                 puerto: int = 0, semilla: int = 42):
+        self.latencia = latencia
+        self.jitter = jitter
+        self.tasa_error = tasa_error
+        self.tasa_rechazo_bulk = tasa_rechazo_bulk
+        self.max_guardados = max_guardados
+        self.puerto = puerto
+
+        self._rnd = random.Random(semilla)
+        self._lock = threading.Lock()
+        self.documentos: Dict[str, List[Dict]] = defaultdict(list)
+        self.totales: Dict[str, int] = defaultdict(int)
+        self._siguiente_id = 0
+        self.respuestas: Dict[str, Dict] = {}
+        self.servidor: Optional[ThreadingHTTPServer] = None
+        self._hilo: Optional[threading.Thread] = None
+        self.reiniciar_contadores()
+
+    # ============================================================
+    # CICLO DE VIDA
+    # ============================================================
+    def iniciar(self) -> "ElasticFixture":
+        fixture = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                fixture._atender(self, "GET")
+
+            def do_POST(self):
+                fixture._atender(self, "POST")
+
+            def do_PUT(self):
+                fixture._atender(self, "PUT")
+
+            def do_DELETE(self):
+                fixture._atender(self, "DELETE")
+
+            def do_HEAD(self):
+                fixture._atender(self, "HEAD")
+
+            def log_message(self, *args):
+                pass
+
+        class Servidor(ThreadingHTTPServer):
+            daemon_threads = True
+            request_queue_size = 128
+
+            def handle_error(self, request, client_address):
+                pass
+
+        self.servidor = Servidor(("127.0.0.1", self.puerto), Manejador)
+        self.puerto = self.servidor.server_address[1]
+        self._hilo = threading.Thread(target=self.servidor.serve_forever, name="elastic-fixture", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        if self.servidor is not None:
+            self.servidor.shutdown()
+            self.servidor.server_close()
+            self.servidor = None
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *args):
+        self.detener()
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.puerto}"
+
+    def reiniciar_contadores(self):
+        self.contadores = {
+            "solicitudes": 0, "bulk": 0, "documentos": 0, "rechazados": 0,
+            "busquedas": 0, "errores_503": 0, "bytes_recibidos": 0
+        }
+
+    def _sumar(self, clave: str, n: int = 1):
+        with self._lock:
+            self.contadores[clave] += n
+
+    # ============================================================
+    # DATOS
+    # ============================================================
+    def precargar(self, index: str, n: int, articulos: int = 15, semilla: int = 42):
+        """Guarda `n` normas sintéticas en `index` (para que las búsquedas traigan hits)."""
+        from benchmarks.corpusNormas import generar_norma, documento_json
+
+        with self._lock:
+            for i in range(n):
+                norma = generar_norma(1000 + i, articulos, semilla=semilla * 100_003 + i)
+                self._siguiente_id += 1
+                self.totales[index] += 1
+                if len(self.documentos[index]) < self.max_guardados:
+                    self.documentos[index].append({
+                        "_id": f"doc{self._siguiente_id}",
+                        "_source": documento_json(norma, f"norma_{1000 + i}.pdf")
+                    })
+
+    @staticmethod
+    def clave_consulta(query: Dict) -> str:
+        return json.dumps(query, sort_keys=True, ensure_ascii=False)
+
+    def cargar_respuestas(self, ruta: str) -> int:
+        """JSON Lines de {"query": ..., "respuesta": ...}; retorna cuántas se cargaron."""
+        for registro in Funciones.leer_jsonl(ruta):
+            self.respuestas[self.clave_consulta(registro["query"])] = registro["respuesta"]
+        return len(self.respuestas)
+
+    # ============================================================
+    # ATENCIÓN DE SOLICITUDES
+    # ============================================================
+    def _atender(self, req: BaseHTTPRequestHandler, metodo: str):
+        largo = int(req.headers.get("Content-Length") or 0)
+        cuerpo = req.rfile.read(largo) if largo else b""
+        self._sumar("solicitudes")
+        self._sumar("bytes_recibidos", len(cuerpo))
+
+        with self._lock:
+            espera = self.latencia + (self._rnd.uniform(0, self.jitter) if self.jitter else 0.0)
+            sorteo = self._rnd.random()
+        if espera:
+            time.sleep(espera)
+
+        partes = [p for p in urlparse(req.path).path.split("/") if p]
+
+        if sorteo < self.tasa_error and partes:
+            self._sumar("errores_503")
+            return self._responder(req, 503, {"error": {"type": "unavailable_shards_exception"}, "status": 503})
+
+        if not partes:
+            return self._responder(req, 200, {
+                "name": "elastic-fixture", "cluster_name": "benchmarks",
+                "version": {"number": self.VERSION, "build_flavor": "default"},
+                "tagline": "You Know, for Search"
+            })
+
+        if partes[-1] == "_bulk":
+            return self._responder(req, 200, self._bulk(partes[0] if len(partes) > 1 else None, cuerpo))
+
+        if partes[-1] == "_search":
+            return self._responder(req, 200, self._buscar(partes[0], Funciones.json_loads(cuerpo or b"{}")))
+
+        if partes[-1] == "_count":
+            with self._lock:
+                return self._responder(req, 200, {"count": self.totales.get(partes[0], 0)})
+
+        if partes[:2] == ["_cat", "indices"]:
+            with self._lock:
+                indices = [
+                    {"index": i, "docs.count": str(n), "store.size": "0b", "health": "green", "status": "open"}
+                    for i, n in sorted(self.totales.items())
+                ]
+            return self._responder(req, 200, indices)
+
+        if len(partes) == 1 and metodo in ("PUT", "DELETE", "HEAD"):
+            with self._lock:
+                if metodo == "PUT":
+                    self.totales.setdefault(partes[0], 0)
+                elif metodo == "DELETE":
+                    self.totales.pop(partes[0], None)
+                    self.documentos.pop(partes[0], None)
+                existe = partes[0] in self.totales
+            if metodo == "HEAD":
+                return self._responder(req, 200 if existe else 404, None)
+            return self._responder(req, 200, {"acknowledged": True, "index": partes[0]})
+
+        return self._responder(req, 404, {"error": {"type": "not_implemented", "reason": req.path}, "status": 404})
+
+    def _bulk(self, index_ruta: Optional[str], cuerpo: bytes) -> Dict:
+        inicio = time.perf_counter()
+        lineas = [l for l in cuerpo.split(b"\n") if l.strip()]
+        items = []
+        errores = False
+
+        # Pares acción / documento (index y create llevan documento)
+        for accion_linea, doc_linea in zip(lineas[0::2], lineas[1::2]):
+            accion = Funciones.json_loads(accion_linea)
+            operacion, meta = next(iter(accion.items()))
+            index = meta.get("_index") or index_ruta
+
+            with self._lock:
+                rechazado = self._rnd.random() < self.tasa_rechazo_bulk
+                if not rechazado:
+                    self._siguiente_id += 1
+                    doc_id = meta.get("_id") or f"doc{self._siguiente_id}"
+                    self.totales[index] += 1
+                    if len(self.documentos[index]) < self.max_guardados:
+                        self.documentos[index].append({"_id": doc_id, "_source": Funciones.json_loads(doc_linea)})
+
+            if rechazado:
+                errores = True
+                items.append({operacion: {
+                    "_index": index, "status": 429,
+                    "error": {"type": "es_rejected_execution_exception", "reason": "rechazo simulado"}
+                }})
+            else:
+                items.append({operacion: {"_index": index, "_id": doc_id, "result": "created", "status": 201}})
+
+        aceptados = sum(1 for i in items if next(iter(i.values()))["status"] == 201)
+        self._sumar("bulk")
+        self._sumar("documentos", aceptados)
+        self._sumar("rechazados", len(items) - aceptados)
+
+        return {"took": int((time.perf_counter() - inicio) * 1000), "errors": errores, "items": items}
+
+    def _buscar(self, index: str, cuerpo: Dict) -> Dict:
+        """Respuesta con la forma real: hits de lo guardado (rotados según la consulta) y aggs vacías."""
+        self._sumar("busquedas")
+        grabada = self.respuestas.get(self.clave_consulta(cuerpo.get("query")))
+        if grabada is not None:
+            return grabada
+
+        size = int(cuerpo.get("size", 10))
+
+        with self._lock:
+            guardados = self.documentos.get(index) or []
+            total = self.totales.get(index, 0)
+            desde = zlib.crc32(str(cuerpo.get("query")).encode()) % len(guardados) if guardados else 0
+            seleccion = (guardados[desde:] + guardados[:desde])[:size]
+
+        hits = [
+            {"_index": index, "_id": d["_id"], "_score": round(10.0 / (i + 1), 4), "_source": d["_source"]}
+            for i, d in enumerate(seleccion)
+        ]
+        aggs = {nombre: {"buckets": []} for nombre in (cuerpo.get("aggs") or cuerpo.get("aggregations") or {})}
+
+        respuesta = {
+            "took": 1, "timed_out": False,
+            "_shards": {"total": 1, "successful": 1, "skipped": 0, "failed": 0},
+            "hits": {"total": {"value": total, "relation": "eq"},
+                     "max_score": hits[0]["_score"] if hits else None, "hits": hits}
+        }
+        if aggs:
+            respuesta["aggregations"] = aggs
+        return respuesta
+
+    @staticmethod
+    def _responder(req: BaseHTTPRequestHandler, status: int, datos):
+        cuerpo = Funciones.json_dumps(datos) if datos is not None else b""
+        try:
+            req.send_response(status)
+            # Sin esta cabecera el cliente 8.x rechaza la respuesta (verificación de producto)
+            req.send_header("X-Elastic-Product", "Elasticsearch")
+            req.send_header("Content-Type", "application/json")
+            req.send_header("Content-Length", str(len(cuerpo)))
+            req.end_headers()
+            if cuerpo and req.command != "HEAD":
+                req.wfile.write(cuerpo)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Elastic local para benchmarks y pruebas de carga")
+    parser.add_argument("--puerto", type=int, default=9201)
+    parser.add_argument("--latencia", type=float, default=0.0, help="segundos por solicitud")
+    parser.add_argument("--jitter", type=float, default=0.0, help="latencia extra aleatoria máxima")
+    parser.add_argument("--tasa-error", type=float, default=0.0, help="fracción de respuestas 503")
+    parser.add_argument("--index", default="index_normatividad")
+    parser.add_argument("--documentos", type=int, default=0, help="normas sintéticas a precargar")
+    parser.add_argument("--respuestas", default=None, help="JSON Lines de respuestas grabadas")
+    parser.add_argument("--semilla", type=int, default=42)
+    args = parser.parse_args()
+
+    fixture = ElasticFixture(latencia=args.latencia, jitter=args.jitter, tasa_error=args.tasa_error,
+                             puerto=args.puerto, semilla=args.semilla)
+    if args.documentos:
+        fixture.precargar(args.index, args.documentos, semilla=args.semilla)
+    if args.respuestas:
+        print(f"{fixture.cargar_respuestas(args.respuestas)} respuestas grabadas")
+
+    fixture.iniciar()
+    print(f"Elastic local en {fixture.url} (index {args.index}, {fixture.totales.get(args.index, 0)} documentos)",
+          flush=True)
+    try:
+        fixture._hilo.join()
+    except KeyboardInterrupt:
+        fixture.detener()
+
+
+if __name__ == "__main__":
+    main()
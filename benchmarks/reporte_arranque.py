@@ -0,0 +1,145 @@
+# benchmarks/reporte_arranque.py
+"""
+Reporte de tiempo de arranque: importa cada módulo en un proceso nuevo con
+`python -X importtime` y resume el tiempo total, la memoria máxima y qué
+paquetes y módulos pesan más (tiempo propio y acumulado).
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.reporte_arranque
+    python -m benchmarks.reporte_arranque --modulo app --top 25
+    python -m benchmarks.reporte_arranque --modulo Helpers --modulo "Helpers.PLN"
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, List
+
+from Helpers.funciones import Funciones
+
+# El proceso hijo imprime su propio tiempo de import y memoria máxima
+CODIGO = (
+    "import time, resource; inicio = time.perf_counter(); import {modulo}; "
+    "print(time.perf_counter() - inicio, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)"
+)
+
+
+def parsear_importtime(salida: str) -> List[Dict]:
+    """Líneas `import time: self | cumulative | paquete` → lista de registros."""
+    registros = []
+    for linea in salida.splitlines():
+        if not linea.startswith("import time:") or "self [us]" in linea:
+            continue
+        partes = linea[len("import time:"):].split("|")
+        if len(partes) != 3:
+            continue
+        nombre = partes[2].rstrip()
+        nivel = (len(nombre) - len(nombre.lstrip())) // 2
+        registros.append({
+            "modulo": nombre.strip(),
+            "nivel": nivel,
+            "propio_ms": int(partes[0]) / 1000,
+            "acumulado_ms": int(partes[1]) / 1000
+        })
+
+    # Lo importado por el intérprete al iniciar (hasta `site`) no es del módulo medido
+    fin_inicio = max((i for i, r in enumerate(registros) if r["modulo"] == "site" and r["nivel"] == 0),
+                     default=-1)
+    return registros[fin_inicio + 1:]
+
+
+def medir_modulo(modulo: str, top: int = 15) -> Dict:
+    """Importa `modulo` en un intérprete nuevo; retorna el reporte."""
+    inicio = time.perf_counter()
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CODIGO.format(modulo=modulo)],
+        capture_output=True, text=True
+    )
+    segundos_proceso = time.perf_counter() - inicio
+
+    if proceso.returncode != 0:
+        ultima = (proceso.stderr.strip().splitlines() or ["error desconocido"])[-1]
+        return {"modulo": modulo, "success": False, "error": ultima}
+
+    segundos_import, rss = proceso.stdout.strip().splitlines()[-1].split()
+    registros = parsear_importtime(proceso.stderr)
+
+    # Tiempo propio agrupado por paquete de primer nivel (spacy, torch, Helpers…)
+    por_paquete = defaultdict(float)
+    for r in registros:
+        por_paquete[r["modulo"].split(".")[0]] += r["propio_ms"]
+
+    paquetes = sorted(por_paquete.items(), key=lambda x: -x[1])[:top]
+    modulos = sorted(registros, key=lambda r: -r["propio_ms"])[:top]
+    acumulados = sorted(
+        (r for r in registros if r["modulo"].split(".")[0] != modulo.split(".")[0] or r["nivel"] <= 1),
+        key=lambda r: -r["acumulado_ms"]
+    )[:top]
+
+    # ru_maxrss está en KB en Linux y en bytes en macOS
+    rss_mb = int(rss) / (1048576 if sys.platform == "darwin" else 1024)
+
+    return {
+        "modulo": modulo,
+        "success": True,
+        "segundos_import": round(float(segundos_import), 3),
+        "segundos_proceso": round(segundos_proceso, 3),
+        "memoria_max_mb": round(rss_mb, 1),
+        "modulos_importados": len(registros),
+        "pesados": [m for m in ("spacy", "torch", "transformers", "sentence_transformers", "sklearn",
+                                "pandas", "nltk", "pdfplumber", "pytesseract", "selenium")
+                    if m in por_paquete],
+        "por_paquete_ms": [{"paquete": p, "propio_ms": round(ms, 1)} for p, ms in paquetes],
+        "por_modulo_ms": [{"modulo": r["modulo"], "propio_ms": round(r["propio_ms"], 1)} for r in modulos],
+        "acumulado_ms": [{"modulo": r["modulo"], "acumulado_ms": round(r["acumulado_ms"], 1)} for r in acumulados]
+    }
+
+
+def imprimir_reporte(reporte: Dict):
+    print(f"\n========== import {reporte['modulo']} ==========")
+    if not reporte["success"]:
+        print(f"   ❌ Error: {reporte['error']}")
+        return
+
+    print(f"   tiempo de import:   {reporte['segundos_import']} s"
+          f"  (proceso completo {reporte['segundos_proceso']} s)")
+    print(f"   memoria máxima:     {reporte['memoria_max_mb']} MB")
+    print(f"   módulos importados: {reporte['modulos_importados']}")
+    print(f"   dependencias pesadas cargadas: {', '.join(reporte['pesados']) or 'ninguna'}")
+
+    print("\n   Por paquete (tiempo propio)")
+    for p in reporte["por_paquete_ms"]:
+        print(f"     {p['propio_ms']:>9.1f} ms  {p['paquete']}")
+
+    print("\n   Imports más costosos (acumulado)")
+    for r in reporte["acumulado_ms"]:
+        print(f"     {r['acumulado_ms']:>9.1f} ms  {r['modulo']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Reporte de tiempo de arranque (python -X importtime)")
+    parser.add_argument("--modulo", action="append", default=None,
+                        help="módulo a importar (repetible; por defecto Helpers y app)")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--salida", default=None, help="JSON de resultados (por defecto benchmarks/resultados/)")
+    args = parser.parse_args()
+
+    reportes = [medir_modulo(m, args.top) for m in (args.modulo or ["Helpers", "app"])]
+    for reporte in reportes:
+        imprimir_reporte(reporte)
+    print()
+
+    salida = args.salida or os.path.join(
+        "benchmarks", "resultados", f"arranque_{datetime.now():%Y%m%d_%H%M%S}.json"
+    )
+    resultado = {"fecha": datetime.now().isoformat(), "python": sys.version.split()[0], "reportes": reportes}
+    if Funciones.guardar_json(salida, resultado, indentar=True):
+        print(f"Resultados guardados en {salida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,292 @@
+# benchmarks/sitioFixture.py
+
+import time
+import random
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from urllib.parse import urlparse, parse_qs
+
+
+# ============================================================
+# PDFs SINTÉTICOS
+# ============================================================
+PALABRAS = (
+    "artículo decreto resolución vivienda ministerio subsidio hogar municipio "
+    "departamento norma reglamento proyecto suelo urbano rural servicio público "
+    "acueducto alcantarillado financiación crédito beneficiario plazo requisito "
+    "entidad territorial licencia construcción interés social prioritario"
+).split()
+
+
+def _escapar_pdf(texto: str) -> str:
+    return texto.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def generar_pdf(titulo: str, tamano_bytes: int = 50_000, semilla: int = 0) -> bytes:
+    """
+    PDF válido con texto extraíble (Helvetica, una o más páginas) de
+    aproximadamente `tamano_bytes`. El contenido es determinista por `semilla`.
+    """
+    rnd = random.Random(semilla)
+    lineas_por_pagina = 45
+
+    # Líneas de ~90 caracteres hasta llenar el tamaño pedido
+    lineas = [titulo]
+    total = len(titulo)
+    n_articulo = 1
+    while total < tamano_bytes:
+        if len(lineas) % 12 == 0:
+            linea = f"ARTÍCULO {n_articulo}."
+            n_articulo += 1
+        else:
+            linea = " ".join(rnd.choice(PALABRAS) for _ in range(12)).capitalize() + "."
+        lineas.append(linea)
+        total += len(linea) + 20
+
+    return pdf_desde_lineas(lineas, lineas_por_pagina)
+
+
+def pdf_desde_lineas(lineas: List[str], lineas_por_pagina: int = 45) -> bytes:
+    """PDF con texto extraíble (Helvetica 9 pt): una línea de texto por renglón."""
+    paginas = [lineas[i:i + lineas_por_pagina] for i in range(0, len(lineas), lineas_por_pagina)] or [[]]
+
+    objetos: List[bytes] = []
+    # 1: catálogo, 2: árbol de páginas, 3: fuente; luego (página, contenido) por página
+    ids_paginas = [4 + 2 * i for i in range(len(paginas))]
+    objetos.append(b"<< /Type /Catalog /Pages 2 0 R >>")
+    objetos.append(
+        f"<< /Type /Pages /Kids [{' '.join(f'{i} 0 R' for i in ids_paginas)}] /Count {len(paginas)} >>".encode()
+    )
+    objetos.append(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+
+    for id_pagina, pagina in zip(ids_paginas, paginas):
+        flujo = ["BT", "/F1 9 Tf", "11 TL", "40 800 Td"]
+        for linea in pagina:
+            flujo.append(f"({_escapar_pdf(linea)}) '")
+        flujo.append("ET")
+        contenido = "\n".join(flujo).encode("cp1252", errors="replace")
+
+        objetos.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 3 0 R >> >> /Contents {id_pagina + 1} 0 R >>".encode()
+        )
+        objetos.append(b"<< /Length %d >>\nstream\n" % len(contenido) + contenido + b"\nendstream")
+
+    salida = bytearray(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+    offsets = []
+    for i, obj in enumerate(objetos, start=1):
+        offsets.append(len(salida))
+        salida += b"%d 0 obj\n" % i + obj + b"\nendobj\n"
+
+    inicio_xref = len(salida)
+    salida += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objetos) + 1)
+    for off in offsets:
+        salida += b"%010d 00000 n \n" % off
+    salida += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objetos) + 1, inicio_xref)
+
+    return bytes(salida)
+
+
+# ============================================================
+# SITIO DE PRUEBA
+# ============================================================
+class SitioFixture:
+    """
+    Servidor HTTP local que imita el listado de normativa de Minvivienda (Drupal):
+    - /normativa?f=<seccion>&page=N con `div.views-row a` y `li.pager__item--next a`
+    - /sites/default/files/<seccion>/<n>.pdf con PDFs sintéticos (ETag, 304)
+    Latencia y tasa de errores (500 / 429 con Retry-After) configurables,
+    con semilla fija para que cada corrida sea comparable.
+    """
+
+    def __init__(self, secciones: int = 3, paginas: int = 5, filas_por_pagina: int = 10,
+                 tamano_pdf: int = 50_000, latencia: float = 0.0, jitter: float = 0.0,
+                 tasa_error: float = 0.0, tasa_throttle: float = 0.0, retry_after: int = 1,
+                 puerto: int = 0, semilla: int = 42):
+        self.nombres_secciones = [f"Seccion_{i}" for i in range(secciones)]
+        self.paginas = paginas
+        self.filas_por_pagina = filas_por_pagina
+        self.tamano_pdf = tamano_pdf
+        self.latencia = latencia
+        self.jitter = jitter
+        self.tasa_error = tasa_error
+        self.tasa_throttle = tasa_throttle
+        self.retry_after = retry_after
+        self.puerto = puerto
+
+        self._rnd = random.Random(semilla)
+        self._lock = threading.Lock()
+        self._pdfs: Dict[str, bytes] = {}
+        self.servidor: Optional[ThreadingHTTPServer] = None
+        self._hilo: Optional[threading.Thread] = None
+        self.reiniciar_contadores()
+
+    # ============================================================
+    # CICLO DE VIDA
+    # ============================================================
+    def iniciar(self) -> "SitioFixture":
+        sitio = self
+
+        class Manejador(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                sitio._atender(self)
+
+            def log_message(self, *args):
+                pass
+
+        class Servidor(ThreadingHTTPServer):
+            daemon_threads = True
+
+            def handle_error(self, request, client_address):
+                # Los clientes cierran conexiones keep-alive al terminar: no es un error
+                pass
+
+        self.servidor = Servidor(("127.0.0.1", self.puerto), Manejador)
+        self.puerto = self.servidor.server_address[1]
+        self._hilo = threading.Thread(target=self.servidor.serve_forever, name="sitio-fixture", daemon=True)
+        self._hilo.start()
+        return self
+
+    def detener(self):
+        if self.servidor is not None:
+            self.servidor.shutdown()
+            self.servidor.server_close()
+            self.servidor = None
+
+    def __enter__(self):
+        return self.iniciar()
+
+    def __exit__(self, *args):
+        self.detener()
+
+    # ============================================================
+    # DATOS DEL SITIO
+    # ============================================================
+    @property
+    def url_base(self) -> str:
+        return f"http://127.0.0.1:{self.puerto}"
+
+    def secciones(self) -> Dict[str, str]:
+        """Diccionario nombre → URL de listado, con el formato de WebScraping.SECCIONES."""
+        return {nombre: f"{self.url_base}/normativa?f={nombre}" for nombre in self.nombres_secciones}
+
+    def total_documentos(self) -> int:
+        return len(self.nombres_secciones) * self.paginas * self.filas_por_pagina
+
+    def total_bytes(self) -> int:
+        return self.total_documentos() * len(self._pdf("Seccion_0", 0))
+
+    def reiniciar_contadores(self):
+        self.contadores = {
+            "listados": 0, "pdfs": 0, "bytes": 0,
+            "no_modificados": 0, "errores_500": 0, "throttles_429": 0, "no_encontrados": 0
+        }
+
+    def _sumar(self, clave: str, n: int = 1):
+        with self._lock:
+            self.contadores[clave] += n
+
+    def _pdf(self, seccion: str, n: int) -> bytes:
+        # Todos los PDFs comparten tamaño; el contenido varía por sección y número
+        clave = f"{seccion}/{n}"
+        if clave not in self._pdfs:
+            semilla = int(hashlib.md5(clave.encode()).hexdigest()[:8], 16)
+            self._pdfs[clave] = generar_pdf(
+                f"Documento {n} de {seccion.replace('_', ' ')}", self.tamano_pdf, semilla
+            )
+        return self._pdfs[clave]
+
+    def _listado(self, seccion: str, pagina: int) -> str:
+        filas = []
+        for i in range(self.filas_por_pagina):
+            n = pagina * self.filas_por_pagina + i
+            filas.append(
+                f'<div class="views-row"><span>Documento {n}</span>'
+                f'<a href="/sites/default/files/{seccion}/{n}.pdf">Descargar</a></div>'
+            )
+
+        siguiente = ""
+        if pagina + 1 < self.paginas:
+            siguiente = (
+                f'<li class="pager__item pager__item--next">'
+                f'<a href="?f={seccion}&amp;page={pagina + 1}">Siguiente</a></li>'
+            )
+
+        return (
+            "<html><body><div class=\"view-content\">" + "".join(filas) + "</div>"
+            f"<nav><ul class=\"pager__items\"><li class=\"pager__item is-active\">{pagina + 1}</li>"
+            f"{siguiente}</ul></nav></body></html>"
+        )
+
+    # ============================================================
+    # ATENCIÓN DE SOLICITUDES
+    # ============================================================
+    def _atender(self, req: BaseHTTPRequestHandler):
+        if self.latencia or self.jitter:
+            with self._lock:
+                espera = self.latencia + self._rnd.uniform(0, self.jitter)
+            time.sleep(espera)
+
+        with self._lock:
+            sorteo = self._rnd.random()
+
+        if sorteo < self.tasa_throttle:
+            self._sumar("throttles_429")
+            return self._responder(req, 429, b"Too Many Requests", "text/plain",
+                                   {"Retry-After": str(self.retry_after)})
+        if sorteo < self.tasa_throttle + self.tasa_error:
+            self._sumar("errores_500")
+            return self._responder(req, 500, b"Internal Server Error", "text/plain")
+
+        url = urlparse(req.path)
+        params = parse_qs(url.query)
+
+        if url.path == "/normativa":
+            seccion = params.get("f", [""])[0]
+            pagina = int(params.get("page", ["0"])[0])
+            if seccion not in self.nombres_secciones or pagina >= self.paginas:
+                self._sumar("no_encontrados")
+                return self._responder(req, 404, b"Not Found", "text/plain")
+
+            self._sumar("listados")
+            return self._responder(req, 200, self._listado(seccion, pagina).encode("utf-8"),
+                                   "text/html; charset=utf-8")
+
+        partes = url.path.strip("/").split("/")
+        if len(partes) == 5 and partes[:3] == ["sites", "default", "files"] and partes[4].endswith(".pdf"):
+            seccion, n = partes[3], partes[4][:-4]
+            if seccion in self.nombres_secciones and n.isdigit() and \
+                    int(n) < self.paginas * self.filas_por_pagina:
+                cuerpo = self._pdf(seccion, int(n))
+                etag = '"' + hashlib.md5(cuerpo).hexdigest() + '"'
+
+                if req.headers.get("If-None-Match") == etag:
+                    self._sumar("no_modificados")
+                    return self._responder(req, 304, b"", None, {"ETag": etag})
+
+                self._sumar("pdfs")
+                self._sumar("bytes", len(cuerpo))
+                return self._responder(req, 200, cuerpo, "application/pdf", {"ETag": etag})
+
+        self._sumar("no_encontrados")
+        return self._responder(req, 404, b"Not Found", "text/plain")
+
+    @staticmethod
+    def _responder(req: BaseHTTPRequestHandler, status: int, cuerpo: bytes,
+                   tipo: Optional[str], cabeceras: Dict[str, str] = None):
+        try:
+            req.send_response(status)
+            if tipo:
+                req.send_header("Content-Type", tipo)
+            for clave, valor in (cabeceras or {}).items():
+                req.send_header(clave, valor)
+            req.send_header("Content-Length", str(len(cuerpo)))
+            req.end_headers()
+            if cuerpo:
+                req.wfile.write(cuerpo)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
@@ -0,0 +1,73 @@
+# gunicorn.conf.py
+"""
+Perfil de producción. Uso (desde la raíz del proyecto):
+    gunicorn -c gunicorn.conf.py
+
+Variables de entorno:
+    GUNICORN_BIND            dirección (por defecto 0.0.0.0:8000)
+    GUNICORN_WORKERS         procesos (por defecto 2 × CPU + 1, máximo 8)
+    GUNICORN_WORKER_CLASS    gthread (por defecto) | gevent (requiere `pip install gevent`)
+    GUNICORN_THREADS         hilos por worker con gthread (por defecto 8)
+    GUNICORN_PRELOAD         1 = importar la app en el master antes del fork
+    PRECARGAR_MODELOS        1 = con preload, cargar también PLN/ANN en el master
+    GUNICORN_MAX_REQUESTS    solicitudes antes de reciclar un worker (0 = nunca)
+"""
+
+import os
+import multiprocessing
+
+wsgi_app = "app:crear_app('produccion')"
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.getenv("GUNICORN_WORKERS", min(2 * multiprocessing.cpu_count() + 1, 8)))
+
+# Las rutas de búsqueda esperan casi todo el tiempo a Elastic/Mongo (I/O):
+# hilos (gthread) o greenlets (gevent) atienden muchas a la vez por worker
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "8"))
+worker_connections = int(os.getenv("GUNICORN_WORKER_CONNECTIONS", "200"))
+
+# Con gevent el monkey-patching ocurre en el worker: importar la app en el master
+# dejaría locks y sockets sin parchear, así que por defecto no se hace preload
+preload_app = os.getenv("GUNICORN_PRELOAD", "0" if worker_class == "gevent" else "1") == "1"
+
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+graceful_timeout = 30
+keepalive = 5
+
+# Reciclar workers de a poco acota el crecimiento de memoria (modelos, cachés).
+# Un worker con trabajos en segundo plano no se recicla hasta que terminen (pre_request)
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", "2000"))
+max_requests_jitter = 200
+PRORROGA_RECICLAJE = 50  # solicitudes hasta volver a revisar si ya puede reciclarse
+
+accesslog = "-"
+errorlog = "-"
+
+
+def post_worker_init(worker):
+    # Corre en el worker, ya cargada la app y antes de aceptar conexiones.
+    # Mongo y Elastic son ConexionPorProceso: aquí se abren los sockets de este worker
+    import app
+    # Trabajos de un worker anterior que murió (reciclado, timeout) quedan 'interrumpido'
+    estado = app.iniciar_proceso()
+    if estado['huerfanos']:
+        worker.log.info("Worker %s: %s trabajos huérfanos marcados como interrumpidos",
+                        os.getpid(), estado['huerfanos'])
+
+    worker.log.info(
+        "Worker %s calentado=%s %s", os.getpid(), estado["calentado"],
+        {nombre: paso["ok"] for nombre, paso in estado["pasos"].items()}
+    )
+
+
+def pre_request(worker, req):
+    # Los trabajos en segundo plano son hilos de este worker: reciclarlo los mataría.
+    # Si toca reciclar y hay trabajos, se pospone PRORROGA_RECICLAJE solicitudes más
+    if worker.nr + 1 < worker.max_requests:
+        return
+    import app
+    if app.trabajos.en_curso():
+        worker.max_requests = worker.nr + 1 + PRORROGA_RECICLAJE
+        worker.log.info("Worker %s: reciclaje pospuesto, %s trabajos en curso",
+                        os.getpid(), app.trabajos.en_curso())
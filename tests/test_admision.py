@@ -0,0 +1,106 @@
+# tests/test_admision.py
+#
+# ControlAdmision: límites por clase y por usuario, token bucket por usuario,
+# reserva de capacidad para las clases interactivas y Retry-After.
+
+import pytest
+
+from Helpers.admision import AdmisionRechazada, ControlAdmision
+
+
+def test_limite_por_clase_y_liberacion():
+    control = ControlAdmision(capacidad=10, reserva_interactiva=0)
+    control.configurar("carga", limite=2, reintentar=7)
+
+    primero = control.admitir("carga", "ana")
+    control.admitir("carga", "luis")
+    with pytest.raises(AdmisionRechazada) as rechazo:
+        control.admitir("carga", "eva")
+    assert rechazo.value.reintentar == 7
+
+    # liberar() es idempotente
+    primero.liberar()
+    primero.liberar()
+    assert control.estadisticas()["clases"]["carga"]["en_vuelo"] == 1
+    control.admitir("carga", "eva")
+
+    assert control.estadisticas()["clases"]["carga"]["rechazos"] == {"limite_clase": 1}
+
+
+def test_limite_por_usuario():
+    control = ControlAdmision(capacidad=10, reserva_interactiva=0)
+    control.configurar("scraping", por_usuario=1)
+
+    with control.permiso("scraping", "ana"):
+        with pytest.raises(AdmisionRechazada):
+            control.admitir("scraping", "ana")
+        control.admitir("scraping", "luis")
+
+    with control.permiso("scraping", "ana"):
+        pass
+
+
+def test_tasa_por_usuario_con_rafaga():
+    control = ControlAdmision()
+    control.configurar("query", tasa_por_minuto=60, rafaga=3, interactiva=True)
+
+    for _ in range(3):
+        with control.permiso("query", "ana"):
+            pass
+    with pytest.raises(AdmisionRechazada) as rechazo:
+        control.admitir("query", "ana")
+
+    # Un token cada segundo
+    assert rechazo.value.reintentar == 1
+    # Cada usuario tiene su propia cubeta
+    with control.permiso("query", "luis"):
+        pass
+    assert control.estadisticas()["clases"]["query"]["rechazos"] == {"tasa_usuario": 1}
+
+
+def test_reserva_para_interactivas():
+    control = ControlAdmision(capacidad=4, reserva_interactiva=2)
+    control.configurar("busqueda", interactiva=True)
+    control.configurar("carga")
+
+    control.admitir("carga")
+    control.admitir("carga")
+    with pytest.raises(AdmisionRechazada):
+        control.admitir("carga")
+
+    # La búsqueda nunca se rechaza, aunque ocupe más allá de la capacidad
+    permisos = [control.admitir("busqueda") for _ in range(5)]
+    assert control.estadisticas()["en_uso"] == 7
+
+    for permiso in permisos:
+        permiso.liberar()
+    assert control.estadisticas()["clases"]["carga"]["rechazos"] == {"capacidad": 1}
+
+
+def test_las_interactivas_en_curso_frenan_a_las_costosas():
+    control = ControlAdmision(capacidad=4, reserva_interactiva=2)
+    control.configurar("busqueda", interactiva=True)
+    control.configurar("carga")
+
+    control.admitir("busqueda")
+    control.admitir("busqueda")
+    with pytest.raises(AdmisionRechazada):
+        control.admitir("carga")
+
+
+def test_poda_de_cubetas_llenas(monkeypatch):
+    import Helpers.admision as admision
+    control = ControlAdmision()
+    control.configurar("query", tasa_por_minuto=6, rafaga=2, interactiva=True)
+
+    for usuario in ("ana", "luis", "eva"):
+        control.admitir("query", usuario).liberar()
+    assert len(control.clases["query"].cubetas) == 3
+
+    # Pasado el intervalo de poda las cubetas ya rellenas se borran
+    monkeypatch.setattr(admision, "PODA_CUBETAS", 0.0)
+    control.clases["query"].cubetas["ana"][1] -= 100
+    control.clases["query"].cubetas["luis"][1] -= 100
+    control.admitir("query", "eva").liberar()
+
+    assert set(control.clases["query"].cubetas) == {"eva"}
@@ -0,0 +1,58 @@
+# tests/test_arranque.py
+#
+# Los dos arranques (worker de gunicorn y `python app.py`) pasan por
+# iniciar_proceso(): después de ambos la verificación de modelos de /readyz da ok.
+# Cada caso corre en su propio proceso, como en producción; Mongo y Elastic
+# apuntan a un puerto cerrado (solo importa que el arranque no se quede esperando).
+
+import os
+import subprocess
+import sys
+
+import pytest
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+GUNICORN = """
+import logging, runpy
+import app
+conf = runpy.run_path('gunicorn.conf.py')
+worker = type('Worker', (), {'log': logging.getLogger('worker')})()
+conf['post_worker_init'](worker)
+print('despues', app.verificar_modelos()['ok'])
+"""
+
+PYTHON_APP = """
+import runpy, flask
+flask.Flask.run = lambda self, *a, **k: None
+g = runpy.run_path('app.py', run_name='__main__')
+print('despues', g['verificar_modelos']()['ok'])
+"""
+
+
+def _correr(codigo, tmp_path, **entorno):
+    env = {
+        **os.environ,
+        'MONGO_URI': 'mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=300',
+        'MONGO_DB': 'pruebas',
+        'ELASTIC_CLOUD_URL': 'http://127.0.0.1:1',
+        'TRABAJOS_DIR': str(tmp_path / 'trabajos'),
+        'INDICES_DIR': str(tmp_path / 'indices'),
+        'ESPACIOS_DIR': str(tmp_path / 'espacios'),
+        'METRICAS_DIR': str(tmp_path / 'metricas'),
+        **entorno
+    }
+    resultado = subprocess.run([sys.executable, '-c', codigo], cwd=RAIZ, env=env,
+                               capture_output=True, text=True, timeout=120)
+    assert resultado.returncode == 0, resultado.stderr
+    return resultado.stdout
+
+
+@pytest.mark.parametrize('codigo, entorno', [
+    (GUNICORN, {}),
+    # Con debug, el proceso que atiende es el hijo del recargador de Flask
+    (PYTHON_APP, {'WERKZEUG_RUN_MAIN': 'true'}),
+], ids=['gunicorn', 'python-app'])
+def test_arranque_deja_los_modelos_listos(codigo, entorno, tmp_path):
+    salida = _correr(codigo, tmp_path, **entorno)
+    assert 'despues True' in salida
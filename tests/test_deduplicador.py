@@ -0,0 +1,116 @@
+# tests/test_deduplicador.py
+#
+# DetectorDuplicados (MinHash/LSH): detección de casi duplicados, registro en
+# dos fases (solo lo indexado deja firmas) y persistencia compartida entre workers.
+
+import os
+
+import numpy as np
+
+from Helpers.deduplicador import DetectorDuplicados
+
+BASE = ("la resolución establece los requisitos para la asignación del subsidio familiar "
+        "de vivienda en las zonas urbanas del país y define el procedimiento de postulación")
+
+
+def _doc(doc_id, texto):
+    return {"_id": doc_id, "texto": texto}
+
+
+def test_casi_duplicado_en_el_mismo_lote():
+    detector = DetectorDuplicados()
+    corrida = detector.nueva_corrida()
+
+    docs = detector.filtrar_documentos(
+        [_doc("a", BASE), _doc("b", BASE + " vigente"), _doc("c", "otro texto sin relación alguna con nada")],
+        "_id", "texto", corrida=corrida
+    )
+
+    assert [d["es_duplicado"] for d in docs] == [False, True, False]
+    assert docs[1]["duplicado_de"] == "a"
+    assert corrida.stats["duplicados"] == 1
+
+
+def test_colapsar_deja_la_copia_en_el_canonico():
+    detector = DetectorDuplicados()
+    docs = detector.filtrar_documentos(
+        [_doc("a", BASE), _doc("b", BASE)], "_id", "texto", colapsar=True,
+        corrida=detector.nueva_corrida()
+    )
+
+    assert [d["_id"] for d in docs] == ["a"]
+    assert docs[0]["copias"] == ["b"]
+
+
+def test_nada_se_registra_hasta_confirmar():
+    detector = DetectorDuplicados()
+    corrida = detector.nueva_corrida()
+    detector.filtrar_documentos([_doc("a", BASE)], "_id", "texto", corrida=corrida)
+
+    assert detector.estadisticas()["canonicos_totales"] == 0
+    # Lote que no llegó a Elastic: la siguiente corrida no lo ve como duplicado
+    corrida.descartar()
+    otra = detector.nueva_corrida()
+    assert not detector.filtrar_documentos([_doc("b", BASE)], "_id", "texto", corrida=otra)[0]["es_duplicado"]
+
+    detector.confirmar(otra)
+    assert detector.estadisticas()["canonicos_totales"] == 1
+
+
+def test_confirmar_excluye_los_rechazados_por_elastic():
+    detector = DetectorDuplicados()
+    corrida = detector.nueva_corrida()
+    detector.filtrar_documentos(
+        [_doc("a", BASE), _doc("b", BASE + " vigente"), _doc("c", "otro texto sin relación alguna con nada")],
+        "_id", "texto", corrida=corrida
+    )
+
+    # "a" fue rechazado: tampoco se registra su duplicado "b"
+    assert detector.confirmar(corrida, excluir=["a"]) == 1
+    assert set(detector.canonico_de) == {"c"}
+
+
+def test_estadisticas_por_corrida():
+    detector = DetectorDuplicados()
+    primera, segunda = detector.nueva_corrida(), detector.nueva_corrida()
+
+    detector.filtrar_documentos([_doc("a", BASE)], "_id", "texto", corrida=primera)
+    detector.filtrar_documentos([_doc("b", BASE), _doc("c", BASE)], "_id", "texto", corrida=segunda)
+
+    assert detector.estadisticas(primera)["documentos"] == 1
+    assert detector.estadisticas(segunda)["documentos"] == 2
+
+
+def test_id_estable_entre_corridas():
+    detector = DetectorDuplicados()
+    detector.agregar("a", BASE)
+
+    # El mismo documento vuelve (otra ruta temporal, mismo _id): no es duplicado de sí mismo
+    doc = {"_id": "a", "ruta": "/tmp/otro/espacio/a.pdf", "texto": BASE}
+    assert not detector.filtrar_documentos([doc], "ruta", "texto")[0]["es_duplicado"]
+
+
+def test_guardar_fusiona_lo_de_otros_workers(tmp_path):
+    ruta = str(tmp_path / "minhash_pruebas.npz")
+    uno, otro = DetectorDuplicados(), DetectorDuplicados()
+
+    uno.agregar("a", BASE)
+    otro.agregar("c", "otro texto sin relación alguna con nada de lo anterior")
+    assert uno.guardar(ruta)
+    assert otro.guardar(ruta)
+
+    cargado = DetectorDuplicados()
+    assert cargado.cargar(ruta)
+    assert set(cargado.firmas) == {"a", "c"}
+    assert cargado.agregar("b", BASE) == "a"
+    # Sin temporales sueltos junto al archivo
+    assert sorted(os.listdir(tmp_path)) == ["minhash_pruebas.npz", "minhash_pruebas.npz.lock"]
+
+
+def test_firma_similitud():
+    detector = DetectorDuplicados()
+    a, b = detector.firma(BASE), detector.firma(BASE + " vigente")
+
+    assert a.dtype == np.uint64 and len(a) == detector.num_permutaciones
+    assert detector.similitud(a, a) == 1.0
+    assert detector.similitud(a, b) >= detector.umbral
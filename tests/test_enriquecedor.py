@@ -0,0 +1,88 @@
+# tests/test_enriquecedor.py
+#
+# Varios workers crean su EnriquecedorNLP para el mismo índice: solo el que
+# toma el bloqueo procesa, y ningún documento pasa dos veces por el PLN.
+
+import time
+
+from Helpers.enriquecedor import EnriquecedorNLP
+
+
+class ElasticPendientes:
+    """Solo lo que usa el enriquecedor: buscar, actualizar_bulk y contar."""
+
+    def __init__(self, n):
+        self.pendientes = {f"doc-{i}": {"texto": f"documento {i}"} for i in range(n)}
+
+    def buscar(self, index, query, size=10):
+        hits = [{"_id": i, "_source": s} for i, s in list(self.pendientes.items())[:size]]
+        return {"success": True, "resultados": hits}
+
+    def actualizar_bulk(self, index, actualizaciones, refresh=None):
+        for doc_id, _ in actualizaciones:
+            self.pendientes.pop(doc_id, None)
+        return {"success": True, "actualizados": len(actualizaciones), "fallidos": 0, "errores": []}
+
+    def contar(self, index, query):
+        return len(self.pendientes)
+
+
+class PLNContador:
+    def __init__(self):
+        self.analizados = []
+
+    def analizar(self, texto, **kwargs):
+        self.analizados.append(texto)
+        return {"resumen": texto, "temas": []}
+
+    def extraer_entidades(self, texto):
+        return {}
+
+
+def _esperar(condicion, segundos=5.0):
+    limite = time.time() + segundos
+    while not condicion() and time.time() < limite:
+        time.sleep(0.02)
+    return condicion()
+
+
+def test_un_solo_enriquecedor_por_indice(tmp_path):
+    elastic = ElasticPendientes(40)
+    pln = PLNContador()
+    bloqueo = str(tmp_path / "enriquecedor_pruebas.lock")
+
+    enriquecedores = [
+        EnriquecedorNLP(elastic, "pruebas", lambda: pln, tamano_lote=4,
+                        espera_inactivo=0.1, ruta_bloqueo=bloqueo)
+        for _ in range(3)
+    ]
+    for e in enriquecedores:
+        e.iniciar()
+
+    try:
+        assert _esperar(lambda: not elastic.pendientes)
+        assert sum(e.lider for e in enriquecedores) == 1
+        assert sorted(pln.analizados) == sorted(f"documento {i}" for i in range(40))
+    finally:
+        for e in enriquecedores:
+            e.detener()
+
+
+def test_otro_worker_toma_el_relevo(tmp_path):
+    elastic = ElasticPendientes(0)
+    pln = PLNContador()
+    bloqueo = str(tmp_path / "enriquecedor_pruebas.lock")
+
+    primero = EnriquecedorNLP(elastic, "pruebas", lambda: pln, espera_inactivo=0.1, ruta_bloqueo=bloqueo)
+    segundo = EnriquecedorNLP(elastic, "pruebas", lambda: pln, espera_inactivo=0.1, ruta_bloqueo=bloqueo)
+    primero.iniciar()
+    assert _esperar(lambda: primero.lider)
+    segundo.iniciar()
+
+    try:
+        primero.detener()
+        assert _esperar(lambda: segundo.lider)
+        assert not primero.lider
+    finally:
+        primero.detener()
+        segundo.detener()
@@ -0,0 +1,43 @@
+# tests/test_estadisticasCorpus.py
+#
+# Tabla DF compartida por los workers: cada guardar() suma su delta al archivo.
+
+import os
+
+import numpy as np
+
+from Helpers.estadisticasCorpus import EstadisticasCorpus
+
+
+def test_idf_baja_con_la_frecuencia():
+    corpus = EstadisticasCorpus(num_buckets=1024)
+    corpus.agregar_documento(["vivienda", "subsidio"])
+    corpus.agregar_documento(["vivienda", "vivienda", "norma"])
+
+    vivienda, norma, ausente = corpus.indices(["vivienda", "norma", "ausente"])
+    idf = corpus.idf(np.array([vivienda, norma, ausente]))
+
+    assert corpus.df[vivienda] == 2
+    assert idf[0] < idf[1] < idf[2]
+
+
+def test_guardar_suma_los_deltas_de_cada_worker(tmp_path):
+    ruta = str(tmp_path / "corpus.npz")
+    uno = EstadisticasCorpus.cargar(ruta)
+    otro = EstadisticasCorpus.cargar(ruta)
+
+    uno.agregar_documento(["vivienda"])
+    otro.agregar_documento(["vivienda", "norma"])
+    otro.agregar_documento(["norma"])
+    assert uno.guardar(ruta)
+    assert otro.guardar(ruta)
+    # Guardar dos veces no vuelve a sumar lo mismo
+    assert uno.guardar(ruta)
+
+    disco = EstadisticasCorpus.cargar(ruta)
+    vivienda, norma = disco.indices(["vivienda", "norma"])
+    assert disco.num_documentos == 3
+    assert disco.df[vivienda] == 2 and disco.df[norma] == 2
+    # El último en guardar adopta la tabla completa
+    assert otro.num_documentos == 3
+    assert sorted(os.listdir(tmp_path)) == ["corpus.npz", "corpus.npz.lock"]
@@ -0,0 +1,90 @@
+# tests/test_estadoCrawl.py
+#
+# EstadoCrawl: lo descargado queda pendiente hasta confirmar que se indexó,
+# los GET condicionales usan solo validadores confirmados y guardar() fusiona
+# los cambios de instancias (trabajos) que escriben el mismo archivo.
+
+from Helpers.estadoCrawl import EstadoCrawl
+
+URL = "https://sitio.prueba/doc.pdf"
+
+
+def _link(url=URL):
+    return {"url": url, "seccion": "normas", "type": "pdf"}
+
+
+def test_registrar_link_nuevo_y_repetido(tmp_path):
+    estado = EstadoCrawl(str(tmp_path / "estado.json"))
+
+    assert estado.registrar_link(_link())
+    assert not estado.registrar_link(_link())
+    assert not estado.conocida(URL)
+
+
+def test_descarga_pendiente_hasta_confirmar(tmp_path):
+    estado = EstadoCrawl(str(tmp_path / "estado.json"))
+    estado.registrar_link(_link())
+
+    assert estado.registrar_descarga(URL, '"v1"', "Mon, 01 Jan 2024 00:00:00 GMT", "h1", "/tmp/doc.pdf")
+    assert not estado.conocida(URL)
+    assert estado.cabeceras_condicionales(URL) == {}
+    assert estado.estadisticas()["pendientes"] == 1
+
+    assert estado.confirmar(URL)
+    assert estado.conocida(URL)
+    assert estado.cabeceras_condicionales(URL) == {
+        "If-None-Match": '"v1"',
+        "If-Modified-Since": "Mon, 01 Jan 2024 00:00:00 GMT"
+    }
+    assert estado.estadisticas() == {"urls_conocidas": 1, "descargadas": 1, "pendientes": 0}
+
+
+def test_mismo_contenido_no_es_cambio(tmp_path):
+    estado = EstadoCrawl(str(tmp_path / "estado.json"))
+    estado.registrar_descarga(URL, '"v1"', None, "h1", "/tmp/doc.pdf")
+    estado.confirmar(URL)
+
+    # Mismo hash con ETag nuevo: no hay que reindexar y el validador se actualiza
+    assert not estado.registrar_descarga(URL, '"v2"', None, "h1", "/tmp/doc.pdf")
+    assert estado.cabeceras_condicionales(URL) == {"If-None-Match": '"v2"'}
+
+
+def test_confirmar_con_hash_de_otra_version(tmp_path):
+    estado = EstadoCrawl(str(tmp_path / "estado.json"))
+    estado.registrar_descarga(URL, None, None, "h2", "/tmp/doc.pdf")
+
+    assert not estado.confirmar(URL, hash_contenido="h1")
+    assert estado.confirmar(URL, hash_contenido="h2")
+    assert not estado.confirmar(URL)
+    assert estado.confirmar_varias([URL, "https://sitio.prueba/otro.pdf"]) == 0
+
+
+def test_lo_no_confirmado_no_se_persiste_como_indexado(tmp_path):
+    ruta = str(tmp_path / "estado.json")
+    estado = EstadoCrawl(ruta)
+    estado.registrar_descarga(URL, '"v1"', None, "h1", "/tmp/doc.pdf")
+    assert estado.guardar()
+
+    recargado = EstadoCrawl(ruta)
+    assert not recargado.conocida(URL)
+    assert recargado.cabeceras_condicionales(URL) == {}
+    assert recargado.confirmar(URL)
+
+
+def test_guardar_fusiona_instancias(tmp_path):
+    ruta = str(tmp_path / "estado.json")
+    otra_url = "https://sitio.prueba/otro.pdf"
+    uno, otro = EstadoCrawl(ruta), EstadoCrawl(ruta)
+
+    uno.registrar_descarga(URL, None, None, "h1", "/tmp/doc.pdf")
+    uno.confirmar(URL)
+    otro.registrar_descarga(otra_url, None, None, "h2", "/tmp/otro.pdf")
+    otro.confirmar(otra_url)
+
+    assert uno.guardar()
+    assert otro.guardar()
+
+    final = EstadoCrawl(ruta)
+    assert final.conocida(URL) and final.conocida(otra_url)
+    # La instancia que guardó último adopta también lo del resto
+    assert otro.conocida(URL)
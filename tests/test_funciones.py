@@ -0,0 +1,163 @@
+# tests/test_funciones.py
+#
+# Utilidades de archivos de Funciones: escritura atómica de JSON, corpus JSON
+# Lines y lectores en streaming (JSON por bloques, ZIP, DOCX y XLSX).
+
+import io
+import json
+import os
+import threading
+import zipfile
+
+import pytest
+
+from Helpers.funciones import Funciones
+
+
+def test_guardar_json_concurrente_en_el_mismo_proceso(tmp_path):
+    ruta = str(tmp_path / "estado.json")
+    errores = []
+
+    def escribir(n):
+        for i in range(50):
+            if not Funciones.guardar_json(ruta, {"hilo": n, "i": i, "relleno": "x" * 10_000}):
+                errores.append((n, i))
+
+    hilos = [threading.Thread(target=escribir, args=(n,)) for n in range(8)]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    assert errores == []
+    assert Funciones.leer_json(ruta)["relleno"] == "x" * 10_000
+    assert os.listdir(tmp_path) == ["estado.json"]
+
+
+def test_escribir_y_leer_jsonl(tmp_path):
+    ruta = str(tmp_path / "corpus.jsonl.gz")
+    documentos = [{"_id": str(i), "texto": f"documento {i}"} for i in range(1000)]
+
+    assert Funciones.escribir_jsonl(ruta, iter(documentos)) == 1000
+    assert list(Funciones.leer_jsonl(ruta)) == documentos
+    assert os.listdir(tmp_path) == ["corpus.jsonl.gz"]
+
+
+def test_sin_dependencias_opcionales(tmp_path, monkeypatch):
+    # orjson y zstandard son opcionales: el respaldo es la librería estándar
+    import Helpers.funciones as funciones
+    monkeypatch.setattr(funciones, "orjson", None)
+    monkeypatch.setattr(funciones, "zstandard", None)
+
+    datos = {"texto": "resolución ñandú", "n": 3, "lista": [1.5, None, True]}
+    assert Funciones.json_loads(Funciones.json_dumps(datos)) == datos
+    assert Funciones.guardar_json(str(tmp_path / "a.json"), datos)
+    assert Funciones.leer_json(str(tmp_path / "a.json")) == datos
+
+    ruta = str(tmp_path / "corpus.jsonl")
+    assert Funciones.escribir_jsonl(ruta, iter([datos])) == 1
+    assert list(Funciones.leer_jsonl(ruta)) == [datos]
+
+    with pytest.raises(RuntimeError, match="zstandard"):
+        Funciones.escribir_jsonl(str(tmp_path / "corpus.jsonl.zst"), iter([datos]))
+
+
+# ============================================================
+# LECTORES EN STREAMING
+# ============================================================
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+X = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+R = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+P = "http://schemas.openxmlformats.org/package/2006/relationships"
+
+
+@pytest.mark.parametrize("contenido", [
+    '[{"a": 1}, {"a": 2} ,\n {"a": 3}]',
+    '{"a": 1}\n{"a": 2}\n\n{"a": 3}\n',
+    '\ufeff{"a": 1}{"a": 2} {"a": 3}',
+], ids=["arreglo", "jsonl", "concatenados"])
+def test_iterar_json_por_bloques(contenido):
+    # Bloques de 3 bytes: los objetos y los caracteres UTF-8 quedan cortados
+    archivo = io.BytesIO(contenido.encode("utf-8"))
+    assert list(Funciones.iterar_json(archivo, tamano_bloque=3)) == [{"a": 1}, {"a": 2}, {"a": 3}]
+
+
+def test_iterar_json_objeto_unico_y_vacio():
+    texto = {"texto": "resolución " * 1000}
+    assert list(Funciones.iterar_json(io.BytesIO(json.dumps(texto).encode()), tamano_bloque=16)) == [texto]
+    assert list(Funciones.iterar_json(io.BytesIO(b"  \n"))) == []
+
+
+def test_iterar_json_invalido():
+    with pytest.raises(json.JSONDecodeError):
+        list(Funciones.iterar_json(io.BytesIO(b'[{"a": 1}, {"a": '), tamano_bloque=4))
+
+
+def test_iterar_documentos_zip(tmp_path):
+    ruta = str(tmp_path / "corpus.zip")
+    with zipfile.ZipFile(ruta, "w") as z:
+        z.writestr("lote/a.json", json.dumps([{"id": 1}, {"id": 2}]))
+        z.writestr("lote/b.jsonl", '{"id": 3}\n{"id": 4}\n')
+        z.writestr("lote/malo.json", '[{"id": 5}, {')
+        z.writestr("lote/leeme.txt", "no es json")
+        z.writestr("__MACOSX/lote/._a.json", "basura")
+
+    errores = []
+    documentos = list(Funciones.iterar_documentos_zip(ruta, errores))
+
+    assert [(m, d["id"]) for m, d in documentos] == [
+        ("lote/a.json", 1), ("lote/a.json", 2), ("lote/b.jsonl", 3), ("lote/b.jsonl", 4), ("lote/malo.json", 5)
+    ]
+    assert [e["miembro"] for e in errores] == ["lote/malo.json"]
+
+
+def test_extraer_texto_docx(tmp_path):
+    ruta = str(tmp_path / "doc.docx")
+    cuerpo = (
+        f'<w:document xmlns:w="{W}"><w:body>'
+        '<w:p><w:r><w:t>Artículo 1.</w:t></w:r><w:r><w:tab/><w:t>Objeto</w:t></w:r></w:p>'
+        '<w:p></w:p>'
+        '<w:p><w:r><w:t>Línea uno</w:t><w:br/><w:t>línea dos</w:t></w:r></w:p>'
+        '</w:body></w:document>'
+    )
+    with zipfile.ZipFile(ruta, "w") as z:
+        z.writestr("word/document.xml", cuerpo)
+
+    assert Funciones.extraer_texto_docx(ruta) == "Artículo 1.\tObjeto\nLínea uno\nlínea dos"
+    assert Funciones.extraer_texto_docx(str(tmp_path / "no.docx")) == ""
+
+
+def _xlsx(ruta):
+    with zipfile.ZipFile(ruta, "w") as z:
+        z.writestr("xl/workbook.xml",
+                   f'<workbook xmlns="{X}" xmlns:r="{R}"><sheets>'
+                   '<sheet name="Normas" r:id="rId2"/><sheet name="Anexo" r:id="rId1"/>'
+                   '</sheets></workbook>')
+        z.writestr("xl/_rels/workbook.xml.rels",
+                   f'<Relationships xmlns="{P}">'
+                   '<Relationship Id="rId1" Target="worksheets/sheet2.xml"/>'
+                   '<Relationship Id="rId2" Target="/xl/worksheets/sheet1.xml"/>'
+                   '</Relationships>')
+        z.writestr("xl/sharedStrings.xml",
+                   f'<sst xmlns="{X}"><si><t>Decreto</t></si><si><r><t>Ley </t></r><r><t>100</t></r></si></sst>')
+        z.writestr("xl/worksheets/sheet1.xml",
+                   f'<worksheet xmlns="{X}"><sheetData>'
+                   '<row><c t="s"><v>0</v></c><c><v>1993</v></c></row>'
+                   '<row><c t="s"><v>1</v></c><c t="inlineStr"><is><t>vigente</t></is></c></row>'
+                   '<row><c><v> </v></c></row>'
+                   '</sheetData></worksheet>')
+        z.writestr("xl/worksheets/sheet2.xml",
+                   f'<worksheet xmlns="{X}"><sheetData><row><c t="inlineStr"><is><t>nota</t></is></c></row></sheetData></worksheet>')
+
+
+def test_iterar_filas_xlsx(tmp_path):
+    ruta = str(tmp_path / "libro.xlsx")
+    _xlsx(ruta)
+
+    assert list(Funciones.iterar_filas_xlsx(ruta)) == [
+        ("Normas", ["Decreto", "1993"]),
+        ("Normas", ["Ley 100", "vigente"]),
+        ("Anexo", ["nota"]),
+    ]
+    assert Funciones.extraer_texto_xlsx(ruta) == "Normas\nDecreto | 1993\nLey 100 | vigente\n\nAnexo\nnota"
+    assert Funciones.extraer_texto_xlsx(ruta, max_caracteres=5) == "Normas\nDecreto | 1993"
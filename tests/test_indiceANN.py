@@ -0,0 +1,91 @@
+# tests/test_indiceANN.py
+#
+# IndiceANN: búsqueda exacta y por celdas, inserción incremental y
+# persistencia en .npz (lo guardado se recupera igual al cargar).
+
+import os
+
+import numpy as np
+
+from Helpers.indiceANN import IndiceANN
+
+
+def _vectores(n, dimension=16, semilla=0):
+    return np.random.default_rng(semilla).normal(size=(n, dimension)).astype(np.float32)
+
+
+def test_busqueda_exacta_por_debajo_del_minimo():
+    vectores = _vectores(50)
+    indice = IndiceANN()
+    indice.construir([f"d{i}" for i in range(50)], vectores)
+
+    assert indice.estadisticas()["exacto"]
+    resultado = indice.buscar(vectores[7] * 3, k=3)
+    assert resultado[0][0] == "d7"
+    assert abs(resultado[0][1] - 1.0) < 1e-5
+    assert [s for _, s in resultado] == sorted((s for _, s in resultado), reverse=True)
+
+
+def test_similares_a_excluye_el_propio_documento():
+    vectores = _vectores(20)
+    vectores[3] = vectores[11] + 0.01
+    indice = IndiceANN()
+    indice.construir([f"d{i}" for i in range(20)], vectores)
+
+    vecinos = indice.similares_a("d11", k=5)
+    assert "d11" not in [i for i, _ in vecinos]
+    assert vecinos[0][0] == "d3"
+    assert indice.similares_a("no-esta") == []
+
+
+def test_agregar_reemplaza_e_inserta_sin_reconstruir():
+    indice = IndiceANN()
+    indice.construir(["a", "b"], _vectores(2))
+
+    nuevo = _vectores(1, semilla=5)
+    assert indice.agregar(["b", "c"], np.vstack([nuevo, _vectores(1, semilla=6)])) == 2
+
+    assert indice.total == 3 and indice.sin_guardar == 2
+    assert indice.buscar(nuevo[0], k=1)[0][0] == "b"
+
+
+def test_indice_con_celdas_encuentra_al_vecino():
+    n = IndiceANN.MINIMO_ENTRENAMIENTO
+    vectores = _vectores(n, semilla=1)
+    indice = IndiceANN(n_listas=16, n_sondeos=4)
+    indice.construir([f"d{i}" for i in range(n)], vectores)
+
+    assert indice.estadisticas()["listas"] == 16
+    aciertos = sum(indice.buscar(vectores[i], k=1)[0][0] == f"d{i}" for i in range(0, n, 100))
+    assert aciertos == len(range(0, n, 100))
+
+    # Lo agregado después queda asignado a una celda y se encuentra
+    extra = _vectores(1, semilla=99)
+    indice.agregar(["extra"], extra)
+    assert indice.buscar(extra[0], k=1)[0][0] == "extra"
+
+
+def test_guardar_y_cargar(tmp_path):
+    ruta = str(tmp_path / "indices" / "ann.npz")
+    n = IndiceANN.MINIMO_ENTRENAMIENTO
+    vectores = _vectores(n, semilla=2)
+    indice = IndiceANN(n_listas=8)
+    indice.construir([f"d{i}" for i in range(n)], vectores)
+    indice.agregar(["extra"], _vectores(1, semilla=3))
+
+    assert indice.guardar(ruta)
+    assert indice.sin_guardar == 0
+    assert os.listdir(tmp_path / "indices") == ["ann.npz"]
+
+    cargado = IndiceANN.cargar(ruta, n_sondeos=8)
+    assert cargado.total == n + 1 and cargado.contiene("extra")
+    assert cargado.estadisticas()["listas"] == 8
+    assert cargado.similares_a("d10", k=5) == indice.similares_a("d10", k=5)
+
+
+def test_cargar_inexistente_o_vacio(tmp_path):
+    assert IndiceANN.cargar(str(tmp_path / "no.npz")) is None
+
+    ruta = str(tmp_path / "vacio.npz")
+    assert IndiceANN().guardar(ruta)
+    assert IndiceANN.cargar(ruta).total == 0
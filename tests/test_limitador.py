@@ -0,0 +1,48 @@
+# tests/test_limitador.py
+#
+# LimitadorHost: un solo limitador por proceso para todos los scrapers y, ante
+# una ráfaga de 429 de solicitudes que ya estaban en vuelo, un solo recorte.
+
+import time
+
+from Helpers.limitador import LimitadorHost
+from Helpers.webScraping import WebScraping
+
+URL = "http://sitio.prueba/documento.pdf"
+
+
+def test_respuestas_en_vuelo_recortan_una_sola_vez():
+    limitador = LimitadorHost(tasa_inicial=8.0, concurrencia_inicial=8, concurrencia_max=8)
+
+    # Cuatro solicitudes enviadas juntas vuelven todas con 429
+    for _ in range(4):
+        limitador.registrar(URL, 429, 0.5)
+
+    h = limitador.hosts["sitio.prueba"]
+    assert h.limite == 4.0 and h.tasa == 4.0
+    assert h.throttles == 1
+
+    # Una enviada después del recorte sí vuelve a reducir
+    time.sleep(0.02)
+    limitador.registrar(URL, 503, 0.01)
+    assert h.limite == 2.0 and h.throttles == 2
+
+
+def test_retry_after_se_respeta_aunque_no_recorte():
+    limitador = LimitadorHost()
+    limitador.registrar(URL, 429, 0.5)
+    limitador.registrar(URL, 429, 0.5, retry_after="30")
+
+    h = limitador.hosts["sitio.prueba"]
+    assert h.throttles == 1
+    assert h.pausa_hasta - time.monotonic() > 25
+
+
+def test_scrapers_del_mismo_proceso_comparten_limitador():
+    uno = WebScraping()
+    otro = WebScraping()
+
+    assert uno.limitador is otro.limitador is WebScraping.LIMITADOR
+
+    propio = LimitadorHost()
+    assert WebScraping(limitador=propio).limitador is propio
@@ -0,0 +1,176 @@
+# tests/test_pipelineIngesta.py
+#
+# Scraping incremental contra el sitio local de benchmarks (SitioFixture):
+# la primera corrida recorre todas las páginas; la siguiente corta en la
+# primera página de cada sección porque todo ya está indexado. Lo que no
+# llegó a Elastic no se confirma en el estado y se vuelve a descargar.
+
+import os
+
+import pytest
+
+from Helpers.estadoCrawl import EstadoCrawl
+from Helpers.pipelineIngesta import PipelineIngesta
+from Helpers.webScraping import WebScraping
+from benchmarks.sitioFixture import SitioFixture
+
+SECCIONES = 2
+PAGINAS = 4
+FILAS = 3
+
+
+class ElasticEnMemoria:
+    """Solo lo que usa el pipeline: indexar_bulk."""
+
+    def __init__(self):
+        self.documentos = []
+
+    def indexar_bulk(self, index, documentos):
+        self.documentos.extend(documentos)
+        return {"success": True, "indexados": len(documentos), "fallidos": 0}
+
+
+@pytest.fixture
+def sitio():
+    with SitioFixture(secciones=SECCIONES, paginas=PAGINAS, filas_por_pagina=FILAS,
+                      tamano_pdf=2_000) as s:
+        yield s
+
+
+def _pipeline(sitio, estado, carpeta, elastic):
+    scraper = WebScraping(secciones=sitio.secciones(), estado=estado, max_secciones=SECCIONES)
+    return PipelineIngesta(scraper, elastic, "pruebas", carpeta_destino=carpeta,
+                           workers_descarga=4, espera_lote=0.2)
+
+
+def test_pipeline_recorre_todas_las_paginas(sitio, tmp_path):
+    estado = EstadoCrawl(str(tmp_path / "estado.json"))
+    elastic = ElasticEnMemoria()
+
+    resultado = _pipeline(sitio, estado, str(tmp_path / "docs"), elastic).ejecutar()
+
+    total = SECCIONES * PAGINAS * FILAS
+    assert resultado["success"]
+    assert sitio.contadores["listados"] == SECCIONES * PAGINAS
+    assert sitio.contadores["pdfs"] == total
+    assert estado.estadisticas()["descargadas"] == total
+    assert len(elastic.documentos) == total
+    # Secciones distintas publican archivos con el mismo nombre (0.pdf, 1.pdf...)
+    assert len(os.listdir(tmp_path / "docs")) == total
+
+
+def test_pipeline_corta_en_lo_ya_descargado(sitio, tmp_path):
+    ruta_estado = str(tmp_path / "estado.json")
+    _pipeline(sitio, EstadoCrawl(ruta_estado), str(tmp_path / "docs"), ElasticEnMemoria()).ejecutar()
+    sitio.reiniciar_contadores()
+
+    elastic = ElasticEnMemoria()
+    _pipeline(sitio, EstadoCrawl(ruta_estado), str(tmp_path / "docs"), elastic).ejecutar()
+
+    assert sitio.contadores["listados"] == SECCIONES
+    assert sitio.contadores["pdfs"] == 0
+    assert sitio.contadores["no_modificados"] == SECCIONES * FILAS
+    assert elastic.documentos == []
+
+
+def test_links_listados_sin_descargar_no_cortan_la_paginacion(sitio, tmp_path):
+    estado = EstadoCrawl(str(tmp_path / "estado.json"))
+    scraper = WebScraping(secciones=sitio.secciones(), estado=estado, max_secciones=SECCIONES)
+
+    primera = scraper.extraer_todos_los_links(str(tmp_path / "links.json"))
+    segunda = scraper.extraer_todos_los_links(str(tmp_path / "links.json"))
+
+    assert primera["total_links"] == SECCIONES * PAGINAS * FILAS
+    assert segunda["total_links"] == SECCIONES * PAGINAS * FILAS
+
+
+def test_paginacion_no_se_corta_si_el_consumidor_descarga_la_pagina(sitio, tmp_path):
+    # Consumidor rápido: descarga los links de cada página antes de pedir la siguiente
+    estado = EstadoCrawl(str(tmp_path / "estado.json"))
+    scraper = WebScraping(secciones=sitio.secciones(), estado=estado)
+    url_seccion = sitio.secciones()["Seccion_0"]
+
+    paginas = 0
+    for links in scraper.iterar_paginas_seccion(url_seccion):
+        paginas += 1
+        for link in links:
+            estado.registrar_link(link)
+            estado.registrar_descarga(link["url"], None, None, "hash-" + link["url"], "archivo")
+
+    assert paginas == PAGINAS
+
+
+class ElasticCaido(ElasticEnMemoria):
+    def indexar_bulk(self, index, documentos):
+        raise ConnectionError("Elastic no responde")
+
+
+def test_pipeline_termina_aunque_falle_la_indexacion(sitio, tmp_path):
+    estado = EstadoCrawl(str(tmp_path / "estado.json"))
+    pipeline = _pipeline(sitio, estado, str(tmp_path / "docs"), ElasticCaido())
+    pipeline.tamano_cola = 2
+    pipeline.tamano_lote = 2
+
+    resultado = pipeline.ejecutar()
+
+    assert pipeline.etapas["descarga"].procesados == SECCIONES * PAGINAS * FILAS
+    assert any(e["etapa"] == "indexacion" for e in resultado["errores"])
+
+
+def test_lo_no_indexado_se_vuelve_a_descargar(sitio, tmp_path):
+    ruta_estado = str(tmp_path / "estado.json")
+    _pipeline(sitio, EstadoCrawl(ruta_estado), str(tmp_path / "docs"), ElasticCaido()).ejecutar()
+
+    estado = EstadoCrawl(ruta_estado)
+    assert estado.estadisticas()["descargadas"] == 0
+    sitio.reiniciar_contadores()
+
+    elastic = ElasticEnMemoria()
+    _pipeline(sitio, estado, str(tmp_path / "docs"), elastic).ejecutar()
+
+    total = SECCIONES * PAGINAS * FILAS
+    assert sitio.contadores["listados"] == SECCIONES * PAGINAS
+    assert sitio.contadores["pdfs"] == total
+    assert len(elastic.documentos) == total
+    assert EstadoCrawl(ruta_estado).estadisticas()["descargadas"] == total
+
+
+def test_lote_con_fallos_parciales_solo_confirma_lo_indexado(sitio, tmp_path):
+    class ElasticParcial(ElasticEnMemoria):
+        """Rechaza el primer documento de cada lote."""
+
+        def indexar_bulk(self, index, documentos):
+            self.documentos.extend(documentos[1:])
+            return {"success": True, "indexados": len(documentos) - 1, "fallidos": 1,
+                    "ids_fallidos": [documentos[0]["_id"]]}
+
+    ruta_estado = str(tmp_path / "estado.json")
+    pipeline = _pipeline(sitio, EstadoCrawl(ruta_estado), str(tmp_path / "docs"), ElasticParcial())
+    pipeline.ejecutar()
+
+    estado = EstadoCrawl(ruta_estado).estadisticas()
+    assert estado["descargadas"] == pipeline.resultado_indexacion["indexados"]
+    assert estado["pendientes"] == pipeline.resultado_indexacion["fallidos"] > 0
+
+
+def test_el_corte_solo_mira_los_tipos_pedidos(tmp_path, monkeypatch):
+    # Cada página publica un PDF y un DOCX; solo se descargan (e indexan) los PDF
+    paginas = {
+        f"http://sitio/p{i}": (
+            [{"url": f"http://sitio/{i}.pdf", "type": "pdf"}, {"url": f"http://sitio/{i}.docx", "type": "docx"}],
+            f"http://sitio/p{i + 1}" if i < PAGINAS else None
+        )
+        for i in range(1, PAGINAS + 1)
+    }
+    estado = EstadoCrawl(str(tmp_path / "estado.json"))
+    for links, _ in paginas.values():
+        estado.registrar_descarga(links[0]["url"], None, None, "hash", "archivo")
+        estado.confirmar(links[0]["url"])
+
+    scraper = WebScraping(secciones={"Seccion": "http://sitio/p1"}, estado=estado)
+    monkeypatch.setattr(scraper, "_obtener_html", lambda url: url)
+    monkeypatch.setattr(scraper, "_parsear_listado", lambda html, url: paginas[url])
+
+    assert len(list(scraper.iterar_paginas_seccion("http://sitio/p1", tipos=["pdf"]))) == 1
+    # Pidiendo también DOCX (nunca descargados) hay que recorrer todo
+    assert len(list(scraper.iterar_paginas_seccion("http://sitio/p1", tipos=["pdf", "docx"]))) == PAGINAS
@@ -0,0 +1,102 @@
+# tests/test_similares.py
+#
+# /documentos-similares solo consulta (con control de admisión); el índice ANN
+# lo actualiza el enriquecedor líder y los demás workers lo recargan del disco.
+
+import importlib
+import os
+import sys
+
+import numpy as np
+import pytest
+
+from Helpers.indiceANN import IndiceANN
+
+
+@pytest.fixture(scope="module")
+def app_modulo(tmp_path_factory):
+    carpeta = tmp_path_factory.mktemp("app")
+    entorno = {
+        "MONGO_URI": "mongodb://127.0.0.1:1/?serverSelectionTimeoutMS=300",
+        "MONGO_DB": "pruebas",
+        "ELASTIC_CLOUD_URL": "http://127.0.0.1:1",
+        "TRABAJOS_DIR": str(carpeta / "trabajos"),
+        "INDICES_DIR": str(carpeta / "indices"),
+        "ESPACIOS_DIR": str(carpeta / "espacios"),
+    }
+    anteriores = {clave: os.environ.get(clave) for clave in entorno}
+    os.environ.update(entorno)
+    try:
+        sys.modules.pop("app", None)
+        yield importlib.import_module("app")
+    finally:
+        sys.modules.pop("app", None)
+        for clave, valor in anteriores.items():
+            if valor is None:
+                os.environ.pop(clave, None)
+            else:
+                os.environ[clave] = valor
+
+
+class PLNFalso:
+    def generar_embeddings(self, textos):
+        rng = np.random.default_rng(len(textos))
+        return rng.normal(size=(len(textos), 8)).astype(np.float32)
+
+
+def _guardar(ids, ruta, mtime):
+    indice = IndiceANN()
+    indice.agregar(ids, np.random.default_rng(0).normal(size=(len(ids), 8)))
+    assert indice.guardar(ruta)
+    os.utime(ruta, (mtime, mtime))
+
+
+def test_documento_fuera_del_indice_no_se_agrega_en_la_consulta(app_modulo):
+    A = app_modulo
+    cliente = A.app.test_client()
+
+    r = cliente.post("/documentos-similares", json={"id": "no-esta"})
+
+    assert r.status_code == 404
+    assert not os.path.exists(A.ruta_indice_similares(A.ELASTIC_INDEX_DEFAULT))
+    assert not A.obtener_indice_similares(A.ELASTIC_INDEX_DEFAULT).contiene("no-esta")
+
+
+def test_similares_pasa_por_el_control_de_admision(app_modulo):
+    A = app_modulo
+    cliente = A.app.test_client()
+
+    codigos = [cliente.post("/documentos-similares", json={"id": "x"}).status_code for _ in range(15)]
+
+    assert 429 in codigos
+    assert A.admision.estadisticas()["clases"]["similares"]["rechazos"]
+
+
+def test_los_workers_recargan_el_indice_cuando_cambia_en_disco(app_modulo):
+    A = app_modulo
+    index = A.ELASTIC_INDEX_DEFAULT
+    ruta = A.ruta_indice_similares(index)
+
+    _guardar(["a", "b"], ruta, mtime=1_000_000)
+    assert A.obtener_indice_similares(index).contiene("a")
+
+    # Otro worker (el líder) guardó una versión nueva
+    _guardar(["a", "b", "c"], ruta, mtime=2_000_000)
+    assert A.obtener_indice_similares(index).contiene("c")
+
+
+def test_el_enriquecedor_agrega_y_guarda_al_vaciar_el_backlog(app_modulo, monkeypatch):
+    A = app_modulo
+    index = A.ELASTIC_INDEX_DEFAULT
+    monkeypatch.setattr(A, "obtener_pln", lambda: PLNFalso())
+
+    agregar = A.agregar_similares(index)
+    agregar(["nuevo-1", "nuevo-2"], ["texto uno", "texto dos"])
+    indice = A.obtener_indice_similares(index)
+    assert indice.contiene("nuevo-1") and indice.sin_guardar == 2
+
+    agregar([], [])
+    assert indice.sin_guardar == 0
+    assert IndiceANN.cargar(A.ruta_indice_similares(index)).contiene("nuevo-2")
+    # Lo recién guardado por este proceso no se vuelve a cargar
+    assert A.obtener_indice_similares(index) is indice